@@ -6,7 +6,7 @@ from species.analysis.fit_model import FitModel
 
 from species.analysis.fit_spectrum import FitSpectrum
 
-from species.analysis.photometry import SyntheticPhotometry
+from species.analysis.photometry import MultiFilterPhotometry, SyntheticPhotometry
 
 from species.analysis.retrieval import AtmosphericRetrieval
 
@@ -6,21 +6,188 @@ import configparser
 import os
 import warnings
 
+from multiprocessing import Pool, cpu_count
 from typing import List, Optional, Tuple, Union
 
 import h5py
 import numpy as np
+import spectres
 
 from scipy.interpolate import interp1d
-from scipy.optimize import curve_fit
 from typeguard import typechecked
 
+from species.analysis import photometry
 from species.core import constants
 from species.data import database
 from species.read import read_filter, read_model, read_object
 from species.util import dust_util, read_util
 
 
+@typechecked
+def template_fit(
+    spectrum: np.ndarray,
+    obj_spec: List[np.ndarray],
+    obj_res: List[float],
+    av_ext: np.ndarray,
+    rad_vel: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Function for calculating the goodness-of-fit statistic from
+    Cushing et al. (2008) and the flux scaling of a library spectrum
+    for all combinations of the extinction and radial velocity. The
+    library spectrum is smoothed once for each spectral resolution
+    of the object spectra, after which all combinations are
+    evaluated with array operations.
+
+    Parameters
+    ----------
+    spectrum : np.ndarray
+        Library spectrum, with the wavelengths (um) and fluxes in the
+        first and second column.
+    obj_spec : list(np.ndarray)
+        List with the spectra of the object.
+    obj_res : list(float)
+        List with the spectral resolution of each spectrum.
+    av_ext : np.ndarray
+        Array with the A_V extinctions (mag).
+    rad_vel : np.ndarray
+        Array with the radial velocities (km s-1).
+
+    Returns
+    -------
+    np.ndarray
+        Goodness-of-fit statistic, with shape ``(n_av, n_rv)``.
+    np.ndarray
+        Flux scaling for each object spectrum, with shape
+        ``(n_av, n_rv, n_spectra)``.
+    """
+
+    # Fluxes with the dust extinction for all values of A_V,
+    # with shape (n_av, n_wavel)
+
+    ism_ext = dust_util.ism_extinction(av_ext[:, np.newaxis], 3.1, spectrum[:, 0])
+    flux_ext = spectrum[:, 1] * 10.0 ** (-0.4 * ism_ext)
+
+    # Doppler factor for each radial velocity, with shape (n_rv, 1)
+
+    doppler = 1.0 + 1e3 * rad_vel[:, np.newaxis] / constants.LIGHT
+
+    g_k = np.zeros((av_ext.size, rad_vel.size))
+    c_k = np.zeros((av_ext.size, rad_vel.size, len(obj_spec)))
+
+    flux_smooth = {}
+
+    for j, spec_item in enumerate(obj_spec):
+        # The smoothing does not depend on the radial velocity since
+        # the relative wavelength spacing is not changed by the shift
+
+        if obj_res[j] not in flux_smooth:
+            flux_smooth[obj_res[j]] = read_util.smooth_spectrum(
+                spectrum[:, 0], flux_ext, spec_res=obj_res[j], force_smooth=True
+            )
+
+        interp_spec = interp1d(
+            spectrum[:, 0],
+            flux_smooth[obj_res[j]],
+            kind="linear",
+            axis=-1,
+            fill_value="extrapolate",
+        )
+
+        # Wavelengths of the object spectrum in the rest frame of the
+        # library spectrum, with shape (n_rv, n_wavel), such that the
+        # resampled fluxes have the shape (n_av, n_rv, n_wavel)
+
+        wavel_rest = spec_item[:, 0] / doppler
+        flux_resample = interp_spec(wavel_rest)
+
+        # Only wavelengths within the range of the library spectrum
+
+        wavel_select = (wavel_rest > np.amin(spectrum[:, 0])) & (
+            wavel_rest < np.amax(spectrum[:, 0])
+        )
+
+        c_numer = np.where(
+            wavel_select,
+            spec_item[:, 1] * flux_resample / spec_item[:, 2] ** 2,
+            0.0,
+        )
+
+        c_denom = np.where(wavel_select, flux_resample ** 2 / spec_item[:, 2] ** 2, 0.0)
+
+        c_k[..., j] = np.sum(c_numer, axis=-1) / np.sum(c_denom, axis=-1)
+
+        chi_sq = (
+            spec_item[:, 1] - c_k[..., j, np.newaxis] * flux_resample
+        ) / spec_item[:, 2]
+
+        g_k += np.sum(np.where(wavel_select, chi_sq ** 2, 0.0), axis=-1)
+
+    return g_k, c_k
+
+
+# Object data that are used by the worker processes of spectral_type.
+# These are set once by the initializer of the pool, such that only
+# the library spectra are passed to the workers.
+_SPT_DATA = None
+
+
+@typechecked
+def _init_spt_worker(
+    obj_spec: List[np.ndarray],
+    obj_res: List[float],
+    av_ext: np.ndarray,
+    rad_vel: np.ndarray,
+) -> None:
+    """
+    Internal function for initializing a worker process of
+    :func:`~species.analysis.compare_spectra.CompareSpectra.spectral_type`.
+
+    Parameters
+    ----------
+    obj_spec : list(np.ndarray)
+        List with the spectra of the object.
+    obj_res : list(float)
+        List with the spectral resolution of each spectrum.
+    av_ext : np.ndarray
+        Array with the A_V extinctions (mag).
+    rad_vel : np.ndarray
+        Array with the radial velocities (km s-1).
+
+    Returns
+    -------
+    NoneType
+        None
+    """
+
+    global _SPT_DATA
+
+    _SPT_DATA = (obj_spec, obj_res, av_ext, rad_vel)
+
+
+@typechecked
+def _template_fit_worker(spectrum: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Internal function for evaluating
+    :func:`~species.analysis.compare_spectra.template_fit` in a worker
+    process with the object data that were set by the initializer.
+
+    Parameters
+    ----------
+    spectrum : np.ndarray
+        Library spectrum.
+
+    Returns
+    -------
+    np.ndarray
+        Goodness-of-fit statistic, with shape ``(n_av, n_rv)``.
+    np.ndarray
+        Flux scaling, with shape ``(n_av, n_rv, n_spectra)``.
+    """
+
+    return template_fit(spectrum, *_SPT_DATA)
+
+
 class CompareSpectra:
     """
     Class for comparing a spectrum of an object with a library of empirical or model spectra.
@@ -83,6 +250,7 @@ class CompareSpectra:
         sptypes: Optional[List[str]] = None,
         av_ext: Optional[Union[List[float], np.array]] = None,
         rad_vel: Optional[Union[List[float], np.array]] = None,
+        processes: Optional[int] = None,
     ) -> None:
         """
         Method for finding the best fitting empirical spectra from a selected library by
@@ -107,6 +275,10 @@ class CompareSpectra:
             extinction is calculated with the empirical relation from Cardelli et al. (1989).
         rad_vel : list(float), np.array, None
             List of radial velocities (km s-1) for which the goodness-of-fit statistic is tested.
+        processes : int, None
+            Number of worker processes over which the library spectra are distributed. All
+            available CPUs are used if set to ``None`` and the spectra are processed in the main
+            process if set to 1.
 
         Returns
         -------
@@ -114,14 +286,18 @@ class CompareSpectra:
             None
         """
 
-        w_i = 1.0
-
         if av_ext is None:
             av_ext = [0.0]
 
         if rad_vel is None:
             rad_vel = [0.0]
 
+        av_ext = np.asarray(av_ext, dtype=float)
+        rad_vel = np.asarray(rad_vel, dtype=float)
+
+        if processes is None:
+            processes = cpu_count()
+
         h5_file = h5py.File(self.database, "r")
 
         try:
@@ -142,23 +318,13 @@ class CompareSpectra:
             obj_spec.append(self.object.get_spectrum()[item][0])
             obj_res.append(self.object.get_spectrum()[item][3])
 
-        # Read inverted covariance matrix
-        # obj_inv_cov = self.object.get_spectrum()[self.spec_name][2]
-
-        # Create empty lists for results
-
-        name_list = []
-        spt_list = []
-        gk_list = []
-        ck_list = []
-        av_list = []
-        rv_list = []
-
-        print_message = ""
+        # Read the selected library spectra at once
 
-        # Start looping over library spectra
+        lib_name = []
+        lib_sptype = []
+        lib_spec = []
 
-        for i, item in enumerate(h5_file[f"spectra/{spec_library}"]):
+        for item in h5_file[f"spectra/{spec_library}"]:
             # Read spectrum spectral type from library
             dset = h5_file[f"spectra/{spec_library}/{item}"]
 
@@ -201,99 +367,76 @@ class CompareSpectra:
                         indices,
                     ]
 
+                lib_name.append(item)
+                lib_sptype.append(item_sptype)
+                lib_spec.append(spectrum)
+
+        h5_file.close()
+
+        # Create empty lists for results
+
+        name_list = []
+        spt_list = []
+        gk_list = []
+        ck_list = []
+        av_list = []
+        rv_list = []
+
+        print_message = ""
+
+        # Evaluate all values of A_V and RV for one library
+        # spectrum at a time, either in the main process or
+        # distributed over the worker processes
+
+        if processes == 1:
+            lib_fit = map(
+                lambda spectrum: template_fit(
+                    spectrum, obj_spec, obj_res, av_ext, rad_vel
+                ),
+                lib_spec,
+            )
+
+            pool = None
+
+        else:
+            # The object data are passed once to each worker by
+            # the initializer instead of with every library spectrum
+            pool = Pool(
+                processes=processes,
+                initializer=_init_spt_worker,
+                initargs=(obj_spec, obj_res, av_ext, rad_vel),
+            )
+
+            lib_fit = pool.imap(_template_fit_worker, lib_spec)
+
+        try:
+            for i, (g_k, c_k) in enumerate(lib_fit):
                 empty_message = len(print_message) * " "
                 print(f"\r{empty_message}", end="")
 
-                print_message = f"Processing spectra... {item}"
+                print_message = f"Processing spectra... {lib_name[i]}"
                 print(f"\r{print_message}", end="")
 
-                # Loop over all values of A_V and RV that will be tested
-
-                for av_item in av_ext:
-                    for rv_item in rad_vel:
-                        for j, spec_item in enumerate(obj_spec):
-                            # Dust extinction
-                            ism_ext = dust_util.ism_extinction(
-                                av_item, 3.1, spectrum[:, 0]
-                            )
-                            flux_scaling = 10.0 ** (-0.4 * ism_ext)
-
-                            # Shift wavelengths by RV
-                            wavel_shifted = (
-                                spectrum[:, 0]
-                                + spectrum[:, 0] * 1e3 * rv_item / constants.LIGHT
-                            )
-
-                            # Smooth spectrum
-                            flux_smooth = read_util.smooth_spectrum(
-                                wavel_shifted,
-                                spectrum[:, 1] * flux_scaling,
-                                spec_res=obj_res[j],
-                                force_smooth=True,
-                            )
-
-                            # Interpolate library spectrum to object wavelengths
-                            interp_spec = interp1d(
-                                spectrum[:, 0],
-                                flux_smooth,
-                                kind="linear",
-                                fill_value="extrapolate",
-                            )
-
-                            indices = np.where(
-                                (spec_item[:, 0] > np.amin(spectrum[:, 0]))
-                                & (spec_item[:, 0] < np.amax(spectrum[:, 0]))
-                            )[0]
-
-                            flux_resample = interp_spec(spec_item[indices, 0])
-
-                            c_numer = (
-                                w_i
-                                * spec_item[indices, 1]
-                                * flux_resample
-                                / spec_item[indices, 2] ** 2
-                            )
-
-                            c_denom = (
-                                w_i * flux_resample ** 2 / spec_item[indices, 2] ** 2
-                            )
-
-                            if j == 0:
-                                g_k = 0.0
-                                c_k_spec = []
-
-                            c_k = np.sum(c_numer) / np.sum(c_denom)
-                            c_k_spec.append(c_k)
-
-                            chi_sq = (
-                                spec_item[indices, 1] - c_k * flux_resample
-                            ) / spec_item[indices, 2]
-
-                            g_k += np.sum(w_i * chi_sq ** 2)
-
-                            # obj_inv_cov_crop = obj_inv_cov[indices, :]
-                            # obj_inv_cov_crop = obj_inv_cov_crop[:, indices]
-
-                            # g_k = np.dot(spec_item[indices, 1]-c_k*flux_resample,
-                            #     np.dot(obj_inv_cov_crop,
-                            #            spec_item[indices, 1]-c_k*flux_resample))
-
-                        # Append to the lists of results
-
-                        name_list.append(item)
-                        spt_list.append(item_sptype)
-                        gk_list.append(g_k)
-                        ck_list.append(c_k_spec)
+                # Append to the lists of results
+
+                for j, av_item in enumerate(av_ext):
+                    for k, rv_item in enumerate(rad_vel):
+                        name_list.append(lib_name[i])
+                        spt_list.append(lib_sptype[i])
+                        gk_list.append(g_k[j, k])
+                        ck_list.append(list(c_k[j, k]))
                         av_list.append(av_item)
                         rv_list.append(rv_item)
 
+        finally:
+            if pool is not None:
+                pool.terminate()
+
         empty_message = len(print_message) * " "
         print(f"\r{empty_message}", end="")
 
         print("\rProcessing spectra... [DONE]")
 
-        h5_file.close()
-
         name_list = np.asarray(name_list)
         spt_list = np.asarray(spt_list)
         gk_list = np.asarray(gk_list)
@@ -359,6 +502,44 @@ class CompareSpectra:
             spec_library=spec_library,
         )
 
+    @typechecked
+    def read_model_grid(
+        self, readmodel: read_model.ReadModel, coord_index: List[np.ndarray]
+    ) -> np.ndarray:
+        """
+        Internal method for reading the fluxes of a selection of grid
+        points of a model grid, within the wavelength range of the
+        ``readmodel`` instance. The wavelength points of the
+        ``readmodel`` are also set.
+
+        Parameters
+        ----------
+        readmodel : species.read.read_model.ReadModel
+            Instance of ``ReadModel`` with the wavelength range or
+            filter name for which the fluxes are read.
+        coord_index : list(np.ndarray)
+            List with, for each model parameter, the indices of the
+            selected grid points.
+
+        Returns
+        -------
+        np.ndarray
+            Fluxes (W m-2 um-1) of the selected grid points, with
+            shape ``(n_models, n_wavel)``.
+        """
+
+        h5_file = readmodel.open_database()
+
+        readmodel.wl_points, readmodel.wl_index = readmodel.wavelength_points(h5_file)
+
+        model_flux = readmodel.read_grid_flux(h5_file)
+
+        for i, item in enumerate(coord_index):
+            if item.size < model_flux.shape[i]:
+                model_flux = np.take(model_flux, item, axis=i)
+
+        return model_flux.reshape(-1, model_flux.shape[-1])
+
     @typechecked
     def compare_model(
         self,
@@ -372,10 +553,9 @@ class CompareSpectra:
     ) -> None:
         """
         Method for finding the best fitting spectrum from a grid of atmospheric model spectra by
-        evaluating the goodness-of-fit statistic from Cushing et al. (2008). Currently, this method
-        only supports model grids with only :math:`T_\\mathrm{eff}` and :math:`\\log(g)` as free
-        parameters (e.g. BT-Settl). Please create an issue on Github if support for models with
-        more than two parameters is required.
+        evaluating the goodness-of-fit statistic from Cushing et al. (2008). The statistic is
+        calculated for all grid points of the model spectra and all values of ``av_points`` at
+        once, with the flux scaling that minimizes the statistic for each grid point.
 
         Parameters
         ----------
@@ -408,10 +588,19 @@ class CompareSpectra:
             None
         """
 
+        # Read the data of the object only once
+
+        obj_spec = {}
+        obj_res = {}
+
+        for spec_item in self.spec_name:
+            obj_spec[spec_item] = self.object.get_spectrum()[spec_item][0]
+            obj_res[spec_item] = self.object.get_spectrum()[spec_item][3]
+
         w_i = {}
 
         for spec_item in self.spec_name:
-            obj_wavel = self.object.get_spectrum()[spec_item][0][:, 0]
+            obj_wavel = obj_spec[spec_item][:, 0]
 
             diff = (np.diff(obj_wavel)[1:] + np.diff(obj_wavel)[:-1]) / 2.0
             diff = np.insert(diff, 0, diff[0])
@@ -428,12 +617,12 @@ class CompareSpectra:
         if scale_spec is None:
             scale_spec = []
 
-        phot_wavel = {}
+        obj_phot = {}
 
         for phot_item in inc_phot:
             read_filt = read_filter.ReadFilter(phot_item)
             w_i[phot_item] = read_filt.filter_fwhm()
-            phot_wavel[phot_item] = read_filt.mean_wavelength()
+            obj_phot[phot_item] = self.object.get_photometry(phot_item)
 
         if av_points is None:
             av_points = np.array([0.0])
@@ -446,11 +635,16 @@ class CompareSpectra:
         model_param = readmodel.get_parameters()
         grid_points = readmodel.get_points()
 
+        # Grid points and their indices in the model grid
+
         coord_points = []
+        coord_index = []
+
         for key, value in grid_points.items():
             if key == "logg" and fix_logg is not None:
                 if fix_logg in value:
                     coord_points.append(np.array([fix_logg]))
+                    coord_index.append(np.where(value == fix_logg)[0])
 
                 else:
                     raise ValueError(
@@ -461,6 +655,7 @@ class CompareSpectra:
 
             else:
                 coord_points.append(value)
+                coord_index.append(np.arange(value.size))
 
         if av_points is not None:
             model_param.append("ism_ext")
@@ -471,128 +666,147 @@ class CompareSpectra:
         for item in coord_points:
             grid_shape.append(len(item))
 
-        fit_stat = np.zeros(grid_shape)
-        flux_scaling = np.zeros(grid_shape)
+        print("Processing model spectra...", end="", flush=True)
+
+        # Model spectra of all grid points and extinction values
+        # with shape (n_models, n_av_points, n_wavel), resampled
+        # to the wavelengths of the observed spectra
+
+        model_spec = {}
+
+        for spec_item in self.spec_name:
+            wavel_range = (
+                0.9 * obj_spec[spec_item][0, 0],
+                1.1 * obj_spec[spec_item][-1, 0],
+            )
+
+            readmodel = read_model.ReadModel(model, wavel_range=wavel_range)
+            model_flux = self.read_model_grid(readmodel, coord_index)
+
+            model_spec[spec_item] = np.zeros(
+                (model_flux.shape[0], av_points.size, obj_spec[spec_item].shape[0])
+            )
+
+            for i, av_item in enumerate(av_points):
+                flux_ext = readmodel.apply_ext_ism(
+                    readmodel.wl_points, model_flux, av_item, 3.1
+                )
+
+                if obj_res[spec_item] is not None:
+                    flux_ext = read_util.smooth_spectrum(
+                        readmodel.wl_points, flux_ext, obj_res[spec_item]
+                    )
+
+                model_spec[spec_item][:, i, :] = spectres.spectres(
+                    obj_spec[spec_item][:, 0],
+                    readmodel.wl_points,
+                    flux_ext,
+                    spec_errs=None,
+                    fill=np.nan,
+                    verbose=True,
+                )
+
+        # Synthetic fluxes of all grid points and extinction
+        # values with shape (n_models, n_av_points)
+
+        model_phot = {}
+
+        for phot_item in inc_phot:
+            readmodel = read_model.ReadModel(model, filter_name=phot_item)
+            model_flux = self.read_model_grid(readmodel, coord_index)
+
+            synphot = photometry.SyntheticPhotometry(phot_item)
+            filter_weights = synphot.flux_weights(readmodel.wl_points)
+
+            model_phot[phot_item] = np.full(
+                (model_flux.shape[0], av_points.size), np.nan
+            )
+
+            if filter_weights is not None:
+                for i, av_item in enumerate(av_points):
+                    flux_ext = readmodel.apply_ext_ism(
+                        readmodel.wl_points, model_flux, av_item, 3.1
+                    )
+
+                    model_phot[phot_item][:, i] = np.dot(
+                        flux_ext[:, filter_weights[0]], filter_weights[1]
+                    )
+
+        # The goodness-of-fit statistic is quadratic in the flux
+        # scaling so the scaling that minimizes the statistic is
+        # calculated analytically for all grid points at once
+
+        c_numer = 0.0
+        c_denom = 0.0
+
+        for spec_item in self.spec_name:
+            if spec_item not in scale_spec:
+                spec_weight = w_i[spec_item] / obj_spec[spec_item][:, 2] ** 2
+
+                c_numer += np.sum(
+                    spec_weight * obj_spec[spec_item][:, 1] * model_spec[spec_item],
+                    axis=-1,
+                )
+
+                c_denom += np.sum(spec_weight * model_spec[spec_item] ** 2, axis=-1)
+
+        for phot_item in inc_phot:
+            phot_weight = w_i[phot_item] / obj_phot[phot_item][3] ** 2
+
+            c_numer += phot_weight * obj_phot[phot_item][2] * model_phot[phot_item]
+            c_denom += phot_weight * model_phot[phot_item] ** 2
+
+        if np.ndim(c_denom) == 0:
+            # The scaling does not affect the goodness-of-fit statistic
+            # if all spectra are scaled independently
+            flux_scaling = np.ones(grid_shape)
+
+        else:
+            flux_scaling = np.reshape(c_numer / c_denom, grid_shape)
 
         if len(scale_spec) == 0:
             extra_scaling = None
 
         else:
-            grid_shape.append(len(scale_spec))
-            extra_scaling = np.zeros(grid_shape)
+            extra_scaling = np.zeros(grid_shape + [len(scale_spec)])
 
-        count = 1
+        fit_stat = np.zeros(grid_shape)
 
-        if len(coord_points) == 3:
-            n_iter = len(coord_points[0]) * len(coord_points[1]) * len(coord_points[2])
+        for spec_item in self.spec_name:
+            spec_weight = w_i[spec_item] / obj_spec[spec_item][:, 2] ** 2
 
-            for i, item_i in enumerate(coord_points[0]):
-                for j, item_j in enumerate(coord_points[1]):
-                    for k, item_k in enumerate(coord_points[2]):
-                        print(
-                            f"\rProcessing model spectrum {count}/{n_iter}...", end=""
-                        )
+            model_flux = model_spec[spec_item].reshape(grid_shape + [-1])
+
+            if spec_item in scale_spec:
+                spec_idx = scale_spec.index(spec_item)
+
+                extra_scaling[..., spec_idx] = np.sum(
+                    spec_weight * obj_spec[spec_item][:, 1] * model_flux, axis=-1
+                ) / np.sum(spec_weight * model_flux ** 2, axis=-1)
 
-                        model_spec = {}
-                        model_phot = {}
-
-                        for spec_item in self.spec_name:
-                            obj_spec = self.object.get_spectrum()[spec_item][0]
-                            obj_res = self.object.get_spectrum()[spec_item][3]
-
-                            param_dict = {
-                                model_param[0]: item_i,
-                                model_param[1]: item_j,
-                                model_param[2]: item_k,
-                            }
-
-                            wavel_range = (0.9 * obj_spec[0, 0], 1.1 * obj_spec[-1, 0])
-                            readmodel = read_model.ReadModel(
-                                model, wavel_range=wavel_range
-                            )
-
-                            model_box = readmodel.get_data(
-                                param_dict,
-                                spec_res=obj_res,
-                                wavel_resample=obj_spec[:, 0],
-                            )
-
-                            model_spec[spec_item] = model_box.flux
-
-                        for phot_item in inc_phot:
-                            readmodel = read_model.ReadModel(
-                                model, filter_name=phot_item
-                            )
-
-                            model_phot[phot_item] = readmodel.get_flux(param_dict)[0]
-
-                        def g_fit(x, scaling):
-                            g_stat = 0.0
-
-                            for spec_item in self.spec_name:
-                                obs_spec = self.object.get_spectrum()[spec_item][0]
-
-                                if spec_item in scale_spec:
-                                    spec_idx = scale_spec.index(spec_item)
-
-                                    c_numer = (
-                                        w_i[spec_item]
-                                        * obs_spec[:, 1]
-                                        * model_spec[spec_item]
-                                        / obs_spec[:, 2] ** 2
-                                    )
-
-                                    c_denom = (
-                                        w_i[spec_item]
-                                        * model_spec[spec_item] ** 2
-                                        / obs_spec[:, 2] ** 2
-                                    )
-
-                                    extra_scaling[i, j, k, spec_idx] = np.sum(
-                                        c_numer
-                                    ) / np.sum(c_denom)
-
-                                    g_stat += np.sum(
-                                        w_i[spec_item]
-                                        * (
-                                            obs_spec[:, 1]
-                                            - extra_scaling[i, j, k, spec_idx]
-                                            * model_spec[spec_item]
-                                        )
-                                        ** 2
-                                        / obs_spec[:, 2] ** 2
-                                    )
-
-                                else:
-                                    g_stat += np.sum(
-                                        w_i[spec_item]
-                                        * (
-                                            obs_spec[:, 1]
-                                            - scaling * model_spec[spec_item]
-                                        )
-                                        ** 2
-                                        / obs_spec[:, 2] ** 2
-                                    )
-
-                            for phot_item in inc_phot:
-                                obs_phot = self.object.get_photometry(phot_item)
-
-                                g_stat += (
-                                    w_i[phot_item]
-                                    * (obs_phot[2] - scaling * model_phot[phot_item])
-                                    ** 2
-                                    / obs_phot[3] ** 2
-                                )
-
-                            return g_stat
-
-                        popt, _ = curve_fit(g_fit, xdata=[0.0], ydata=[0.0])
-                        scaling = popt[0]
-
-                        flux_scaling[i, j, k] = scaling
-                        fit_stat[i, j, k] = g_fit(0.0, scaling)
-
-                        count += 1
+                spec_scaling = extra_scaling[..., spec_idx]
+
+            else:
+                spec_scaling = flux_scaling
+
+            fit_stat += np.sum(
+                spec_weight
+                * (
+                    obj_spec[spec_item][:, 1]
+                    - spec_scaling[..., np.newaxis] * model_flux
+                )
+                ** 2,
+                axis=-1,
+            )
+
+        for phot_item in inc_phot:
+            model_flux = model_phot[phot_item].reshape(grid_shape)
+
+            fit_stat += (
+                w_i[phot_item]
+                * (obj_phot[phot_item][2] - flux_scaling * model_flux) ** 2
+                / obj_phot[phot_item][3] ** 2
+            )
 
         print(" [DONE]")
 
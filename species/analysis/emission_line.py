@@ -24,7 +24,7 @@ from astropy import units as u
 from astropy.modeling.fitting import LinearLSQFitter
 from astropy.modeling.polynomial import Polynomial1D
 from astropy.nddata import StdDevUncertainty
-from scipy.interpolate import interp1d, InterpolatedUnivariateSpline
+from scipy.interpolate import interp1d
 from specutils import Spectrum1D
 from specutils.fitting import fit_generic_continuum
 from typeguard import typechecked
@@ -372,12 +372,14 @@ class EmissionLine:
         wavel_int: Tuple[float, float],
         interp_kind: str = "linear",
         plot_filename: str = "int_line.pdf",
+        n_samples: int = 1000,
     ) -> Union[np.float64, np.float64]:
         """
         Method for calculating the integrated line flux and error. The spectrum is first
         interpolated to :math:`R = 100000` and then integrated across the specified wavelength
         range with the composite trapezoidal rule of ``np.trapz``. The error is estimated with
-        a Monte Carlo approach from 1000 samples.
+        a Monte Carlo approach, for which the random samples of the spectrum are interpolated
+        with a single sparse matrix product.
 
         Parameters
         ----------
@@ -387,6 +389,8 @@ class EmissionLine:
             Kind of interpolation kind for ``scipy.interpolate.interp1d`` (default: 'linear').
         plot_filename : str
             Filename for the plot with the interpolated line profile.
+        n_samples : int
+            Number of random samples that are used for estimating the uncertainties.
 
         Returns
         -------
@@ -398,8 +402,6 @@ class EmissionLine:
 
         print(f"Plotting integrated line: {plot_filename}...", end="", flush=True)
 
-        n_samples = 1000
-
         wavel_high_res = read_util.create_wavelengths(wavel_int, 1e5)
 
         # Creating plot
@@ -496,74 +498,109 @@ class EmissionLine:
         flux_sample = np.zeros(n_samples)
         fwhm_sample = np.zeros(n_samples)
         mean_sample = np.zeros(n_samples)
-        vrad_sample = np.zeros(n_samples)
-        lum_sample = np.zeros(n_samples)
 
-        for i in range(n_samples):
-            # Sample fluxes from random errors
-            spec_rand = np.random.normal(self.spectrum[:, 1], self.spectrum[:, 2])
+        # Sparse matrix that interpolates the spectrum to the
+        # high-resolution wavelengths, such that the random samples
+        # are interpolated with a single matrix product
+
+        interp_matrix = read_util.interp_matrix(
+            self.spectrum[:, 0], wavel_high_res, interp_kind
+        )
+
+        # Wavelengths outside the spectrum are set to NaN, as
+        # with bounds_error=False of interp1d
 
-            # Interpolate sampled spectrum
-            spec_interp = interp1d(
-                self.spectrum[:, 0], spec_rand, kind=interp_kind, bounds_error=False
+        out_range = (wavel_high_res < self.spectrum[0, 0]) | (
+            wavel_high_res > self.spectrum[-1, 0]
+        )
+
+        # The samples are processed in chunks to limit the memory
+        # usage of the arrays with the high-resolution spectra
+
+        chunk_size = 1000
+
+        for i in range(0, n_samples, chunk_size):
+            chunk = slice(i, min(i + chunk_size, n_samples))
+
+            # Sample fluxes from random errors
+            spec_rand = np.random.normal(
+                self.spectrum[:, 1],
+                self.spectrum[:, 2],
+                size=(chunk.stop - chunk.start, self.spectrum.shape[0]),
             )
 
             # Resample to high-resolution wavelengths
-            flux_rand = spec_interp(wavel_high_res)
+            flux_rand = interp_matrix.dot(spec_rand.T).T
+            flux_rand[:, out_range] = np.nan
 
             # Integrate line flux (W m-2)
-            flux_sample[i] = np.trapz(flux_rand, wavel_high_res)
+            flux_sample[chunk] = np.trapz(flux_rand, wavel_high_res, axis=1)
 
-            # Line luminosity (Lsun)
-            lum_sample[i] = (
-                4.0 * np.pi * (self.distance * constants.PARSEC) ** 2 * flux_sample[i]
+            # Weighted (with flux) mean wavelength (um)
+            mean_sample[chunk] = (
+                np.trapz(wavel_high_res * flux_rand, wavel_high_res, axis=1)
+                / flux_sample[chunk]
             )
-            lum_sample[i] /= constants.L_SUN  # (Lsun)
 
-            # Weighted (with flux) mean wavelength (um)
-            mean_sample[i] = np.trapz(
-                wavel_high_res * flux_rand, wavel_high_res
-            ) / np.trapz(flux_rand, wavel_high_res)
+            # Find full width at half maximum from the wavelengths
+            # at which the flux crosses the half maximum, which are
+            # linearly interpolated between the wavelength points
 
-            # Radial velocity (km s-1)
-            vrad_sample[i] = (
-                1e-3
-                * constants.LIGHT
-                * (mean_sample[i] - self.lambda_rest)
-                / self.lambda_rest
-            )
+            flux_half = flux_rand - np.max(flux_rand, axis=1, keepdims=True) / 2.0
 
-            # Find full width at half maximum
+            half_cross = np.sign(flux_half[:, :-1]) != np.sign(flux_half[:, 1:])
 
-            spline = InterpolatedUnivariateSpline(
-                wavel_high_res, flux_rand - np.max(flux_rand) / 2.0
-            )
-            root = spline.roots()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                root = wavel_high_res[:-1] - flux_half[:, :-1] * np.diff(
+                    wavel_high_res
+                ) / (flux_half[:, 1:] - flux_half[:, :-1])
 
-            diff = root - mean_sample[i]
+            diff = root - mean_sample[chunk, np.newaxis]
 
-            root1 = np.amax(diff[diff < 0.0])
-            root2 = np.amin(diff[diff > 0.0])
+            root1 = np.amax(np.where(half_cross & (diff < 0.0), diff, -np.inf), axis=1)
+            root2 = np.amin(np.where(half_cross & (diff > 0.0), diff, np.inf), axis=1)
 
-            fwhm_sample[i] = 1e-3 * constants.LIGHT * (root2 - root1) / mean_sample[i]
+            fwhm_sample[chunk] = (
+                1e-3 * constants.LIGHT * (root2 - root1) / mean_sample[chunk]
+            )
 
             # Add 30 samples to the plot
 
             if i == 0:
-                ax1.plot(
-                    wavel_high_res,
-                    flux_rand,
-                    ls="-",
-                    lw=0.5,
-                    color="gray",
-                    alpha=0.4,
-                    label="Random sample",
-                )
+                for j, item in enumerate(flux_rand[:30]):
+                    ax1.plot(
+                        wavel_high_res,
+                        item,
+                        ls="-",
+                        lw=0.5,
+                        color="gray",
+                        alpha=0.4,
+                        label="Random sample" if j == 0 else None,
+                    )
+
+        # The FWHM is not defined if the flux does not
+        # cross the half maximum on both sides
+
+        fwhm_sample[~np.isfinite(fwhm_sample)] = np.nan
+
+        n_nan = np.sum(np.isnan(fwhm_sample))
+
+        if n_nan > 0:
+            warnings.warn(
+                f"The FWHM could not be determined for {n_nan} out of "
+                f"{n_samples} samples since the flux does not cross the "
+                f"half maximum on both sides of the peak. These samples "
+                f"are excluded from the FWHM."
+            )
 
-            elif i < 30:
-                ax1.plot(
-                    wavel_high_res, flux_rand, ls="-", lw=0.5, color="gray", alpha=0.4
-                )
+        # Line luminosity (Lsun)
+        lum_sample = 4.0 * np.pi * (self.distance * constants.PARSEC) ** 2 * flux_sample
+        lum_sample /= constants.L_SUN  # (Lsun)
+
+        # Radial velocity (km s-1)
+        vrad_sample = (
+            1e-3 * constants.LIGHT * (mean_sample - self.lambda_rest) / self.lambda_rest
+        )
 
         # Line flux from original, interpolated spectrum
 
@@ -593,7 +630,7 @@ class EmissionLine:
         wavel_mean, wavel_std = np.mean(mean_sample), np.std(mean_sample)
         print(f"Mean wavelength (nm): {1e3*wavel_mean:.2f} +/- {1e3*wavel_std:.2f}")
 
-        fwhm_mean, fwhm_std = np.mean(fwhm_sample), np.std(fwhm_sample)
+        fwhm_mean, fwhm_std = np.nanmean(fwhm_sample), np.nanstd(fwhm_sample)
         print(f"FWHM (km s-1): {fwhm_mean:.2f} +/- {fwhm_std:.2f}")
 
         vrad_mean, vrad_std = np.mean(vrad_sample), np.std(vrad_sample)
@@ -6,7 +6,7 @@ import os
 import math
 import warnings
 
-from typing import Optional, Union, List, Tuple, Dict
+from typing import Any, Optional, Union, List, Tuple, Dict
 from multiprocessing import Pool, cpu_count
 
 import emcee
@@ -39,13 +39,13 @@ from species.analysis import photometry
 from species.data import database
 from species.core import constants
 from species.read import read_model, read_object, read_planck, read_filter
-from species.util import read_util, dust_util
+from species.util import checkpoint_util, cov_util, dust_util, perf_util, read_util
 
 
 warnings.filterwarnings("always", category=DeprecationWarning)
 
 
-@typechecked
+@perf_util.hot_path
 def lnprior(
     param: np.ndarray,
     bounds: dict,
@@ -106,7 +106,7 @@ def lnprior(
     return ln_prior
 
 
-@typechecked
+@perf_util.hot_path
 def lnlike(
     param: np.ndarray,
     bounds: dict,
@@ -121,6 +121,7 @@ def lnlike(
     modelspec: Optional[List[read_model.ReadModel]],
     n_planck: int,
     fit_corr: List[str],
+    wavel_dist: Optional[Dict[str, np.ndarray]] = None,
 ):
     """
     Internal function for calculating the log likelihood.
@@ -165,6 +166,13 @@ def lnlike(
         be used if the actual covariances as determined from the data
         are not available. The parameters that will be fitted are the
         correlation length and fractional amplitude.
+    wavel_dist : dict(str, np.ndarray), None
+        Dictionary with the matrices of the squared wavelength
+        distances of the spectra in ``fit_corr``, as calculated with
+        :func:`~species.util.cov_util.wavel_distance`. The matrices
+        only depend on the wavelengths so they can be computed once
+        before the sampling. The matrices are calculated with each
+        evaluation if set to ``None``.
 
     Returns
     -------
@@ -276,50 +284,44 @@ def lnlike(
             )
 
         if spectrum[item][2] is not None:
-            # The inverted covariance matrix is available
+            # Calculate the log-likelihood with the covariance matrix
 
             if err_scaling[item] is None:
                 # Use the inverted covariance matrix directly
-                data_cov_inv = spectrum[item][2]
+                dot_tmp = np.dot(
+                    data_flux - model_flux,
+                    np.dot(spectrum[item][2], data_flux - model_flux),
+                )
 
             else:
                 # Ratio of the inflated and original uncertainties
                 sigma_ratio = np.sqrt(data_var) / spectrum[item][0][:, 2]
-                sigma_j, sigma_i = np.meshgrid(sigma_ratio, sigma_ratio)
 
-                # Calculate the inverted matrix of the inflated covariances
-                data_cov_inv = np.linalg.inv(spectrum[item][1] * sigma_i * sigma_j)
+                # Chi-square with the rescaled covariance matrix
+                dot_tmp = cov_util.chi_squared(
+                    data_flux - model_flux, spectrum[item][1], sigma_ratio
+                )
 
-        if spectrum[item][2] is not None:
-            # Calculate the log-likelihood with the covariance matrix
-            dot_tmp = np.dot(
-                data_flux - model_flux, np.dot(data_cov_inv, data_flux - model_flux)
-            )
             ln_like += -0.5 * dot_tmp - 0.5 * np.nansum(np.log(2.0 * np.pi * data_var))
 
         else:
             if item in fit_corr:
                 # Calculate the log-likelihood with the
                 # covariance model (see Wang et al. 2020)
-                wavel = spectrum[item][0][:, 0]  # (um)
-                wavel_j, wavel_i = np.meshgrid(wavel, wavel)
-
-                error = np.sqrt(data_var)  # (W m-2 um-1)
-                error_j, error_i = np.meshgrid(error, error)
-
-                cov_matrix = (
-                    corr_amp[item] ** 2
-                    * error_i
-                    * error_j
-                    * np.exp(-((wavel_i - wavel_j) ** 2) / (2.0 * corr_len[item] ** 2))
-                    + (1.0 - corr_amp[item] ** 2)
-                    * np.eye(wavel.shape[0])
-                    * error_i ** 2
-                )
+                if wavel_dist is None:
+                    wavel_dist = {}
 
-                dot_tmp = np.dot(
+                if item not in wavel_dist:
+                    wavel_dist[item] = cov_util.wavel_distance(
+                        spectrum[item][0][:, 0]
+                    )
+
+                dot_tmp = cov_util.gp_chi_squared(
                     data_flux - model_flux,
-                    np.dot(np.linalg.inv(cov_matrix), data_flux - model_flux),
+                    np.sqrt(data_var),
+                    wavel_dist[item],
+                    corr_len[item],
+                    corr_amp[item],
                 )
 
                 ln_like += -0.5 * dot_tmp - 0.5 * np.nansum(
@@ -337,7 +339,7 @@ def lnlike(
     return ln_like
 
 
-@typechecked
+@perf_util.hot_path
 def lnprob(
     param: np.ndarray,
     bounds: dict,
@@ -353,6 +355,7 @@ def lnprob(
     modelspec: Optional[List[read_model.ReadModel]],
     n_planck: int,
     fit_corr: List[str],
+    wavel_dist: Optional[Dict[str, np.ndarray]] = None,
 ) -> np.float64:
     """
     Internal function for calculating the log posterior.
@@ -406,6 +409,13 @@ def lnprob(
         be used if the actual covariances as determined from the data
         are not available. The parameters that will be fitted are the
         correlation length and fractional amplitude.
+    wavel_dist : dict(str, np.ndarray), None
+        Dictionary with the matrices of the squared wavelength
+        distances of the spectra in ``fit_corr``, as calculated with
+        :func:`~species.util.cov_util.wavel_distance`. The matrices
+        only depend on the wavelengths so they can be computed once
+        before the sampling. The matrices are calculated with each
+        evaluation if set to ``None``.
 
     Returns
     -------
@@ -431,6 +441,7 @@ def lnprob(
             modelspec,
             n_planck,
             fit_corr,
+            wavel_dist,
         )
 
     if np.isnan(ln_prob):
@@ -439,6 +450,60 @@ def lnprob(
     return ln_prob
 
 
+# FitModel object and priors that are used by the worker processes
+# of run_mcmc. These are set once by the initializer of the pool, such
+# that the interpolated grids are not pickled for each evaluation of
+# the log-probability function.
+_MCMC_FIT = None
+_MCMC_PRIOR = None
+
+
+@typechecked
+def _init_mcmc_worker(fit_model, prior: Dict[str, Tuple[float, float]]) -> None:
+    """
+    Internal function for initializing a worker process of
+    :func:`~species.analysis.fit_model.FitModel.run_mcmc`.
+
+    Parameters
+    ----------
+    fit_model : species.analysis.fit_model.FitModel
+        Object with the data and interpolated model grids.
+    prior : dict(str, tuple(float, float))
+        Dictionary with the Gaussian priors.
+
+    Returns
+    -------
+    NoneType
+        None
+    """
+
+    global _MCMC_FIT
+    global _MCMC_PRIOR
+
+    _MCMC_FIT = fit_model
+    _MCMC_PRIOR = prior
+
+
+@perf_util.hot_path
+def _lnprob_mcmc_worker(param: np.ndarray) -> np.float64:
+    """
+    Internal function for calculating the log posterior in a worker
+    process of :func:`~species.analysis.fit_model.FitModel.run_mcmc`.
+
+    Parameters
+    ----------
+    param : np.ndarray
+        Parameter values.
+
+    Returns
+    -------
+    float
+        Log posterior.
+    """
+
+    return _MCMC_FIT.lnprob_mcmc(param, _MCMC_PRIOR)
+
+
 class FitModel:
     """
     Class for fitting atmospheric model spectra to spectra and/or
@@ -941,6 +1006,10 @@ class FitModel:
         self.filter_name = []
         self.instr_name = []
 
+        # Mean wavelengths of the filters, for
+        # calculating the interstellar extinction
+        self.mean_wavel = {}
+
         for item in inc_phot:
             if self.model == "planck":
                 # Create SyntheticPhotometry objects when fitting a Planck function
@@ -987,6 +1056,9 @@ class FitModel:
             self.filter_name.append(item)
             self.instr_name.append(instr_filt)
 
+            read_filt = read_filter.ReadFilter(item)
+            self.mean_wavel[item] = read_filt.mean_wavelength()
+
         # Include spectroscopic data
 
         if inc_spec:
@@ -1005,6 +1077,9 @@ class FitModel:
 
             self.n_corr_par = 0
 
+            # Squared wavelength distances for the covariance model
+            self.wavel_dist = {}
+
             for item in self.spectrum:
                 if item in self.fit_corr:
                     if self.spectrum[item][1] is not None:
@@ -1037,6 +1112,10 @@ class FitModel:
 
                         self.n_corr_par += 2
 
+                        self.wavel_dist[item] = cov_util.wavel_distance(
+                            self.spectrum[item][0][:, 0]
+                        )
+
             self.modelspec = []
 
             if self.model != "planck":
@@ -1064,6 +1143,7 @@ class FitModel:
             self.spectrum = {}
             self.modelspec = None
             self.n_corr_par = 0
+            self.wavel_dist = {}
 
         # Get the parameter order if interpolate_grid is used
 
@@ -1295,6 +1375,9 @@ class FitModel:
         nwalkers: int = 200,
         nsteps: int = 1000,
         prior: Optional[Dict[str, Tuple[float, float]]] = None,
+        processes: Optional[int] = None,
+        vectorize: bool = False,
+        checkpoint: Optional[str] = None,
     ) -> None:
         """
         Function to run the MCMC sampler of ``emcee``. The
@@ -1328,6 +1411,28 @@ class FitModel:
             ``prior={'mass': (13., 3.)}`` for an expected mass
             of 13 Mjup with an uncertainty of 3 Mjup. The
             parameter is not used if set to ``None``.
+        processes : int, None
+            Number of worker processes that evaluate the walkers in
+            parallel. The data and interpolated grids are passed once
+            to each worker when the pool is created. All available
+            CPUs are used if set to ``None`` and the walkers are
+            evaluated in the main process if set to 1. Not used if
+            ``vectorize=True``.
+        vectorize : bool
+            Evaluate the log-probability of all walkers with a single
+            function call (see
+            :func:`~species.analysis.fit_model.FitModel.lnprob_mcmc_batch`),
+            in which case the model grids are interpolated for all
+            walkers at once.
+        checkpoint : str, None
+            HDF5 file in which the walkers are periodically stored
+            (see :class:`~species.util.checkpoint_util.CheckpointBackend`),
+            in a group with the name of the ``tag``. The sampler
+            continues from the last stored step if the file already
+            contains steps for the ``tag``, until a total of ``nsteps``
+            steps have been made. The file should be different from
+            the database. The walkers are only kept in memory if the
+            argument is set to ``None``.
 
         Returns
         -------
@@ -1337,7 +1442,10 @@ class FitModel:
 
         print("Running MCMC...")
 
-        ndim = len(self.bounds)
+        ndim = len(self.modelpar)
+
+        if guess is None:
+            guess = {}
 
         if self.model == "planck":
 
@@ -1391,44 +1499,112 @@ class FitModel:
         initial = np.zeros((nwalkers, ndim))
 
         for i, item in enumerate(self.modelpar):
-            if guess[item] is not None:
+            if item == "distance":
+                # The distance is sampled from its Gaussian prior
+                # unless a guess is provided
+                if guess.get(item) is None:
+                    initial[:, i] = np.random.normal(
+                        self.distance[0], self.distance[1], nwalkers
+                    )
+
+                else:
+                    initial[:, i] = guess[item] + np.random.normal(
+                        0, self.distance[1], nwalkers
+                    )
+
+            elif guess.get(item) is not None:
+                if item not in sigma:
+                    sigma[item] = 0.01 * (self.bounds[item][1] - self.bounds[item][0])
+
                 initial[:, i] = guess[item] + np.random.normal(0, sigma[item], nwalkers)
 
+                initial[:, i] = np.clip(
+                    initial[:, i], self.bounds[item][0], self.bounds[item][1]
+                )
+
             else:
                 initial[:, i] = np.random.uniform(
                     low=self.bounds[item][0], high=self.bounds[item][1], size=nwalkers
                 )
 
-        # Create a dictionary with the indices of the parameters
+        # Add distance to dictionary with Gaussian priors
 
-        param_index = {}
-        for i, item in enumerate(self.modelpar):
-            param_index[item] = i
+        if prior is None:
+            prior = {}
+
+        else:
+            prior = prior.copy()
+
+        prior["distance"] = self.distance
+
+        if processes is None:
+            processes = cpu_count()
+
+        # Continue from the last checkpoint of the walkers
+
+        if checkpoint is None:
+            backend = None
+
+        else:
+            backend = checkpoint_util.CheckpointBackend(checkpoint, name=tag)
+
+            if backend.initialized and backend.iteration > 0:
+                if backend.shape != (nwalkers, ndim):
+                    raise ValueError(
+                        f"The checkpoint of '{tag}' in {checkpoint} contains "
+                        f"{backend.shape[0]} walkers with {backend.shape[1]} "
+                        f"parameters, which is not compatible with the "
+                        f"requested {nwalkers} walkers with {ndim} parameters."
+                    )
 
-        with Pool(processes=cpu_count()):
+                print(f"Resuming from step {backend.iteration} of the checkpoint...")
 
+                initial = None
+                nsteps -= backend.iteration
+
+            else:
+                backend.reset(nwalkers, ndim)
+
+        pool = None
+
+        if vectorize:
             ens_sampler = emcee.EnsembleSampler(
                 nwalkers,
                 ndim,
-                lnprob,
-                args=(
-                    [
-                        self.bounds,
-                        self.model,
-                        param_index,
-                        self.objphot,
-                        self.distance,
-                        prior,
-                        self.spectrum,
-                        self.modelphot,
-                        self.modelspec,
-                        self.n_planck,
-                        self.fit_corr,
-                    ]
-                ),
+                self.lnprob_mcmc_batch,
+                args=[prior],
+                vectorize=True,
+                backend=backend,
+            )
+
+        elif processes == 1:
+            ens_sampler = emcee.EnsembleSampler(
+                nwalkers, ndim, self.lnprob_mcmc, args=[prior], backend=backend
             )
 
-            ens_sampler.run_mcmc(initial, nsteps, progress=True)
+        else:
+            # The FitModel object is passed once to each worker by the
+            # initializer instead of pickling it with every evaluation
+            pool = Pool(
+                processes=processes,
+                initializer=_init_mcmc_worker,
+                initargs=(self, prior),
+            )
+
+            ens_sampler = emcee.EnsembleSampler(
+                nwalkers, ndim, _lnprob_mcmc_worker, pool=pool, backend=backend
+            )
+
+        try:
+            if nsteps > 0:
+                ens_sampler.run_mcmc(initial, nsteps, progress=True)
+
+        finally:
+            if pool is not None:
+                pool.terminate()
+
+        if backend is not None:
+            backend.flush()
 
         spec_labels = []
         for item in self.spectrum:
@@ -1453,8 +1629,8 @@ class FitModel:
 
             species_db.add_samples(
                 sampler="emcee",
-                samples=ens_sampler.chain,
-                ln_prob=ens_sampler.lnprobability,
+                samples=ens_sampler.get_chain(),
+                ln_prob=ens_sampler.get_log_prob(),
                 ln_evidence=None,
                 mean_accept=np.mean(ens_sampler.acceptance_fraction),
                 spectrum=("model", self.model),
@@ -1464,135 +1640,738 @@ class FitModel:
                 spec_labels=spec_labels,
             )
 
-    @typechecked
-    def lnlike_func(
-        self, params, prior: Optional[Dict[str, Tuple[float, float]]]
+    @perf_util.hot_path
+    def lnprob_mcmc(
+        self, params: np.ndarray, prior: Dict[str, Tuple[float, float]]
     ) -> np.float64:
         """
-        Function for calculating the log-likelihood for the sampled
-        parameter cube.
+        Function for calculating the log posterior with uniform
+        priors within the ``bounds`` and the Gaussian priors that
+        are included with
+        :func:`~species.analysis.fit_model.FitModel.lnlike_func`.
 
         Parameters
         ----------
-        params : np.ndarray, pymultinest.run.LP_c_double
-            Cube with physical parameters.
+        params : np.ndarray
+            Parameter values.
         prior : dict(str, tuple(float, float))
             Dictionary with Gaussian priors for one or multiple
-            parameters. The prior can be set for any of the atmosphere
-            or calibration parameters, e.g.
-            ``prior={'teff': (1200., 100.)}``. Additionally, a prior
-            can be set for the mass, e.g. ``prior={'mass': (13., 3.)}``
-            for an expected mass of 13 Mjup with an uncertainty of
-            3 Mjup.
+            parameters, including the distance.
 
         Returns
         -------
         float
-            Log-likelihood.
+            Log posterior.
         """
 
-        # Initilize dictionaries for different parameter types
+        for key, value in self.bounds.items():
+            if not value[0] <= params[self.cube_index[key]] <= value[1]:
+                return -np.inf
 
-        spec_scaling = {}
-        phot_scaling = {}
-        err_scaling = {}
-        corr_len = {}
-        corr_amp = {}
-        dust_param = {}
-        disk_param = {}
-        veil_param = {}
-        param_dict = {}
+        ln_prob = self.lnlike_func(params, prior=prior)
 
-        for item in self.bounds:
-            # Add the parameters from the params to their dictionaries
+        if np.isnan(ln_prob):
+            ln_prob = -np.inf
+
+        return ln_prob
+
+    @perf_util.hot_path
+    def lnprob_mcmc_batch(
+        self, params: np.ndarray, prior: Dict[str, Tuple[float, float]]
+    ) -> np.ndarray:
+        """
+        Function for calculating the log posterior of a batch of
+        parameter vectors (e.g. all walkers of ``emcee``). The grids
+        of the photometric fluxes and spectra are interpolated for
+        all parameter vectors at once. The log posterior is
+        calculated separately for each parameter vector with
+        :func:`~species.analysis.fit_model.FitModel.lnprob_mcmc`
+        when fitting a Planck or power-law spectrum, a binary
+        system, a blackbody disk, veiling, or a covariance model.
+
+        Parameters
+        ----------
+        params : np.ndarray
+            Parameter values, with shape ``(n_samples, n_param)``.
+        prior : dict(str, tuple(float, float))
+            Dictionary with Gaussian priors for one or multiple
+            parameters, including the distance.
 
-            if item[:8] == "scaling_" and item[8:] in self.spectrum:
-                spec_scaling[item[8:]] = params[self.cube_index[item]]
+        Returns
+        -------
+        np.ndarray
+            Log posterior of each parameter vector.
+        """
 
-            elif item[:6] == "error_" and item[6:] in self.spectrum:
-                err_scaling[item[6:]] = params[self.cube_index[item]]
+        ln_prob = np.zeros(params.shape[0])
 
-            elif item[:9] == "corr_len_" and item[9:] in self.spectrum:
-                corr_len[item[9:]] = 10.0 ** params[self.cube_index[item]]  # (um)
+        for key, value in self.bounds.items():
+            param_item = params[:, self.cube_index[key]]
+            ln_prob[(param_item < value[0]) | (param_item > value[1])] = -np.inf
 
-            elif item[:9] == "corr_amp_" and item[9:] in self.spectrum:
-                corr_amp[item[9:]] = params[self.cube_index[item]]
+        select = np.isfinite(ln_prob)
 
-            elif item[-6:] == "_error" and item[:-6] in self.filter_name:
-                phot_scaling[item[:-6]] = params[self.cube_index[item]]
+        free_fixed = list(self.bounds.keys()) + list(self.fix_param.keys())
 
-            elif item[-6:] == "_error" and item[:-6] in self.instr_name:
-                phot_scaling[item[:-6]] = params[self.cube_index[item]]
+        no_batch = (
+            self.model in ["planck", "powerlaw"]
+            or self.binary
+            or len(self.diskphot) > 0
+            or len(self.diskspec) > 0
+            or len(self.fit_corr) > 0
+            or any(item[:5] == "veil_" for item in free_fixed)
+        )
 
-            elif item[:8] == "lognorm_":
-                dust_param[item] = params[self.cube_index[item]]
+        if no_batch:
+            for i in np.where(select)[0]:
+                ln_prob[i] = self.lnprob_mcmc(params[i], prior)
 
-            elif item[:9] == "powerlaw_":
-                dust_param[item] = params[self.cube_index[item]]
+            return ln_prob
 
-            elif item[:4] == "ism_":
-                dust_param[item] = params[self.cube_index[item]]
+        params = params[select]
 
-            elif item == "disk_teff":
-                disk_param["teff"] = params[self.cube_index[item]]
+        # Sort the free and fixed parameters by their type, with
+        # arrays of the selected samples as values of free parameters
 
-            elif item == "disk_radius":
-                disk_param["radius"] = params[self.cube_index[item]]
+        sorted_param = self.sort_params(params)
 
-            elif item == "veil_a":
-                veil_param["veil_a"] = params[self.cube_index[item]]
+        param_dict = sorted_param["model"]
+        dust_param = sorted_param["dust"]
 
-            elif item == "veil_b":
-                veil_param["veil_b"] = params[self.cube_index[item]]
+        flux_scaling = (param_dict["radius"] * constants.R_JUP) ** 2 / (
+            param_dict["distance"] * constants.PARSEC
+        ) ** 2
 
-            elif item == "veil_ref":
-                veil_param["veil_ref"] = params[self.cube_index[item]]
+        # Points for the interpolation of the grids, with the
+        # parameters in the order that is used by spectrum_interp
 
-            elif item == "spec_weight":
-                pass
+        interp_points = np.column_stack(
+            np.broadcast_arrays(*[param_dict[item] for item in self.param_interp])
+        )
 
-            else:
-                param_dict[item] = params[self.cube_index[item]]
+        dust_points, n_grains = self.dust_grains(dust_param)
+
+        ln_like = np.zeros(params.shape[0])
+        ln_like += self.prior_ln_like(params, prior)
+
+        for i, obj_item in enumerate(self.objphot):
+            # Get filter name
+            phot_filter = self.modelphot[i].filter_name
+
+            phot_flux = self.modelphot[i].spectrum_interp(interp_points)[:, 0]
+            phot_flux *= flux_scaling
+
+            phot_flux *= self.ext_factor(phot_filter, dust_param, dust_points, n_grains)
+
+            ln_like += self.phot_ln_like(
+                obj_item, phot_filter, phot_flux, sorted_param["phot_scaling"]
+            )
+
+        for i, item in enumerate(self.spectrum.keys()):
+            # Interpolate the model spectra from the grid and
+            # scale the spectra by (radius/distance)^2
+            model_flux = self.modelspec[i].spectrum_interp(interp_points)
+            model_flux *= flux_scaling[:, np.newaxis]
+
+            data_flux, data_var = self.data_flux_var(
+                item,
+                model_flux,
+                sorted_param["spec_scaling"],
+                sorted_param["err_scaling"],
+            )
+
+            model_flux *= self.ext_factor(item, dust_param, dust_points, n_grains)
+
+            ln_like += self.spec_ln_like(
+                item,
+                data_flux,
+                data_var,
+                model_flux,
+                sorted_param["err_scaling"],
+                sorted_param["corr_len"],
+                sorted_param["corr_amp"],
+            )
+
+        ln_like[np.isnan(ln_like)] = -np.inf
+
+        ln_prob[select] = ln_like
+
+        return ln_prob
+
+    @perf_util.hot_path
+    def cube_values(self, params) -> Dict[str, Any]:
+        """
+        Internal function for extracting the values of the free
+        parameters from a parameter cube or from a batch of
+        parameter vectors.
+
+        Parameters
+        ----------
+        params : np.ndarray, pymultinest.run.LP_c_double
+            Cube with physical parameters or an array with shape
+            ``(n_samples, n_param)`` with multiple parameter vectors.
+
+        Returns
+        -------
+        dict(str, float)
+            Dictionary with the values of the free parameters. The
+            values are arrays with shape ``(n_samples,)`` in case a
+            batch of parameter vectors is provided.
+        """
+
+        if isinstance(params, np.ndarray) and params.ndim == 2:
+            return {key: params[:, value] for key, value in self.cube_index.items()}
+
+        return {key: params[value] for key, value in self.cube_index.items()}
+
+    @perf_util.hot_path
+    def sort_params(self, params) -> Dict[str, Dict[str, Any]]:
+        """
+        Internal function for sorting the free and fixed parameters
+        by their type. Used by
+        :func:`~species.analysis.fit_model.FitModel.lnlike_func`
+        and
+        :func:`~species.analysis.fit_model.FitModel.lnprob_mcmc_batch`.
+
+        Parameters
+        ----------
+        params : np.ndarray, pymultinest.run.LP_c_double
+            Cube with physical parameters or an array with shape
+            ``(n_samples, n_param)`` with multiple parameter vectors.
+
+        Returns
+        -------
+        dict(str, dict)
+            Dictionary with the parameter dictionaries of the model
+            (``'model'``), the flux scaling and error inflation of
+            the spectra (``'spec_scaling'`` and ``'err_scaling'``),
+            the error inflation of the photometry
+            (``'phot_scaling'``), the covariance model
+            (``'corr_len'`` and ``'corr_amp'``), the extinction
+            (``'dust'``), the disk (``'disk'``), and the veiling
+            (``'veil'``).
+        """
+
+        sorted_param = {
+            "model": {},
+            "spec_scaling": {},
+            "phot_scaling": {},
+            "err_scaling": {},
+            "corr_len": {},
+            "corr_amp": {},
+            "dust": {},
+            "disk": {},
+            "veil": {},
+        }
+
+        cube_values = self.cube_values(params)
+
+        param_values = {}
+
+        for item in self.bounds:
+            param_values[item] = cube_values[item]
 
         # Add the distance manually because it should
         # not be provided in the bounds dictionary
-        param_dict["distance"] = params[self.cube_index["distance"]]
+        param_values["distance"] = cube_values["distance"]
 
         for item in self.fix_param:
-            # Add the fixed parameters to their dictionaries
+            param_values[item] = self.fix_param[item]
 
-            if item[:8] == "scaling_" and item[8:] in self.spectrum:
-                spec_scaling[item[8:]] = self.fix_param[item]
+        for key, value in param_values.items():
+            if key[:8] == "scaling_" and key[8:] in self.spectrum:
+                sorted_param["spec_scaling"][key[8:]] = value
 
-            elif item[:6] == "error_" and item[6:] in self.spectrum:
-                err_scaling[item[6:]] = self.fix_param[item]
+            elif key[:6] == "error_" and key[6:] in self.spectrum:
+                sorted_param["err_scaling"][key[6:]] = value
 
-            elif item[:9] == "corr_len_" and item[9:] in self.spectrum:
-                corr_len[item[9:]] = self.fix_param[item]  # (um)
+            elif key[:9] == "corr_len_" and key[9:] in self.spectrum:
+                if key in self.bounds:
+                    # The log10 of the correlation length is fitted
+                    sorted_param["corr_len"][key[9:]] = 10.0 ** value  # (um)
 
-            elif item[:9] == "corr_amp_" and item[9:] in self.spectrum:
-                corr_amp[item[9:]] = self.fix_param[item]
+                else:
+                    sorted_param["corr_len"][key[9:]] = value  # (um)
+
+            elif key[:9] == "corr_amp_" and key[9:] in self.spectrum:
+                sorted_param["corr_amp"][key[9:]] = value
+
+            elif key[-6:] == "_error" and key[:-6] in self.filter_name:
+                sorted_param["phot_scaling"][key[:-6]] = value
+
+            elif key[-6:] == "_error" and key[:-6] in self.instr_name:
+                sorted_param["phot_scaling"][key[:-6]] = value
 
-            elif item[:8] == "lognorm_":
-                dust_param[item] = self.fix_param[item]
+            elif key[:8] == "lognorm_":
+                sorted_param["dust"][key] = value
 
-            elif item[:9] == "powerlaw_":
-                dust_param[item] = self.fix_param[item]
+            elif key[:9] == "powerlaw_":
+                sorted_param["dust"][key] = value
 
-            elif item[:4] == "ism_":
-                dust_param[item] = self.fix_param[item]
+            elif key[:4] == "ism_":
+                sorted_param["dust"][key] = value
 
-            elif item == "disk_teff":
-                disk_param["teff"] = self.fix_param[item]
+            elif key in ["disk_teff", "disk_radius"]:
+                sorted_param["disk"][key[5:]] = value
 
-            elif item == "disk_radius":
-                disk_param["radius"] = self.fix_param[item]
+            elif key in ["veil_a", "veil_b", "veil_ref"]:
+                sorted_param["veil"][key] = value
 
-            elif item == "spec_weight":
+            elif key == "spec_weight":
                 pass
 
             else:
-                param_dict[item] = self.fix_param[item]
+                sorted_param["model"][key] = value
+
+        return sorted_param
+
+    @perf_util.hot_path
+    def prior_ln_like(
+        self, params, prior: Optional[Dict[str, Tuple[float, float]]]
+    ) -> Union[float, np.ndarray]:
+        """
+        Internal function for calculating the contribution of the
+        Gaussian priors to the log-likelihood.
+
+        Parameters
+        ----------
+        params : np.ndarray, pymultinest.run.LP_c_double
+            Cube with physical parameters or an array with shape
+            ``(n_samples, n_param)`` with multiple parameter vectors.
+        prior : dict(str, tuple(float, float)), None
+            Dictionary with Gaussian priors for one or multiple
+            parameters, including a prior on the mass.
+
+        Returns
+        -------
+        float, np.ndarray
+            Log-likelihood of the priors.
+        """
+
+        ln_like = 0.0
+
+        if prior is None:
+            return ln_like
+
+        cube_values = self.cube_values(params)
+
+        for key, value in prior.items():
+            if key == "mass":
+                radius = cube_values["radius"]
+
+                if isinstance(radius, np.ndarray):
+                    # The radius is scaled in place by get_mass
+                    radius = radius.copy()
+
+                mass = read_util.get_mass(cube_values["logg"], radius)
+
+                ln_like += -0.5 * (mass - value[0]) ** 2 / value[1] ** 2
+
+            else:
+                ln_like += -0.5 * (cube_values[key] - value[0]) ** 2 / value[1] ** 2
+
+        return ln_like
+
+    @perf_util.hot_path
+    def cross_section(
+        self, data_name: str, dust_points: np.ndarray
+    ) -> Union[float, np.ndarray]:
+        """
+        Internal function for interpolating the dust cross sections
+        of a filter or spectrum.
+
+        Parameters
+        ----------
+        data_name : str
+            Filter name or name of the spectrum.
+        dust_points : np.ndarray
+            Grid point of the cross sections, or an array with
+            shape ``(n_samples, 2)`` with multiple grid points.
+
+        Returns
+        -------
+        float, np.ndarray
+            Interpolated cross sections.
+        """
+
+        cross_tmp = self.cross_sections[data_name](dust_points)
+
+        if dust_points.ndim == 1:
+            # Remove the axis of the single grid point
+            cross_tmp = cross_tmp[0]
+
+        return cross_tmp
+
+    @perf_util.hot_path
+    def dust_grains(
+        self, dust_param: Dict[str, Any]
+    ) -> Tuple[Optional[np.ndarray], Optional[Union[float, np.ndarray]]]:
+        """
+        Internal function for calculating the number of dust grains
+        from the extinction in the V band, for a log-normal or
+        power-law size distribution.
+
+        Parameters
+        ----------
+        dust_param : dict(str, float)
+            Dictionary with the extinction parameters.
+
+        Returns
+        -------
+        np.ndarray, None
+            Grid point or grid points of the interpolated cross
+            sections. None is returned if no size distribution is
+            fitted.
+        float, np.ndarray, None
+            Number of dust grains. None is returned if no size
+            distribution is fitted.
+        """
+
+        if "lognorm_ext" in dust_param:
+            dust_ext = dust_param["lognorm_ext"]
+
+            # Grid points of the interpolated cross sections
+            dust_points = np.stack(
+                np.broadcast_arrays(
+                    10.0 ** dust_param["lognorm_radius"], dust_param["lognorm_sigma"]
+                ),
+                axis=-1,
+            )
+
+        elif "powerlaw_ext" in dust_param:
+            dust_ext = dust_param["powerlaw_ext"]
+
+            # Grid points of the interpolated cross sections
+            dust_points = np.stack(
+                np.broadcast_arrays(
+                    10.0 ** dust_param["powerlaw_max"], dust_param["powerlaw_exp"]
+                ),
+                axis=-1,
+            )
+
+        else:
+            return None, None
+
+        cross_tmp = self.cross_section("Generic/Bessell.V", dust_points)
+
+        n_grains = dust_ext / cross_tmp / 2.5 / np.log10(np.exp(1.0))
+
+        return dust_points, n_grains
+
+    @perf_util.hot_path
+    def ext_factor(
+        self,
+        data_name: str,
+        dust_param: Dict[str, Any],
+        dust_points: Optional[np.ndarray],
+        n_grains: Optional[Union[float, np.ndarray]],
+    ) -> Union[float, np.ndarray]:
+        """
+        Internal function for calculating the factor by which the
+        flux of a filter or spectrum is reduced by the extinction.
+
+        Parameters
+        ----------
+        data_name : str
+            Filter name or name of the spectrum.
+        dust_param : dict(str, float)
+            Dictionary with the extinction parameters.
+        dust_points : np.ndarray, None
+            Grid point or grid points of the cross sections, as
+            returned by
+            :func:`~species.analysis.fit_model.FitModel.dust_grains`.
+        n_grains : float, np.ndarray, None
+            Number of dust grains, as returned by
+            :func:`~species.analysis.fit_model.FitModel.dust_grains`.
+
+        Returns
+        -------
+        float, np.ndarray
+            Extinction factor of the flux. The factor is 1 if the
+            extinction is not fitted.
+        """
+
+        if dust_points is not None:
+            cross_tmp = self.cross_section(data_name, dust_points)
+
+            if cross_tmp.ndim > np.ndim(n_grains):
+                # Cross sections at all wavelengths of a spectrum
+                n_grains = np.asarray(n_grains)[..., np.newaxis]
+
+            return np.exp(-cross_tmp * n_grains)
+
+        if "ism_ext" in dust_param:
+            if data_name in self.spectrum:
+                wavelength = self.spectrum[data_name][0][:, 0]
+            else:
+                wavelength = np.array([self.mean_wavel[data_name]])
+
+            ism_ext = dust_param["ism_ext"]
+            ism_red = dust_param.get("ism_red", 3.1)
+
+            if np.ndim(ism_ext) == 1:
+                ism_ext = ism_ext[:, np.newaxis]
+
+            if np.ndim(ism_red) == 1:
+                ism_red = ism_red[:, np.newaxis]
+
+            ext_mag = dust_util.ism_extinction(ism_ext, ism_red, wavelength)
+
+            if data_name not in self.spectrum:
+                # Extinction at the mean wavelength of the filter
+                ext_mag = ext_mag[..., 0]
+
+            return 10.0 ** (-0.4 * ext_mag)
+
+        return 1.0
+
+    @perf_util.hot_path
+    def phot_ln_like(
+        self,
+        obj_item: np.ndarray,
+        phot_filter: str,
+        phot_flux: Union[float, np.ndarray],
+        phot_scaling: Dict[str, Any],
+    ) -> Union[float, np.ndarray]:
+        """
+        Internal function for calculating the log-likelihood of the
+        photometry of a filter.
+
+        Parameters
+        ----------
+        obj_item : np.ndarray
+            Flux and uncertainty of the object, with shape ``(2,)``,
+            or with shape ``(2, n_phot)`` in case there are multiple
+            fluxes for the filter.
+        phot_filter : str
+            Filter name.
+        phot_flux : float, np.ndarray
+            Model flux for a single sample or an array with the
+            model fluxes for a batch of samples.
+        phot_scaling : dict(str, float)
+            Dictionary with the error inflation of the filters
+            and instruments.
+
+        Returns
+        -------
+        float, np.ndarray
+            Log-likelihood of the photometry.
+        """
+
+        # Shortcut for weight
+        weight = self.weights[phot_filter]
+
+        # Get the telescope/instrument name
+        instr_check = phot_filter.split(".")[0]
+
+        if obj_item.ndim == 1:
+            obj_item = obj_item[:, np.newaxis]
+
+        ln_like = 0.0
+
+        for j in range(obj_item.shape[1]):
+            phot_var = obj_item[1, j] ** 2
+
+            if phot_filter in phot_scaling:
+                # Inflate photometric error for filter
+                phot_var += phot_scaling[phot_filter] ** 2 * obj_item[0, j] ** 2
+
+            elif instr_check in phot_scaling:
+                # Inflate photometric error for instrument
+                phot_var += phot_scaling[instr_check] ** 2 * obj_item[0, j] ** 2
+
+            ln_like += -0.5 * weight * (obj_item[0, j] - phot_flux) ** 2 / phot_var
+
+            # Only required when fitting an error inflation
+            ln_like += -0.5 * weight * np.log(2.0 * np.pi * phot_var)
+
+        return ln_like
+
+    @perf_util.hot_path
+    def data_flux_var(
+        self,
+        spec_name: str,
+        model_flux: np.ndarray,
+        spec_scaling: Dict[str, Any],
+        err_scaling: Dict[str, Any],
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Internal function for scaling the fluxes of a spectrum and
+        for calculating the variances, including the error inflation.
+
+        Parameters
+        ----------
+        spec_name : str
+            Name of the spectrum.
+        model_flux : np.ndarray
+            Model spectrum for a single sample, or an array with
+            shape ``(n_samples, n_wavel)`` for a batch of samples.
+        spec_scaling : dict(str, float)
+            Dictionary with the flux scaling of the spectra.
+        err_scaling : dict(str, float)
+            Dictionary with the error inflation of the spectra.
+
+        Returns
+        -------
+        np.ndarray
+            Scaled fluxes of the spectrum.
+        np.ndarray
+            Variances of the spectrum.
+        """
+
+        spec_data = self.spectrum[spec_name][0]
+
+        # Scale the spectrum data
+        scaling = np.asarray(spec_scaling.get(spec_name, 1.0))
+        data_flux = scaling[..., np.newaxis] * spec_data[:, 1]
+
+        if spec_name not in err_scaling:
+            # Variance without error inflation
+            data_var = spec_data[:, 2] ** 2
+
+        else:
+            # Variance with error inflation (see Piette & Madhusudhan 2020)
+            inflation = np.asarray(err_scaling[spec_name])
+
+            data_var = (
+                spec_data[:, 2] ** 2 + (inflation[..., np.newaxis] * model_flux) ** 2
+            )
+
+        return data_flux, data_var
+
+    @perf_util.hot_path
+    def spec_ln_like(
+        self,
+        spec_name: str,
+        data_flux: np.ndarray,
+        data_var: np.ndarray,
+        model_flux: np.ndarray,
+        err_scaling: Dict[str, Any],
+        corr_len: Dict[str, Any],
+        corr_amp: Dict[str, Any],
+    ) -> Union[float, np.ndarray]:
+        """
+        Internal function for calculating the log-likelihood of a
+        spectrum, either with the covariance matrix of the data,
+        with a covariance model, or with the variances only.
+
+        Parameters
+        ----------
+        spec_name : str
+            Name of the spectrum.
+        data_flux : np.ndarray
+            Scaled fluxes of the spectrum.
+        data_var : np.ndarray
+            Variances of the spectrum.
+        model_flux : np.ndarray
+            Model spectrum for a single sample, or an array with
+            shape ``(n_samples, n_wavel)`` for a batch of samples.
+        err_scaling : dict(str, float)
+            Dictionary with the error inflation of the spectra.
+        corr_len : dict(str, float)
+            Dictionary with the correlation lengths (um) of the
+            covariance model.
+        corr_amp : dict(str, float)
+            Dictionary with the fractional amplitudes of the
+            covariance model.
+
+        Returns
+        -------
+        float, np.ndarray
+            Log-likelihood of the spectrum.
+        """
+
+        # Shortcut for the weight
+        weight = self.weights[spec_name]
+
+        flux_diff = data_flux - model_flux
+
+        if self.spectrum[spec_name][2] is not None:
+            if spec_name not in err_scaling:
+                # Use the inverted covariance matrix directly
+                if flux_diff.ndim == 1:
+                    dot_tmp = np.dot(
+                        flux_diff, np.dot(self.spectrum[spec_name][2], flux_diff)
+                    )
+
+                else:
+                    dot_tmp = np.einsum(
+                        "ij,jk,ik->i", flux_diff, self.spectrum[spec_name][2], flux_diff
+                    )
+
+            else:
+                # Ratio of the inflated and original uncertainties
+                sigma_ratio = np.sqrt(data_var) / self.spectrum[spec_name][0][:, 2]
+
+                # Chi-square with the rescaled covariance matrix, which
+                # uses the cached Cholesky factor of the covariances
+                dot_tmp = cov_util.chi_squared(
+                    flux_diff, self.spectrum[spec_name][1], sigma_ratio
+                )
+
+            ln_like = -0.5 * weight * dot_tmp
+
+            ln_like += (
+                -0.5 * weight * np.nansum(np.log(2.0 * np.pi * data_var), axis=-1)
+            )
+
+        elif spec_name in self.fit_corr:
+            # Covariance model (Wang et al. 2020)
+            dot_tmp = cov_util.gp_chi_squared(
+                flux_diff,
+                np.sqrt(data_var),
+                self.wavel_dist[spec_name],
+                corr_len[spec_name],
+                corr_amp[spec_name],
+            )
+
+            ln_like = -0.5 * weight * dot_tmp
+            ln_like += -0.5 * np.nansum(np.log(2.0 * np.pi * data_var))
+
+        else:
+            # Calculate the chi-square without a covariance matrix
+            chi_sq = -0.5 * weight * flux_diff ** 2 / data_var
+            chi_sq += -0.5 * weight * np.log(2.0 * np.pi * data_var)
+
+            ln_like = np.nansum(chi_sq, axis=-1)
+
+        return ln_like
+
+    @perf_util.hot_path
+    def lnlike_func(
+        self, params, prior: Optional[Dict[str, Tuple[float, float]]]
+    ) -> np.float64:
+        """
+        Function for calculating the log-likelihood for the sampled
+        parameter cube.
+
+        Parameters
+        ----------
+        params : np.ndarray, pymultinest.run.LP_c_double
+            Cube with physical parameters.
+        prior : dict(str, tuple(float, float))
+            Dictionary with Gaussian priors for one or multiple
+            parameters. The prior can be set for any of the atmosphere
+            or calibration parameters, e.g.
+            ``prior={'teff': (1200., 100.)}``. Additionally, a prior
+            can be set for the mass, e.g. ``prior={'mass': (13., 3.)}``
+            for an expected mass of 13 Mjup with an uncertainty of
+            3 Mjup.
+
+        Returns
+        -------
+        float
+            Log-likelihood.
+        """
+
+        # Sort the free and fixed parameters by their type
+
+        sorted_param = self.sort_params(params)
+
+        param_dict = sorted_param["model"]
+        dust_param = sorted_param["dust"]
+        disk_param = sorted_param["disk"]
+        veil_param = sorted_param["veil"]
 
         if self.model == "planck" and self.n_planck > 1:
             for i in range(self.n_planck - 1):
@@ -1631,13 +2410,6 @@ class FitModel:
                 # The scaling is applied manually because of the interpolation
                 del param_dict["radius"]
 
-        for item in self.spectrum:
-            if item not in spec_scaling:
-                spec_scaling[item] = 1.0
-
-            if item not in err_scaling:
-                err_scaling[item] = None
-
         if self.param_interp is not None:
             # Sort the parameters in the correct order for spectrum_interp because
             # spectrum_interp creates a list in the order of the keys in param_dict
@@ -1647,49 +2419,14 @@ class FitModel:
             for item in self.param_interp:
                 param_dict[item] = param_tmp[item]
 
-        ln_like = 0.0
-
-        for key, value in prior.items():
-            if key == "mass":
-                mass = read_util.get_mass(
-                    params[self.cube_index["logg"]],
-                    params[self.cube_index["radius"]],
-                )
-
-                ln_like += -0.5 * (mass - value[0]) ** 2 / value[1] ** 2
-
-            else:
-                ln_like += (
-                    -0.5
-                    * (params[self.cube_index[key]] - value[0]) ** 2
-                    / value[1] ** 2
-                )
-
-        if "lognorm_ext" in dust_param:
-            cross_tmp = self.cross_sections["Generic/Bessell.V"](
-                dust_param["lognorm_sigma"], 10.0 ** dust_param["lognorm_radius"]
-            )[0]
-
-            n_grains = (
-                dust_param["lognorm_ext"] / cross_tmp / 2.5 / np.log10(np.exp(1.0))
-            )
-
-        elif "powerlaw_ext" in dust_param:
-            cross_tmp = self.cross_sections["Generic/Bessell.V"](
-                dust_param["powerlaw_exp"], 10.0 ** dust_param["powerlaw_max"]
-            )
+        ln_like = self.prior_ln_like(params, prior)
 
-            n_grains = (
-                dust_param["powerlaw_ext"] / cross_tmp / 2.5 / np.log10(np.exp(1.0))
-            )
+        dust_points, n_grains = self.dust_grains(dust_param)
 
         for i, obj_item in enumerate(self.objphot):
             # Get filter name
             phot_filter = self.modelphot[i].filter_name
 
-            # Shortcut for weight
-            weight = self.weights[phot_filter]
-
             if self.model == "planck":
                 readplanck = read_planck.ReadPlanck(filter_name=phot_filter)
                 phot_flux = readplanck.get_flux(param_dict, synphot=self.modelphot[i])[
@@ -1762,77 +2499,15 @@ class FitModel:
                     / (param_dict["distance"] * constants.PARSEC) ** 2
                 )
 
-            if "lognorm_ext" in dust_param:
-                cross_tmp = self.cross_sections[phot_filter](
-                    dust_param["lognorm_sigma"], 10.0 ** dust_param["lognorm_radius"]
-                )[0]
-
-                phot_flux *= np.exp(-cross_tmp * n_grains)
+            phot_flux *= self.ext_factor(phot_filter, dust_param, dust_points, n_grains)
 
-            elif "powerlaw_ext" in dust_param:
-                cross_tmp = self.cross_sections[phot_filter](
-                    dust_param["powerlaw_exp"], 10.0 ** dust_param["powerlaw_max"]
-                )[0]
-
-                phot_flux *= np.exp(-cross_tmp * n_grains)
-
-            elif "ism_ext" in dust_param:
-                read_filt = read_filter.ReadFilter(phot_filter)
-                filt_wavel = np.array([read_filt.mean_wavelength()])
-
-                ism_reddening = dust_param.get("ism_red", 3.1)
-
-                ext_filt = dust_util.ism_extinction(
-                    dust_param["ism_ext"], ism_reddening, filt_wavel
-                )
-
-                phot_flux *= 10.0 ** (-0.4 * ext_filt[0])
-
-            if obj_item.ndim == 1:
-                phot_var = obj_item[1] ** 2
-
-                # Get the telescope/instrument name
-                instr_check = phot_filter.split(".")[0]
-
-                if phot_filter in phot_scaling:
-                    # Inflate photometric error for filter
-                    phot_var += phot_scaling[phot_filter] ** 2 * obj_item[0] ** 2
-
-                elif instr_check in phot_scaling:
-                    # Inflate photometric error for instrument
-                    phot_var += phot_scaling[instr_check] ** 2 * obj_item[0] ** 2
-
-                ln_like += -0.5 * weight * (obj_item[0] - phot_flux) ** 2 / phot_var
-
-                # Only required when fitting an error inflation
-                ln_like += -0.5 * weight * np.log(2.0 * np.pi * phot_var)
-
-            else:
-                for j in range(obj_item.shape[1]):
-                    phot_var = obj_item[1, j] ** 2
-
-                    if (
-                        self.model == "powerlaw"
-                        and f"{phot_filter}_error" in param_dict
-                    ):
-                        phot_var += (
-                            param_dict[f"{phot_filter}_error"] ** 2
-                            * obj_item[0, j] ** 2
-                        )
-
-                    ln_like += (
-                        -0.5 * weight * (obj_item[0, j] - phot_flux) ** 2 / phot_var
-                    )
-
-                    # Only required when fitting an error inflation
-                    ln_like += -0.5 * weight * np.log(2.0 * np.pi * phot_var)
+            ln_like += self.phot_ln_like(
+                obj_item, phot_filter, phot_flux, sorted_param["phot_scaling"]
+            )
 
         for i, item in enumerate(self.spectrum.keys()):
             # Calculate or interpolate the model spectrum
 
-            # Shortcut for the weight
-            weight = self.weights[item]
-
             if self.model == "planck":
                 # Calculate a blackbody spectrum
                 readplanck = read_planck.ReadPlanck(
@@ -1915,36 +2590,12 @@ class FitModel:
 
                     model_flux = veil_param["veil_a"] * model_flux + veil_flux
 
-            # Scale the spectrum data
-            data_flux = spec_scaling[item] * self.spectrum[item][0][:, 1]
-
-            if err_scaling[item] is None:
-                # Variance without error inflation
-                data_var = self.spectrum[item][0][:, 2] ** 2
-
-            else:
-                # Variance with error inflation (see Piette & Madhusudhan 2020)
-                data_var = (
-                    self.spectrum[item][0][:, 2] ** 2
-                    + (err_scaling[item] * model_flux) ** 2
-                )
-
-            if self.spectrum[item][2] is not None:
-                # The inverted covariance matrix is available
-
-                if err_scaling[item] is None:
-                    # Use the inverted covariance matrix directly
-                    data_cov_inv = self.spectrum[item][2]
-
-                else:
-                    # Ratio of the inflated and original uncertainties
-                    sigma_ratio = np.sqrt(data_var) / self.spectrum[item][0][:, 2]
-                    sigma_j, sigma_i = np.meshgrid(sigma_ratio, sigma_ratio)
-
-                    # Calculate the inverted matrix of the inflated covariances
-                    data_cov_inv = np.linalg.inv(
-                        self.spectrum[item][1] * sigma_i * sigma_j
-                    )
+            data_flux, data_var = self.data_flux_var(
+                item,
+                model_flux,
+                sorted_param["spec_scaling"],
+                sorted_param["err_scaling"],
+            )
 
             if disk_param:
                 model_tmp = self.diskspec[i].spectrum_interp([disk_param["teff"]])[0, :]
@@ -1955,81 +2606,17 @@ class FitModel:
 
                 model_flux += model_tmp
 
-            if "lognorm_ext" in dust_param:
-                for j, cross_item in enumerate(self.cross_sections[item]):
-                    cross_tmp = cross_item(
-                        dust_param["lognorm_sigma"],
-                        10.0 ** dust_param["lognorm_radius"],
-                    )[0]
-
-                    model_flux[j] *= np.exp(-cross_tmp * n_grains)
-
-            elif "powerlaw_ext" in dust_param:
-                for j, cross_item in enumerate(self.cross_sections[item]):
-                    # For loop over all wavelengths of a spectrum
-                    cross_tmp = cross_item(
-                        dust_param["powerlaw_exp"], 10.0 ** dust_param["powerlaw_max"]
-                    )[0]
-
-                    model_flux[j] *= np.exp(-cross_tmp * n_grains)
-
-            elif "ism_ext" in dust_param:
-                ism_reddening = dust_param.get("ism_red", 3.1)
-
-                ext_filt = dust_util.ism_extinction(
-                    dust_param["ism_ext"], ism_reddening, self.spectrum[item][0][:, 0]
-                )
-
-                model_flux *= 10.0 ** (-0.4 * ext_filt)
-
-            if self.spectrum[item][2] is not None:
-                # Use the inverted covariance matrix
-                ln_like += (
-                    -0.5
-                    * weight
-                    * np.dot(
-                        data_flux - model_flux,
-                        np.dot(data_cov_inv, data_flux - model_flux),
-                    )
-                )
-
-                ln_like += -0.5 * weight * np.nansum(np.log(2.0 * np.pi * data_var))
-
-            else:
-                if item in self.fit_corr:
-                    # Covariance model (Wang et al. 2020)
-                    wavel = self.spectrum[item][0][:, 0]  # (um)
-                    wavel_j, wavel_i = np.meshgrid(wavel, wavel)
-
-                    error = np.sqrt(data_var)  # (W m-2 um-1)
-                    error_j, error_i = np.meshgrid(error, error)
-
-                    cov_matrix = (
-                        corr_amp[item] ** 2
-                        * error_i
-                        * error_j
-                        * np.exp(
-                            -((wavel_i - wavel_j) ** 2) / (2.0 * corr_len[item] ** 2)
-                        )
-                        + (1.0 - corr_amp[item] ** 2)
-                        * np.eye(wavel.shape[0])
-                        * error_i ** 2
-                    )
-
-                    dot_tmp = np.dot(
-                        data_flux - model_flux,
-                        np.dot(np.linalg.inv(cov_matrix), data_flux - model_flux),
-                    )
-
-                    ln_like += -0.5 * weight * dot_tmp
-                    ln_like += -0.5 * np.nansum(np.log(2.0 * np.pi * data_var))
+            model_flux *= self.ext_factor(item, dust_param, dust_points, n_grains)
 
-                else:
-                    # Calculate the chi-square without a covariance matrix
-                    chi_sq = -0.5 * weight * (data_flux - model_flux) ** 2 / data_var
-                    chi_sq += -0.5 * weight * np.log(2.0 * np.pi * data_var)
-
-                    ln_like += np.nansum(chi_sq)
+            ln_like += self.spec_ln_like(
+                item,
+                data_flux,
+                data_var,
+                model_flux,
+                sorted_param["err_scaling"],
+                sorted_param["corr_len"],
+                sorted_param["corr_amp"],
+            )
 
         return ln_like
 
@@ -2040,6 +2627,7 @@ class FitModel:
         n_live_points: int = 1000,
         output: str = "multinest/",
         prior: Optional[Dict[str, Tuple[float, float]]] = None,
+        resume: bool = False,
     ) -> None:
         """
         Function to run the ``PyMultiNest`` wrapper of the
@@ -2077,6 +2665,10 @@ class FitModel:
             ``prior={'mass': (13., 3.)}`` for an expected mass
             of 13 Mjup with an uncertainty of 3 Mjup. The
             parameter is not used if set to ``None``.
+        resume : bool
+            Resume the sampling from the checkpoint files that
+            ``MultiNest`` periodically writes to the ``output``
+            folder, for example after a job was stopped.
 
         Returns
         -------
@@ -2108,7 +2700,7 @@ class FitModel:
 
         prior['distance'] = self.distance
 
-        @typechecked
+        @perf_util.hot_path
         def lnprior_multinest(cube, n_dim: int, n_param: int) -> None:
             """
             Function to transform the unit cube into the parameter cube. It is not clear how to
@@ -2147,7 +2739,7 @@ class FitModel:
                         * cube[self.cube_index[item]]
                     )
 
-        @typechecked
+        @perf_util.hot_path
         def lnlike_multinest(params, n_dim: int, n_param: int) -> np.float64:
             """
             Function for return the log-likelihood for the sampled parameter cube.
@@ -2174,7 +2766,7 @@ class FitModel:
             lnprior_multinest,
             len(self.modelpar),
             outputfiles_basename=output,
-            resume=False,
+            resume=resume,
             n_live_points=n_live_points,
         )
 
@@ -2267,6 +2859,7 @@ class FitModel:
         min_num_live_points=400,
         output: str = "ultranest/",
         prior: Optional[Dict[str, Tuple[float, float]]] = None,
+        resume: bool = False,
     ) -> None:
         """
         Function to run ``UltraNest`` for constructing the posterior
@@ -2292,6 +2885,12 @@ class FitModel:
             ``prior={'teff': (1200., 100.)}``. Additionally, a prior can be set for the mass, e.g.
             ``prior={'mass': (13., 3.)}`` for an expected mass of 13 Mjup with an uncertainty of
             3 Mjup. The parameter is not used if set to ``None``.
+        resume : bool
+            Write the checkpoint of ``UltraNest`` directly to the
+            ``output`` folder and resume the sampling from a previous
+            checkpoint in that folder, for example after a job was
+            stopped. A new run is started in a subfolder of ``output``
+            if set to ``False``.
 
         Returns
         -------
@@ -2332,7 +2931,7 @@ class FitModel:
 
         prior['distance'] = self.distance
 
-        @typechecked
+        @perf_util.hot_path
         def lnprior_ultranest(cube: np.ndarray) -> np.ndarray:
             """
             Function to transform the unit cube into the parameter cube. It is not clear how to
@@ -2362,7 +2961,7 @@ class FitModel:
 
             return params
 
-        @typechecked
+        @perf_util.hot_path
         def lnlike_ultranest(params: np.ndarray) -> np.float64:
             """
             Function for returning the log-likelihood for the sampled parameter cube.
@@ -2384,7 +2983,7 @@ class FitModel:
             self.modelpar,
             lnlike_ultranest,
             transform=lnprior_ultranest,
-            resume="subfolder",
+            resume="resume" if resume else "subfolder",
             log_dir=output,
         )
 
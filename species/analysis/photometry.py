@@ -9,14 +9,14 @@ import configparser
 
 from typing import Optional, Union, Tuple, List
 
-import h5py
 import numpy as np
 
+from scipy import sparse
 from typeguard import typechecked
 
 from species.data import database
 from species.read import read_filter, read_calibration
-from species.util import phot_util
+from species.util import cache_util, phot_util
 
 
 class SyntheticPhotometry:
@@ -42,8 +42,6 @@ class SyntheticPhotometry:
         """
 
         self.filter_name = filter_name
-        self.filter_interp = None
-        self.wavel_range = None
 
         self.vega_mag = 0.03  # (mag)
 
@@ -54,13 +52,21 @@ class SyntheticPhotometry:
 
         self.database = config["species"]["database"]
 
+        # The profile and its derived quantities are
+        # read from the in-memory filter registry
+
         read_filt = read_filter.ReadFilter(self.filter_name)
+
         self.det_type = read_filt.detector_type()
+        self.filter_interp = read_filt.interpolate_filter()
+        self.wavel_range = read_filt.wavelength_range()
 
     @typechecked
     def zero_point(self) -> np.float64:
         """
-        Internal function for calculating the zero point of the provided ``filter_name``.
+        Internal function for calculating the zero point of the provided ``filter_name``. The
+        zero point is stored as attribute of the filter profile in the database and is cached
+        in memory, such that the spectrum of Vega is only integrated once for each filter.
 
         Returns
         -------
@@ -68,20 +74,29 @@ class SyntheticPhotometry:
             Zero-point flux (W m-2 um-1).
         """
 
-        if self.wavel_range is None:
-            transmission = read_filter.ReadFilter(self.filter_name)
-            self.wavel_range = transmission.wavelength_range()
+        cache_key = ("zero_point", self.filter_name, self.det_type)
+        zp_flux = cache_util.get_cached(self.database, cache_key)
+
+        if zp_flux is not None:
+            return zp_flux
+
+        # The attribute name includes the detector type since the
+        # zero point depends on the type of detector
 
-        h5_file = h5py.File(self.database, "r")
+        attr_name = f"zero_point_{self.det_type}"
 
-        try:
-            h5_file["spectra/calibration/vega"]
+        h5_file = cache_util.open_pooled(self.database)
+        dset = h5_file[f"filters/{self.filter_name}"]
 
-        except KeyError:
-            h5_file.close()
+        if attr_name in dset.attrs:
+            zp_flux = np.float64(dset.attrs[attr_name])
+            cache_util.set_cached(self.database, cache_key, zp_flux)
+
+            return zp_flux
+
+        if "spectra/calibration/vega" not in h5_file:
             species_db = database.Database()
             species_db.add_spectra("vega")
-            h5_file = h5py.File(self.database, "r")
 
         readcalib = read_calibration.ReadCalibration("vega", None)
         calibbox = readcalib.get_spectrum()
@@ -97,9 +112,202 @@ class SyntheticPhotometry:
             (wavelength > self.wavel_range[0]) & (wavelength < self.wavel_range[1])
         ]
 
-        h5_file.close()
+        zp_flux = self.spectrum_to_flux(wavelength_crop, flux_crop)[0]
+
+        if not np.isnan(zp_flux):
+            # Only the pooled file handle is closed since storing the
+            # zero point does not change any of the cached data
 
-        return self.spectrum_to_flux(wavelength_crop, flux_crop)[0]
+            try:
+                with cache_util.open_writable(
+                    self.database, clear_cache=False
+                ) as h5_file:
+                    h5_file[f"filters/{self.filter_name}"].attrs[attr_name] = zp_flux
+
+            except OSError:
+                # The database might be opened by a different process
+                # in which case the zero point is only cached in memory
+                warnings.warn(
+                    f"Could not store the zero point of {self.filter_name} "
+                    f"in the database: {self.database}"
+                )
+
+            cache_util.set_cached(self.database, cache_key, zp_flux)
+
+        return zp_flux
+
+    @typechecked
+    def flux_weights(
+        self, wavelength: np.ndarray, threshold: Optional[float] = 0.05
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Function for calculating the weights with which the fluxes of a
+        spectrum are integrated over the filter profile. The average
+        flux is given by ``np.dot(flux[..., indices], weights)``, so
+        the synthetic fluxes of any number of spectra that are sampled
+        at the same wavelengths are calculated with a single matrix
+        product.
+
+        Parameters
+        ----------
+        wavelength : np.ndarray
+            Wavelength points (um).
+        threshold : float, None
+            Transmission threshold (value between 0 and 1). If the minimum transmission value is
+            larger than the threshold, a ``None`` is returned. This will happen if the input
+            spectrum does not cover the full wavelength range of the filter profile. Not used if
+            set to ``None``.
+
+        Returns
+        -------
+        tuple(np.ndarray, np.ndarray), None
+            Indices of the wavelength points that are used for the
+            integral and the weights of the fluxes at those wavelengths.
+            A ``None`` is returned if the synthetic flux can not be
+            calculated from the wavelength sampling.
+        """
+
+        if wavelength.size == 0:
+            raise ValueError(
+                f"Calculation of the mean flux for {self.filter_name} is not "
+                f"possible because the wavelength array is empty."
+            )
+
+        indices = np.where(
+            (self.wavel_range[0] <= wavelength) & (wavelength <= self.wavel_range[1])
+        )[0]
+
+        if indices.size < 2:
+            warnings.warn(
+                "Calculating a synthetic flux requires more than one wavelength "
+                "point. Photometry is set to NaN."
+            )
+
+            return None
+
+        if threshold is None and (
+            wavelength[0] > self.wavel_range[0] or wavelength[-1] < self.wavel_range[1]
+        ):
+
+            warnings.warn(
+                f"The filter profile of {self.filter_name} "
+                f"({self.wavel_range[0]:.4f}-{self.wavel_range[1]:.4f}) extends "
+                f"beyond the wavelength range of the spectrum ({wavelength[0]:.4f} "
+                f"-{wavelength[-1]:.4f}). The flux is set to NaN. Setting the "
+                f"'threshold' parameter will loosen the wavelength constraints."
+            )
+
+            return None
+
+        wavelength = wavelength[indices]
+        transmission = self.filter_interp(wavelength)
+
+        if (
+            threshold is not None
+            and (transmission[0] > threshold or transmission[-1] > threshold)
+            and (
+                wavelength[0] < self.wavel_range[0]
+                or wavelength[-1] > self.wavel_range[-1]
+            )
+        ):
+
+            warnings.warn(
+                f"The filter profile of {self.filter_name} "
+                f"({self.wavel_range[0]:.4f}-{self.wavel_range[1]:.4f}) "
+                f"extends beyond the wavelength range of the spectrum "
+                f"({wavelength[0]:.4f}-{wavelength[-1]:.4f}). The flux "
+                f"is set to NaN. Increasing the 'threshold' parameter "
+                f"({threshold}) will loosen the wavelength constraint."
+            )
+
+            return None
+
+        not_nan = np.logical_not(np.isnan(transmission))
+
+        indices = indices[not_nan]
+        wavelength = wavelength[not_nan]
+        transmission = transmission[not_nan]
+
+        if self.det_type == "energy":
+            # Energy counting detector
+            integrand = transmission
+
+        elif self.det_type == "photon":
+            # Photon counting detector
+            integrand = wavelength * transmission
+
+        # Weights of the trapezoidal rule
+        trapz_weights = np.zeros(wavelength.size)
+        trapz_weights[:-1] += 0.5 * np.diff(wavelength)
+        trapz_weights[1:] += 0.5 * np.diff(wavelength)
+
+        weights = integrand * trapz_weights
+
+        return indices, weights / np.sum(weights)
+
+    @typechecked
+    def flux_samples(
+        self,
+        wavelength: np.ndarray,
+        flux: np.ndarray,
+        error: np.ndarray,
+        threshold: Optional[float] = 0.05,
+        n_draws: int = 200,
+        seed: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Function for calculating the average fluxes of random
+        realizations of a spectrum. All realizations are drawn as
+        a single array with shape ``(n_draws, n_wavel)``, which is
+        integrated over the filter profile with a single matrix
+        product. The errors of the spectrum are assumed to be
+        uncorrelated.
+
+        Parameters
+        ----------
+        wavelength : np.ndarray
+            Wavelength points (um).
+        flux : np.ndarray
+            Flux (W m-2 um-1).
+        error : np.ndarray
+            Uncertainty (W m-2 um-1).
+        threshold : float, None
+            Transmission threshold (value between 0 and 1). See
+            :func:`~species.analysis.photometry.SyntheticPhotometry.spectrum_to_flux`.
+        n_draws : int
+            Number of random realizations of the spectrum.
+        seed : int, None
+            Seed for the random number generator. The global random
+            state of ``numpy`` is used if set to ``None``.
+
+        Returns
+        -------
+        np.ndarray
+            Average fluxes (W m-2 um-1) of the random realizations.
+        """
+
+        filter_weights = self.flux_weights(wavelength, threshold=threshold)
+
+        if filter_weights is None:
+            return np.full(n_draws, np.nan)
+
+        indices, weights = filter_weights
+
+        # Only the wavelengths that are used by the
+        # integral over the filter profile are sampled
+
+        if seed is None:
+            random_normal = np.random.normal(
+                loc=0.0, scale=1.0, size=(n_draws, indices.size)
+            )
+
+        else:
+            rng = np.random.default_rng(seed)
+            random_normal = rng.normal(loc=0.0, scale=1.0, size=(n_draws, indices.size))
+
+        spec_random = flux[indices] + random_normal * error[indices]
+
+        return np.dot(spec_random, weights)
 
     @typechecked
     def spectrum_to_flux(
@@ -108,12 +316,16 @@ class SyntheticPhotometry:
         flux: np.ndarray,
         error: Optional[np.ndarray] = None,
         threshold: Optional[float] = 0.05,
+        error_method: str = "sampling",
+        n_draws: int = 200,
+        seed: Optional[int] = None,
     ) -> Tuple[
         Union[np.float32, np.float64], Union[Optional[np.float32], Optional[np.float64]]
     ]:
         """
         Function for calculating the average flux from a spectrum and a filter profile. The error
-        is propagated by sampling 200 random values from the error distributions.
+        is propagated by sampling ``n_draws`` random values from the error distributions or by
+        linear propagation of the uncertainties.
 
         Parameters
         ----------
@@ -128,6 +340,16 @@ class SyntheticPhotometry:
             larger than the threshold, a NaN is returned. This will happen if the input spectrum
             does not cover the full wavelength range of the filter profile. Not used if set to
             ``None``.
+        error_method : str
+            Method for propagating the uncertainties of the spectrum ('sampling' or 'analytic').
+            With 'sampling', the error is the standard deviation of the average fluxes of
+            ``n_draws`` random realizations of the spectrum. With 'analytic', the uncertainties
+            are linearly propagated, assuming that the errors of the spectrum are uncorrelated.
+        n_draws : int
+            Number of random realizations of the spectrum when ``error_method='sampling'``.
+        seed : int, None
+            Seed for the random number generator when ``error_method='sampling'``. The global
+            random state of ``numpy`` is used if set to ``None``.
 
         Returns
         -------
@@ -137,115 +359,41 @@ class SyntheticPhotometry:
             Uncertainty (W m-2 um-1).
         """
 
-        if error is not None:
-            # The error calculation requires the original spectrum because spectrum_to_flux is used
-            wavel_error = wavelength.copy()
-            flux_error = flux.copy()
-
-        if self.filter_interp is None:
-            transmission = read_filter.ReadFilter(self.filter_name)
-            self.filter_interp = transmission.interpolate_filter()
-
-            if self.wavel_range is None:
-                self.wavel_range = transmission.wavelength_range()
-
-        if wavelength.size == 0:
+        if error_method not in ["sampling", "analytic"]:
             raise ValueError(
-                f"Calculation of the mean flux for {self.filter_name} is not "
-                f"possible because the wavelength array is empty."
+                f"The argument of 'error_method' should be 'sampling' or "
+                f"'analytic' but '{error_method}' was provided."
             )
 
-        indices = np.where(
-            (self.wavel_range[0] <= wavelength) & (wavelength <= self.wavel_range[1])
-        )[0]
+        filter_weights = self.flux_weights(wavelength, threshold=threshold)
 
-        if indices.size < 2:
+        if filter_weights is None:
             syn_flux = np.nan
 
-            warnings.warn(
-                "Calculating a synthetic flux requires more than one wavelength "
-                "point. Photometry is set to NaN."
-            )
-
         else:
-            if threshold is None and (
-                wavelength[0] > self.wavel_range[0]
-                or wavelength[-1] < self.wavel_range[1]
-            ):
-
-                warnings.warn(
-                    f"The filter profile of {self.filter_name} "
-                    f"({self.wavel_range[0]:.4f}-{self.wavel_range[1]:.4f}) extends "
-                    f"beyond the wavelength range of the spectrum ({wavelength[0]:.4f} "
-                    f"-{wavelength[-1]:.4f}). The flux is set to NaN. Setting the "
-                    f"'threshold' parameter will loosen the wavelength constraints."
-                )
-
-                syn_flux = np.nan
+            syn_flux = np.dot(flux[filter_weights[0]], filter_weights[1])
 
-            else:
-                wavelength = wavelength[indices]
-                flux = flux[indices]
-
-                transmission = self.filter_interp(wavelength)
-
-                if (
-                    threshold is not None
-                    and (transmission[0] > threshold or transmission[-1] > threshold)
-                    and (
-                        wavelength[0] < self.wavel_range[0]
-                        or wavelength[-1] > self.wavel_range[-1]
-                    )
-                ):
-
-                    warnings.warn(
-                        f"The filter profile of {self.filter_name} "
-                        f"({self.wavel_range[0]:.4f}-{self.wavel_range[1]:.4f}) "
-                        f"extends beyond the wavelength range of the spectrum "
-                        f"({wavelength[0]:.4f}-{wavelength[-1]:.4f}). The flux "
-                        f"is set to NaN. Increasing the 'threshold' parameter "
-                        f"({threshold}) will loosen the wavelength constraint."
-                    )
-
-                    syn_flux = np.nan
+        if error is not None and not np.any(np.isnan(error)):
+            if error_method == "analytic":
+                if filter_weights is None:
+                    error_flux = np.float64(np.nan)
 
                 else:
-                    indices = np.isnan(transmission)
-                    indices = np.logical_not(indices)
-
-                    if self.det_type == "energy":
-                        # Energy counting detector
-                        integrand1 = transmission[indices] * flux[indices]
-                        integrand2 = transmission[indices]
-
-                    elif self.det_type == "photon":
-                        # Photon counting detector
-                        integrand1 = (
-                            wavelength[indices] * transmission[indices] * flux[indices]
-                        )
-                        integrand2 = wavelength[indices] * transmission[indices]
-
-                    integral1 = np.trapz(integrand1, wavelength[indices])
-                    integral2 = np.trapz(integrand2, wavelength[indices])
-
-                    syn_flux = integral1 / integral2
+                    error_flux = np.sqrt(
+                        np.sum((filter_weights[1] * error[filter_weights[0]]) ** 2)
+                    )
 
-        if error is not None and not np.any(np.isnan(error)):
-            phot_random = np.zeros(200)
-
-            for i in range(200):
-                # Use the original spectrum size (i.e. wavel_error and flux_error)
-                spec_random = (
-                    flux_error
-                    + np.random.normal(loc=0.0, scale=1.0, size=wavel_error.shape[0])
-                    * error
+            else:
+                phot_random = self.flux_samples(
+                    wavelength,
+                    flux,
+                    error,
+                    threshold=threshold,
+                    n_draws=n_draws,
+                    seed=seed,
                 )
 
-                phot_random[i] = self.spectrum_to_flux(
-                    wavel_error, spec_random, error=None, threshold=threshold
-                )[0]
-
-            error_flux = np.std(phot_random)
+                error_flux = np.std(phot_random)
 
         elif error is not None and np.any(np.isnan(error)):
             warnings.warn("Spectum contains NaN so can not calculate the error.")
@@ -264,13 +412,16 @@ class SyntheticPhotometry:
         error: Optional[Union[np.ndarray, List[np.ndarray]]] = None,
         distance: Optional[Tuple[float, Optional[float]]] = None,
         threshold: Optional[float] = 0.05,
+        error_method: str = "sampling",
+        n_draws: int = 200,
+        seed: Optional[int] = None,
     ) -> Tuple[
         Tuple[float, Optional[float]], Optional[Tuple[Optional[float], Optional[float]]]
     ]:
         """
         Function for calculating the apparent and absolute magnitude from a spectrum and a
-        filter profile. The error is propagated by sampling 200 random values from the error
-        distributions.
+        filter profile. The error is propagated by sampling ``n_draws`` random values from the
+        error distributions or by linear propagation of the uncertainties.
 
         Parameters
         ----------
@@ -288,6 +439,14 @@ class SyntheticPhotometry:
             larger than the threshold, a NaN is returned. This will happen if the input spectrum
             does not cover the full wavelength range of the filter profile. Not used if set to
             ``None``.
+        error_method : str
+            Method for propagating the uncertainties of the spectrum ('sampling' or 'analytic').
+            See :func:`~species.analysis.photometry.SyntheticPhotometry.spectrum_to_flux`.
+        n_draws : int
+            Number of random realizations of the spectrum when ``error_method='sampling'``.
+        seed : int, None
+            Seed for the random number generator when ``error_method='sampling'``. The global
+            random state of ``numpy`` is used if set to ``None``.
 
         Returns
         -------
@@ -297,31 +456,48 @@ class SyntheticPhotometry:
             Absolute magnitude and uncertainty.
         """
 
+        if error_method not in ["sampling", "analytic"]:
+            raise ValueError(
+                f"The argument of 'error_method' should be 'sampling' or "
+                f"'analytic' but '{error_method}' was provided."
+            )
+
+        if error is not None:
+            error = np.asarray(error)
+
         zp_flux = self.zero_point()
 
         syn_flux = self.spectrum_to_flux(
-            wavelength, flux, error=error, threshold=threshold
+            wavelength, flux, error=None, threshold=threshold
         )
 
         app_mag = self.vega_mag - 2.5 * math.log10(syn_flux[0] / zp_flux)
 
         if error is not None and not np.any(np.isnan(error)):
-            mag_random = np.zeros(200)
+            if error_method == "analytic":
+                error_flux = self.spectrum_to_flux(
+                    wavelength,
+                    flux,
+                    error=error,
+                    threshold=threshold,
+                    error_method="analytic",
+                )[1]
 
-            for i in range(200):
-                spec_random = (
-                    flux
-                    + np.random.normal(loc=0.0, scale=1.0, size=wavelength.shape[0])
-                    * error
-                )
+                error_app_mag = 2.5 / math.log(10.0) * error_flux / syn_flux[0]
 
-                flux_random = self.spectrum_to_flux(
-                    wavelength, spec_random, error=None, threshold=threshold
+            else:
+                flux_random = self.flux_samples(
+                    wavelength,
+                    flux,
+                    error,
+                    threshold=threshold,
+                    n_draws=n_draws,
+                    seed=seed,
                 )
 
-                mag_random[i] = self.vega_mag - 2.5 * np.log10(flux_random[0] / zp_flux)
+                mag_random = self.vega_mag - 2.5 * np.log10(flux_random / zp_flux)
 
-            error_app_mag = np.std(mag_random)
+                error_app_mag = np.std(mag_random)
 
         elif error is not None and np.any(np.isnan(error)):
             warnings.warn("Spectum contains NaN so can not calculate the error.")
@@ -452,3 +628,165 @@ class SyntheticPhotometry:
             )
 
         return (app_mag, error_app_mag), (abs_mag, error_abs_mag)
+
+
+class MultiFilterPhotometry:
+    """
+    Class for calculating synthetic photometry for multiple filters at once. The transmission
+    profiles of all filters are interpolated once onto the wavelength sampling of the spectrum
+    and combined into a sparse matrix with the integration weights, such that the synthetic
+    fluxes for all filters are obtained with a single matrix product.
+    """
+
+    @typechecked
+    def __init__(self, filter_names: List[str]) -> None:
+        """
+        Parameters
+        ----------
+        filter_names : list(str)
+            List with the filter names as listed in the database. Filters from the SVO Filter
+            Profile Service are automatically downloaded and added to the database.
+
+        Returns
+        -------
+        NoneType
+            None
+        """
+
+        self.filter_names = filter_names
+
+        self.synphot = []
+        self.wavel_range = []
+
+        for item in self.filter_names:
+            synphot = SyntheticPhotometry(item)
+
+            self.synphot.append(synphot)
+            self.wavel_range.append(synphot.wavel_range)
+
+        # The weight matrix is stored together with the wavelengths
+        # for which it was calculated, such that it is reused when
+        # spectra with the same wavelength sampling are provided
+
+        self.wavelength = None
+        self.weights = None
+        self.threshold = None
+        self.nan_filter = None
+
+    @typechecked
+    def wavelength_range(self) -> Tuple[float, float]:
+        """
+        Function for returning the wavelength range that is covered by all filters.
+
+        Returns
+        -------
+        tuple(float, float)
+            Minimum and maximum wavelength (um).
+        """
+
+        wavel_min = min(item[0] for item in self.wavel_range)
+        wavel_max = max(item[1] for item in self.wavel_range)
+
+        return float(wavel_min), float(wavel_max)
+
+    @typechecked
+    def weight_matrix(
+        self, wavelength: np.ndarray, threshold: Optional[float] = 0.05
+    ) -> Tuple[sparse.csr_matrix, np.ndarray]:
+        """
+        Function for calculating the sparse matrix with the weights of the filter integrals.
+        The matrix is only recalculated if the wavelength sampling or the threshold is
+        different from the previous call.
+
+        Parameters
+        ----------
+        wavelength : np.ndarray
+            Wavelength points (um).
+        threshold : float, None
+            Transmission threshold (value between 0 and 1). See
+            :func:`~species.analysis.photometry.SyntheticPhotometry.spectrum_to_flux`.
+
+        Returns
+        -------
+        scipy.sparse.csr_matrix
+            Matrix with the weights, with shape ``(n_filters, n_wavel)``.
+        np.ndarray
+            Booleans that indicate for which filters the synthetic flux can not be calculated
+            with the wavelength sampling.
+        """
+
+        if (
+            self.weights is None
+            or self.threshold != threshold
+            or not np.array_equal(self.wavelength, wavelength)
+        ):
+            rows = []
+            columns = []
+            values = []
+
+            self.nan_filter = np.zeros(len(self.filter_names), dtype=bool)
+
+            for i, item in enumerate(self.synphot):
+                filter_weights = item.flux_weights(wavelength, threshold=threshold)
+
+                if filter_weights is None:
+                    self.nan_filter[i] = True
+
+                else:
+                    rows.append(np.full(filter_weights[0].size, i))
+                    columns.append(filter_weights[0])
+                    values.append(filter_weights[1])
+
+            if len(values) > 0:
+                rows = np.concatenate(rows)
+                columns = np.concatenate(columns)
+                values = np.concatenate(values)
+
+            self.weights = sparse.csr_matrix(
+                (values, (rows, columns)),
+                shape=(len(self.filter_names), wavelength.size),
+            )
+
+            self.wavelength = wavelength.copy()
+            self.threshold = threshold
+
+        return self.weights, self.nan_filter
+
+    @typechecked
+    def spectrum_to_flux(
+        self,
+        wavelength: np.ndarray,
+        flux: np.ndarray,
+        threshold: Optional[float] = 0.05,
+    ) -> np.ndarray:
+        """
+        Function for calculating the average fluxes for all filters from a spectrum or a batch
+        of spectra that are sampled at the same wavelengths.
+
+        Parameters
+        ----------
+        wavelength : np.ndarray
+            Wavelength points (um).
+        flux : np.ndarray
+            Flux (W m-2 um-1), either a 1D array with a single spectrum or a 2D array with
+            shape ``(n_spectra, n_wavel)``.
+        threshold : float, None
+            Transmission threshold (value between 0 and 1). If the minimum transmission value is
+            larger than the threshold, a NaN is returned for the filter. This will happen if the
+            input spectrum does not cover the full wavelength range of the filter profile. Not
+            used if set to ``None``.
+
+        Returns
+        -------
+        np.ndarray
+            Average fluxes (W m-2 um-1), with shape ``(n_filters,)`` for a single spectrum or
+            ``(n_spectra, n_filters)`` for a batch of spectra. The fluxes are in the same order
+            as ``filter_names``.
+        """
+
+        weights, nan_filter = self.weight_matrix(wavelength, threshold=threshold)
+
+        syn_flux = np.asarray(weights.dot(flux.T).T, dtype=np.float64)
+        syn_flux[..., nan_filter] = np.nan
+
+        return syn_flux
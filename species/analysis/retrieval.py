@@ -36,7 +36,7 @@ from species.analysis import photometry
 from species.core import constants
 from species.data import database
 from species.read import read_filter, read_object
-from species.util import dust_util, read_util, retrieval_util
+from species.util import cov_util, dust_util, perf_util, read_util, retrieval_util
 
 
 os.environ["OMP_NUM_THREADS"] = "1"
@@ -921,11 +921,17 @@ class AtmosphericRetrieval:
         if fit_corr is None:
             fit_corr = []
 
+        # Squared wavelength distances for the covariance model, which
+        # are not affected by the wavelength calibration parameters
+        wavel_dist = {}
+
         for item in self.spectrum:
             if item in fit_corr:
                 bounds[f"corr_len_{item}"] = (-3.0, 0.0)  # log10(corr_len/um)
                 bounds[f"corr_amp_{item}"] = (0.0, 1.0)
 
+                wavel_dist[item] = cov_util.wavel_distance(self.spectrum[item][0][:, 0])
+
         # List with spectra that will be used for a
         # cross-correlation instead of least-squares
 
@@ -1093,7 +1099,7 @@ class AtmosphericRetrieval:
         else:
             knot_press = None
 
-        @typechecked
+        @perf_util.hot_path
         def prior_func(cube, n_dim: int, n_param: int) -> None:
             """
             Function to transform the sampled unit cube into a
@@ -1794,7 +1800,7 @@ class AtmosphericRetrieval:
                     * cube[cube_index["mix_length"]]
                 )
 
-        @typechecked
+        @perf_util.hot_path
         def loglike_func(cube, n_dim: int, n_param: int) -> float:
             """
             Function for calculating the log-likelihood function
@@ -2890,25 +2896,22 @@ class AtmosphericRetrieval:
                     weight = self.weights[item]
 
                     if self.spectrum[item][2] is not None:
-                        # Use the inverted covariance matrix
-
                         if err_offset[item] is None:
+                            # Use the inverted covariance matrix
                             data_cov_inv = self.spectrum[item][2]
+                            dot_tmp = np.dot(flux_diff, np.dot(data_cov_inv, flux_diff))
 
                         else:
                             # Ratio of the inflated and original uncertainties
                             sigma_ratio = (
                                 np.sqrt(data_var) / self.spectrum[item][0][:, 2]
                             )
-                            sigma_j, sigma_i = np.meshgrid(sigma_ratio, sigma_ratio)
 
-                            # Calculate the inversion of the infalted covariances
-                            data_cov_inv = np.linalg.inv(
-                                self.spectrum[item][1] * sigma_i * sigma_j
+                            # Chi-square with the rescaled covariance matrix
+                            dot_tmp = cov_util.chi_squared(
+                                flux_diff, self.spectrum[item][1], sigma_ratio
                             )
 
-                        # Use the inverted covariance matrix
-                        dot_tmp = np.dot(flux_diff, np.dot(data_cov_inv, flux_diff))
                         ln_like += -0.5 * weight * dot_tmp - 0.5 * weight * np.nansum(
                             np.log(2.0 * np.pi * data_var)
                         )
@@ -2916,26 +2919,12 @@ class AtmosphericRetrieval:
                     else:
                         if item in fit_corr:
                             # Covariance model (Wang et al. 2020)
-                            wavel_j, wavel_i = np.meshgrid(data_wavel, data_wavel)
-
-                            error = np.sqrt(data_var)  # (W m-2 um-1)
-                            error_j, error_i = np.meshgrid(error, error)
-
-                            cov_matrix = (
-                                corr_amp[item] ** 2
-                                * error_i
-                                * error_j
-                                * np.exp(
-                                    -((wavel_i - wavel_j) ** 2)
-                                    / (2.0 * corr_len[item] ** 2)
-                                )
-                                + (1.0 - corr_amp[item] ** 2)
-                                * np.eye(data_wavel.shape[0])
-                                * error_i ** 2
-                            )
-
-                            dot_tmp = np.dot(
-                                flux_diff, np.dot(np.linalg.inv(cov_matrix), flux_diff)
+                            dot_tmp = cov_util.gp_chi_squared(
+                                flux_diff,
+                                np.sqrt(data_var),
+                                wavel_dist[item],
+                                corr_len[item],
+                                corr_amp[item],
                             )
 
                             ln_like += (
@@ -11,6 +11,8 @@ import urllib.request
 import h5py
 import species
 
+from species.util import cache_util, perf_util
+
 
 class SpeciesInit:
     """
@@ -69,6 +71,19 @@ class SpeciesInit:
         database_file = os.path.abspath(config["species"]["database"])
         data_folder = os.path.abspath(config["species"]["data_folder"])
 
+        # Close file handles and remove cached data from a previously
+        # used database, which may have been replaced in the meantime
+        cache_util.invalidate()
+
+        # Optionally skip the type checking of the hot-path functions
+
+        performance_mode = config["species"].getboolean(
+            "performance_mode", fallback=None
+        )
+
+        if performance_mode is not None:
+            perf_util.set_performance_mode(performance_mode)
+
         print(f"Database: {database_file}")
         print(f"Data folder: {data_folder}")
         print(f"Working folder: {working_folder}")
@@ -8,7 +8,7 @@ import os
 import pathlib
 import warnings
 
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import emcee
 import h5py
@@ -16,7 +16,6 @@ import numpy as np
 import tqdm
 
 from astropy.io import fits
-from scipy.integrate import simps
 from typeguard import typechecked
 
 from species.analysis import photometry
@@ -44,7 +43,7 @@ from species.read import (
     read_planck,
     read_radtrans,
 )
-from species.util import data_util, dust_util, read_util, retrieval_util
+from species.util import cache_util, data_util, dust_util, read_util, retrieval_util
 
 
 class Database:
@@ -69,6 +68,11 @@ class Database:
         self.database = config["species"]["database"]
         self.input_path = config["species"]["data_folder"]
 
+        # Optional compression filter ('gzip' or 'lzf') of the posterior samples
+        self.sample_compression = config["species"].get(
+            "sample_compression", fallback=None
+        )
+
     @typechecked
     def list_content(self) -> None:
         """
@@ -241,7 +245,7 @@ class Database:
             None
         """
 
-        with h5py.File(self.database, "a") as hdf_file:
+        with cache_util.open_writable(self.database) as hdf_file:
             if data_set in hdf_file:
                 print(f"Deleting data: {data_set}...", end="", flush=True)
                 del hdf_file[data_set]
@@ -330,7 +334,7 @@ class Database:
             None
         """
 
-        h5_file = h5py.File(self.database, "a")
+        h5_file = cache_util.open_writable(self.database)
 
         if "dust" in h5_file:
             del h5_file["dust"]
@@ -391,7 +395,7 @@ class Database:
 
         filter_split = filter_name.split("/")
 
-        h5_file = h5py.File(self.database, "a")
+        h5_file = cache_util.open_writable(self.database)
 
         if f"filters/{filter_name}" in h5_file:
             del h5_file[f"filters/{filter_name}"]
@@ -456,7 +460,7 @@ class Database:
             None
         """
 
-        h5_file = h5py.File(self.database, "a")
+        h5_file = cache_util.open_writable(self.database)
 
         if "isochrones" not in h5_file:
             h5_file.create_group("isochrones")
@@ -522,7 +526,7 @@ class Database:
             None
         """
 
-        with h5py.File(self.database, "a") as h5_file:
+        with cache_util.open_writable(self.database) as h5_file:
             if "models" not in h5_file:
                 h5_file.create_group("models")
 
@@ -593,7 +597,7 @@ class Database:
             None
         """
 
-        h5_file = h5py.File(self.database, "a")
+        h5_file = cache_util.open_writable(self.database)
 
         if deredden is None:
             deredden = {}
@@ -1131,7 +1135,7 @@ class Database:
             None
         """
 
-        h5_file = h5py.File(self.database, "a")
+        h5_file = cache_util.open_writable(self.database)
 
         if "photometry" not in h5_file:
             h5_file.create_group("photometry")
@@ -1199,7 +1203,7 @@ class Database:
         if scaling is None:
             scaling = (1.0, 1.0)
 
-        h5_file = h5py.File(self.database, "a")
+        h5_file = cache_util.open_writable(self.database)
 
         if "spectra/calibration" not in h5_file:
             h5_file.create_group("spectra/calibration")
@@ -1279,7 +1283,7 @@ class Database:
             "use the add_spectra method instead."
         )
 
-        h5_file = h5py.File(self.database, "a")
+        h5_file = cache_util.open_writable(self.database)
 
         if "spectra" not in h5_file:
             h5_file.create_group("spectra")
@@ -1289,6 +1293,7 @@ class Database:
 
         if spec_library[0:5] == "vega":
             vega.add_vega(self.input_path, h5_file)
+            self._remove_zero_points(h5_file)
 
         elif spec_library[0:5] == "irtf":
             irtf.add_irtf(self.input_path, h5_file, sptypes)
@@ -1307,6 +1312,37 @@ class Database:
 
         h5_file.close()
 
+    @staticmethod
+    @typechecked
+    def _remove_zero_points(h5_file: h5py._hl.files.File) -> None:
+        """
+        Internal function for removing the zero points that are
+        stored with the filter profiles. This is required when the
+        spectrum of Vega is replaced, since the zero points were
+        calculated with the previous spectrum.
+
+        Parameters
+        ----------
+        h5_file : h5py._hl.files.File
+            The HDF5 database with write access.
+
+        Returns
+        -------
+        NoneType
+            None
+        """
+
+        if "filters" in h5_file:
+            filter_names = []
+            h5_file["filters"].visit(filter_names.append)
+
+            for item in filter_names:
+                dset = h5_file[f"filters/{item}"]
+
+                for det_type in ["energy", "photon"]:
+                    if f"zero_point_{det_type}" in dset.attrs:
+                        del dset.attrs[f"zero_point_{det_type}"]
+
     @typechecked
     def add_spectra(
         self, spec_library: str, sptypes: Optional[List[str]] = None
@@ -1325,7 +1361,7 @@ class Database:
             None
         """
 
-        h5_file = h5py.File(self.database, "a")
+        h5_file = cache_util.open_writable(self.database)
 
         if "spectra" not in h5_file:
             h5_file.create_group("spectra")
@@ -1335,6 +1371,7 @@ class Database:
 
         if spec_library[0:5] == "vega":
             vega.add_vega(self.input_path, h5_file)
+            self._remove_zero_points(h5_file)
 
         elif spec_library[0:5] == "irtf":
             irtf.add_irtf(self.input_path, h5_file, sptypes)
@@ -1408,7 +1445,7 @@ class Database:
         if spec_labels is None:
             spec_labels = []
 
-        h5_file = h5py.File(self.database, "a")
+        h5_file = cache_util.open_writable(self.database)
 
         if "results" not in h5_file:
             h5_file.create_group("results")
@@ -1419,7 +1456,13 @@ class Database:
         if f"results/fit/{tag}" in h5_file:
             del h5_file[f"results/fit/{tag}"]
 
-        dset = h5_file.create_dataset(f"results/fit/{tag}/samples", data=samples)
+        dset = data_util.create_samples(
+            h5_file,
+            f"results/fit/{tag}/samples",
+            samples,
+            compression=self.sample_compression,
+        )
+
         h5_file.create_dataset(f"results/fit/{tag}/ln_prob", data=ln_prob)
 
         dset.attrs["type"] = str(spectrum[0])
@@ -1620,7 +1663,7 @@ class Database:
             Dictionary with the best-fit parameters.
         """
 
-        with h5py.File(self.database, "a") as h5_file:
+        with cache_util.open_writable(self.database) as h5_file:
             dset = h5_file[f"results/comparison/{tag}/goodness_of_fit"]
 
             n_param = dset.attrs["n_param"]
@@ -1780,6 +1823,101 @@ class Database:
 
         boxes = []
 
+        if spectrum_type == "model" and spectrum_name not in ["planck", "powerlaw"]:
+            # Interpolate and process all spectra at once
+
+            param_select = []
+            for item in param:
+                if item not in ignore_param:
+                    param_select.append(item)
+
+            samples_select = samples[:, [param.index(item) for item in param_select]]
+
+            if "distance" not in param_select and distance is not None:
+                param_select.append("distance")
+                samples_select = np.column_stack(
+                    (samples_select, np.full(samples_select.shape[0], distance))
+                )
+
+            if binary:
+                flux_binary = []
+
+                for star_index in [0, 1]:
+                    # Use the column indices as values to select the columns
+                    param_star = read_util.binary_to_single(
+                        {key: float(i) for i, key in enumerate(param_select)},
+                        star_index,
+                    )
+
+                    wavel_batch, flux_star = readmodel.get_model_batch(
+                        samples_select[:, [int(i) for i in param_star.values()]],
+                        list(param_star.keys()),
+                        spec_res=spec_res,
+                        wavel_resample=wavel_resample,
+                        smooth=True,
+                    )
+
+                    flux_binary.append(flux_star)
+
+                spec_weight = samples_select[:, param_select.index("spec_weight")]
+
+                flux_batch = (
+                    spec_weight[:, np.newaxis] * flux_binary[0]
+                    + (1.0 - spec_weight[:, np.newaxis]) * flux_binary[1]
+                )
+
+            else:
+                wavel_batch, flux_batch = readmodel.get_model_batch(
+                    samples_select,
+                    param_select,
+                    spec_res=spec_res,
+                    wavel_resample=wavel_resample,
+                    smooth=True,
+                )
+
+            for i in range(samples_select.shape[0]):
+                model_param = dict(zip(param_select, samples_select[i, :]))
+
+                if not binary and "radius" in model_param:
+                    model_param["luminosity"] = (
+                        4.0
+                        * np.pi
+                        * (model_param["radius"] * constants.R_JUP) ** 2
+                        * constants.SIGMA_SB
+                        * model_param["teff"] ** 4.0
+                        / constants.L_SUN
+                    )  # (Lsun)
+
+                    if "disk_teff" in model_param and "disk_radius" in model_param:
+                        model_param["luminosity"] += (
+                            4.0
+                            * np.pi
+                            * (model_param["disk_radius"] * constants.R_JUP) ** 2
+                            * constants.SIGMA_SB
+                            * model_param["disk_teff"] ** 4.0
+                            / constants.L_SUN
+                        )  # (Lsun)
+
+                    if "logg" in model_param:
+                        model_param["mass"] = read_util.get_mass(
+                            model_param["logg"], model_param["radius"]
+                        )
+
+                specbox = box.create_box(
+                    boxtype="model",
+                    model=spectrum_name,
+                    wavelength=wavel_batch,
+                    flux=flux_batch[i, :],
+                    parameters=model_param,
+                    quantity="flux",
+                )
+
+                boxes.append(specbox)
+
+            h5_file.close()
+
+            return boxes
+
         for i in tqdm.tqdm(range(samples.shape[0]), desc="Getting MCMC spectra"):
             model_param = {}
             for j in range(samples.shape[1]):
@@ -1807,48 +1945,6 @@ class Database:
 
                     specbox = read_util.powerlaw_spectrum(wavel_range, model_param)
 
-                else:
-                    if binary:
-                        param_0 = read_util.binary_to_single(model_param, 0)
-
-                        specbox_0 = readmodel.get_model(
-                            param_0,
-                            spec_res=spec_res,
-                            wavel_resample=wavel_resample,
-                            smooth=True,
-                        )
-
-                        param_1 = read_util.binary_to_single(model_param, 1)
-
-                        specbox_1 = readmodel.get_model(
-                            param_1,
-                            spec_res=spec_res,
-                            wavel_resample=wavel_resample,
-                            smooth=True,
-                        )
-
-                        flux_comb = (
-                            model_param["spec_weight"] * specbox_0.flux
-                            + (1.0 - model_param["spec_weight"]) * specbox_1.flux
-                        )
-
-                        specbox = box.create_box(
-                            boxtype="model",
-                            model=spectrum_name,
-                            wavelength=specbox_0.wavelength,
-                            flux=flux_comb,
-                            parameters=model_param,
-                            quantity="flux",
-                        )
-
-                    else:
-                        specbox = readmodel.get_model(
-                            model_param,
-                            spec_res=spec_res,
-                            wavel_resample=wavel_resample,
-                            smooth=True,
-                        )
-
             elif spectrum_type == "calibration":
                 specbox = readcalib.get_spectrum(model_param)
 
@@ -1862,9 +1958,10 @@ class Database:
     def get_mcmc_photometry(
         self,
         tag: str,
-        filter_name: str,
+        filter_name: Union[str, List[str]],
         burnin: Optional[int] = None,
         phot_type: str = "magnitude",
+        vectorize: bool = False,
     ) -> np.ndarray:
         """
         Function for calculating synthetic magnitudes or fluxes from the posterior samples.
@@ -1873,18 +1970,26 @@ class Database:
         ----------
         tag : str
             Database tag with the posterior samples.
-        filter_name : str
-            Filter name for which the synthetic photometry will be computed.
+        filter_name : str, list(str)
+            Filter name for which the synthetic photometry will be computed. A list with
+            filter names can be used for computing the synthetic photometry of multiple
+            filters.
         burnin : int, None
             Number of burnin steps. No burnin is removed if set to ``None``. Not required when
             using nested sampling.
         phot_type : str
             Photometry type ('magnitude' or 'flux').
+        vectorize : bool
+            Calculate the synthetic photometry of all samples at once with
+            :func:`~species.read.read_model.ReadModel.get_flux_batch` instead of
+            calculating a spectrum for each sample. Only supported for posterior samples of
+            a model grid. Samples outside the grid boundaries result in a NaN.
 
         Returns
         -------
         np.ndarray
-            Synthetic magnitudes or fluxes (W m-2 um-1).
+            Synthetic magnitudes or fluxes (W m-2 um-1), with shape ``(n_samples,)``, or
+            shape ``(n_filters, n_samples)`` if ``filter_name`` is a list.
         """
 
         if phot_type not in ["magnitude", "flux"]:
@@ -1893,6 +1998,22 @@ class Database:
                 "set to 'magnitude' or 'flux'."
             )
 
+        if isinstance(filter_name, list):
+            mcmc_phot = []
+
+            for item in filter_name:
+                mcmc_phot.append(
+                    self.get_mcmc_photometry(
+                        tag,
+                        item,
+                        burnin=burnin,
+                        phot_type=phot_type,
+                        vectorize=vectorize,
+                    )
+                )
+
+            return np.array(mcmc_phot)
+
         if burnin is None:
             burnin = 0
 
@@ -1935,6 +2056,66 @@ class Database:
 
         h5_file.close()
 
+        if vectorize and spectrum_type == "model" and spectrum_name != "powerlaw":
+            readmodel = read_model.ReadModel(spectrum_name, filter_name=filter_name)
+
+            if distance is not None and "distance" not in param:
+                samples = np.column_stack(
+                    (samples, np.full(samples.shape[0], distance))
+                )
+                param.append("distance")
+
+            if binary:
+                star_index = [0, 1]
+            else:
+                star_index = [None]
+
+            phot_star = []
+
+            for item in star_index:
+                # Select the columns with the parameters of the star,
+                # without the suffix of the parameters of a binary
+
+                if item is None:
+                    param_names = param
+                    param_index = list(range(len(param)))
+
+                else:
+                    param_names, param_index = read_util.binary_param_index(
+                        param, item
+                    )
+
+                star_param = []
+                star_samples = []
+
+                for param_name, i in zip(param_names, param_index):
+                    if (
+                        param_name in readmodel.get_parameters()
+                        or param_name in readmodel.extra_param
+                    ):
+                        star_param.append(param_name)
+                        star_samples.append(samples[:, i])
+
+                star_samples = np.column_stack(star_samples)
+
+                if phot_type == "magnitude":
+                    app_mag, _ = readmodel.get_magnitude_batch(star_samples, star_param)
+
+                    if app_mag is None:
+                        app_mag = np.full(samples.shape[0], np.nan)
+
+                    phot_star.append(app_mag)
+
+                elif phot_type == "flux":
+                    phot_star.append(readmodel.get_flux_batch(star_samples, star_param))
+
+            if binary:
+                spec_weight = samples[:, param.index("spec_weight")]
+
+                return spec_weight * phot_star[0] + (1.0 - spec_weight) * phot_star[1]
+
+            return phot_star[0]
+
         if spectrum_type == "model":
             if spectrum_name == "powerlaw":
                 synphot = photometry.SyntheticPhotometry(filter_name)
@@ -2134,6 +2315,7 @@ class Database:
         burnin: Optional[int] = None,
         random: Optional[int] = None,
         json_file: Optional[str] = None,
+        columns: Optional[List[str]] = None,
     ) -> box.SamplesBox:
         """
         Parameters
@@ -2152,6 +2334,12 @@ class Database:
         json_file : str, None
             JSON file to store the posterior samples. The data will
             not be written if the argument is set to ``None``.
+        columns : list(str), None
+            Names of the parameters that are selected. Only these
+            parameters are read from the database and included in
+            the attributes, median sample, and most probable sample
+            of the box. All parameters are selected if set to
+            ``None``.
 
         Returns
         -------
@@ -2183,29 +2371,46 @@ class Database:
             # For backward compatibility
             ln_evidence = None
 
-        samples = np.asarray(dset)
+        param = []
+        for i in range(n_param):
+            param.append(dset.attrs[f"parameter{i}"])
 
-        if samples.ndim == 3:
-            if burnin > samples.shape[0]:
+        if columns is None:
+            col_index = None
+
+        else:
+            for item in columns:
+                if item not in param:
+                    raise ValueError(
+                        f"The '{item}' parameter is not found in the samples of "
+                        f"'{tag}'. The available parameters are {param}."
+                    )
+
+            col_index = [param.index(item) for item in columns]
+            param = list(columns)
+
+        # Only the selected samples and parameters are read from the dataset
+
+        if dset.ndim == 3:
+            if burnin > dset.shape[0]:
                 raise ValueError(
                     f"The 'burnin' value is larger than the number of steps "
-                    f"({samples.shape[1]}) that are made by the walkers."
+                    f"({dset.shape[1]}) that are made by the walkers."
                 )
 
-            samples = samples[burnin:, :, :]
+            samples = data_util.read_samples(dset, columns=col_index, start=burnin)
 
             if random is not None:
                 ran_walker = np.random.randint(samples.shape[0], size=random)
                 ran_step = np.random.randint(samples.shape[1], size=random)
                 samples = samples[ran_walker, ran_step, :]
 
-        elif samples.ndim == 2 and random is not None:
-            indices = np.random.randint(samples.shape[0], size=random)
-            samples = samples[indices, :]
+        elif dset.ndim == 2 and random is not None:
+            indices = np.random.randint(dset.shape[0], size=random)
+            samples = data_util.read_samples(dset, rows=indices, columns=col_index)
 
-        param = []
-        for i in range(n_param):
-            param.append(dset.attrs[f"parameter{i}"])
+        else:
+            samples = data_util.read_samples(dset, columns=col_index)
 
         h5_file.close()
 
@@ -2216,6 +2421,30 @@ class Database:
 
         median_sample = self.get_median_sample(tag, burnin)
 
+        if columns is not None:
+            # Only describe the selected parameters, such that the
+            # attributes and parameters of the box are consistent
+
+            for i in range(n_param):
+                del attributes[f"parameter{i}"]
+
+            for i, item in enumerate(param):
+                attributes[f"parameter{i}"] = item
+
+            if "n_param" in attributes:
+                attributes["n_param"] = len(param)
+            else:
+                attributes["nparam"] = len(param)
+
+            median_sample = {
+                key: value for key, value in median_sample.items() if key in param
+            }
+
+            if prob_sample is not None:
+                prob_sample = {
+                    key: value for key, value in prob_sample.items() if key in param
+                }
+
         if json_file is not None:
             samples_dict = {}
 
@@ -2329,12 +2558,7 @@ class Database:
 
         samples = np.asarray(dset)
 
-        if random is None:
-            n_profiles = samples.shape[0]
-
-        else:
-            n_profiles = random
-
+        if random is not None:
             indices = np.random.randint(samples.shape[0], size=random)
             samples = samples[indices, :]
 
@@ -2346,66 +2570,26 @@ class Database:
 
         press = np.logspace(-6, 3, 180)  # (bar)
 
-        temp = np.zeros((press.shape[0], n_profiles))
-
-        desc = f"Extracting the P-T profiles of {tag}"
-
-        for i in tqdm.tqdm(range(samples.shape[0]), desc=desc):
-            item = samples[i, :]
-
-            if pt_profile == "molliere":
-                three_temp = np.array(
-                    [
-                        item[param_index["t1"]],
-                        item[param_index["t2"]],
-                        item[param_index["t3"]],
-                    ]
-                )
-
-                temp[:, i], _, _ = retrieval_util.pt_ret_model(
-                    three_temp,
-                    10.0 ** item[param_index["log_delta"]],
-                    item[param_index["alpha"]],
-                    item[param_index["tint"]],
-                    press,
-                    item[param_index["metallicity"]],
-                    item[param_index["c_o_ratio"]],
-                )
-
-            elif pt_profile == "mod-molliere":
-                temp[:, i], _, _ = retrieval_util.pt_ret_model(
-                    None,
-                    10.0 ** item[param_index["log_delta"]],
-                    item[param_index["alpha"]],
-                    item[param_index["tint"]],
-                    press,
-                    item[param_index["metallicity"]],
-                    item[param_index["c_o_ratio"]],
-                )
-
-            elif pt_profile == "eddington":
-                # Eddington approximation
-                # delta = kappa_ir/gravity
-                tau = press * 1e6 * 10.0 ** item[param_index["log_delta"]]
-                temp[:, i] = (0.75 * item[param_index["tint"]] ** 4.0 * (2.0 / 3.0 + tau)) ** 0.25
-
-            elif pt_profile in ["free", "monotonic"]:
-                if "pt_smooth" in param_index:
-                    pt_smooth = item[param_index["pt_smooth"]]
-                else:
-                    pt_smooth = 0.0
+        if pt_profile in ["free", "monotonic"]:
+            knot_press = np.logspace(np.log10(press[0]), np.log10(press[-1]), 15)
+        else:
+            knot_press = None
 
-                knot_press = np.logspace(np.log10(press[0]), np.log10(press[-1]), 15)
+        print(f"Extracting the P-T profiles of {tag}...", end="", flush=True)
 
-                knot_temp = []
-                for j in range(15):
-                    knot_temp.append(item[param_index[f"t{i}"]])
+        temp, _, _ = retrieval_util.pt_profile_batch(
+            samples,
+            param_index,
+            pt_profile,
+            press,
+            knot_press=knot_press,
+            pt_smooth=0.0,
+        )
 
-                knot_temp = np.asarray(knot_temp)
+        print(" [DONE]")
 
-                temp[:, j] = retrieval_util.pt_spline_interp(
-                    knot_press, knot_temp, press, pt_smooth
-                )
+        # Array with shape (n_pressures, n_samples)
+        temp = np.transpose(temp)
 
         if out_file is not None:
             data = np.hstack([press[..., np.newaxis], temp])
@@ -2465,7 +2649,7 @@ class Database:
             None
         """
 
-        with h5py.File(self.database, "a") as h5_file:
+        with cache_util.open_writable(self.database) as h5_file:
 
             if "results" not in h5_file:
                 h5_file.create_group("results")
@@ -2556,7 +2740,7 @@ class Database:
         read_obj = read_object.ReadObject(object_name)
         distance = read_obj.get_distance()[0]  # (pc)
 
-        with h5py.File(self.database, "a") as h5_file:
+        with cache_util.open_writable(self.database) as h5_file:
 
             if "results" not in h5_file:
                 h5_file.create_group("results")
@@ -2615,7 +2799,7 @@ class Database:
                 dset.attrs[f"best_param{i}"] = best_param
                 print(f"   - {item} = {best_param}")
 
-            scaling = flux_scaling[best_index[0], best_index[1], best_index[2]]
+            scaling = flux_scaling[best_index]
 
             radius = np.sqrt(scaling * (distance * constants.PARSEC) ** 2)  # (m)
             radius /= constants.R_JUP  # (Rjup)
@@ -2627,15 +2811,17 @@ class Database:
             print(f"   - Scaling = {scaling:.2e}")
 
             for i, item in enumerate(scale_spec):
-                scale_tmp = (
-                    scaling
-                    / extra_scaling[best_index[0], best_index[1], best_index[2], i]
-                )
+                scale_tmp = scaling / extra_scaling[best_index + (i,)]
                 print(f"   - {item} scaling = {scale_tmp:.2e}")
                 dset.attrs[f"scaling_{item}"] = scale_tmp
 
     def add_retrieval(
-        self, tag: str, output_folder: str, inc_teff: bool = False
+        self,
+        tag: str,
+        output_folder: str,
+        inc_teff: bool = False,
+        processes: int = 1,
+        forward_model: Optional[Callable] = None,
     ) -> None:
         """
         Function for adding the output data from
@@ -2658,6 +2844,17 @@ class Database:
             computation time for adding :math:`T_\\mathrm{eff}` will
             be long because the spectra need to be calculated and
             integrated for all samples.
+        processes : int
+            Number of worker processes over which the samples are
+            distributed when ``inc_teff=True``. The :math:`T_\\mathrm{eff}`
+            values are stored in the database while the remaining
+            spectra are calculated. The spectra are calculated in the
+            main process if set to 1.
+        forward_model : callable, None
+            Class that is used instead of
+            :class:`~species.read.read_radtrans.ReadRadtrans` for
+            calculating the spectra when ``inc_teff=True``. Not used
+            if set to ``None``.
 
         Returns
         -------
@@ -2700,7 +2897,7 @@ class Database:
                 np.newaxis,
             ]
 
-        with h5py.File(self.database, "a") as h5_file:
+        with cache_util.open_writable(self.database) as h5_file:
 
             if "results" not in h5_file:
                 h5_file.create_group("results")
@@ -2723,7 +2920,12 @@ class Database:
                     "of the samples array."
                 )
 
-            dset = h5_file.create_dataset(f"results/fit/{tag}/samples", data=samples)
+            dset = data_util.create_samples(
+                h5_file,
+                f"results/fit/{tag}/samples",
+                samples,
+                compression=self.sample_compression,
+            )
 
             dset.attrs["type"] = "model"
             dset.attrs["spectrum"] = "petitradtrans"
@@ -2791,11 +2993,44 @@ class Database:
         elif radtrans["pressure_grid"] == "clouds":
             n_pressures = 1440
 
+        # Calculate the P-T profiles of all samples at once, which are
+        # required for the cloud mass fractions and quenching pressures
+
+        pressure = np.logspace(-6, 3, n_pressures)  # (bar)
+
+        cloud_tau = [
+            f"{item[:-6].lower()}_tau" in parameters
+            for item in radtrans["cloud_species"]
+        ]
+
+        if any(cloud_tau) or radtrans["quenching"] == "diffusion":
+            param_index = {item: i for i, item in enumerate(parameters)}
+
+            if radtrans["pt_profile"] in ["free", "monotonic"]:
+                knot_press = np.logspace(
+                    np.log10(pressure[0]), np.log10(pressure[-1]), 15
+                )
+
+            else:
+                knot_press = None
+
+            print("Calculating the P-T profiles...", end="", flush=True)
+
+            temp_samples, _, _ = retrieval_util.pt_profile_batch(
+                samples,
+                param_index,
+                radtrans["pt_profile"],
+                pressure,
+                knot_press=knot_press,
+                pt_smooth=radtrans.get("pt_smooth", 0.3),
+            )
+
+            print(" [DONE]")
+
         rt_object = None
 
         for i, cloud_item in enumerate(radtrans["cloud_species"]):
-            if f"{cloud_item[:-6].lower()}_tau" in parameters:
-                pressure = np.logspace(-6, 3, n_pressures)
+            if cloud_tau[i]:
                 cloud_mass = np.zeros(samples.shape[0])
 
                 if rt_object is None:
@@ -2841,38 +3076,7 @@ class Database:
                         ],
                     )
 
-                    if radtrans["pt_profile"] == "molliere":
-                        upper_temp = np.array(
-                            [sample_dict["t1"], sample_dict["t2"], sample_dict["t3"]]
-                        )
-
-                        temp, _, _ = retrieval_util.pt_ret_model(
-                            upper_temp,
-                            10.0 ** sample_dict["log_delta"],
-                            sample_dict["alpha"],
-                            sample_dict["tint"],
-                            pressure,
-                            sample_dict["metallicity"],
-                            sample_dict["c_o_ratio"],
-                        )
-
-                    elif (radtrans["pt_profile"] == "free" or
-                          radtrans["pt_profile"] == "monotonic"):
-                        knot_press = np.logspace(
-                            np.log10(pressure[0]), np.log10(pressure[-1]), 15
-                        )
-
-                        knot_temp = []
-                        for k in range(15):
-                            knot_temp.append(sample_dict[f"t{k}"])
-
-                        knot_temp = np.asarray(knot_temp)
-
-                        pt_smooth = sample_dict.get("pt_smooth", radtrans["pt_smooth"])
-
-                        temp = retrieval_util.pt_spline_interp(
-                            knot_press, knot_temp, pressure, pt_smooth=pt_smooth
-                        )
+                    temp = temp_samples[j]
 
                     # Set the quenching pressure (bar)
 
@@ -2906,24 +3110,14 @@ class Database:
 
                 db_tag = f"results/fit/{tag}/samples"
 
-                with h5py.File(self.database, "a") as h5_file:
-                    dset_attrs = h5_file[db_tag].attrs
-
-                    samples = np.asarray(h5_file[db_tag])
-                    samples = np.append(samples, cloud_mass[..., np.newaxis], axis=1)
-
-                    del h5_file[db_tag]
-                    dset = h5_file.create_dataset(db_tag, data=samples)
-
-                    for attr_item in dset_attrs:
-                        dset.attrs[attr_item] = dset_attrs[attr_item]
-
-                    n_param = dset_attrs["n_param"] + 1
-
-                    dset.attrs["n_param"] = n_param
-                    dset.attrs[
-                        f"parameter{n_param-1}"
-                    ] = f"{cloud_item[:-6].lower()}_fraction"
+                with cache_util.open_writable(self.database) as h5_file:
+                    data_util.append_samples(
+                        h5_file,
+                        db_tag,
+                        cloud_mass,
+                        f"{cloud_item[:-6].lower()}_fraction",
+                        compression=self.sample_compression,
+                    )
 
         if radtrans["quenching"] == "diffusion":
             p_quench = np.zeros(samples.shape[0])
@@ -2939,47 +3133,7 @@ class Database:
                     ],
                 )
 
-                # Recalculate the P-T profile from the sampled parameters
-
-                pressure = np.logspace(-6, 3, n_pressures)  # (bar)
-
-                if radtrans["pt_profile"] == "molliere":
-                    upper_temp = np.array(
-                        [sample_dict["t1"], sample_dict["t2"], sample_dict["t3"]]
-                    )
-
-                    temp, _, _ = retrieval_util.pt_ret_model(
-                        upper_temp,
-                        10.0 ** sample_dict["log_delta"],
-                        sample_dict["alpha"],
-                        sample_dict["tint"],
-                        pressure,
-                        sample_dict["metallicity"],
-                        sample_dict["c_o_ratio"],
-                    )
-
-                elif (
-                    radtrans["pt_profile"] == "free"
-                    or radtrans["pt_profile"] == "monotonic"
-                ):
-                    knot_press = np.logspace(
-                        np.log10(pressure[0]), np.log10(pressure[-1]), 15
-                    )
-
-                    knot_temp = []
-                    for k in range(15):
-                        knot_temp.append(sample_dict[f"t{k}"])
-
-                    knot_temp = np.asarray(knot_temp)
-
-                    if "pt_smooth" in sample_dict:
-                        pt_smooth = sample_dict["pt_smooth"]
-                    else:
-                        pt_smooth = radtrans["pt_smooth"]
-
-                    temp = retrieval_util.pt_spline_interp(
-                        knot_press, knot_temp, pressure, pt_smooth=pt_smooth
-                    )
+                temp = temp_samples[i]
 
                 # Calculate the quenching pressure
 
@@ -2994,76 +3148,77 @@ class Database:
 
             db_tag = f"results/fit/{tag}/samples"
 
-            with h5py.File(self.database, "a") as h5_file:
-                dset_attrs = h5_file[db_tag].attrs
-
-                samples = np.asarray(h5_file[db_tag])
-                samples = np.append(
-                    samples, np.log10(p_quench[..., np.newaxis]), axis=1
+            with cache_util.open_writable(self.database) as h5_file:
+                data_util.append_samples(
+                    h5_file,
+                    db_tag,
+                    np.log10(p_quench),
+                    "log_p_quench",
+                    compression=self.sample_compression,
                 )
 
-                del h5_file[db_tag]
-                dset = h5_file.create_dataset(db_tag, data=samples)
-
-                for item in dset_attrs:
-                    dset.attrs[item] = dset_attrs[item]
-
-                n_param = dset_attrs["n_param"] + 1
-
-                dset.attrs["n_param"] = n_param
-                dset.attrs[f"parameter{n_param-1}"] = "log_p_quench"
-
         if inc_teff:
             print("Calculating Teff from the posterior samples... ")
 
-            boxes, _ = self.get_retrieval_spectra(
-                tag=tag, random=None, wavel_range=(0.5, 50.0), spec_res=100.0
+            samples, pt_smooth, model_kwargs, spec_kwargs = self.retrieval_settings(
+                tag, None, wavel_range=(0.5, 50.0), spec_res=100.0
             )
 
-            teff = np.zeros(len(boxes))
-
-            for i, box_item in enumerate(boxes):
-                sample_distance = box_item.parameters["distance"] * constants.PARSEC
-                sample_radius = box_item.parameters["radius"] * constants.R_JUP
-
-                # Scaling for the flux back to the planet surface
-                sample_scale = (sample_distance / sample_radius) ** 2
-
-                # Blackbody flux: sigma * Teff^4
-                flux_int = simps(sample_scale * box_item.flux, box_item.wavelength)
-                teff[i] = (flux_int / constants.SIGMA_SB) ** 0.25
+            if forward_model is None:
+                forward_model = read_radtrans.ReadRadtrans
 
             db_tag = f"results/fit/{tag}/samples"
 
-            with h5py.File(self.database, "a") as h5_file:
-                dset_attrs = h5_file[db_tag].attrs
+            teff_iter = data_util.retrieval_spectra(
+                samples,
+                pt_smooth,
+                spec_kwargs,
+                model_kwargs,
+                forward_model=forward_model,
+                post_process=data_util.retrieval_teff,
+                processes=processes,
+            )
 
-                samples = np.asarray(h5_file[db_tag])
-                samples = np.append(samples, teff[..., np.newaxis], axis=1)
+            # Add a column for Teff that is filled in while the
+            # spectra of the remaining chunks are calculated. The
+            # database is opened once for all chunks instead of
+            # invalidating the cache and reopening it per chunk
+
+            with cache_util.open_writable(self.database) as h5_file:
+                data_util.append_samples(
+                    h5_file,
+                    db_tag,
+                    np.full(samples.shape[0], np.nan),
+                    "teff",
+                    compression=self.sample_compression,
+                )
 
-                del h5_file[db_tag]
-                dset = h5_file.create_dataset(db_tag, data=samples)
+                dset = h5_file[db_tag]
 
-                for item in dset_attrs:
-                    dset.attrs[item] = dset_attrs[item]
+                for i, teff_list in teff_iter:
+                    dset[i : i + len(teff_list), -1] = teff_list
 
-                n_param = dset_attrs["n_param"] + 1
+                    print(
+                        f"\rCalculating Teff {i+len(teff_list)}/{samples.shape[0]}...",
+                        end="",
+                    )
 
-                dset.attrs["n_param"] = n_param
-                dset.attrs[f"parameter{n_param-1}"] = "teff"
+            print(" [DONE]")
 
     @staticmethod
     @typechecked
-    def get_retrieval_spectra(
+    def retrieval_settings(
         tag: str,
         random: Optional[int],
         wavel_range: Union[Tuple[float, float], str] = None,
         spec_res: Optional[float] = None,
-    ) -> Tuple[List[box.ModelBox], Union[read_radtrans.ReadRadtrans]]:
+    ) -> Tuple[np.ndarray, List[Any], Dict[str, Any], Dict[str, Any]]:
         """
-        Function for extracting random spectra from the
-        posterior distribution that was sampled with
-        :class:`~species.analysis.retrieval.AtmosphericRetrieval`.
+        Internal function for reading the posterior samples and the
+        settings of a retrieval with
+        :class:`~species.analysis.retrieval.AtmosphericRetrieval`,
+        which are required for recalculating the spectra of the
+        samples with :func:`~species.util.data_util.retrieval_spectra`.
 
         Parameters
         ----------
@@ -3073,13 +3228,8 @@ class Database:
             Number of randomly selected samples. All samples
             are used if set to ``None``.
         wavel_range : tuple(float, float), str, None
-            Wavelength range (um) or filter name. The
-            wavelength range from the retrieval is adopted
-            (i.e. the``wavel_range`` parameter of
-            :class:`~species.analysis.retrieval.AtmosphericRetrieval`)
-            when set to ``None``. It is mandatory to set the argument
-            to ``None`` in case the ``log_tau_cloud`` parameter has
-            been used with the retrieval.
+            Wavelength range (um) or filter name. The wavelength
+            range from the retrieval is adopted when set to ``None``.
         spec_res : float, None
             Spectral resolution that is used for the smoothing with a
             Gaussian kernel. No smoothing is applied when the argument
@@ -3087,10 +3237,16 @@ class Database:
 
         Returns
         -------
-        list(box.ModelBox)
-            Boxes with the randomly sampled spectra.
-        read_radtrans.Radtrans
-            Instance of :class:`~species.read.read_radtrans.ReadRadtrans`.
+        np.ndarray
+            Posterior samples.
+        list
+            P-T smoothing parameters of the samples.
+        dict
+            Keyword arguments of
+            :class:`~species.read.read_radtrans.ReadRadtrans`.
+        dict
+            Keyword arguments of
+            :func:`~species.util.data_util.retrieval_spectrum`.
         """
 
         # Open configuration file
@@ -3115,11 +3271,7 @@ class Database:
 
         # Select random samples
 
-        if random is None:
-            # Required for the printed output in the for loop
-            random = samples.shape[0]
-
-        else:
+        if random is not None:
             random_indices = np.random.randint(samples.shape[0], size=random)
             samples = samples[random_indices, :]
 
@@ -3221,96 +3373,174 @@ class Database:
         for i in range(n_cloud_species):
             cloud_species.append(dset.attrs[f"cloud_species{i}"])
 
-        # Create an instance of ReadRadtrans
-        # Afterwards, the names of the cloud_species have been shortened
-        # from e.g. 'MgSiO3(c)_cd' to 'MgSiO3(c)'
+        # Get the P-T smoothing parameter of each sample
 
-        read_rad = read_radtrans.ReadRadtrans(
-            line_species=line_species,
-            cloud_species=cloud_species,
-            scattering=scattering,
-            wavel_range=wavel_range,
-            pressure_grid=pressure_grid,
-            cloud_wavel=cloud_wavel,
-            max_press=max_press,
-        )
+        pt_smooth = []
 
-        # Set quenching attribute such that the parameter of get_model is not required
+        for item in samples:
+            if "pt_smooth" in dset.attrs:
+                pt_smooth.append(dset.attrs["pt_smooth"])
 
-        read_rad.quenching = quenching
+            elif "pt_smooth_0" in parameters:
+                pt_smooth_dict = {}
+                for i in range(temp_nodes - 1):
+                    pt_smooth_dict[f"pt_smooth_{i}"] = item[-temp_nodes + i]
 
-        # pool = multiprocessing.Pool(os.cpu_count())
-        # processes = []
+                pt_smooth.append(pt_smooth_dict)
 
-        # Initiate empty list for ModelBox objects
+            else:
+                pt_smooth.append(item[indices["pt_smooth"]])
 
-        boxes = []
+        # Close the HDF5 database
 
-        for i, item in enumerate(samples):
-            print(f"\rGetting posterior spectra {i+1}/{random}...", end="")
+        h5_file.close()
 
-            # Get the P-T smoothing parameter
-            if "pt_smooth" in dset.attrs:
-                pt_smooth = dset.attrs["pt_smooth"]
+        # Keyword arguments of ReadRadtrans
+
+        model_kwargs = {
+            "line_species": line_species,
+            "cloud_species": cloud_species,
+            "scattering": scattering,
+            "wavel_range": wavel_range,
+            "pressure_grid": pressure_grid,
+            "cloud_wavel": cloud_wavel,
+            "max_press": max_press,
+        }
+
+        # Keyword arguments of retrieval_spectrum
+
+        spec_kwargs = {
+            "indices": indices,
+            "chemistry": chemistry,
+            "pt_profile": pt_profile,
+            "line_species": line_species,
+            "cloud_species": cloud_species,
+            "quenching": quenching,
+            "spec_res": spec_res,
+            "distance": distance,
+            "temp_nodes": temp_nodes,
+        }
+
+        return samples, pt_smooth, model_kwargs, spec_kwargs
 
-            elif "pt_smooth_0" in parameters:
-                pt_smooth = {}
-                for i in range(temp_nodes-1):
-                    pt_smooth[f"pt_smooth_{i}"] = item[-temp_nodes+i]
+    @staticmethod
+    @typechecked
+    def get_retrieval_spectra(
+        tag: str,
+        random: Optional[int],
+        wavel_range: Union[Tuple[float, float], str] = None,
+        spec_res: Optional[float] = None,
+        processes: int = 1,
+        forward_model: Optional[Callable] = None,
+    ) -> Tuple[List[box.ModelBox], Union[read_radtrans.ReadRadtrans]]:
+        """
+        Function for extracting random spectra from the
+        posterior distribution that was sampled with
+        :class:`~species.analysis.retrieval.AtmosphericRetrieval`.
 
-            else:
-                pt_smooth = item[indices["pt_smooth"]]
-
-            # Calculate the petitRADTRANS spectrum
-
-            model_box = data_util.retrieval_spectrum(
-                indices=indices,
-                chemistry=chemistry,
-                pt_profile=pt_profile,
-                line_species=line_species,
-                cloud_species=cloud_species,
-                quenching=quenching,
-                spec_res=spec_res,
-                distance=distance,
-                pt_smooth=pt_smooth,
-                temp_nodes=temp_nodes,
-                read_rad=read_rad,
-                sample=item,
+        Parameters
+        ----------
+        tag : str
+            Database tag with the posterior samples.
+        random : int, None
+            Number of randomly selected samples. All samples
+            are used if set to ``None``.
+        wavel_range : tuple(float, float), str, None
+            Wavelength range (um) or filter name. The
+            wavelength range from the retrieval is adopted
+            (i.e. the``wavel_range`` parameter of
+            :class:`~species.analysis.retrieval.AtmosphericRetrieval`)
+            when set to ``None``. It is mandatory to set the argument
+            to ``None`` in case the ``log_tau_cloud`` parameter has
+            been used with the retrieval.
+        spec_res : float, None
+            Spectral resolution that is used for the smoothing with a
+            Gaussian kernel. No smoothing is applied when the argument
+            is set to ``None``.
+        processes : int
+            Number of worker processes over which the samples are
+            distributed (see
+            :func:`~species.util.data_util.retrieval_spectra`). Each
+            worker creates its own instance of ``ReadRadtrans``, so
+            the memory usage scales with the number of processes. The
+            instance that is returned is only created in the main
+            process after the workers have finished. The spectra are
+            calculated in the main process if set to 1.
+        forward_model : callable, None
+            Class that is used instead of
+            :class:`~species.read.read_radtrans.ReadRadtrans` for
+            calculating the spectra (e.g. a lightweight stand-in for
+            testing). The class is created with the same keyword
+            arguments as ``ReadRadtrans``. Not used if set to
+            ``None``.
+
+        Returns
+        -------
+        list(box.ModelBox)
+            Boxes with the randomly sampled spectra.
+        read_radtrans.Radtrans
+            Instance of :class:`~species.read.read_radtrans.ReadRadtrans`.
+        """
+
+        samples, pt_smooth, model_kwargs, spec_kwargs = Database.retrieval_settings(
+            tag, random, wavel_range=wavel_range, spec_res=spec_res
+        )
+
+        if forward_model is None:
+            forward_model = read_radtrans.ReadRadtrans
+
+        # Create an instance of ReadRadtrans in the main process
+        # only if the spectra are also calculated there. Otherwise,
+        # the instance is created after the worker processes have
+        # finished, so the opacities are not loaded in the main
+        # process while the workers hold their own copies
+
+        if processes == 1:
+            read_rad, _ = data_util.retrieval_model(
+                forward_model, model_kwargs, spec_kwargs
             )
+        else:
+            read_rad = None
 
-            # Add the ModelBox to the list
-
-            boxes.append(model_box)
-
-            # proc = pool.apply_async(data_util.retrieval_spectrum,
-            #                         args=(indices,
-            #                               chemistry,
-            #                               pt_profile,
-            #                               line_species,
-            #                               cloud_species,
-            #                               quenching,
-            #                               spec_res,
-            #                               read_rad,
-            #                               item))
-            #
-            # processes.append(proc)
-
-        # pool.close()
-        #
-        # for i, item in enumerate(processes):
-        #     boxes.append(item.get(timeout=30))
-        #     print(f'\rGetting posterior spectra {i+1}/{random}...', end='', flush=True)
+        # Calculate the spectra, optionally distributed over worker processes
 
-        print(" [DONE]")
+        boxes = []
 
-        # Close the HDF5 database
+        spec_iter = data_util.retrieval_spectra(
+            samples,
+            pt_smooth,
+            spec_kwargs,
+            model_kwargs,
+            forward_model=forward_model,
+            read_rad=read_rad,
+            processes=processes,
+        )
 
-        h5_file.close()
+        for i, box_list in spec_iter:
+            boxes.extend(box_list)
+
+            print(
+                f"\rGetting posterior spectra {i+len(box_list)}/{samples.shape[0]}...",
+                end="",
+            )
+
+        print(" [DONE]")
+
+        if read_rad is None:
+            read_rad, _ = data_util.retrieval_model(
+                forward_model, model_kwargs, spec_kwargs
+            )
 
         return boxes, read_rad
 
     @typechecked
-    def get_retrieval_teff(self, tag: str, random: int = 100) -> Tuple[float, float]:
+    def get_retrieval_teff(
+        self,
+        tag: str,
+        random: int = 100,
+        processes: int = 1,
+        forward_model: Optional[Callable] = None,
+    ) -> Tuple[float, float]:
         """
         Function for calculating :math:`T_\\mathrm{eff}` from
         randomly drawn samples of the posterior distribution from
@@ -3324,6 +3554,14 @@ class Database:
             Database tag with the posterior samples.
         random : int
             Number of randomly selected samples.
+        processes : int
+            Number of worker processes over which the samples are
+            distributed. The spectra are calculated in the main
+            process if set to 1.
+        forward_model : callable, None
+            Class that is used instead of
+            :class:`~species.read.read_radtrans.ReadRadtrans` for
+            calculating the spectra. Not used if set to ``None``.
 
         Returns
         -------
@@ -3335,32 +3573,36 @@ class Database:
 
         print(f"Calculating Teff from {random} posterior samples... ")
 
-        boxes, _ = self.get_retrieval_spectra(
-            tag=tag, random=random, wavel_range=(0.5, 50.0), spec_res=500.0
+        samples, pt_smooth, model_kwargs, spec_kwargs = self.retrieval_settings(
+            tag, random, wavel_range=(0.5, 50.0), spec_res=500.0
         )
 
-        teff = np.zeros(len(boxes))
+        if forward_model is None:
+            forward_model = read_radtrans.ReadRadtrans
 
-        for i, box_item in enumerate(boxes):
-            sample_distance = box_item.parameters["distance"] * constants.PARSEC
-            sample_radius = box_item.parameters["radius"] * constants.R_JUP
+        # The spectra are integrated by the worker processes
+        # such that only Teff is returned for each sample
 
-            # Scaling for the flux back to the planet surface
-            sample_scale = (sample_distance / sample_radius) ** 2
+        teff = np.zeros(samples.shape[0])
 
-            # Blackbody flux: sigma * Teff^4
-            flux_int = simps(sample_scale * box_item.flux, box_item.wavelength)
-            teff[i] = (flux_int / constants.SIGMA_SB) ** 0.25
+        teff_iter = data_util.retrieval_spectra(
+            samples,
+            pt_smooth,
+            spec_kwargs,
+            model_kwargs,
+            forward_model=forward_model,
+            post_process=data_util.retrieval_teff,
+            processes=processes,
+        )
 
-            # np.savetxt(f'output/spectrum/spectrum{i:04d}.dat',
-            #            np.column_stack([box_item.wavelength, sample_scale*box_item.flux]),
-            #            header='Wavelength (um) - Flux (W m-2 um-1)')
+        for i, teff_list in teff_iter:
+            teff[i : i + len(teff_list)] = teff_list
 
         q_16, q_50, q_84 = np.percentile(teff, [16.0, 50.0, 84.0])
 
         print(f"Teff (K) = {q_50:.2f} -{q_50-q_16:.2f} +{q_84-q_50:.2f}")
 
-        with h5py.File(self.database, "a") as h5_file:
+        with cache_util.open_writable(self.database) as h5_file:
             print(f"Storing Teff as attribute of results/fit/{tag}/samples...", end="")
             dset = h5_file[f"results/fit/{tag}/samples"]
             dset.attrs["teff"] = (q_50 - q_16, q_50, q_84 - q_50)
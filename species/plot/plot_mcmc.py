@@ -1263,21 +1263,34 @@ def plot_extinction(
             (wavelength, dust_radius, dust_sigma), cross_section
         )
 
-        for i in range(samples.shape[0]):
-            cross_tmp = cross_optical["Generic/Bessell.V"](
-                sigma_g[i], 10.0 ** log_r_g[i]
-            )
+        # Cross sections in the V band for all samples at once
+
+        cross_tmp = cross_optical["Generic/Bessell.V"](
+            np.column_stack((10.0 ** log_r_g, sigma_g))
+        )
+
+        n_grains = dust_ext / cross_tmp / 2.5 / np.log10(np.exp(1.0))
 
-            n_grains = dust_ext[i] / cross_tmp / 2.5 / np.log10(np.exp(1.0))
+        # Grid points with shape (n_samples, n_wavel, 3)
 
-            sample_cross = np.zeros(sample_wavel.shape)
+        grid_shape = (samples.shape[0], sample_wavel.size)
 
-            for j, item in enumerate(sample_wavel):
-                sample_cross[j] = cross_interp((item, 10.0 ** log_r_g[i], sigma_g[i]))
+        dust_points = np.stack(
+            (
+                np.broadcast_to(sample_wavel, grid_shape),
+                np.broadcast_to(10.0 ** log_r_g[:, np.newaxis], grid_shape),
+                np.broadcast_to(sigma_g[:, np.newaxis], grid_shape),
+            ),
+            axis=-1,
+        )
+
+        sample_cross = cross_interp(dust_points)
 
-            sample_ext = 2.5 * np.log10(np.exp(1.0)) * sample_cross * n_grains
+        sample_ext = (
+            2.5 * np.log10(np.exp(1.0)) * sample_cross * n_grains[:, np.newaxis]
+        )
 
-            ax.plot(sample_wavel, sample_ext, ls="-", lw=0.5, color="black", alpha=0.5)
+        ax.plot(sample_wavel, sample_ext.T, ls="-", lw=0.5, color="black", alpha=0.5)
 
     elif (
         "powerlaw_max" in box.parameters
@@ -1309,21 +1322,34 @@ def plot_extinction(
             (wavelength, dust_max, dust_exp), cross_section
         )
 
-        for i in range(samples.shape[0]):
-            cross_tmp = cross_optical["Generic/Bessell.V"](
-                exponent[i], 10.0 ** r_max[i]
-            )
+        # Cross sections in the V band for all samples at once
 
-            n_grains = dust_ext[i] / cross_tmp / 2.5 / np.log10(np.exp(1.0))
+        cross_tmp = cross_optical["Generic/Bessell.V"](
+            np.column_stack((10.0 ** r_max, exponent))
+        )
+
+        n_grains = dust_ext / cross_tmp / 2.5 / np.log10(np.exp(1.0))
 
-            sample_cross = np.zeros(sample_wavel.shape)
+        # Grid points with shape (n_samples, n_wavel, 3)
 
-            for j, item in enumerate(sample_wavel):
-                sample_cross[j] = cross_interp((item, 10.0 ** r_max[i], exponent[i]))
+        grid_shape = (samples.shape[0], sample_wavel.size)
 
-            sample_ext = 2.5 * np.log10(np.exp(1.0)) * sample_cross * n_grains
+        dust_points = np.stack(
+            (
+                np.broadcast_to(sample_wavel, grid_shape),
+                np.broadcast_to(10.0 ** r_max[:, np.newaxis], grid_shape),
+                np.broadcast_to(exponent[:, np.newaxis], grid_shape),
+            ),
+            axis=-1,
+        )
 
-            ax.plot(sample_wavel, sample_ext, ls="-", lw=0.5, color="black", alpha=0.5)
+        sample_cross = cross_interp(dust_points)
+
+        sample_ext = (
+            2.5 * np.log10(np.exp(1.0)) * sample_cross * n_grains[:, np.newaxis]
+        )
+
+        ax.plot(sample_wavel, sample_ext.T, ls="-", lw=0.5, color="black", alpha=0.5)
 
     elif "ism_ext" in box.parameters:
 
@@ -1338,10 +1364,11 @@ def plot_extinction(
             # Use default ISM redenning (R_V = 3.1) if ism_red was not fitted
             ism_red = np.full(samples.shape[0], 3.1)
 
-        for i in range(samples.shape[0]):
-            sample_ext = dust_util.ism_extinction(ism_ext[i], ism_red[i], sample_wavel)
+        sample_ext = dust_util.ism_extinction(
+            ism_ext[:, np.newaxis], ism_red[:, np.newaxis], sample_wavel
+        )
 
-            ax.plot(sample_wavel, sample_ext, ls="-", lw=0.5, color="black", alpha=0.5)
+        ax.plot(sample_wavel, sample_ext.T, ls="-", lw=0.5, color="black", alpha=0.5)
 
     else:
         raise ValueError("The SamplesBox does not contain extinction parameters.")
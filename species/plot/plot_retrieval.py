@@ -104,8 +104,8 @@ def plot_pt_profile(
         ]
 
     param_index = {}
-    for item in parameters:
-        param_index[item] = np.argwhere(parameters == item)[0][0]
+    for i, item in enumerate(parameters):
+        param_index[item] = i
 
     mpl.rcParams["font.serif"] = ["Bitstream Vera Serif"]
     mpl.rcParams["font.family"] = "serif"
@@ -203,20 +203,18 @@ def plot_pt_profile(
             np.log10(pressure[0]), np.log10(pressure[-1]), temp_nodes
         )
 
-    if pt_profile == "molliere":
-        conv_press = np.zeros(samples.shape[0])
-
-    for i, item in enumerate(samples):
-        # C/O and [Fe/H]
+    # C/O and [Fe/H]
 
-        if box.attributes["chemistry"] == "equilibrium":
-            metallicity = item[param_index["metallicity"]]
-            c_o_ratio = item[param_index["c_o_ratio"]]
+    if box.attributes["chemistry"] == "equilibrium":
+        metallicity = samples[:, param_index["metallicity"]]
+        c_o_ratio = samples[:, param_index["c_o_ratio"]]
 
-        elif box.attributes["chemistry"] == "free":
-            # TODO Set [Fe/H] = 0
-            metallicity = 0.0
+    elif box.attributes["chemistry"] == "free":
+        # TODO Set [Fe/H] = 0
+        metallicity = np.zeros(samples.shape[0])
+        c_o_ratio = np.zeros(samples.shape[0])
 
+        for i, item in enumerate(samples):
             # Create a dictionary with the mass fractions
 
             log_x_abund = {}
@@ -227,47 +225,26 @@ def plot_pt_profile(
 
             # Check if the C/H and O/H ratios are within the prior boundaries
 
-            _, _, c_o_ratio = retrieval_util.calc_metal_ratio(log_x_abund)
+            _, _, c_o_ratio[i] = retrieval_util.calc_metal_ratio(log_x_abund)
 
-        if pt_profile == "molliere":
-            t3_param = np.array(
-                [
-                    item[param_index["t1"]],
-                    item[param_index["t2"]],
-                    item[param_index["t3"]],
-                ]
-            )
-
-            temp, _, conv_press[i] = retrieval_util.pt_ret_model(
-                t3_param,
-                10.0 ** item[param_index["log_delta"]],
-                item[param_index["alpha"]],
-                item[param_index["tint"]],
-                pressure,
-                metallicity,
-                c_o_ratio,
-            )
-
-        elif pt_profile == "eddington":
-            tau = pressure * 1e6 * 10.0 ** item[param_index["log_delta"]]
-            temp = (0.75 * item[param_index["tint"]] ** 4.0 * (2.0 / 3.0 + tau)) ** 0.25
+    if pt_profile == "free" and "pt_smooth" not in parameters and (
+        "pt_smooth_0" in parameters or "pt_turn" in parameters
+    ):
+        temp = np.zeros((samples.shape[0], pressure.size))
 
-        elif pt_profile == "free":
+        for i, item in enumerate(samples):
             knot_temp = []
             for j in range(temp_nodes):
                 knot_temp.append(item[temp_index[j]])
 
             knot_temp = np.asarray(knot_temp)
 
-            if "pt_smooth" in parameters:
-                pt_smooth = item[param_index["pt_smooth"]]
-
-            elif "pt_smooth_0" in parameters:
+            if "pt_smooth_0" in parameters:
                 pt_smooth = {}
-                for i in range(temp_nodes - 1):
-                    pt_smooth[f"pt_smooth_{i}"] = item[param_index[f"pt_smooth_{i}"]]
+                for j in range(temp_nodes - 1):
+                    pt_smooth[f"pt_smooth_{j}"] = item[param_index[f"pt_smooth_{j}"]]
 
-            elif "pt_turn" in parameters:
+            else:
                 pt_smooth = {
                     "pt_smooth_1": item[param_index["pt_smooth_1"]],
                     "pt_smooth_2": item[param_index["pt_smooth_2"]],
@@ -275,88 +252,30 @@ def plot_pt_profile(
                     "pt_index": item[param_index["pt_index"]],
                 }
 
-            else:
-                pt_smooth = box.attributes["pt_smooth"]
-
-            temp = retrieval_util.pt_spline_interp(
+            temp[i] = retrieval_util.pt_spline_interp(
                 knot_press, knot_temp, pressure, pt_smooth=pt_smooth
             )
 
-        # if pt_profile == "free":
-        #     temp = temp[:, 0]
-        #
-        #     from poor_mans_nonequ_chem.poor_mans_nonequ_chem import interpol_abundances
-        #     ab = interpol_abundances(
-        #         np.full(temp.shape[0], c_o_ratio),
-        #         np.full(temp.shape[0], metallicity),
-        #         temp,
-        #         pressure,
-        #     )
-        #
-        #     nabla_ad = ab["nabla_ad"]
-        #
-        #     # Convert pressures from bar to cgs units
-        #     press_cgs = pressure * 1e6
-        #
-        #     # Calculate the current, radiative temperature gradient
-        #     nab_rad = np.diff(np.log(temp)) / np.diff(np.log(press_cgs))
-        #
-        #     # Extend to array of same length as pressure structure
-        #     nabla_rad = np.ones_like(temp)
-        #     nabla_rad[0] = nab_rad[0]
-        #     nabla_rad[-1] = nab_rad[-1]
-        #     nabla_rad[1:-1] = (nab_rad[1:] + nab_rad[:-1]) / 2.0
-        #
-        #     # Where is the atmosphere convectively unstable?
-        #     conv_index = nabla_rad > nabla_ad
-        #
-        #     tfinal = None
-        #
-        #     for i in range(10):
-        #         if i == 0:
-        #             t_take = copy.copy(temp)
-        #         else:
-        #             t_take = copy.copy(tfinal)
-        #
-        #         ab = interpol_abundances(
-        #             np.full(t_take.shape[0], c_o_ratio),
-        #             np.full(t_take.shape[0], metallicity),
-        #             t_take,
-        #             pressure,
-        #         )
-        #
-        #         nabla_ad = ab["nabla_ad"]
-        #
-        #         # Calculate the average nabla_ad between the layers
-        #         nabla_ad_mean = nabla_ad
-        #         nabla_ad_mean[1:] = (nabla_ad[1:] + nabla_ad[:-1]) / 2.0
-        #
-        #         # What are the increments in temperature due to convection
-        #         tnew = nabla_ad_mean[conv_index] * np.mean(np.diff(np.log(press_cgs)))
-        #
-        #         # What is the last radiative temperature?
-        #         tstart = np.log(t_take[~conv_index][-1])
-        #
-        #         # Integrate and translate to temperature
-        #         # from log(temperature)
-        #         tnew = np.exp(np.cumsum(tnew) + tstart)
-        #
-        #         # Add upper radiative and lower covective
-        #         # part into one single array
-        #         tfinal = copy.copy(t_take)
-        #         tfinal[conv_index] = tnew
-        #
-        #         if np.max(np.abs(t_take - tfinal) / t_take) < 0.01:
-        #             break
-        #
-        #     temp = copy.copy(tfinal)
-
-        ax.plot(temp, pressure, "-", lw=0.3, color="gray", alpha=0.5, zorder=1)
+    else:
+        # Calculate the P-T profiles of all samples at once
+
+        temp, _, conv_press = retrieval_util.pt_profile_batch(
+            samples,
+            param_index,
+            pt_profile,
+            pressure,
+            knot_press=knot_press if pt_profile == "free" else None,
+            metallicity=metallicity,
+            c_o_ratio=c_o_ratio,
+            pt_smooth=box.attributes.get("pt_smooth", 0.3),
+        )
+
+    ax.plot(temp.T, pressure, "-", lw=0.3, color="gray", alpha=0.5, zorder=1)
 
     if box.attributes["chemistry"] == "free":
         # TODO Set [Fe/H] = 0
-        median["metallicity"] = metallicity
-        median["c_o_ratio"] = c_o_ratio
+        median["metallicity"] = metallicity[-1]
+        median["c_o_ratio"] = c_o_ratio[-1]
 
     if pt_profile == "molliere":
         temp, _, conv_press_median = retrieval_util.pt_ret_model(
@@ -6,15 +6,15 @@ import os
 import warnings
 import configparser
 
-from typing import Union, Tuple
+from typing import Any, Dict, Optional, Union, Tuple
 
-import h5py
 import numpy as np
 
 from typeguard import typechecked
 from scipy.interpolate import interp1d, InterpolatedUnivariateSpline, interpolate
 
 from species.data import database
+from species.util import cache_util
 
 
 class ReadFilter:
@@ -48,38 +48,99 @@ class ReadFilter:
 
         self.database = config["species"]["database"]
 
-        h5_file = h5py.File(self.database, "r")
-
-        if "filters" not in h5_file or self.filter_name not in h5_file["filters"]:
-            h5_file.close()
+        if self._get_profile() is None:
             species_db = database.Database()
             species_db.add_filter(self.filter_name)
-            h5_file = h5py.File(self.database, "r")
-
-        h5_file.close()
 
     @typechecked
-    def get_filter(self) -> np.ndarray:
+    def _get_profile(self) -> Optional[Dict[str, Any]]:
         """
-        Function for selecting a filter profile from the database.
+        Internal function for returning the filter profile and its
+        derived quantities from the filter registry. The registry is
+        kept in memory (see :func:`~species.util.cache_util.get_cached`)
+        such that each profile is only read once from the database
+        by a process. The registry is cleared when the database
+        is modified.
 
         Returns
         -------
-        np.ndarray
-            Array with the wavelengths and filter transmission.
+        dict, None
+            Dictionary with the filter profile ('data'), wavelength
+            range ('wavel_range'), mean wavelength ('mean_wavel'),
+            effective width ('eff_width'), detector type ('det_type'),
+            and the interpolated profile ('interp'). The FWHM
+            ('fwhm') is added by
+            :func:`~species.read.read_filter.ReadFilter.filter_fwhm`.
+            A ``None`` is returned if the filter is not present in
+            the database.
         """
 
-        h5_file = h5py.File(self.database, "r")
+        cache_key = f"filters/{self.filter_name}"
+
+        profile = cache_util.get_cached(self.database, cache_key)
+
+        if profile is not None:
+            return profile
 
-        data = np.asarray(h5_file[f"filters/{self.filter_name}"])
+        h5_file = cache_util.open_pooled(self.database)
+
+        if "filters" not in h5_file or self.filter_name not in h5_file["filters"]:
+            return None
+
+        dset = h5_file[cache_key]
+
+        data = np.asarray(dset)
 
         if data.shape[0] == 2 and data.shape[1] > data.shape[0]:
             # Required for backward compatibility
             data = np.transpose(data)
 
-        h5_file.close()
+        if "det_type" in dset.attrs:
+            det_type = dset.attrs["det_type"]
+
+        else:
+            warnings.warn(
+                f"Detector type not found for {self.filter_name}. The database "
+                f"was probably created before the detector type was introduced "
+                f"in species (v0.3.1). Assuming an energy-counting detector."
+            )
+
+            det_type = "energy"
+
+        profile = {
+            "data": data,
+            "wavel_range": (data[0, 0], data[-1, 0]),
+            "mean_wavel": np.trapz(data[:, 0] * data[:, 1], data[:, 0])
+            / np.trapz(data[:, 1], data[:, 0]),
+            "eff_width": np.trapz(data[:, 1], data[:, 0]) / np.amax(data[:, 1]),
+            "det_type": det_type,
+            "interp": interp1d(
+                data[:, 0],
+                data[:, 1],
+                kind="linear",
+                bounds_error=False,
+                fill_value=float("nan"),
+            ),
+        }
+
+        cache_util.set_cached(self.database, cache_key, profile)
+
+        return profile
+
+    @typechecked
+    def get_filter(self) -> np.ndarray:
+        """
+        Function for selecting a filter profile from the database.
+
+        Returns
+        -------
+        np.ndarray
+            Array with the wavelengths and filter transmission.
+        """
 
-        return data
+        # A copy is returned since the profile in the
+        # registry is shared by all ReadFilter instances
+        return self._get_profile()["data"].copy()
 
     @typechecked
     def interpolate_filter(self) -> interp1d:
@@ -92,15 +153,7 @@ class ReadFilter:
             Linearly interpolated filter.
         """
 
-        data = self.get_filter()
-
-        return interp1d(
-            data[:, 0],
-            data[:, 1],
-            kind="linear",
-            bounds_error=False,
-            fill_value=float("nan"),
-        )
+        return self._get_profile()["interp"]
 
     @typechecked
     def wavelength_range(
@@ -117,9 +170,7 @@ class ReadFilter:
             Maximum wavelength (um).
         """
 
-        data = self.get_filter()
-
-        return data[0, 0], data[-1, 0]
+        return self._get_profile()["wavel_range"]
 
     @typechecked
     def mean_wavelength(self) -> Union[np.float32, np.float64]:
@@ -132,11 +183,7 @@ class ReadFilter:
             Mean wavelength (um).
         """
 
-        data = self.get_filter()
-
-        return np.trapz(data[:, 0] * data[:, 1], data[:, 0]) / np.trapz(
-            data[:, 1], data[:, 0]
-        )
+        return self._get_profile()["mean_wavel"]
 
     @typechecked
     def filter_fwhm(self) -> float:
@@ -150,19 +197,26 @@ class ReadFilter:
             Full width at half maximum (um).
         """
 
-        data = self.get_filter()
+        profile = self._get_profile()
+
+        if "fwhm" not in profile:
+            # The FWHM is only calculated when requested since the
+            # root finding might fail for some filter profiles
+            data = profile["data"]
 
-        spline = InterpolatedUnivariateSpline(
-            data[:, 0], data[:, 1] - np.max(data[:, 1]) / 2.0
-        )
-        root = spline.roots()
+            spline = InterpolatedUnivariateSpline(
+                data[:, 0], data[:, 1] - np.max(data[:, 1]) / 2.0
+            )
+            root = spline.roots()
 
-        diff = root - self.mean_wavelength()
+            diff = root - profile["mean_wavel"]
 
-        root1 = np.amax(diff[diff < 0.0])
-        root2 = np.amin(diff[diff > 0.0])
+            root1 = np.amax(diff[diff < 0.0])
+            root2 = np.amin(diff[diff > 0.0])
 
-        return root2 - root1
+            profile["fwhm"] = root2 - root1
+
+        return profile["fwhm"]
 
     @typechecked
     def effective_width(self) -> np.float32:
@@ -178,9 +232,7 @@ class ReadFilter:
             Effective width (um).
         """
 
-        data = self.get_filter()
-
-        return np.trapz(data[:, 1], data[:, 0]) / np.amax(data[:, 1])
+        return self._get_profile()["eff_width"]
 
     @typechecked
     def detector_type(self) -> str:
@@ -193,19 +245,4 @@ class ReadFilter:
             Detector type ('energy' or 'photon').
         """
 
-        with h5py.File(self.database, "r") as h5_file:
-            dset = h5_file[f"filters/{self.filter_name}"]
-
-            if "det_type" in dset.attrs:
-                det_type = dset.attrs["det_type"]
-
-            else:
-                warnings.warn(
-                    f"Detector type not found for {self.filter_name}. The database "
-                    f"was probably created before the detector type was introduced "
-                    f"in species (v0.3.1). Assuming an energy-counting detector."
-                )
-
-                det_type = "energy"
-
-        return det_type
+        return self._get_profile()["det_type"]
@@ -6,17 +6,17 @@ import configparser
 import os
 import warnings
 
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
-import h5py
 import numpy as np
 
-from scipy.interpolate import griddata
+from scipy.interpolate import LinearNDInterpolator
+from scipy.spatial import Delaunay
 from typeguard import typechecked
 
 from species.core import box
 from species.read import read_model
-from species.util import read_util
+from species.util import cache_util, read_util
 
 
 class ReadIsochrone:
@@ -47,6 +47,68 @@ class ReadIsochrone:
 
         self.database = config["species"]["database"]
 
+    @typechecked
+    def _isochrone_data(self) -> Dict[str, Any]:
+        """
+        Internal function for reading the isochrone data and creating
+        the interpolator of the evolutionary data and magnitudes. The
+        Delaunay triangulation of the ages and masses is calculated
+        once and is then kept in memory, together with the data, for
+        all instances of :class:`~species.read.read_isochrone.ReadIsochrone`
+        that use the same database and tag.
+
+        Returns
+        -------
+        dict
+            Dictionary with the evolutionary model (``'model'``), the
+            filter names (``'filters'``), the number of columns with
+            evolutionary data (``'n_evolution'``), and the linear
+            interpolator (``'interp'``) that returns the evolutionary
+            data followed by the magnitudes as function of age (Myr)
+            and mass (Mjup).
+        """
+
+        iso_data = cache_util.get_cached(self.database, f"isochrones/{self.tag}")
+
+        if iso_data is None:
+            h5_file = cache_util.open_pooled(self.database)
+
+            model = h5_file[f"isochrones/{self.tag}/evolution"].attrs["model"]
+            evolution = np.asarray(h5_file[f"isochrones/{self.tag}/evolution"])
+
+            if model == "baraffe":
+                filters = list(h5_file[f"isochrones/{self.tag}/filters"])
+                magnitudes = np.asarray(h5_file[f"isochrones/{self.tag}/magnitudes"])
+
+                # Convert the h5py list of filters from bytes to strings
+                for i, item in enumerate(filters):
+                    if isinstance(item, bytes):
+                        filters[i] = item.decode("utf-8")
+
+                iso_values = np.column_stack((evolution, magnitudes))
+
+            else:
+                filters = []
+                iso_values = evolution
+
+            # Triangulation of the ages and masses, which is shared
+            # by the interpolation of all columns
+
+            iso_tri = Delaunay(evolution[:, 0:2])
+
+            iso_data = {
+                "model": model,
+                "filters": filters,
+                "n_evolution": evolution.shape[1],
+                "interp": LinearNDInterpolator(
+                    iso_tri, iso_values, fill_value=np.nan, rescale=False
+                ),
+            }
+
+            cache_util.set_cached(self.database, f"isochrones/{self.tag}", iso_data)
+
+        return iso_data
+
     @typechecked
     def get_isochrone(
         self,
@@ -79,85 +141,34 @@ class ReadIsochrone:
             Box with the isochrone.
         """
 
-        age_points = np.full(masses.shape[0], age)  # (Myr)
+        iso_data = self._isochrone_data()
 
         color = None
         mag_abs = None
 
-        index_teff = 2
-        index_logg = 4
+        # Interpolate the evolutionary data and magnitudes of all
+        # masses with a single evaluation of the interpolator
 
-        # Read isochrone data
-
-        with h5py.File(self.database, "r") as h5_file:
-            model = h5_file[f"isochrones/{self.tag}/evolution"].attrs["model"]
-            evolution = np.asarray(h5_file[f"isochrones/{self.tag}/evolution"])
-
-            if model == "baraffe":
-                filters = list(h5_file[f"isochrones/{self.tag}/filters"])
-                magnitudes = np.asarray(h5_file[f"isochrones/{self.tag}/magnitudes"])
-
-                # Convert the h5py list of filters from bytes to strings
-                for i, item in enumerate(filters):
-                    if isinstance(item, bytes):
-                        filters[i] = item.decode("utf-8")
+        iso_values = iso_data["interp"](
+            np.stack((np.full(masses.shape[0], age), masses), axis=1)
+        )
 
-        if model == "baraffe":
-            if filters_color is not None:
-                index_color_1 = filters.index(filters_color[0])
-                index_color_2 = filters.index(filters_color[1])
+        n_evol = iso_data["n_evolution"]
 
-            if filter_mag is not None:
-                index_mag = filters.index(filter_mag)
+        if iso_data["model"] == "baraffe":
+            filters = iso_data["filters"]
 
             if filters_color is not None:
-                mag_color_1 = griddata(
-                    points=evolution[:, 0:2],
-                    values=magnitudes[:, index_color_1],
-                    xi=np.stack((age_points, masses), axis=1),
-                    method="linear",
-                    fill_value="nan",
-                    rescale=False,
-                )
-
-                mag_color_2 = griddata(
-                    points=evolution[:, 0:2],
-                    values=magnitudes[:, index_color_2],
-                    xi=np.stack((age_points, masses), axis=1),
-                    method="linear",
-                    fill_value="nan",
-                    rescale=False,
-                )
+                mag_color_1 = iso_values[:, n_evol + filters.index(filters_color[0])]
+                mag_color_2 = iso_values[:, n_evol + filters.index(filters_color[1])]
 
                 color = mag_color_1 - mag_color_2
 
             if filter_mag is not None:
-                mag_abs = griddata(
-                    points=evolution[:, 0:2],
-                    values=magnitudes[:, index_mag],
-                    xi=np.stack((age_points, masses), axis=1),
-                    method="linear",
-                    fill_value="nan",
-                    rescale=False,
-                )
-
-        teff = griddata(
-            points=evolution[:, 0:2],
-            values=evolution[:, index_teff],
-            xi=np.stack((age_points, masses), axis=1),
-            method="linear",
-            fill_value="nan",
-            rescale=False,
-        )
+                mag_abs = iso_values[:, n_evol + filters.index(filter_mag)]
 
-        logg = griddata(
-            points=evolution[:, 0:2],
-            values=evolution[:, index_logg],
-            xi=np.stack((age_points, masses), axis=1),
-            method="linear",
-            fill_value="nan",
-            rescale=False,
-        )
+        teff = iso_values[:, 2]
+        logg = iso_values[:, 4]
 
         return box.create_box(
             boxtype="isochrone",
@@ -232,86 +243,85 @@ class ReadIsochrone:
                 "additional functionalities are required."
             )
 
-        mag1 = np.zeros(isochrone.masses.shape[0])
-        mag2 = np.zeros(isochrone.masses.shape[0])
-        radius = np.zeros(isochrone.masses.shape[0])
+        # Copy the masses since get_radius modifies its argument in place
+        radius = read_util.get_radius(
+            isochrone.logg, np.copy(isochrone.masses)
+        )  # (Rjup)
 
-        for i, mass_item in enumerate(isochrone.masses):
-            model_param = {
-                "teff": isochrone.teff[i],
-                "logg": isochrone.logg[i],
-                "mass": mass_item,
-                "distance": 10.0,
-            }
+        teff = isochrone.teff
+        logg = np.copy(isochrone.logg)
 
-            radius[i] = read_util.get_radius(
-                model_param["logg"], model_param["mass"]
-            )  # (Rjup)
+        # Select the isochrone samples that are within the grid
+        # boundaries, for which the magnitudes are calculated
 
-            if np.isnan(isochrone.teff[i]):
-                mag1[i] = np.nan
-                mag2[i] = np.nan
+        nan_teff = np.isnan(teff)
 
-                warnings.warn(
-                    f"The value of Teff is NaN for the following isochrone sample: "
-                    f"{model_param}. Setting the magnitudes to NaN."
-                )
+        if np.any(nan_teff):
+            warnings.warn(
+                f"The value of Teff is NaN for {np.sum(nan_teff)} isochrone "
+                f"samples, with masses {isochrone.masses[nan_teff]}. Setting "
+                f"the magnitudes to NaN."
+            )
+
+        select = ~nan_teff
+
+        for item_bounds, value in [("teff", teff), ("logg", logg)]:
+            below_bound = select & (value <= param_bounds[item_bounds][0])
+            above_bound = select & (value >= param_bounds[item_bounds][1])
+
+            if adapt_logg and item_bounds == "logg":
+                if np.any(below_bound):
+                    warnings.warn(
+                        f"The log(g) is {value[below_bound]} for {np.sum(below_bound)} "
+                        f"isochrone samples but the lower boundary of the model "
+                        f"grid is {param_bounds[item_bounds][0]}. Adapting log(g) "
+                        f"to {param_bounds[item_bounds][0]} since adapt_logg=True."
+                    )
+
+                    logg[below_bound] = param_bounds["logg"][0]
+
+                if np.any(above_bound):
+                    warnings.warn(
+                        f"The log(g) is {value[above_bound]} for {np.sum(above_bound)} "
+                        f"isochrone samples but the upper boundary of the model "
+                        f"grid is {param_bounds[item_bounds][1]}. Adapting log(g) "
+                        f"to {param_bounds[item_bounds][1]} since adapt_logg=True."
+                    )
+
+                    logg[above_bound] = param_bounds["logg"][1]
 
             else:
-                for item_bounds in param_bounds:
-                    if model_param[item_bounds] <= param_bounds[item_bounds][0]:
-                        if adapt_logg and item_bounds == "logg":
-                            warnings.warn(
-                                f"The log(g) is {model_param[item_bounds]} but the "
-                                f"lower boundary of the model grid is "
-                                f"{param_bounds[item_bounds][0]}. Adapting "
-                                f"log(g) to {param_bounds[item_bounds][0]} since "
-                                f"adapt_logg=True."
-                            )
-
-                            model_param["logg"] = param_bounds["logg"][0]
-
-                        else:
-                            mag1[i] = np.nan
-                            mag2[i] = np.nan
-
-                            warnings.warn(
-                                f"The value of {item_bounds} is "
-                                f"{model_param[item_bounds]}, which is below "
-                                f"the lower bound of the model grid "
-                                f"({param_bounds[item_bounds][0]}). Setting the "
-                                f"magnitudes to NaN for the following isochrone "
-                                f"sample: {model_param}."
-                            )
-
-                    elif model_param[item_bounds] >= param_bounds[item_bounds][1]:
-                        if adapt_logg and item_bounds == "logg":
-                            warnings.warn(
-                                f"The log(g) is {model_param[item_bounds]} but "
-                                f"the upper boundary of the model grid is "
-                                f"{param_bounds[item_bounds][1]}. Adapting "
-                                f"log(g) to {param_bounds[item_bounds][1]} "
-                                f"since adapt_logg=True."
-                            )
-
-                            model_param["logg"] = param_bounds["logg"][1]
-
-                        else:
-                            mag1[i] = np.nan
-                            mag2[i] = np.nan
-
-                            warnings.warn(
-                                f"The value of {item_bounds} is "
-                                f"{model_param[item_bounds]}, which is above "
-                                f"the upper bound of the model grid "
-                                f"({param_bounds[item_bounds][1]}). Setting the "
-                                f"magnitudes to NaN for the following isochrone "
-                                f"sample: {model_param}."
-                            )
-
-                if not np.isnan(mag1[i]):
-                    mag1[i], _ = model1.get_magnitude(model_param)
-                    mag2[i], _ = model2.get_magnitude(model_param)
+                if np.any(below_bound):
+                    warnings.warn(
+                        f"The value of {item_bounds} is {value[below_bound]} for "
+                        f"{np.sum(below_bound)} isochrone samples, which is below "
+                        f"the lower bound of the model grid "
+                        f"({param_bounds[item_bounds][0]}). Setting the "
+                        f"magnitudes to NaN for these isochrone samples."
+                    )
+
+                if np.any(above_bound):
+                    warnings.warn(
+                        f"The value of {item_bounds} is {value[above_bound]} for "
+                        f"{np.sum(above_bound)} isochrone samples, which is above "
+                        f"the upper bound of the model grid "
+                        f"({param_bounds[item_bounds][1]}). Setting the "
+                        f"magnitudes to NaN for these isochrone samples."
+                    )
+
+                select &= ~below_bound & ~above_bound
+
+        # Absolute magnitudes of all selected samples at once
+
+        param_names = ["teff", "logg", "mass"]
+        samples = np.column_stack((teff, logg, isochrone.masses))[select]
+
+        mag1 = np.full(isochrone.masses.shape[0], np.nan)
+        mag2 = np.full(isochrone.masses.shape[0], np.nan)
+
+        if np.any(select):
+            mag1[select] = model1.get_magnitude_batch(samples, param_names)[1]
+            mag2[select] = model2.get_magnitude_batch(samples, param_names)[1]
 
         if filter_mag == filters_color[0]:
             abs_mag = mag1
@@ -387,79 +397,66 @@ class ReadIsochrone:
                 "functionalities are required."
             )
 
-        mag1 = np.zeros(isochrone.masses.shape[0])
-        mag2 = np.zeros(isochrone.masses.shape[0])
-        mag3 = np.zeros(isochrone.masses.shape[0])
-        mag4 = np.zeros(isochrone.masses.shape[0])
-        radius = np.zeros(isochrone.masses.shape[0])
-
-        for i, mass_item in enumerate(isochrone.masses):
-            model_param = {
-                "teff": isochrone.teff[i],
-                "logg": isochrone.logg[i],
-                "mass": mass_item,
-                "distance": 10.0,
-            }
+        param_bounds = model1.get_bounds()
+
+        # Copy the masses since get_radius modifies its argument in place
+        radius = read_util.get_radius(
+            isochrone.logg, np.copy(isochrone.masses)
+        )  # (Rjup)
 
-            radius[i] = read_util.get_radius(
-                model_param["logg"], model_param["mass"]
-            )  # (Rjup)
+        # Select the isochrone samples that are within the grid
+        # boundaries, for which the magnitudes are calculated
 
-            if np.isnan(isochrone.teff[i]):
-                mag1[i] = np.nan
-                mag2[i] = np.nan
-                mag3[i] = np.nan
-                mag4[i] = np.nan
+        nan_teff = np.isnan(isochrone.teff)
 
+        if np.any(nan_teff):
+            warnings.warn(
+                f"The value of Teff is NaN for {np.sum(nan_teff)} isochrone "
+                f"samples, with masses {isochrone.masses[nan_teff]}. Setting "
+                f"the magnitudes to NaN."
+            )
+
+        select = ~nan_teff
+
+        for item_bounds, value in [("teff", isochrone.teff), ("logg", isochrone.logg)]:
+            below_bound = select & (value <= param_bounds[item_bounds][0])
+            above_bound = select & (value >= param_bounds[item_bounds][1])
+
+            if np.any(below_bound):
                 warnings.warn(
-                    f"The value of Teff is NaN for the following isochrone "
-                    f"sample: {model_param}. Setting the magnitudes to NaN."
+                    f"The value of {item_bounds} is {value[below_bound]} for "
+                    f"{np.sum(below_bound)} isochrone samples, which is below "
+                    f"the lower bound of the model grid "
+                    f"({param_bounds[item_bounds][0]}). Setting the "
+                    f"magnitudes to NaN for these isochrone samples."
                 )
 
-            else:
-                for item_bounds in model1.get_bounds():
-                    if model_param[item_bounds] <= model1.get_bounds()[item_bounds][0]:
-                        mag1[i] = np.nan
-                        mag2[i] = np.nan
-                        mag3[i] = np.nan
-                        mag4[i] = np.nan
-
-                        warnings.warn(
-                            f"The value of {item_bounds} is "
-                            f"{model_param[item_bounds]}, which is "
-                            f"below the lower bound of the model grid "
-                            f" ({model1.get_bounds()[item_bounds][0]}). "
-                            f"Setting the magnitudes to NaN for the "
-                            f"following isochrone sample: {model_param}."
-                        )
-
-                    elif (
-                        model_param[item_bounds] >= model1.get_bounds()[item_bounds][1]
-                    ):
-                        mag1[i] = np.nan
-                        mag2[i] = np.nan
-                        mag3[i] = np.nan
-                        mag4[i] = np.nan
-
-                        warnings.warn(
-                            f"The value of {item_bounds} is "
-                            f"{model_param[item_bounds]}, which is above "
-                            f"the upper bound of the model grid "
-                            f"({model1.get_bounds()[item_bounds][1]}). "
-                            f"Setting the magnitudes to NaN for the "
-                            f"following isochrone sample: {model_param}."
-                        )
-
-                if (
-                    not np.isnan(mag1[i])
-                    and not np.isnan(mag2[i])
-                    and not np.isnan(mag3[i])
-                    and not np.isnan(mag4[i])
-                ):
-                    mag1[i], _ = model1.get_magnitude(model_param)
-                    mag2[i], _ = model2.get_magnitude(model_param)
-                    mag3[i], _ = model3.get_magnitude(model_param)
-                    mag4[i], _ = model4.get_magnitude(model_param)
+            if np.any(above_bound):
+                warnings.warn(
+                    f"The value of {item_bounds} is {value[above_bound]} for "
+                    f"{np.sum(above_bound)} isochrone samples, which is above "
+                    f"the upper bound of the model grid "
+                    f"({param_bounds[item_bounds][1]}). Setting the "
+                    f"magnitudes to NaN for these isochrone samples."
+                )
+
+            select &= ~below_bound & ~above_bound
+
+        # Absolute magnitudes of all selected samples at once
+
+        param_names = ["teff", "logg", "mass"]
+
+        samples = np.column_stack(
+            (isochrone.teff, isochrone.logg, isochrone.masses)
+        )[select]
+
+        mags = np.full((4, isochrone.masses.shape[0]), np.nan)
+
+        if np.any(select):
+            for i, item in enumerate([model1, model2, model3, model4]):
+                mags[i, select] = item.get_magnitude_batch(samples, param_names)[1]
+
+        mag1, mag2, mag3, mag4 = mags
 
         return box.create_box(
             boxtype="colorcolor",
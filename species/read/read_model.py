@@ -7,20 +7,20 @@ import math
 import warnings
 import configparser
 
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import h5py
 import spectres
 import numpy as np
 
 from typeguard import typechecked
-from scipy.interpolate import interp1d, interp2d, RegularGridInterpolator
+from scipy.interpolate import RegularGridInterpolator
 
 from species.analysis import photometry
 from species.core import box, constants
 from species.data import database
 from species.read import read_calibration, read_filter, read_planck
-from species.util import dust_util, read_util
+from species.util import cache_util, dust_util, perf_util, read_util
 
 
 class ReadModel:
@@ -63,6 +63,7 @@ class ReadModel:
                           "add_model of Database.")
 
         self.spectrum_interp = None
+        self.flux_interp = None
         self.wl_points = None
         self.wl_index = None
 
@@ -85,6 +86,19 @@ class ReadModel:
 
         self.database = config["species"]["database"]
 
+        # File and maximum size (MB) of the cache with resampled grids
+
+        self.grid_cache = config["species"].get(
+            "grid_cache",
+            fallback=os.path.join(
+                os.path.dirname(self.database), "species_grid_cache.hdf5"
+            ),
+        )
+
+        self.grid_cache_size = config["species"].getfloat(
+            "grid_cache_size", fallback=1000.0
+        )
+
         self.extra_param = [
             "radius",
             "distance",
@@ -111,7 +125,10 @@ class ReadModel:
     @typechecked
     def open_database(self) -> h5py._hl.files.File:
         """
-        Internal function for opening the HDF5 database.
+        Internal function for opening the HDF5 database. A shared,
+        read-only file handle is returned (see
+        :func:`~species.util.cache_util.open_pooled`) so the file
+        should not be closed after reading the data.
 
         Returns
         -------
@@ -119,26 +136,81 @@ class ReadModel:
             The HDF5 database.
         """
 
-        config_file = os.path.join(os.getcwd(), "species_config.ini")
+        h5_file = cache_util.open_pooled(self.database)
 
-        config = configparser.ConfigParser()
-        config.read(config_file)
+        if f"models/{self.model}" not in h5_file:
+            raise ValueError(
+                f"The '{self.model}' model spectra are not present in the database."
+            )
+
+        return h5_file
 
-        database_path = config["species"]["database"]
+    @typechecked
+    def grid_data(self) -> Dict[str, Any]:
+        """
+        Internal function for reading the parameter names, grid
+        points, and wavelengths of the model grid. The data are read
+        once from the database and are then kept in memory for all
+        instances of :class:`~species.read.read_model.ReadModel`
+        that use the same database and model. The cache is cleared
+        when data are written to the database or with
+        :func:`~species.read.read_model.ReadModel.clear_cache`.
 
-        h5_file = h5py.File(database_path, "r")
+        Returns
+        -------
+        dict
+            Dictionary with the parameter names (``'parameters'``),
+            the grid points (``'points'``), and the wavelength
+            points (``'wavelength'``).
+        """
 
-        try:
-            h5_file[f"models/{self.model}"]
+        grid_data = cache_util.get_cached(self.database, f"models/{self.model}")
 
-        except KeyError:
-            h5_file.close()
+        if grid_data is None:
+            h5_file = self.open_database()
 
-            raise ValueError(
-                f"The '{self.model}' model spectra are not present in the database."
-            )
+            dset = h5_file[f"models/{self.model}"]
 
-        return h5_file
+            if "n_param" in dset.attrs:
+                n_param = dset.attrs["n_param"]
+
+            elif "nparam" in dset.attrs:
+                n_param = dset.attrs["nparam"]
+
+            param = []
+            for i in range(n_param):
+                param.append(dset.attrs[f"parameter{i}"])
+
+            points = {}
+            for item in param:
+                points[item] = np.asarray(h5_file[f"models/{self.model}/{item}"])
+
+            grid_data = {
+                "parameters": param,
+                "points": points,
+                "wavelength": np.asarray(h5_file[f"models/{self.model}/wavelength"]),
+            }
+
+            cache_util.set_cached(self.database, f"models/{self.model}", grid_data)
+
+        return grid_data
+
+    @typechecked
+    def clear_cache(self) -> None:
+        """
+        Function for clearing the cached grid data and closing the
+        shared file handle of the database. This is only required
+        if the database has been modified outside of
+        :class:`~species.data.database.Database` (e.g. by a
+        different process).
+
+        Returns
+        -------
+        NoneType
+            None
+        """
+
+        cache_util.invalidate(self.database)
 
     @typechecked
     def wavelength_points(
@@ -181,6 +253,33 @@ class ReadModel:
 
         return wl_points[wl_index], wl_index
 
+    @typechecked
+    def read_grid_flux(self, hdf5_file: h5py._hl.files.File) -> np.ndarray:
+        """
+        Internal function for reading the fluxes of the full grid
+        at the wavelengths that are selected with
+        :func:`~species.read.read_model.ReadModel.wavelength_points`.
+        Only the contiguous part of the flux dataset that covers
+        these wavelengths is read from the database.
+
+        Parameters
+        ----------
+        hdf5_file : h5py._hl.files.File
+            The HDF5 database.
+
+        Returns
+        -------
+        np.ndarray
+            Flux cube with one axis per model parameter and the
+            wavelength axis as last axis.
+        """
+
+        index = np.where(self.wl_index)[0]
+
+        return np.asarray(
+            hdf5_file[f"models/{self.model}/flux"][..., index[0] : index[-1] + 1]
+        )
+
     @typechecked
     def interpolate_model(self) -> None:
         """
@@ -202,13 +301,91 @@ class ReadModel:
         if self.wl_points is None:
             self.wl_points, self.wl_index = self.wavelength_points(h5_file)
 
-        flux = np.asarray(h5_file[f"models/{self.model}/flux"])
-        flux = flux[..., self.wl_index]
+        flux = self.read_grid_flux(h5_file)
 
         self.spectrum_interp = RegularGridInterpolator(
             points, flux, method="linear", bounds_error=False, fill_value=np.nan
         )
 
+    @typechecked
+    def resample_grid(
+        self,
+        hdf5_file: h5py._hl.files.File,
+        wavel_resample: Optional[np.ndarray],
+        smooth: bool,
+        spec_res: Optional[float],
+    ) -> np.ndarray:
+        """
+        Internal function for smoothing and resampling the spectra of
+        all grid points at once, or for calculating the synthetic
+        fluxes of all grid points for the ``filter_name``.
+
+        Parameters
+        ----------
+        hdf5_file : h5py._hl.files.File
+            The HDF5 database.
+        wavel_resample : np.ndarray, None
+            Wavelength points for the resampling of the spectra. The
+            ``filter_name`` is used if set to ``None``.
+        smooth : bool
+            Smooth the spectra with a Gaussian line spread function.
+        spec_res : float, None
+            Spectral resolution that is used for the Gaussian filter
+            when ``smooth=True``.
+
+        Returns
+        -------
+        np.ndarray
+            Resampled flux cube with one axis per model parameter and
+            the resampled wavelengths (or a single synthetic flux) along
+            the last axis.
+        """
+
+        # The spectra of all grid points are processed at once by
+        # reshaping the flux cube into a 2D array with the grid points
+        # along the first axis and the wavelengths along the second axis
+
+        flux = self.read_grid_flux(hdf5_file)
+
+        grid_shape = flux.shape[:-1]
+        flux = flux.reshape(-1, flux.shape[-1])
+
+        if self.filter_name is not None:
+            synphot = photometry.SyntheticPhotometry(self.filter_name)
+            filter_weights = synphot.flux_weights(self.wl_points)
+
+            if filter_weights is None:
+                flux_new = np.full((flux.shape[0], 1), np.nan)
+
+            else:
+                flux_new = np.dot(flux[:, filter_weights[0]], filter_weights[1])
+                flux_new = flux_new[:, np.newaxis]
+
+        else:
+            if smooth and spec_res is not None:
+                flux = read_util.smooth_spectrum(
+                    wavelength=self.wl_points, flux=flux, spec_res=spec_res
+                )
+
+            elif smooth:
+                warnings.warn(
+                    "Smoothing of a spectrum (smooth=True) is only possible when "
+                    "setting the argument of 'spec_res'."
+                )
+
+            flux_new = spectres.spectres(
+                wavel_resample,
+                self.wl_points,
+                flux,
+                spec_errs=None,
+                fill=np.nan,
+                verbose=True,
+            )
+
+        flux_new = flux_new.reshape(grid_shape + (flux_new.shape[-1],))
+
+        return flux_new
+
     @typechecked
     def interpolate_grid(
         self,
@@ -218,7 +395,10 @@ class ReadModel:
     ) -> None:
         """
         Internal function for linearly interpolating the grid of model
-        spectra for a given filter or wavelength sampling.
+        spectra for a given filter or wavelength sampling. The resampled
+        grid is stored in the grid cache (see ``grid_cache`` and
+        ``grid_cache_size`` in the configuration file) such that it is
+        reused when the same grid is requested again.
 
         wavel_resample : np.ndarray, None
             Wavelength points for the resampling of the spectrum. The
@@ -237,8 +417,6 @@ class ReadModel:
             None
         """
 
-        self.interpolate_model()
-
         if smooth and wavel_resample is None:
             raise ValueError(
                 "Smoothing is only required if the spectra are resampled to a new "
@@ -248,128 +426,52 @@ class ReadModel:
 
         points = []
         for item in self.get_points().values():
-            points.append(list(item))
+            points.append(item)
 
-        param = self.get_parameters()
-        n_param = len(param)
+        h5_file = self.open_database()
 
-        dim_size = []
-        for item in points:
-            dim_size.append(len(item))
+        if self.wl_points is None:
+            self.wl_points, self.wl_index = self.wavelength_points(h5_file)
+
+        # Resampled grids are stored in the grid cache with a key
+        # that depends on the model grid, the wavelength sampling,
+        # the spectral resolution, and the filter profile
+
+        if self.grid_cache_size > 0.0:
+            if self.filter_name is None:
+                filter_data = None
+                det_type = None
+
+            else:
+                read_filt = read_filter.ReadFilter(self.filter_name)
+                filter_data = read_filt.get_filter()
+                det_type = read_filt.detector_type()
+
+            cache_key = cache_util.grid_cache_key(
+                self.model,
+                *points,
+                self.get_wavelengths(),
+                self.wl_points,
+                wavel_resample,
+                smooth,
+                spec_res,
+                self.filter_name,
+                filter_data,
+                det_type,
+            )
+
+            flux_new = cache_util.load_grid(self.grid_cache, cache_key)
 
-        if self.filter_name is not None:
-            dim_size.append(1)
         else:
-            dim_size.append(wavel_resample.size)
-
-        flux_new = np.zeros(dim_size)
-
-        if n_param == 1:
-            model_param = {}
-
-            for i, item_0 in enumerate(points[0]):
-                model_param[param[0]] = item_0
-
-                if self.filter_name is not None:
-                    flux_new[i] = self.get_flux(model_param)[0]
-
-                else:
-                    flux_new[i, :] = self.get_model(
-                        model_param,
-                        spec_res=spec_res,
-                        wavel_resample=wavel_resample,
-                        smooth=smooth,
-                    ).flux
-
-        elif n_param == 2:
-            model_param = {}
-
-            for i, item_0 in enumerate(points[0]):
-                for j, item_1 in enumerate(points[1]):
-                    model_param[param[0]] = item_0
-                    model_param[param[1]] = item_1
-
-                    if self.filter_name is not None:
-                        flux_new[i, j] = self.get_flux(model_param)[0]
-
-                    else:
-                        flux_new[i, j, :] = self.get_model(
-                            model_param,
-                            spec_res=spec_res,
-                            wavel_resample=wavel_resample,
-                            smooth=smooth,
-                        ).flux
-
-        elif n_param == 3:
-            model_param = {}
-
-            for i, item_0 in enumerate(points[0]):
-                for j, item_1 in enumerate(points[1]):
-                    for k, item_2 in enumerate(points[2]):
-                        model_param[param[0]] = item_0
-                        model_param[param[1]] = item_1
-                        model_param[param[2]] = item_2
-
-                        if self.filter_name is not None:
-                            flux_new[i, j, k] = self.get_flux(model_param)[0]
-
-                        else:
-                            flux_new[i, j, k, :] = self.get_model(
-                                model_param,
-                                spec_res=spec_res,
-                                wavel_resample=wavel_resample,
-                                smooth=smooth,
-                            ).flux
-
-        elif n_param == 4:
-            model_param = {}
-
-            for i, item_0 in enumerate(points[0]):
-                for j, item_1 in enumerate(points[1]):
-                    for k, item_2 in enumerate(points[2]):
-                        for m, item_3 in enumerate(points[3]):
-                            model_param[param[0]] = item_0
-                            model_param[param[1]] = item_1
-                            model_param[param[2]] = item_2
-                            model_param[param[3]] = item_3
-
-                            if self.filter_name is not None:
-                                flux_new[i, j, k, m] = self.get_flux(model_param)[0]
-
-                            else:
-                                flux_new[i, j, k, m, :] = self.get_model(
-                                    model_param,
-                                    spec_res=spec_res,
-                                    wavel_resample=wavel_resample,
-                                    smooth=smooth,
-                                ).flux
-
-        elif n_param == 5:
-            model_param = {}
-
-            for i, item_0 in enumerate(points[0]):
-                for j, item_1 in enumerate(points[1]):
-                    for k, item_2 in enumerate(points[2]):
-                        for m, item_3 in enumerate(points[3]):
-                            for n, item_4 in enumerate(points[4]):
-                                model_param[param[0]] = item_0
-                                model_param[param[1]] = item_1
-                                model_param[param[2]] = item_2
-                                model_param[param[3]] = item_3
-                                model_param[param[4]] = item_4
-
-                                if self.filter_name is not None:
-                                    flux_new[i, j, k, m, n] = self.get_flux(
-                                        model_param
-                                    )[0]
-
-                                else:
-                                    flux_new[i, j, k, m, n, :] = self.get_model(
-                                        model_param,
-                                        spec_res=spec_res,
-                                        wavel_resample=wavel_resample,
-                                        smooth=smooth,
-                                    ).flux
+            flux_new = None
+
+        if flux_new is None:
+            flux_new = self.resample_grid(h5_file, wavel_resample, smooth, spec_res)
+
+            if self.grid_cache_size > 0.0:
+                cache_util.store_grid(
+                    self.grid_cache, cache_key, flux_new, self.grid_cache_size
+                )
 
         if self.filter_name is not None:
             transmission = read_filter.ReadFilter(self.filter_name)
@@ -383,29 +485,32 @@ class ReadModel:
         )
 
     @staticmethod
-    @typechecked
+    @perf_util.hot_path
     def apply_lognorm_ext(
         wavelength: np.ndarray,
         flux: np.ndarray,
-        radius_interp: float,
-        sigma_interp: float,
-        v_band_ext: float,
+        radius_interp: Union[float, np.ndarray],
+        sigma_interp: Union[float, np.ndarray],
+        v_band_ext: Union[float, np.ndarray],
     ) -> np.ndarray:
         """
         Internal function for applying extinction by dust to a
-        spectrum.
+        spectrum or a batch of spectra.
 
         wavelength : np.ndarray
             Wavelengths (um) of the spectrum.
         flux : np.ndarray
-            Fluxes (W m-2 um-1) of the spectrum.
-        radius_interp : float
+            Fluxes (W m-2 um-1) of the spectrum, or a 2D array with
+            the fluxes of multiple spectra, with shape
+            ``(n_spectra, n_wavel)``.
+        radius_interp : float, np.ndarray
             Logarithm of the mean geometric radius (um) of the
-            log-normal size distribution.
-        sigma_interp : float
+            log-normal size distribution. An array with one value per
+            spectrum should be provided if ``flux`` is a 2D array.
+        sigma_interp : float, np.ndarray
             Geometric standard deviation (dimensionless) of the
             log-normal size distribution.
-        v_band_ext : float
+        v_band_ext : float, np.ndarray
             The extinction (mag) in the V band.
 
         Returns
@@ -414,19 +519,9 @@ class ReadModel:
             Fluxes (W m-2 um-1) with the extinction applied.
         """
 
-        database_path = dust_util.check_dust_database()
-
-        with h5py.File(database_path, "r") as h5_file:
-            dust_cross = np.asarray(
-                h5_file["dust/lognorm/mgsio3/crystalline/cross_section"]
-            )
-            dust_wavel = np.asarray(
-                h5_file["dust/lognorm/mgsio3/crystalline/wavelength"]
-            )
-            dust_radius = np.asarray(
-                h5_file["dust/lognorm/mgsio3/crystalline/radius_g"]
-            )
-            dust_sigma = np.asarray(h5_file["dust/lognorm/mgsio3/crystalline/sigma_g"])
+        dust_cross, dust_wavel, dust_radius, dust_sigma = dust_util.read_cross_sections(
+            "lognorm"
+        )
 
         if wavelength[0] < dust_wavel[0]:
             raise ValueError(
@@ -450,62 +545,48 @@ class ReadModel:
             bounds_error=True,
         )
 
-        read_filt = read_filter.ReadFilter("Generic/Bessell.V")
-        filt_trans = read_filt.get_filter()
-
-        cross_phot = np.zeros((dust_radius.shape[0], dust_sigma.shape[0]))
-
-        for i in range(dust_radius.shape[0]):
-            for j in range(dust_sigma.shape[0]):
-                cross_interp = interp1d(
-                    dust_wavel, dust_cross[:, i, j], kind="linear", bounds_error=True
-                )
+        cross_phot = dust_util.filter_cross_sections("lognorm", "Generic/Bessell.V")
 
-                cross_tmp = cross_interp(filt_trans[:, 0])
-
-                integral1 = np.trapz(filt_trans[:, 1] * cross_tmp, filt_trans[:, 0])
-                integral2 = np.trapz(filt_trans[:, 1], filt_trans[:, 0])
-
-                # Filter-weighted average of the extinction cross section
-                cross_phot[i, j] = integral1 / integral2
-
-        cross_interp = interp2d(
-            dust_sigma, dust_radius, cross_phot, kind="linear", bounds_error=True
+        cross_interp = RegularGridInterpolator(
+            (dust_radius, dust_sigma), cross_phot, method="linear", bounds_error=True
         )
 
-        cross_v_band = cross_interp(sigma_interp, 10.0 ** radius_interp)[0]
-
-        radius_full = np.full(wavelength.shape[0], 10.0 ** radius_interp)
-        sigma_full = np.full(wavelength.shape[0], sigma_interp)
-
-        cross_new = dust_interp(np.column_stack((wavelength, radius_full, sigma_full)))
-
-        n_grains = v_band_ext / cross_v_band / 2.5 / np.log10(np.exp(1.0))
-
-        return flux * np.exp(-cross_new * n_grains)
+        return ReadModel.dust_extinction(
+            wavelength,
+            flux,
+            dust_interp,
+            cross_interp,
+            10.0 ** np.asarray(radius_interp),
+            np.asarray(sigma_interp),
+            np.asarray(v_band_ext),
+        )
 
     @staticmethod
-    @typechecked
+    @perf_util.hot_path
     def apply_powerlaw_ext(
         wavelength: np.ndarray,
         flux: np.ndarray,
-        r_max_interp: float,
-        exp_interp: float,
-        v_band_ext: float,
+        r_max_interp: Union[float, np.ndarray],
+        exp_interp: Union[float, np.ndarray],
+        v_band_ext: Union[float, np.ndarray],
     ) -> np.ndarray:
         """
         Internal function for applying extinction by dust to a
-        spectrum.
+        spectrum or a batch of spectra.
 
         wavelength : np.ndarray
             Wavelengths (um) of the spectrum.
         flux : np.ndarray
-            Fluxes (W m-2 um-1) of the spectrum.
-        r_max_interp : float
-            Maximum radius (um) of the power-law size distribution.
-        exp_interp : float
+            Fluxes (W m-2 um-1) of the spectrum, or a 2D array with
+            the fluxes of multiple spectra, with shape
+            ``(n_spectra, n_wavel)``.
+        r_max_interp : float, np.ndarray
+            Logarithm of the maximum radius (um) of the power-law
+            size distribution. An array with one value per spectrum
+            should be provided if ``flux`` is a 2D array.
+        exp_interp : float, np.ndarray
             Exponent of the power-law size distribution.
-        v_band_ext : float
+        v_band_ext : float, np.ndarray
             The extinction (mag) in the V band.
 
         Returns
@@ -514,19 +595,9 @@ class ReadModel:
             Fluxes (W m-2 um-1) with the extinction applied.
         """
 
-        database_path = dust_util.check_dust_database()
-
-        with h5py.File(database_path, "r") as h5_file:
-            dust_cross = np.asarray(
-                h5_file["dust/powerlaw/mgsio3/crystalline/cross_section"]
-            )
-            dust_wavel = np.asarray(
-                h5_file["dust/powerlaw/mgsio3/crystalline/wavelength"]
-            )
-            dust_r_max = np.asarray(
-                h5_file["dust/powerlaw/mgsio3/crystalline/radius_max"]
-            )
-            dust_exp = np.asarray(h5_file["dust/powerlaw/mgsio3/crystalline/exponent"])
+        dust_cross, dust_wavel, dust_r_max, dust_exp = dust_util.read_cross_sections(
+            "powerlaw"
+        )
 
         dust_interp = RegularGridInterpolator(
             (dust_wavel, dust_r_max, dust_exp),
@@ -550,55 +621,118 @@ class ReadModel:
                 f"({dust_wavel[-1]:.2e} um) of the grid with dust cross sections."
             )
 
-        read_filt = read_filter.ReadFilter("Generic/Bessell.V")
-        filt_trans = read_filt.get_filter()
+        cross_phot = dust_util.filter_cross_sections("powerlaw", "Generic/Bessell.V")
 
-        cross_phot = np.zeros((dust_r_max.shape[0], dust_exp.shape[0]))
+        cross_interp = RegularGridInterpolator(
+            (dust_r_max, dust_exp), cross_phot, method="linear", bounds_error=True
+        )
 
-        for i in range(dust_r_max.shape[0]):
-            for j in range(dust_exp.shape[0]):
-                cross_interp = interp1d(
-                    dust_wavel, dust_cross[:, i, j], kind="linear", bounds_error=True
-                )
+        return ReadModel.dust_extinction(
+            wavelength,
+            flux,
+            dust_interp,
+            cross_interp,
+            10.0 ** np.asarray(r_max_interp),
+            np.asarray(exp_interp),
+            np.asarray(v_band_ext),
+        )
 
-                cross_tmp = cross_interp(filt_trans[:, 0])
+    @staticmethod
+    @perf_util.hot_path
+    def dust_extinction(
+        wavelength: np.ndarray,
+        flux: np.ndarray,
+        dust_interp: RegularGridInterpolator,
+        cross_interp: RegularGridInterpolator,
+        dust_size: Union[float, np.ndarray],
+        dust_shape: Union[float, np.ndarray],
+        v_band_ext: Union[float, np.ndarray],
+    ) -> np.ndarray:
+        """
+        Internal function for applying the extinction by a size
+        distribution of dust grains to one or multiple spectra.
 
-                integral1 = np.trapz(filt_trans[:, 1] * cross_tmp, filt_trans[:, 0])
-                integral2 = np.trapz(filt_trans[:, 1], filt_trans[:, 0])
+        wavelength : np.ndarray
+            Wavelengths (um) of the spectrum.
+        flux : np.ndarray
+            Fluxes (W m-2 um-1), either a 1D array with a single
+            spectrum or a 2D array with shape ``(n_spectra,
+            n_wavel)``.
+        dust_interp : scipy.interpolate.RegularGridInterpolator
+            Interpolator of the cross sections as function of
+            wavelength, grain size, and shape parameter of the size
+            distribution.
+        cross_interp : scipy.interpolate.RegularGridInterpolator
+            Interpolator of the V band averaged cross sections as
+            function of grain size and shape parameter.
+        dust_size : float, np.ndarray
+            Characteristic grain radius (um), either a single value
+            or one value per spectrum.
+        dust_shape : float, np.ndarray
+            Shape parameter of the size distribution (i.e. the
+            geometric standard deviation or the power-law exponent).
+        v_band_ext : float, np.ndarray
+            The extinction (mag) in the V band.
 
-                # Filter-weighted average of the extinction cross section
-                cross_phot[i, j] = integral1 / integral2
+        Returns
+        -------
+        np.ndarray
+            Fluxes (W m-2 um-1) with the extinction applied.
+        """
 
-        cross_interp = interp2d(
-            dust_exp, dust_r_max, cross_phot, kind="linear", bounds_error=True
-        )
+        dust_size = np.atleast_1d(dust_size)
+        dust_shape = np.atleast_1d(dust_shape)
+        v_band_ext = np.atleast_1d(v_band_ext)
+
+        cross_v_band = cross_interp(np.column_stack((dust_size, dust_shape)))
+
+        # Grid points with shape (n_spectra, n_wavel, 3)
 
-        cross_v_band = cross_interp(exp_interp, 10.0 ** r_max_interp)[0]
+        grid_shape = (dust_size.size, wavelength.size)
 
-        r_max_full = np.full(wavelength.shape[0], 10.0 ** r_max_interp)
-        exp_full = np.full(wavelength.shape[0], exp_interp)
+        dust_points = np.stack(
+            (
+                np.broadcast_to(wavelength, grid_shape),
+                np.broadcast_to(dust_size[:, np.newaxis], grid_shape),
+                np.broadcast_to(dust_shape[:, np.newaxis], grid_shape),
+            ),
+            axis=-1,
+        )
 
-        cross_new = dust_interp(np.column_stack((wavelength, r_max_full, exp_full)))
+        cross_new = dust_interp(dust_points)
 
         n_grains = v_band_ext / cross_v_band / 2.5 / np.log10(np.exp(1.0))
 
-        return flux * np.exp(-cross_new * n_grains)
+        ext_factor = np.exp(-cross_new * n_grains[:, np.newaxis])
+
+        if flux.ndim == 1:
+            ext_factor = ext_factor[0]
+
+        return flux * ext_factor
 
     @staticmethod
-    @typechecked
+    @perf_util.hot_path
     def apply_ext_ism(
-        wavelengths: np.ndarray, flux: np.ndarray, v_band_ext: float, v_band_red: float
+        wavelengths: np.ndarray,
+        flux: np.ndarray,
+        v_band_ext: Union[float, np.ndarray],
+        v_band_red: Union[float, np.ndarray],
     ) -> np.ndarray:
         """
-        Internal function for applying ISM extinction to a spectrum.
+        Internal function for applying ISM extinction to a spectrum
+        or a batch of spectra.
 
         wavelengths : np.ndarray
             Wavelengths (um) of the spectrum.
         flux : np.ndarray
-            Fluxes (W m-2 um-1) of the spectrum.
-        v_band_ext : float
-            Extinction (mag) in the V band.
-        v_band_red : float
+            Fluxes (W m-2 um-1) of the spectrum, or a 2D array with
+            the fluxes of multiple spectra, with shape
+            ``(n_spectra, n_wavel)``.
+        v_band_ext : float, np.ndarray
+            Extinction (mag) in the V band. An array with shape
+            ``(n_spectra, 1)`` should be provided if ``flux`` is a
+            2D array.
+        v_band_red : float, np.ndarray
             Reddening in the V band.
 
         Returns
@@ -659,17 +793,18 @@ class ReadModel:
             Box with the model spectrum.
         """
 
-        # Get grid boundaries
+        # Get grid boundaries and parameter names
 
         grid_bounds = self.get_bounds()
+        grid_param = self.get_parameters()
 
         # Check if all parameters are present and within the grid boundaries
 
-        for key in self.get_parameters():
+        for key in grid_param:
             if key not in model_param.keys():
                 raise ValueError(
                     f"The '{key}' parameter is required by '{self.model}'. "
-                    f"The mandatory parameters are {self.get_parameters()}."
+                    f"The mandatory parameters are {grid_param}."
                 )
 
             if model_param[key] < grid_bounds[key][0]:
@@ -689,11 +824,11 @@ class ReadModel:
         # Print a warning if redundant parameters are included in the dictionary
 
         for key in model_param.keys():
-            if key not in self.get_parameters() and key not in self.extra_param:
+            if key not in grid_param and key not in self.extra_param:
                 warnings.warn(
                     f"The '{key}' parameter is not required by '{self.model}' so "
                     f"the parameter will be ignored. The mandatory parameters are "
-                    f"{self.get_parameters()}."
+                    f"{grid_param}."
                 )
 
         # Interpolate the model grid
@@ -973,6 +1108,250 @@ class ReadModel:
 
         return model_box
 
+    @typechecked
+    def get_model_batch(
+        self,
+        samples: np.ndarray,
+        param_names: List[str],
+        spec_res: Optional[float] = None,
+        wavel_resample: Optional[np.ndarray] = None,
+        smooth: bool = False,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Function for extracting a batch of model spectra by linearly
+        interpolating the model grid at all parameter vectors at once.
+        The spectra are processed in the same way as with
+        :meth:`~species.read.read_model.ReadModel.get_model`, except
+        that the conversion to magnitudes is not supported. Parameter
+        vectors outside the grid boundaries result in NaN fluxes
+        instead of an error.
+
+        Parameters
+        ----------
+        samples : np.ndarray
+            Array with the parameter values, with shape
+            ``(n_spectra, n_param)``.
+        param_names : list(str)
+            Parameter names that correspond with the columns of
+            ``samples``. Should contain all the parameters of the
+            model grid (see
+            :func:`~species.read.read_model.ReadModel.get_parameters`)
+            and optionally parameters such as ``radius``, ``distance``,
+            ``ism_ext``, and ``disk_teff``.
+        spec_res : float, None
+            Spectral resolution that is used for smoothing the spectra
+            with a Gaussian kernel when ``smooth=True``. The
+            wavelengths will be resampled to the argument of
+            ``spec_res`` if ``smooth=False``.
+        wavel_resample : np.ndarray, None
+            Wavelength points (um) to which the spectra are resampled.
+            The original wavelength points are used if the argument is
+            set to ``None``.
+        smooth : bool
+            If ``True``, the spectra are smoothed with a Gaussian
+            kernel to the spectral resolution of ``spec_res``.
+
+        Returns
+        -------
+        np.ndarray
+            Wavelength points (um).
+        np.ndarray
+            Fluxes (W m-2 um-1), with shape ``(n_spectra, n_wavel)``.
+        """
+
+        if samples.ndim != 2 or samples.shape[1] != len(param_names):
+            raise ValueError(
+                f"The 'samples' array should have a shape of (n_spectra, "
+                f"{len(param_names)}), with one column for each of the "
+                f"'param_names', but the shape is {samples.shape}."
+            )
+
+        grid_param = self.get_parameters()
+
+        for key in grid_param:
+            if key not in param_names:
+                raise ValueError(
+                    f"The '{key}' parameter is required by '{self.model}'. "
+                    f"The mandatory parameters are {grid_param}."
+                )
+
+        for key in param_names:
+            if key not in grid_param and key not in self.extra_param:
+                warnings.warn(
+                    f"The '{key}' parameter is not required by '{self.model}' so "
+                    f"the parameter will be ignored. The mandatory parameters are "
+                    f"{grid_param}."
+                )
+
+        # Dictionary with the parameter values as arrays with shape (n_spectra, 1)
+
+        param_val = {}
+        for i, item in enumerate(param_names):
+            param_val[item] = samples[:, i, np.newaxis]
+
+        if self.spectrum_interp is None:
+            self.interpolate_model()
+
+        if self.wavel_range is None:
+            wl_points = self.get_wavelengths()
+            self.wavel_range = (wl_points[0], wl_points[-1])
+
+        # Interpolate all spectra from the grid
+
+        grid_bounds = self.get_bounds()
+
+        grid_points = np.column_stack([param_val[item][:, 0] for item in grid_param])
+
+        out_bounds = np.zeros(samples.shape[0], dtype=bool)
+
+        for i, item in enumerate(grid_param):
+            out_bounds |= (grid_points[:, i] < grid_bounds[item][0]) | (
+                grid_points[:, i] > grid_bounds[item][1]
+            )
+
+        if np.any(out_bounds):
+            warnings.warn(
+                f"There are {np.sum(out_bounds)} parameter vectors outside the "
+                f"boundaries of the model grid, {grid_bounds}, so the fluxes of "
+                f"these spectra are set to NaN."
+            )
+
+        flux = self.spectrum_interp(grid_points)
+
+        # Calculate the radius from the mass and surface gravity
+
+        if "mass" in param_val and "radius" not in param_val:
+            mass = 1e3 * param_val["mass"] * constants.M_JUP  # (g)
+            radius = np.sqrt(
+                1e3 * constants.GRAVITY * mass / (10.0 ** param_val["logg"])
+            )  # (cm)
+            param_val["radius"] = 1e-2 * radius / constants.R_JUP  # (Rjup)
+
+        # Apply (radius/distance)^2 scaling
+
+        if "radius" in param_val and "distance" in param_val:
+            flux *= (param_val["radius"] * constants.R_JUP) ** 2 / (
+                param_val["distance"] * constants.PARSEC
+            ) ** 2
+
+        # Add blackbody disk components to the spectra
+
+        if "disk_teff" in param_val and "disk_radius" in param_val:
+            wavel_planck = read_util.create_wavelengths(
+                (0.9 * self.wavel_range[0], 1.1 * self.wavel_range[-1]), 500.0
+            )
+
+            disk_scaling = (
+                (param_val["disk_radius"] * constants.R_JUP)
+                / (param_val["distance"] * constants.PARSEC)
+            ) ** 2
+
+            flux_planck = read_planck.ReadPlanck.planck(
+                wavel_planck, param_val["disk_teff"], disk_scaling
+            )
+
+            flux += spectres.spectres(self.wl_points, wavel_planck, flux_planck)
+
+        wavelength = self.wl_points
+
+        # Apply veiling
+
+        if "veil_a" in param_val and "veil_b" in param_val and "veil_ref" in param_val:
+            lambda_ref = 0.5  # (um)
+
+            veil_flux = param_val["veil_ref"] + param_val["veil_b"] * (
+                wavelength - lambda_ref
+            )
+
+            flux = param_val["veil_a"] * flux + veil_flux
+
+        # Apply extinction
+
+        if (
+            "lognorm_radius" in param_val
+            and "lognorm_sigma" in param_val
+            and "lognorm_ext" in param_val
+        ):
+
+            flux = self.apply_lognorm_ext(
+                wavelength,
+                flux,
+                param_val["lognorm_radius"][:, 0],
+                param_val["lognorm_sigma"][:, 0],
+                param_val["lognorm_ext"][:, 0],
+            )
+
+        if (
+            "powerlaw_max" in param_val
+            and "powerlaw_exp" in param_val
+            and "powerlaw_ext" in param_val
+        ):
+
+            flux = self.apply_powerlaw_ext(
+                wavelength,
+                flux,
+                param_val["powerlaw_max"][:, 0],
+                param_val["powerlaw_exp"][:, 0],
+                param_val["powerlaw_ext"][:, 0],
+            )
+
+        if "ism_ext" in param_val:
+            ism_reddening = param_val.get("ism_red", 3.1)
+
+            flux = self.apply_ext_ism(
+                wavelength, flux, param_val["ism_ext"], ism_reddening
+            )
+
+        # Smooth the spectra
+
+        if smooth and spec_res is not None:
+            flux = read_util.smooth_spectrum(wavelength, flux, spec_res)
+
+        elif smooth and spec_res is None:
+            warnings.warn(
+                "Smoothing of a spectrum (smooth=True) is only possible when setting "
+                "the argument of 'spec_res'."
+            )
+
+        # Resample the spectra
+
+        if wavel_resample is not None:
+            flux = spectres.spectres(
+                wavel_resample,
+                wavelength,
+                flux,
+                spec_errs=None,
+                fill=np.nan,
+                verbose=True,
+            )
+
+            wavelength = wavel_resample
+
+        elif spec_res is not None and not smooth:
+            wavel_resample = read_util.create_wavelengths(
+                (self.wl_points[0], self.wl_points[-1]), spec_res
+            )
+
+            indices = np.where(
+                (wavel_resample > self.wl_points[0])
+                & (wavel_resample < self.wl_points[-2])
+            )[0]
+
+            wavel_resample = wavel_resample[indices]
+
+            flux = spectres.spectres(
+                wavel_resample,
+                wavelength,
+                flux,
+                spec_errs=None,
+                fill=np.nan,
+                verbose=True,
+            )
+
+            wavelength = wavel_resample
+
+        return wavelength, flux
+
     @typechecked
     def get_data(
         self,
@@ -1100,10 +1479,6 @@ class ReadModel:
 
         flux = flux[tuple(indices)]
 
-        # Close the HDF5 database
-
-        h5_file.close()
-
         # Apply (radius/distance)^2 scaling
 
         if "radius" in model_param and "distance" in model_param:
@@ -1354,6 +1729,213 @@ class ReadModel:
 
         return app_mag[0], abs_mag[0]
 
+    @typechecked
+    def get_flux_batch(
+        self, samples: np.ndarray, param_names: List[str], chunk_size: int = 1000
+    ) -> np.ndarray:
+        """
+        Function for calculating the average flux densities for the
+        ``filter_name`` at all parameter vectors at once. If the
+        spectra are only scaled with the radius and distance, then
+        the synthetic fluxes of the grid points are calculated once,
+        after which the fluxes are linearly interpolated at the
+        parameter vectors. Otherwise, the spectra are calculated in
+        chunks with :func:`~species.read.read_model.ReadModel.get_model_batch`
+        and integrated over the filter profile with a matrix product.
+        The fluxes are equal to those of
+        :func:`~species.read.read_model.ReadModel.get_flux`, except
+        that parameter vectors outside the grid boundaries result in
+        a NaN instead of an error.
+
+        Parameters
+        ----------
+        samples : np.ndarray
+            Array with the parameter values, with shape
+            ``(n_samples, n_param)``.
+        param_names : list(str)
+            Parameter names that correspond with the columns of
+            ``samples``. Should contain all the parameters of the
+            model grid. The fluxes are scaled if the parameters
+            include a ``radius`` (Rjup), or a ``mass`` (Mjup) from
+            which the radius is calculated, and a ``distance`` (pc).
+        chunk_size : int
+            Number of spectra that are calculated at once when the
+            fluxes can not be interpolated from the synthetic fluxes
+            of the grid points.
+
+        Returns
+        -------
+        np.ndarray
+            Average fluxes (W m-2 um-1), with shape ``(n_samples,)``.
+        """
+
+        if self.filter_name is None:
+            raise ValueError(
+                "The synthetic fluxes can only be calculated if the 'filter_name' "
+                "argument of ReadModel has been set."
+            )
+
+        if samples.ndim != 2 or samples.shape[1] != len(param_names):
+            raise ValueError(
+                f"The 'samples' array should have a shape of (n_samples, "
+                f"{len(param_names)}), with one column for each of the "
+                f"'param_names', but the shape is {samples.shape}."
+            )
+
+        grid_param = self.get_parameters()
+
+        for key in grid_param:
+            if key not in param_names:
+                raise ValueError(
+                    f"The '{key}' parameter is required by '{self.model}'. "
+                    f"The mandatory parameters are {grid_param}."
+                )
+
+        # The synthetic fluxes of the grid points can only be
+        # interpolated if the spectra are not modified otherwise
+
+        spec_param = [
+            "lognorm_ext",
+            "powerlaw_ext",
+            "ism_ext",
+            "disk_teff",
+            "veil_a",
+        ]
+
+        if any(item in param_names for item in spec_param):
+            h5_file = self.open_database()
+
+            if self.wl_points is None:
+                self.wl_points, self.wl_index = self.wavelength_points(h5_file)
+
+            synphot = photometry.SyntheticPhotometry(self.filter_name)
+            filter_weights = synphot.flux_weights(self.wl_points)
+
+            if filter_weights is None:
+                return np.full(samples.shape[0], np.nan)
+
+            flux = np.zeros(samples.shape[0])
+
+            for i in range(0, samples.shape[0], chunk_size):
+                _, flux_chunk = self.get_model_batch(
+                    samples[i : i + chunk_size], param_names
+                )
+
+                flux[i : i + chunk_size] = np.dot(
+                    flux_chunk[:, filter_weights[0]], filter_weights[1]
+                )
+
+            return flux
+
+        if self.flux_interp is None:
+            # Synthetic fluxes of all grid points, which are calculated
+            # with a single matrix product of the flux cube
+
+            h5_file = self.open_database()
+
+            if self.wl_points is None:
+                self.wl_points, self.wl_index = self.wavelength_points(h5_file)
+
+            flux_grid = self.resample_grid(h5_file, None, False, None)
+
+            self.flux_interp = RegularGridInterpolator(
+                list(self.get_points().values()),
+                flux_grid[..., 0],
+                method="linear",
+                bounds_error=False,
+                fill_value=np.nan,
+            )
+
+        param_index = [param_names.index(item) for item in grid_param]
+
+        flux = self.flux_interp(samples[:, param_index])
+
+        if "radius" in param_names:
+            radius = samples[:, param_names.index("radius")]
+
+        elif "mass" in param_names and "logg" in param_names:
+            mass = 1e3 * samples[:, param_names.index("mass")] * constants.M_JUP  # (g)
+            radius = np.sqrt(
+                1e3
+                * constants.GRAVITY
+                * mass
+                / (10.0 ** samples[:, param_names.index("logg")])
+            )  # (cm)
+            radius = 1e-2 * radius / constants.R_JUP  # (Rjup)
+
+        else:
+            radius = None
+
+        if radius is not None and "distance" in param_names:
+            distance = samples[:, param_names.index("distance")]
+            flux *= (radius * constants.R_JUP) ** 2 / (distance * constants.PARSEC) ** 2
+
+        return flux
+
+    @typechecked
+    def get_magnitude_batch(
+        self, samples: np.ndarray, param_names: List[str]
+    ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        Function for calculating the apparent and absolute magnitudes
+        for the ``filter_name`` at all parameter vectors at once. The
+        synthetic fluxes are calculated with
+        :func:`~species.read.read_model.ReadModel.get_flux_batch`. The
+        magnitudes are equal to those of
+        :func:`~species.read.read_model.ReadModel.get_magnitude`,
+        except that parameter vectors outside the grid boundaries
+        result in a NaN without a warning.
+
+        Parameters
+        ----------
+        samples : np.ndarray
+            Array with the parameter values, with shape
+            ``(n_samples, n_param)``.
+        param_names : list(str)
+            Parameter names that correspond with the columns of
+            ``samples``. Should contain all the parameters of the
+            model grid. A ``radius`` (Rjup), or a ``mass`` (Mjup) from
+            which the radius is calculated, and a ``distance`` (pc)
+            are required for the apparent magnitude. Only a radius is
+            required for the absolute magnitude.
+
+        Returns
+        -------
+        np.ndarray, None
+            Apparent magnitudes. A ``None`` is returned if the
+            ``param_names`` do not contain a radius and ``distance``.
+        np.ndarray, None
+            Absolute magnitudes. A ``None`` is returned if the
+            ``param_names`` do not contain a radius.
+        """
+
+        if "radius" not in param_names and (
+            "mass" not in param_names or "logg" not in param_names
+        ):
+            return None, None
+
+        if "distance" in param_names:
+            distance = samples[:, param_names.index("distance")]
+
+        else:
+            # Calculate the absolute magnitudes from the fluxes at 10 pc
+            distance = None
+
+            samples = np.column_stack((samples, np.full(samples.shape[0], 10.0)))
+            param_names = param_names + ["distance"]
+
+        flux = self.get_flux_batch(samples, param_names)
+
+        synphot = photometry.SyntheticPhotometry(self.filter_name)
+        zp_flux = synphot.zero_point()
+
+        mag = synphot.vega_mag - 2.5 * np.log10(flux / zp_flux)
+
+        if distance is None:
+            return None, mag
+
+        return mag, mag - 5.0 * np.log10(distance) + 5.0
+
     @typechecked
     def get_bounds(self) -> Dict[str, Tuple[float, float]]:
         """
@@ -1365,17 +1947,10 @@ class ReadModel:
             Boundaries of parameter grid.
         """
 
-        h5_file = self.open_database()
-
-        parameters = self.get_parameters()
-
         bounds = {}
 
-        for item in parameters:
-            data = h5_file[f"models/{self.model}/{item}"]
-            bounds[item] = (data[0], data[-1])
-
-        h5_file.close()
+        for key, value in self.grid_data()["points"].items():
+            bounds[key] = (value[0], value[-1])
 
         return bounds
 
@@ -1390,10 +1965,7 @@ class ReadModel:
             Wavelength points (um).
         """
 
-        with self.open_database() as h5_file:
-            wavelength = np.asarray(h5_file[f"models/{self.model}/wavelength"])
-
-        return wavelength
+        return self.grid_data()["wavelength"].copy()
 
     @typechecked
     def get_points(self) -> Dict[str, np.ndarray]:
@@ -1408,17 +1980,8 @@ class ReadModel:
 
         points = {}
 
-        h5_file = self.open_database()
-
-        parameters = self.get_parameters()
-
-        points = {}
-
-        for item in parameters:
-            data = h5_file[f"models/{self.model}/{item}"]
-            points[item] = np.asarray(data)
-
-        h5_file.close()
+        for key, value in self.grid_data()["points"].items():
+            points[key] = value.copy()
 
         return points
 
@@ -1433,23 +1996,7 @@ class ReadModel:
             Model parameters.
         """
 
-        h5_file = self.open_database()
-
-        dset = h5_file[f"models/{self.model}"]
-
-        if "n_param" in dset.attrs:
-            n_param = dset.attrs["n_param"]
-
-        elif "nparam" in dset.attrs:
-            n_param = dset.attrs["nparam"]
-
-        param = []
-        for i in range(n_param):
-            param.append(dset.attrs[f"parameter{i}"])
-
-        h5_file.close()
-
-        return param
+        return self.grid_data()["parameters"].copy()
 
     @typechecked
     def get_spec_res(self) -> float:
@@ -73,7 +73,9 @@ class ReadPlanck:
     @staticmethod
     @typechecked
     def planck(
-        wavel_points: np.ndarray, temperature: float, scaling: float
+        wavel_points: np.ndarray,
+        temperature: Union[float, np.ndarray],
+        scaling: Union[float, np.ndarray],
     ) -> np.ndarray:
         """
         Internal function for calculating a Planck function.
@@ -82,9 +84,11 @@ class ReadPlanck:
         ----------
         wavel_points : np.ndarray
             Wavelength points (um).
-        temperature : float
-            Temperature (K).
-        scaling : float
+        temperature : float, np.ndarray
+            Temperature (K). An array with shape ``(n_spectra, 1)``
+            can be provided (together with ``scaling``) to calculate
+            multiple Planck functions at once.
+        scaling : float, np.ndarray
             Scaling parameter.
 
         Returns
@@ -0,0 +1,411 @@
+"""
+Utility functions for caching data that are read from the database
+and for the on-disk cache of resampled model grids.
+"""
+
+import os
+import time
+import hashlib
+import warnings
+
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+import h5py
+import numpy as np
+
+from typeguard import typechecked
+
+
+# Read-only file handles of the HDF5 database, stored together with
+# the ID of the process that opened them since HDF5 handles can not
+# be shared between a parent process and its forked children
+_H5_POOL: Dict[str, Tuple[int, h5py._hl.files.File]] = {}
+
+# In-memory data (e.g. grid points and parameter names) that have
+# been read from the HDF5 database, stored per database file
+_DATA_CACHE: Dict[str, Dict[Hashable, Any]] = {}
+
+
+@typechecked
+def open_pooled(database_path: str) -> h5py._hl.files.File:
+    """
+    Function for returning a shared, read-only handle of the HDF5
+    database. The file is opened once and the same handle is
+    returned by subsequent calls, so the returned file should not
+    be closed by the caller. A new handle is opened if the file
+    was closed elsewhere or if the function is called from a
+    different process than the one that opened the file.
+
+    Parameters
+    ----------
+    database_path : str
+        Path to the HDF5 database.
+
+    Returns
+    -------
+    h5py._hl.files.File
+        Read-only handle of the HDF5 database.
+    """
+
+    pool_key = os.path.abspath(database_path)
+
+    if pool_key in _H5_POOL:
+        proc_id, h5_file = _H5_POOL[pool_key]
+
+        if proc_id == os.getpid() and h5_file.id.valid:
+            return h5_file
+
+    h5_file = h5py.File(database_path, "r")
+    _H5_POOL[pool_key] = (os.getpid(), h5_file)
+
+    return h5_file
+
+
+@typechecked
+def open_writable(
+    database_path: str, mode: str = "a", clear_cache: bool = True
+) -> h5py._hl.files.File:
+    """
+    Function for opening the HDF5 database with write access. The
+    pooled read-only handle of the database is closed and the cached
+    data of the database are removed before opening the file, since
+    HDF5 does not allow a file to be opened for writing while it is
+    still open in read-only mode, and since the cached data might no
+    longer match the content of the database.
+
+    Parameters
+    ----------
+    database_path : str
+        Path to the HDF5 database.
+    mode : str
+        File mode that is used by ``h5py`` ('a', 'r+', or 'w').
+    clear_cache : bool
+        Remove the cached data of the database. Can be set to
+        ``False`` when only data are added that are not part of
+        the cache (e.g. an attribute with a derived quantity), in
+        which case only the pooled file handle is closed.
+
+    Returns
+    -------
+    h5py._hl.files.File
+        The HDF5 database with write access.
+    """
+
+    if clear_cache:
+        invalidate(database_path)
+
+    else:
+        close_pooled(database_path)
+
+    return h5py.File(database_path, mode)
+
+
+@typechecked
+def get_cached(database_path: str, key: Hashable) -> Optional[Any]:
+    """
+    Function for returning data from the in-memory cache.
+
+    Parameters
+    ----------
+    database_path : str
+        Path to the HDF5 database from which the data were read.
+    key : hashable
+        Key of the cached data.
+
+    Returns
+    -------
+    object, None
+        The cached data. A ``None`` is returned if the data are not
+        present in the cache.
+    """
+
+    return _DATA_CACHE.get(os.path.abspath(database_path), {}).get(key)
+
+
+@typechecked
+def set_cached(database_path: str, key: Hashable, data: Any) -> None:
+    """
+    Function for storing data in the in-memory cache.
+
+    Parameters
+    ----------
+    database_path : str
+        Path to the HDF5 database from which the data were read.
+    key : hashable
+        Key of the cached data.
+    data : object
+        Data that will be cached.
+
+    Returns
+    -------
+    NoneType
+        None
+    """
+
+    cache_key = os.path.abspath(database_path)
+
+    if cache_key not in _DATA_CACHE:
+        _DATA_CACHE[cache_key] = {}
+
+    _DATA_CACHE[cache_key][key] = data
+
+
+@typechecked
+def invalidate(database_path: Optional[str] = None) -> None:
+    """
+    Function for closing the pooled file handle and removing the
+    cached data of a database. This is automatically done when
+    the database is opened with
+    :func:`~species.util.cache_util.open_writable`, but should
+    be done manually if the database is modified in a different
+    way (e.g. by a different process).
+
+    Parameters
+    ----------
+    database_path : str, None
+        Path to the HDF5 database. The file handles and cached
+        data of all databases are removed if set to ``None``.
+
+    Returns
+    -------
+    NoneType
+        None
+    """
+
+    if database_path is None:
+        _DATA_CACHE.clear()
+
+    else:
+        _DATA_CACHE.pop(os.path.abspath(database_path), None)
+
+    close_pooled(database_path)
+
+
+@typechecked
+def close_pooled(database_path: Optional[str] = None) -> None:
+    """
+    Function for closing the pooled, read-only file handle of a
+    database. The cached data of the database are not removed. A
+    new handle is opened with the next call of
+    :func:`~species.util.cache_util.open_pooled`.
+
+    Parameters
+    ----------
+    database_path : str, None
+        Path to the HDF5 database. The file handles of all
+        databases are closed if set to ``None``.
+
+    Returns
+    -------
+    NoneType
+        None
+    """
+
+    if database_path is None:
+        pool_keys = list(_H5_POOL.keys())
+
+    else:
+        pool_keys = [os.path.abspath(database_path)]
+
+    for item in pool_keys:
+        if item in _H5_POOL:
+            proc_id, h5_file = _H5_POOL.pop(item)
+
+            if proc_id == os.getpid() and h5_file.id.valid:
+                h5_file.close()
+
+
+@typechecked
+def grid_cache_key(*items: Any) -> str:
+    """
+    Function for creating the key of a resampled model grid in the
+    grid cache. The key is a hash of the provided items, so any
+    change in for example the wavelength sampling or the spectral
+    resolution results in a different key.
+
+    Parameters
+    ----------
+    items : object
+        Items that identify the resampled grid (e.g. the model name,
+        the wavelength points, and the spectral resolution). Arrays
+        are hashed by their content.
+
+    Returns
+    -------
+    str
+        Hexadecimal hash of the items.
+    """
+
+    hash_obj = hashlib.sha1()
+
+    for item in items:
+        if isinstance(item, np.ndarray):
+            hash_obj.update(str(item.shape).encode())
+            hash_obj.update(np.ascontiguousarray(item, dtype=np.float64).tobytes())
+
+        else:
+            hash_obj.update(repr(item).encode())
+
+        # Separator such that the boundaries between the items are
+        # included in the hash
+        hash_obj.update(b"\x00")
+
+    return hash_obj.hexdigest()
+
+
+@typechecked
+def load_grid(cache_file: str, cache_key: str) -> Optional[np.ndarray]:
+    """
+    Function for reading a resampled model grid from the grid cache.
+    The access time of the grid is updated, which is used for
+    removing the least recently used grids from the cache.
+
+    Parameters
+    ----------
+    cache_file : str
+        Path to the HDF5 file with the grid cache.
+    cache_key : str
+        Key of the grid, as created with
+        :func:`~species.util.cache_util.grid_cache_key`.
+
+    Returns
+    -------
+    np.ndarray, None
+        The resampled flux cube. A ``None`` is returned if the grid
+        is not present in the cache.
+    """
+
+    if not os.path.isfile(cache_file):
+        return None
+
+    try:
+        with h5py.File(cache_file, "a") as h5_file:
+            if cache_key not in h5_file:
+                return None
+
+            h5_file[cache_key].attrs["access_time"] = time.time()
+
+            return np.asarray(h5_file[cache_key])
+
+    except OSError:
+        # The cache file might be in use by a different process
+        warnings.warn(f"Could not read from the grid cache: {cache_file}")
+
+        return None
+
+
+@typechecked
+def store_grid(
+    cache_file: str, cache_key: str, data: np.ndarray, max_size: float
+) -> None:
+    """
+    Function for storing a resampled model grid in the grid cache.
+    The least recently used grids are removed when the total size
+    of the cached grids exceeds ``max_size``.
+
+    Parameters
+    ----------
+    cache_file : str
+        Path to the HDF5 file with the grid cache. The file is
+        created if it does not exist.
+    cache_key : str
+        Key of the grid, as created with
+        :func:`~species.util.cache_util.grid_cache_key`.
+    data : np.ndarray
+        The resampled flux cube.
+    max_size : float
+        Maximum total size (MB) of the cached grids.
+
+    Returns
+    -------
+    NoneType
+        None
+    """
+
+    if data.nbytes > max_size * 1e6:
+        return
+
+    try:
+        with h5py.File(cache_file, "a") as h5_file:
+            if cache_key in h5_file:
+                del h5_file[cache_key]
+
+            h5_file.create_dataset(cache_key, data=data)
+            h5_file[cache_key].attrs["access_time"] = time.time()
+
+            access_time = {}
+            total_size = 0
+
+            for key, value in h5_file.items():
+                access_time[key] = value.attrs["access_time"]
+                total_size += value.size * value.dtype.itemsize
+
+            evicted = False
+
+            for key in sorted(access_time, key=access_time.get):
+                if total_size <= max_size * 1e6:
+                    break
+
+                value = h5_file[key]
+                total_size -= value.size * value.dtype.itemsize
+
+                del h5_file[key]
+                evicted = True
+
+        if evicted:
+            # HDF5 does not reclaim the space of deleted datasets
+            # so the remaining grids are copied to a new file
+            _repack(cache_file)
+
+    except OSError:
+        # The cache file might be in use by a different process
+        warnings.warn(f"Could not write to the grid cache: {cache_file}")
+
+
+@typechecked
+def clear_grid_cache(cache_file: str) -> None:
+    """
+    Function for removing all resampled model grids from the grid
+    cache. This is only required if a model grid or a filter
+    profile has been replaced in the database by a different
+    version with the same parameter and wavelength sampling.
+
+    Parameters
+    ----------
+    cache_file : str
+        Path to the HDF5 file with the grid cache.
+
+    Returns
+    -------
+    NoneType
+        None
+    """
+
+    if os.path.isfile(cache_file):
+        os.remove(cache_file)
+
+
+@typechecked
+def _repack(cache_file: str) -> None:
+    """
+    Internal function for copying the content of an HDF5 file to a
+    new file, such that the space of deleted datasets is released.
+
+    Parameters
+    ----------
+    cache_file : str
+        Path to the HDF5 file.
+
+    Returns
+    -------
+    NoneType
+        None
+    """
+
+    repack_file = cache_file + ".repack"
+
+    with h5py.File(cache_file, "r") as h5_in, h5py.File(repack_file, "w") as h5_out:
+        for key in h5_in:
+            h5_in.copy(key, h5_out)
+
+    os.replace(repack_file, cache_file)
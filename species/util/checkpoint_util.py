@@ -0,0 +1,254 @@
+"""
+Module with a backend for checkpointing the walkers of the MCMC
+sampler, such that a fit can be resumed after it was stopped.
+"""
+
+import time
+
+from typing import List, Optional, Tuple
+
+import emcee
+import numpy as np
+
+from typeguard import typechecked
+
+
+class CheckpointBackend(emcee.backends.HDFBackend):
+    """
+    Backend of ``emcee`` that stores the walker positions, the
+    log-probabilities, the acceptance counts, and the state of the
+    random number generator in resizable datasets of a group in an
+    HDF5 file. In contrast to the ``HDFBackend`` of ``emcee``, the
+    steps are collected in memory and written to the file at most
+    once per ``flush_interval``, so the file is not opened after
+    each step while the memory usage remains bounded for long
+    chains. An ``EnsembleSampler`` with a backend that contains
+    steps continues from the last step that was written.
+    """
+
+    @typechecked
+    def __init__(
+        self,
+        filename: str,
+        name: str = "mcmc",
+        flush_interval: float = 60.0,
+        max_steps: int = 1000,
+        compression: Optional[str] = None,
+    ) -> None:
+        """
+        Parameters
+        ----------
+        filename : str
+            HDF5 file in which the checkpoints are stored. The file
+            is created if it does not exist.
+        name : str
+            Group of the HDF5 file in which the datasets are stored.
+        flush_interval : float
+            Time interval (s) after which the collected steps are
+            written to the file.
+        max_steps : int
+            Maximum number of steps that are kept in memory before
+            they are written to the file.
+        compression : str, None
+            Compression filter ('gzip' or 'lzf') of the datasets. The
+            datasets are not compressed if set to ``None``.
+
+        Returns
+        -------
+        NoneType
+            None
+        """
+
+        super().__init__(filename, name=name, compression=compression)
+
+        self.flush_interval = flush_interval
+        self.max_steps = max_steps
+
+        self.step_buffer: List[Tuple[emcee.State, np.ndarray]] = []
+        self.flush_time = time.time()
+
+    def reset(self, nwalkers: int, ndim: int) -> None:
+        """
+        Function for removing the stored steps and creating new
+        datasets for the walkers.
+
+        Parameters
+        ----------
+        nwalkers : int
+            Number of walkers.
+        ndim : int
+            Number of parameters.
+
+        Returns
+        -------
+        NoneType
+            None
+        """
+
+        self.step_buffer = []
+        self.flush_time = time.time()
+
+        super().reset(nwalkers, ndim)
+
+    def flush(self) -> None:
+        """
+        Function for writing the collected steps to the HDF5 file.
+
+        Returns
+        -------
+        NoneType
+            None
+        """
+
+        if len(self.step_buffer) == 0:
+            return
+
+        with self.open("a") as h5_file:
+            group = h5_file[self.name]
+
+            n_steps = len(self.step_buffer)
+            iteration = group.attrs["iteration"]
+
+            if group["chain"].shape[0] < iteration + n_steps:
+                group["chain"].resize(iteration + n_steps, axis=0)
+                group["log_prob"].resize(iteration + n_steps, axis=0)
+
+                if group.attrs["has_blobs"]:
+                    group["blobs"].resize(iteration + n_steps, axis=0)
+
+            step_slice = slice(iteration, iteration + n_steps)
+
+            group["chain"][step_slice] = [item[0].coords for item in self.step_buffer]
+
+            group["log_prob"][step_slice] = [
+                item[0].log_prob for item in self.step_buffer
+            ]
+
+            if group.attrs["has_blobs"]:
+                group["blobs"][step_slice] = [
+                    item[0].blobs for item in self.step_buffer
+                ]
+
+            group["accepted"][:] += np.sum(
+                [item[1] for item in self.step_buffer], axis=0
+            )
+
+            for i, item in enumerate(self.step_buffer[-1][0].random_state):
+                group.attrs[f"random_state_{i}"] = item
+
+            group.attrs["iteration"] = iteration + n_steps
+
+        self.step_buffer = []
+        self.flush_time = time.time()
+
+    def save_step(self, state: emcee.State, accepted: np.ndarray) -> None:
+        """
+        Function for storing a step of the walkers. The steps are
+        written to the HDF5 file after the ``flush_interval`` or
+        when ``max_steps`` steps have been collected.
+
+        Parameters
+        ----------
+        state : emcee.State
+            State of the walkers.
+        accepted : np.ndarray
+            Boolean array with the walkers of which the proposal
+            was accepted.
+
+        Returns
+        -------
+        NoneType
+            None
+        """
+
+        # The sampler reuses the arrays of the state
+        # so copies are stored until the next flush
+
+        step_state = emcee.State(state, copy=True)
+
+        self.step_buffer.append((step_state, np.copy(accepted)))
+
+        if (
+            len(self.step_buffer) >= self.max_steps
+            or time.time() - self.flush_time >= self.flush_interval
+        ):
+            self.flush()
+
+    def grow(self, ngrow: int, blobs: Optional[np.ndarray]) -> None:
+        """
+        Function for increasing the size of the datasets.
+
+        Parameters
+        ----------
+        ngrow : int
+            Number of steps that are added.
+        blobs : np.ndarray, None
+            Blobs of the walkers.
+
+        Returns
+        -------
+        NoneType
+            None
+        """
+
+        self.flush()
+
+        super().grow(ngrow, blobs)
+
+    def get_value(
+        self, name: str, flat: bool = False, thin: int = 1, discard: int = 0
+    ) -> Optional[np.ndarray]:
+        """
+        Function for reading the stored steps. The collected steps
+        are first written to the HDF5 file.
+
+        Parameters
+        ----------
+        name : str
+            Name of the dataset ('chain', 'log_prob', or 'blobs').
+        flat : bool
+            Flatten the walkers and steps.
+        thin : int
+            Thinning factor of the steps.
+        discard : int
+            Number of steps that are discarded.
+
+        Returns
+        -------
+        np.ndarray, None
+            Stored values.
+        """
+
+        self.flush()
+
+        return super().get_value(name, flat=flat, thin=thin, discard=discard)
+
+    @property
+    def iteration(self) -> int:
+        """
+        Number of stored steps, including the steps that have not
+        yet been written to the HDF5 file.
+        """
+
+        return super().iteration + len(self.step_buffer)
+
+    @property
+    def accepted(self) -> np.ndarray:
+        """
+        Number of accepted proposals of each walker.
+        """
+
+        self.flush()
+
+        return super().accepted
+
+    @property
+    def random_state(self) -> Optional[list]:
+        """
+        State of the random number generator after the last step.
+        """
+
+        self.flush()
+
+        return super().random_state
+
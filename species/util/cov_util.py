@@ -0,0 +1,186 @@
+"""
+Utility functions for evaluating the log-likelihood of spectra with
+correlated uncertainties. The quadratic form with the inverse of the
+covariance matrix is evaluated with triangular solves on the Cholesky
+factor of the covariance matrix, which is computed once per matrix
+and cached, instead of inverting the matrix in each evaluation.
+"""
+
+import weakref
+
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+
+from scipy.linalg import cho_factor, cho_solve, solve_triangular
+from typeguard import typechecked
+
+from species.util import perf_util
+
+
+# Cholesky factors of the covariance matrices, stored by the ID of
+# the matrix together with a weak reference to the matrix such
+# that an entry is removed when its matrix is deleted
+_CHOL_CACHE: Dict[int, Tuple[weakref.ref, np.ndarray]] = {}
+
+
+@perf_util.hot_path
+def cov_cholesky(cov_matrix: np.ndarray) -> np.ndarray:
+    """
+    Function for returning the Cholesky factor of a covariance
+    matrix. The factorization is
+    only computed the first time that the function is called for
+    a given array, so the array should not be modified in place
+    afterwards.
+
+    Parameters
+    ----------
+    cov_matrix : np.ndarray
+        Covariance matrix, with shape ``(n_wavel, n_wavel)``.
+
+    Returns
+    -------
+    np.ndarray
+        Lower-triangular Cholesky factor of the covariance matrix.
+    """
+
+    cache_key = id(cov_matrix)
+
+    if cache_key in _CHOL_CACHE:
+        matrix_ref, chol_factor = _CHOL_CACHE[cache_key]
+
+        if matrix_ref() is cov_matrix:
+            return chol_factor
+
+    chol_factor = np.linalg.cholesky(cov_matrix)
+
+    matrix_ref = weakref.ref(
+        cov_matrix, lambda _, key=cache_key: _CHOL_CACHE.pop(key, None)
+    )
+
+    _CHOL_CACHE[cache_key] = (matrix_ref, chol_factor)
+
+    return chol_factor
+
+
+@perf_util.hot_path
+def chi_squared(
+    flux_diff: np.ndarray,
+    cov_matrix: np.ndarray,
+    sigma_ratio: Optional[np.ndarray] = None,
+) -> Union[np.float64, np.ndarray]:
+    """
+    Function for calculating the chi-square of the residuals of a
+    spectrum with a covariance matrix. Inflated uncertainties are
+    included by rescaling the covariance matrix with the ratio of
+    the inflated and original uncertainties, that is, with elements
+    ``C_ij * sigma_ratio_i * sigma_ratio_j``. The rescaling is applied
+    to the residuals instead, such that the cached Cholesky factor
+    of the original covariance matrix is used.
+
+    Parameters
+    ----------
+    flux_diff : np.ndarray
+        Residuals of the spectrum, with shape ``(n_wavel,)`` or
+        ``(n_samples, n_wavel)``.
+    cov_matrix : np.ndarray
+        Covariance matrix, with shape ``(n_wavel, n_wavel)``.
+    sigma_ratio : np.ndarray, None
+        Ratio of the inflated and original uncertainties, with the
+        same shape as ``flux_diff``. Not used if set to ``None``.
+
+    Returns
+    -------
+    float, np.ndarray
+        Chi-square, or array with the chi-square of each sample.
+    """
+
+    chol_factor = cov_cholesky(cov_matrix)
+
+    if sigma_ratio is not None:
+        flux_diff = flux_diff / sigma_ratio
+
+    # Solve L y = r such that chi2 = r^T C^-1 r = y^T y
+    chol_solve = solve_triangular(
+        chol_factor, flux_diff.T, lower=True, check_finite=False
+    )
+
+    return np.sum(chol_solve ** 2, axis=0)
+
+
+@typechecked
+def wavel_distance(wavelength: np.ndarray) -> np.ndarray:
+    """
+    Function for calculating the matrix with the squared distances
+    between the wavelengths of a spectrum, which is used by the
+    covariance model of :func:`~species.util.cov_util.gp_chi_squared`.
+    The matrix only depends on the wavelength sampling so it can be
+    computed once per spectrum.
+
+    Parameters
+    ----------
+    wavelength : np.ndarray
+        Wavelengths (um) of the spectrum.
+
+    Returns
+    -------
+    np.ndarray
+        Matrix with the squared wavelength distances (um^2), with
+        shape ``(n_wavel, n_wavel)``.
+    """
+
+    return (wavelength[:, np.newaxis] - wavelength[np.newaxis, :]) ** 2
+
+
+@perf_util.hot_path
+def gp_chi_squared(
+    flux_diff: np.ndarray,
+    error: np.ndarray,
+    wavel_dist: np.ndarray,
+    corr_len: float,
+    corr_amp: float,
+) -> np.float64:
+    """
+    Function for calculating the chi-square of the residuals of a
+    spectrum for which the covariances are modeled with a squared
+    exponential kernel (see Wang et al. 2020). The covariance matrix,
+    ``C_ij = corr_amp^2 * e_i * e_j * exp(-d_ij^2 / (2 * corr_len^2))
+    + (1 - corr_amp^2) * e_i^2 * delta_ij``, is factorized as
+    ``E K E`` with ``E`` the diagonal matrix with the uncertainties,
+    so only the correlation matrix ``K`` requires a Cholesky
+    decomposition.
+
+    Parameters
+    ----------
+    flux_diff : np.ndarray
+        Residuals of the spectrum.
+    error : np.ndarray
+        Uncertainties of the spectrum.
+    wavel_dist : np.ndarray
+        Matrix with the squared wavelength distances (um^2), as
+        calculated with :func:`~species.util.cov_util.wavel_distance`.
+    corr_len : float
+        Correlation length (um).
+    corr_amp : float
+        Fractional amplitude of the correlated uncertainties.
+
+    Returns
+    -------
+    float
+        Chi-square.
+    """
+
+    corr_matrix = corr_amp ** 2 * np.exp(-wavel_dist / (2.0 * corr_len ** 2))
+    corr_matrix[np.diag_indices_from(corr_matrix)] += 1.0 - corr_amp ** 2
+
+    flux_norm = flux_diff / error
+
+    try:
+        chol_factor = cho_factor(corr_matrix, lower=True, check_finite=False)
+
+    except np.linalg.LinAlgError:
+        # The correlation matrix is (numerically) singular when
+        # corr_amp approaches unity for a large correlation length
+        return np.dot(flux_norm, np.linalg.solve(corr_matrix, flux_norm))
+
+    return np.dot(flux_norm, cho_solve(chol_factor, flux_norm, check_finite=False))
@@ -2,18 +2,26 @@
 Utility functions for data processing.
 """
 
-from typing import Dict, List, Optional
+from multiprocessing import Pool
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 
 import h5py
 import numpy as np
 
+from scipy.integrate import simps
 from scipy.interpolate import griddata
 from typeguard import typechecked
 
-from species.core import box
+from species.core import box, constants
 from species.read import read_radtrans
 
 
+# Forward model and settings that are used by the worker processes
+# of retrieval_spectra, which are set once per worker by the
+# initializer of the pool
+_RETRIEVAL_DATA = None
+
+
 @typechecked
 def update_sptype(sptypes: np.ndarray) -> List[str]:
     """
@@ -774,7 +782,7 @@ def retrieval_spectrum(
     distance: Optional[float],
     pt_smooth: Optional[float],
     temp_nodes: Optional[np.integer],
-    read_rad: read_radtrans.ReadRadtrans,
+    read_rad: Any,
     sample: np.ndarray,
 ) -> box.ModelBox:
     """
@@ -814,7 +822,9 @@ def retrieval_spectrum(
         Number of free temperature nodes that are used when
         ``pt_profile='monotonic'`` or ``pt_profile='free'``.
     read_rad : read_radtrans.ReadRadtrans
-        Instance of :class:`~species.read.read_radtrans.ReadRadtrans`.
+        Instance of :class:`~species.read.read_radtrans.ReadRadtrans`,
+        or any other forward model with a ``get_model`` method
+        that has the same parameters.
     sample : np.ndarray
         Parameter values with their order given by the ``indices``.
 
@@ -956,3 +966,482 @@ def retrieval_spectrum(
     model_box.type = "mcmc"
 
     return model_box
+
+
+@typechecked
+def retrieval_teff(model_box: box.ModelBox) -> float:
+    """
+    Function for calculating :math:`T_\\mathrm{eff}` from a
+    petitRADTRANS spectrum of a posterior sample, by integrating
+    the flux at the planet surface. The spectrum should cover
+    the wavelengths at which most of the flux is emitted (e.g.
+    0.5-50 um).
+
+    Parameters
+    ----------
+    model_box : box.ModelBox
+        Box with the petitRADTRANS spectrum, as calculated with
+        :func:`~species.util.data_util.retrieval_spectrum`.
+
+    Returns
+    -------
+    float
+        Effective temperature (K).
+    """
+
+    sample_distance = model_box.parameters["distance"] * constants.PARSEC
+    sample_radius = model_box.parameters["radius"] * constants.R_JUP
+
+    # Scaling for the flux back to the planet surface
+    sample_scale = (sample_distance / sample_radius) ** 2
+
+    # Blackbody flux: sigma * Teff^4
+    flux_int = simps(sample_scale * model_box.flux, model_box.wavelength)
+
+    return float((flux_int / constants.SIGMA_SB) ** 0.25)
+
+
+@typechecked
+def retrieval_model(
+    forward_model: Callable,
+    model_kwargs: Dict[str, Any],
+    spec_kwargs: Dict[str, Any],
+    read_rad: Optional[Any] = None,
+) -> Tuple[Any, Dict[str, Any]]:
+    """
+    Internal function for creating the forward model with which
+    the spectra of posterior samples are calculated.
+
+    Parameters
+    ----------
+    forward_model : callable
+        Class or function that creates the forward model.
+    model_kwargs : dict
+        Keyword arguments of ``forward_model``. The lists of the
+        dictionary are copied before creating the forward model.
+    spec_kwargs : dict
+        Keyword arguments of
+        :func:`~species.util.data_util.retrieval_spectrum`.
+    read_rad : read_radtrans.ReadRadtrans, None
+        Forward model that has already been created with the
+        ``model_kwargs``. A new forward model is created if set
+        to ``None``.
+
+    Returns
+    -------
+    read_radtrans.ReadRadtrans
+        Forward model.
+    dict
+        Keyword arguments of
+        :func:`~species.util.data_util.retrieval_spectrum` for the
+        forward model.
+    """
+
+    if read_rad is None:
+        # The names of the cloud species are shortened by Radtrans
+        # (e.g. from 'MgSiO3(c)_cd' to 'MgSiO3(c)') so copies of
+        # the lists are passed to the forward model
+
+        model_copy = {}
+        for key, value in model_kwargs.items():
+            if isinstance(value, list):
+                model_copy[key] = value.copy()
+            else:
+                model_copy[key] = value
+
+        read_rad = forward_model(**model_copy)
+
+        # Set quenching attribute such that the parameter of get_model is not required
+
+        read_rad.quenching = spec_kwargs["quenching"]
+
+    spec_kwargs = spec_kwargs.copy()
+    spec_kwargs["cloud_species"] = read_rad.cloud_species
+
+    return read_rad, spec_kwargs
+
+
+@typechecked
+def _init_retrieval_worker(
+    forward_model: Callable,
+    model_kwargs: Dict[str, Any],
+    spec_kwargs: Dict[str, Any],
+    post_process: Optional[Callable],
+) -> None:
+    """
+    Internal function for initializing a worker process of
+    :func:`~species.util.data_util.retrieval_spectra`. The forward
+    model is created once per worker.
+
+    Parameters
+    ----------
+    forward_model : callable
+        Class or function that creates the forward model.
+    model_kwargs : dict
+        Keyword arguments of ``forward_model``.
+    spec_kwargs : dict
+        Keyword arguments of
+        :func:`~species.util.data_util.retrieval_spectrum`.
+    post_process : callable, None
+        Function that is applied to each ``ModelBox``.
+
+    Returns
+    -------
+    NoneType
+        None
+    """
+
+    global _RETRIEVAL_DATA
+
+    read_rad, spec_kwargs = retrieval_model(forward_model, model_kwargs, spec_kwargs)
+
+    _RETRIEVAL_DATA = (read_rad, spec_kwargs, post_process)
+
+
+def _retrieval_worker(chunk: Tuple[np.ndarray, List[Any]]) -> List[Any]:
+    """
+    Internal function for calculating the spectra of a chunk of
+    posterior samples in a worker process with the forward model
+    that was created by the initializer.
+
+    Parameters
+    ----------
+    chunk : tuple(np.ndarray, list)
+        Posterior samples and the P-T smoothing parameters of the
+        samples.
+
+    Returns
+    -------
+    list
+        Boxes with the spectra, or the output of the
+        ``post_process`` function.
+    """
+
+    return retrieval_chunk(*_RETRIEVAL_DATA, *chunk)
+
+
+def retrieval_chunk(
+    read_rad: Any,
+    spec_kwargs: Dict[str, Any],
+    post_process: Optional[Callable],
+    samples: np.ndarray,
+    pt_smooth: List[Any],
+) -> List[Any]:
+    """
+    Internal function for calculating the spectra of a chunk of
+    posterior samples with
+    :func:`~species.util.data_util.retrieval_spectrum`.
+
+    Parameters
+    ----------
+    read_rad : read_radtrans.ReadRadtrans
+        Forward model that calculates the spectra.
+    spec_kwargs : dict
+        Keyword arguments of
+        :func:`~species.util.data_util.retrieval_spectrum`, except
+        ``pt_smooth``, ``read_rad``, and ``sample``.
+    post_process : callable, None
+        Function that is applied to each ``ModelBox``. The boxes
+        are returned if set to ``None``.
+    samples : np.ndarray
+        Posterior samples, with shape ``(n_samples, n_param)``.
+    pt_smooth : list
+        P-T smoothing parameters of the samples.
+
+    Returns
+    -------
+    list
+        Boxes with the spectra, or the output of ``post_process``.
+    """
+
+    results = []
+
+    for sample_item, smooth_item in zip(samples, pt_smooth):
+        model_box = retrieval_spectrum(
+            pt_smooth=smooth_item, read_rad=read_rad, sample=sample_item, **spec_kwargs
+        )
+
+        if post_process is None:
+            results.append(model_box)
+        else:
+            results.append(post_process(model_box))
+
+    return results
+
+
+@typechecked
+def retrieval_spectra(
+    samples: np.ndarray,
+    pt_smooth: List[Any],
+    spec_kwargs: Dict[str, Any],
+    model_kwargs: Dict[str, Any],
+    forward_model: Optional[Callable] = None,
+    read_rad: Optional[Any] = None,
+    post_process: Optional[Callable] = None,
+    processes: int = 1,
+    chunk_size: int = 10,
+) -> Iterator[Tuple[int, List[Any]]]:
+    """
+    Function for calculating the petitRADTRANS spectra of posterior
+    samples, optionally in parallel. The samples are distributed in
+    chunks over a pool of worker processes, which each create the
+    forward model once. The results are returned per chunk, in the
+    order of the samples, as soon as they are available, such that
+    they can be processed (e.g. stored in the database) while the
+    remaining spectra are calculated.
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        Posterior samples, with shape ``(n_samples, n_param)``.
+    pt_smooth : list
+        P-T smoothing parameters of the samples.
+    spec_kwargs : dict
+        Keyword arguments of
+        :func:`~species.util.data_util.retrieval_spectrum`, except
+        ``pt_smooth``, ``read_rad``, and ``sample``.
+    model_kwargs : dict
+        Keyword arguments with which the ``forward_model`` is
+        created (e.g. ``line_species`` and ``wavel_range``).
+    forward_model : callable, None
+        Class or function that creates the forward model, which
+        should provide the ``get_model`` method and the
+        ``cloud_species`` attribute of
+        :class:`~species.read.read_radtrans.ReadRadtrans`. The
+        ``ReadRadtrans`` class is used if set to ``None``. Should
+        be defined at the top level of a module when
+        ``processes > 1``.
+    read_rad : read_radtrans.ReadRadtrans, None
+        Forward model that has already been created with the
+        ``model_kwargs``, which is used instead of creating a new
+        one when ``processes=1``.
+    post_process : callable, None
+        Function that is applied to each ``ModelBox`` (e.g.
+        :func:`~species.util.data_util.retrieval_teff`), such that
+        only its output is returned by the worker processes. The
+        boxes are returned if set to ``None``.
+    processes : int
+        Number of worker processes. The spectra are calculated in
+        the main process if set to 1. Each worker process reads the
+        opacities of petitRADTRANS, so the memory usage scales with
+        the number of processes.
+    chunk_size : int
+        Number of samples per chunk.
+
+    Returns
+    -------
+    iterator
+        Iterator over the index of the first sample of each chunk
+        and the list with the results of the chunk.
+    """
+
+    if forward_model is None:
+        forward_model = read_radtrans.ReadRadtrans
+
+    chunk_start = list(range(0, samples.shape[0], chunk_size))
+
+    chunks = [
+        (samples[i : i + chunk_size], pt_smooth[i : i + chunk_size])
+        for i in chunk_start
+    ]
+
+    if processes == 1:
+        read_rad, spec_kwargs = retrieval_model(
+            forward_model, model_kwargs, spec_kwargs, read_rad=read_rad
+        )
+
+        for i, item in zip(chunk_start, chunks):
+            yield i, retrieval_chunk(read_rad, spec_kwargs, post_process, *item)
+
+    else:
+        pool = Pool(
+            processes=processes,
+            initializer=_init_retrieval_worker,
+            initargs=(forward_model, model_kwargs, spec_kwargs, post_process),
+        )
+
+        try:
+            for i, item in zip(chunk_start, pool.imap(_retrieval_worker, chunks)):
+                yield i, item
+
+        finally:
+            pool.terminate()
+
+
+@typechecked
+def create_samples(
+    database: h5py._hl.files.File,
+    db_tag: str,
+    samples: np.ndarray,
+    compression: Optional[str] = None,
+) -> h5py._hl.dataset.Dataset:
+    """
+    Function for storing posterior samples in a chunked dataset
+    that is resizable along all axes. The parameters are stored
+    along the last axis, with one parameter per chunk, such that
+    derived parameters can be appended in place with
+    :func:`~species.util.data_util.append_samples` and individual
+    parameters can be read without reading the full dataset.
+
+    Parameters
+    ----------
+    database: h5py._hl.files.File
+        Database.
+    db_tag : str
+        Database tag of the dataset.
+    samples : np.ndarray
+        Samples of the posterior, with the parameters along the
+        last axis.
+    compression : str, None
+        Compression filter ('gzip' or 'lzf') of the dataset. The
+        samples are not compressed if set to ``None``.
+
+    Returns
+    -------
+    h5py._hl.dataset.Dataset
+        Dataset with the samples.
+    """
+
+    # Chunks of at most 2^16 samples of a single parameter
+
+    chunk_shape = list(samples.shape[:-1]) + [1]
+    chunk_shape[0] = int(
+        max(1, min(chunk_shape[0], 2 ** 16 // np.prod(chunk_shape[1:])))
+    )
+
+    return database.create_dataset(
+        db_tag,
+        data=samples,
+        maxshape=(None,) * samples.ndim,
+        chunks=tuple(chunk_shape),
+        compression=compression,
+    )
+
+
+@typechecked
+def append_samples(
+    database: h5py._hl.files.File,
+    db_tag: str,
+    samples: np.ndarray,
+    param_name: str,
+    compression: Optional[str] = None,
+) -> h5py._hl.dataset.Dataset:
+    """
+    Function for appending the samples of a derived parameter to
+    a dataset with posterior samples. The dataset is resized in
+    place if it was created with
+    :func:`~species.util.data_util.create_samples`. Otherwise, the
+    dataset is converted into a resizable dataset first. The
+    ``n_param`` and ``parameter`` attributes are updated.
+
+    Parameters
+    ----------
+    database: h5py._hl.files.File
+        Database.
+    db_tag : str
+        Database tag of the dataset with the samples.
+    samples : np.ndarray
+        Samples of the derived parameter, with the shape of the
+        dataset except for the last axis.
+    param_name : str
+        Name of the derived parameter.
+    compression : str, None
+        Compression filter ('gzip' or 'lzf') that is used if the
+        dataset is converted into a resizable dataset. The samples
+        are not compressed if set to ``None``.
+
+    Returns
+    -------
+    h5py._hl.dataset.Dataset
+        Dataset with the samples.
+    """
+
+    dset = database[db_tag]
+
+    if dset.shape[:-1] != samples.shape:
+        raise ValueError(
+            f"The shape of the 'samples', {samples.shape}, is not compatible "
+            f"with the shape of the dataset, {dset.shape}."
+        )
+
+    if dset.maxshape[-1] is not None:
+        # Convert a dataset that is not resizable (i.e. that
+        # was stored by a previous version of species)
+
+        dset_attrs = dict(dset.attrs)
+        dset_data = np.asarray(dset)
+
+        del database[db_tag]
+
+        dset = create_samples(
+            database, db_tag, dset_data, compression=compression
+        )
+
+        for key, value in dset_attrs.items():
+            dset.attrs[key] = value
+
+    n_param = dset.shape[-1]
+
+    dset.resize(n_param + 1, axis=dset.ndim - 1)
+    dset[..., n_param] = samples
+
+    dset.attrs["n_param"] = n_param + 1
+    dset.attrs[f"parameter{n_param}"] = param_name
+
+    return dset
+
+
+@typechecked
+def read_samples(
+    dset: h5py._hl.dataset.Dataset,
+    rows: Optional[np.ndarray] = None,
+    columns: Optional[List[int]] = None,
+    start: int = 0,
+) -> np.ndarray:
+    """
+    Function for reading a subset of the posterior samples from
+    the database. Only the selected columns are read from the
+    dataset, for the range of rows that contains the selection.
+
+    Parameters
+    ----------
+    dset : h5py._hl.dataset.Dataset
+        Dataset with the samples.
+    rows : np.ndarray, None
+        Indices of the samples along the first axis. Indices can
+        occur multiple times and do not need to be sorted. All
+        samples from ``start`` onward are read if set to ``None``.
+    columns : list(int), None
+        Indices of the parameters along the last axis. All
+        parameters are read if set to ``None``.
+    start : int
+        Index of the first sample along the first axis (e.g. to
+        exclude the burnin). Only used if ``rows`` is set to
+        ``None``.
+
+    Returns
+    -------
+    np.ndarray
+        Selected samples.
+    """
+
+    # Fancy indexing of a dataset with h5py is much slower than
+    # reading a contiguous slice so the samples are read as a span
+    # of rows, one parameter at a time, and selected with numpy
+
+    if rows is None:
+        row_span = slice(start, None)
+
+    else:
+        row_span = slice(int(np.amin(rows)), int(np.amax(rows)) + 1)
+
+    if columns is None:
+        samples = dset[row_span, ...]
+
+    else:
+        samples = np.stack([dset[row_span, ..., item] for item in columns], axis=-1)
+
+    if rows is not None:
+        samples = samples[rows - row_span.start, ...]
+
+    return samples
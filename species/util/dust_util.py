@@ -3,20 +3,37 @@ Utility functions for dust cross sections and extinction.
 """
 
 import os
+import warnings
 import configparser
 
 from typing import Optional, Union, Tuple, List, Dict
 
-import h5py
-import PyMieScatt
 import numpy as np
 
 from typeguard import typechecked
-from scipy.interpolate import interp1d, interp2d
+from scipy.interpolate import interp1d, RegularGridInterpolator
+from scipy.special import spherical_jn, spherical_yn
 from scipy.stats import lognorm
 
 from species.data import database
 from species.read import read_filter
+from species.util import cache_util, perf_util
+
+
+# Extinction efficiencies that have been calculated by
+# dust_cross_section, stored by the refractive index,
+# wavelength, and grain radii
+_QEXT_CACHE: Dict[Tuple[float, float, float, bytes], np.ndarray] = {}
+
+# Maximum number of arrays in the cache of extinction efficiencies
+_QEXT_CACHE_SIZE = 1000
+
+# Names of the radius and shape parameters of the grids with
+# cross sections of the log-normal and power-law distributions
+_DUST_PARAM = {
+    "lognorm": ("radius_g", "sigma_g"),
+    "powerlaw": ("radius_max", "exponent"),
+}
 
 
 @typechecked
@@ -38,7 +55,7 @@ def check_dust_database() -> str:
 
     database_path = config["species"]["database"]
 
-    if "dust" not in h5py.File(database_path, "r"):
+    if "dust" not in cache_util.open_pooled(database_path):
         species_db = database.Database()
         species_db.add_dust()
 
@@ -163,6 +180,129 @@ def power_law_distribution(
     return dn_grains, r_width, radii
 
 
+@typechecked
+def mie_efficiency(
+    size_param: np.ndarray,
+    n_index: Union[float, np.ndarray],
+    k_index: Union[float, np.ndarray],
+) -> np.ndarray:
+    """
+    Function for calculating the extinction efficiency, Q_ext, of
+    spherical grains with Mie theory (see Bohren & Huffman 1983).
+    The efficiencies are calculated for all size parameters at once,
+    following the implementation of ``PyMieScatt.MieQ``, including
+    the Rayleigh approximation for size parameters smaller than 0.05.
+
+    Parameters
+    ----------
+    size_param : np.ndarray
+        Size parameters, ``2 * pi * radius / wavelength``, for
+        example with shape ``(n_wavel, n_radius)`` for a grid of
+        wavelengths and grain radii.
+    n_index : float, np.ndarray
+        Real part of the refractive index. An array that can be
+        broadcast to the shape of ``size_param`` (e.g. with shape
+        ``(n_wavel, 1)``) can be provided for a wavelength-dependent
+        refractive index.
+    k_index : float, np.ndarray
+        Imaginary part of the refractive index, with the same
+        shape as ``n_index``.
+
+    Returns
+    -------
+    np.ndarray
+        Extinction efficiencies, with the same shape as
+        ``size_param``.
+    """
+
+    m_index = np.broadcast_to(
+        np.asarray(n_index) + 1j * np.asarray(k_index), size_param.shape
+    )
+
+    q_ext = np.zeros(size_param.shape)
+
+    # Rayleigh approximation for small grains (B&H Eq. 5.8 and 5.11)
+
+    rayleigh = (size_param > 0.0) & (size_param <= 0.05)
+
+    m_ray = m_index[rayleigh]
+    lorentz = (m_ray ** 2 - 1.0) / (m_ray ** 2 + 2.0)
+
+    q_ext[rayleigh] = (
+        8.0 * np.abs(lorentz) ** 2 * size_param[rayleigh] ** 4 / 3.0
+        + 4.0 * size_param[rayleigh] * lorentz.imag
+    )
+
+    # Mie series for the other grains, with the size
+    # parameters along the first axis of the arrays
+
+    mie = size_param > 0.05
+
+    if not np.any(mie):
+        return q_ext
+
+    x_param = size_param[mie][:, np.newaxis]
+    m_mie = m_index[mie][:, np.newaxis]
+    mx_param = m_mie[:, 0] * x_param[:, 0]
+
+    # Number of terms in the series of each size parameter
+
+    n_max = np.round(2.0 + x_param + 4.0 * x_param ** (1.0 / 3.0))
+    n_mx = np.round(np.maximum(n_max[:, 0], np.abs(mx_param)) + 16.0)
+
+    n_terms = np.arange(1, int(np.amax(n_max)) + 1)
+
+    # The Bessel functions are only evaluated for the terms up to
+    # n_max of each size parameter, since the number of terms is
+    # strongly dependent on the size parameter
+
+    valid = n_terms <= n_max
+    x_valid = np.broadcast_to(x_param, valid.shape)[valid]
+    n_valid = np.broadcast_to(n_terms, valid.shape)[valid]
+
+    # Riccati-Bessel functions, x * j_n(x) and -x * y_n(x)
+
+    px_param = np.zeros(valid.shape)
+    px_param[valid] = x_valid * spherical_jn(n_valid, x_valid)
+
+    chx_param = np.zeros(valid.shape)
+    chx_param[valid] = -x_valid * spherical_yn(n_valid, x_valid)
+
+    p1x_param = np.hstack((np.sin(x_param), px_param[:, :-1]))
+    ch1x_param = np.hstack((np.cos(x_param), chx_param[:, :-1]))
+
+    with np.errstate(all="ignore"):
+        # The terms beyond n_max of a size parameter
+        # may be undefined but these are not used
+
+        gsx_param = px_param - 1j * chx_param
+        gs1x_param = p1x_param - 1j * ch1x_param
+
+        # Logarithmic derivative with downward recurrence (B&H
+        # Eq. 4.89), starting at n_mx of each size parameter
+
+        d_n = np.zeros((x_param.shape[0], int(np.amax(n_mx))), dtype=complex)
+
+        for i in range(d_n.shape[1] - 1, 1, -1):
+            d_n[:, i - 1] = np.where(
+                i < n_mx, (i / mx_param) - 1.0 / (d_n[:, i] + i / mx_param), 0.0
+            )
+
+        d_n = d_n[:, 1 : n_terms.size + 1]
+
+        d_a = d_n / m_mie + n_terms / x_param
+        d_b = m_mie * d_n + n_terms / x_param
+
+        a_n = (d_a * px_param - p1x_param) / (d_a * gsx_param - gs1x_param)
+        b_n = (d_b * px_param - p1x_param) / (d_b * gsx_param - gs1x_param)
+
+        q_terms = np.where(valid, (2.0 * n_terms + 1.0) * (a_n.real + b_n.real), 0.0)
+
+    q_ext[mie] = 2.0 / x_param[:, 0] ** 2 * np.sum(q_terms, axis=1)
+
+    return q_ext
+
+
 @typechecked
 def dust_cross_section(
     dn_grains: np.ndarray,
@@ -173,7 +313,10 @@ def dust_cross_section(
 ) -> np.float64:
     """
     Function for calculating the extinction cross section for a size
-    distribution of dust grains.
+    distribution of dust grains. The extinction efficiencies of the
+    grain radii are cached in memory, so the cross sections of other
+    size distributions with the same radii are calculated without
+    evaluating the Mie series again.
 
     Parameters
     ----------
@@ -195,30 +338,20 @@ def dust_cross_section(
         Extinction cross section (um2)
     """
 
-    c_ext = 0.0
-
-    for i, item in enumerate(radii):
-        # From the PyMieScatt documentation: When using PyMieScatt,
-        # pay close attention to the units of the your inputs and
-        # outputs. Wavelength and particle diameters are always in
-        # nanometers, efficiencies are unitless, cross-sections are
-        # in nm2, coefficients are in Mm-1, and size distribution
-        # concentration is always in cm-3.
-        mie = PyMieScatt.MieQ(
-            complex(n_index, k_index),
-            wavelength * 1e3,  # (nm)
-            2.0 * item * 1e3,  # diameter (nm)
-            asDict=True,
-            asCrossSection=False,
-        )
+    cache_key = (n_index, k_index, wavelength, radii.tobytes())
+
+    if cache_key in _QEXT_CACHE:
+        q_ext = _QEXT_CACHE[cache_key]
+
+    else:
+        q_ext = mie_efficiency(2.0 * np.pi * radii / wavelength, n_index, k_index)
 
-        if "Qext" in mie:
-            c_ext += np.pi * item ** 2 * mie["Qext"] * dn_grains[i]  # (um2)
+        if len(_QEXT_CACHE) >= _QEXT_CACHE_SIZE:
+            _QEXT_CACHE.pop(next(iter(_QEXT_CACHE)))
 
-        else:
-            raise ValueError("Qext not found in the PyMieScatt dictionary.")
+        _QEXT_CACHE[cache_key] = q_ext
 
-    return c_ext  # (um2)
+    return np.sum(np.pi * radii ** 2 * q_ext * dn_grains)  # (um2)
 
 
 @typechecked
@@ -233,7 +366,9 @@ def calc_reddening(
     Function for calculating the reddening of a color given the
     extinction for a given filter. A log-normal size distribution with
     a geometric standard deviation of 2 is used as parametrization for
-    the grain sizes (Ackerman & Marley 2001).
+    the grain sizes (Ackerman & Marley 2001). The cross sections are
+    stored as attributes of the optical constants in the database, so
+    they are only calculated once for each filter and grain size.
 
     Parameters
     ----------
@@ -258,78 +393,88 @@ def calc_reddening(
 
     database_path = check_dust_database()
 
-    h5_file = h5py.File(database_path, "r")
+    if composition == "MgSiO3" and structure == "crystalline":
+        # Average cross section of the three axes
+        dust_data = [f"dust/mgsio3/crystalline/axis_{i+1}" for i in range(3)]
+
+    elif composition == "MgSiO3" and structure == "amorphous":
+        dust_data = ["dust/mgsio3/amorphous"]
+
+    elif composition == "Fe" and structure == "crystalline":
+        dust_data = ["dust/fe/crystalline"]
+
+    elif composition == "Fe" and structure == "amorphous":
+        dust_data = ["dust/fe/amorphous"]
+
+    else:
+        raise ValueError(
+            f"The combination of composition='{composition}' and "
+            f"structure='{structure}' is not supported."
+        )
 
     filters = [extinction[0], filters_color[0], filters_color[1]]
 
+    # The mean wavelengths are read before opening the database
+    # since a filter might still need to be added to the database
+
+    filter_wavel = {}
+
+    for item in filters:
+        read_filt = read_filter.ReadFilter(item)
+        filter_wavel[item] = read_filt.mean_wavelength()
+
     dn_grains, _, radii = log_normal_distribution(radius_g, 2.0, 100)
 
+    h5_file = cache_util.open_pooled(database_path)
+
     c_ext = {}
+    new_ext = {}
 
     for item in filters:
-        h5_file.close()
+        c_ext[item] = 0.0
 
-        read_filt = read_filter.ReadFilter(item)
-        filter_wavel = read_filt.mean_wavelength()
-
-        h5_file = h5py.File(database_path, "r")
-
-        if composition == "MgSiO3" and structure == "crystalline":
-            for i in range(3):
-                data = h5_file[f"dust/mgsio3/crystalline/axis_{i+1}"]
-
-                wavel_index = (np.abs(data[:, 0] - filter_wavel)).argmin()
-
-                # Average cross section of the three axes
-
-                if i == 0:
-                    c_ext[item] = (
-                        dust_cross_section(
-                            dn_grains,
-                            radii,
-                            data[wavel_index, 0],
-                            data[wavel_index, 1],
-                            data[wavel_index, 2],
-                        )
-                        / 3.0
-                    )
-
-                else:
-                    c_ext[item] += (
-                        dust_cross_section(
-                            dn_grains,
-                            radii,
-                            data[wavel_index, 0],
-                            data[wavel_index, 1],
-                            data[wavel_index, 2],
-                        )
-                        / 3.0
-                    )
-
-        else:
-            if composition == "MgSiO3" and structure == "amorphous":
-                data = h5_file["dust/mgsio3/amorphous/"]
-
-            elif composition == "Fe" and structure == "crystalline":
-                data = h5_file["dust/fe/crystalline/"]
-
-            elif composition == "Fe" and structure == "amorphous":
-                data = h5_file["dust/fe/amorphous/"]
-
-            wavel_index = (np.abs(data[:, 0] - filter_wavel)).argmin()
-
-            c_ext[item] += (
-                dust_cross_section(
+        for data_item in dust_data:
+            dset = h5_file[data_item]
+            data = np.asarray(dset)
+
+            wavel_index = (np.abs(data[:, 0] - filter_wavel[item])).argmin()
+
+            attr_name = "c_ext_" + cache_util.grid_cache_key(
+                "lognorm", radius_g, 2.0, 100, int(wavel_index)
+            )
+
+            if attr_name in dset.attrs:
+                cross_tmp = np.float64(dset.attrs[attr_name])
+
+            else:
+                cross_tmp = dust_cross_section(
                     dn_grains,
                     radii,
                     data[wavel_index, 0],
                     data[wavel_index, 1],
                     data[wavel_index, 2],
                 )
-                / 3.0
-            )
 
-    h5_file.close()
+                new_ext[(data_item, attr_name)] = cross_tmp
+
+            c_ext[item] += cross_tmp / len(dust_data)
+
+    if new_ext:
+        # The cross sections are stored as attributes, which are not
+        # part of the cached data, so the cache is not cleared
+
+        try:
+            with cache_util.open_writable(database_path, clear_cache=False) as h5_file:
+                for (data_item, attr_name), value in new_ext.items():
+                    h5_file[data_item].attrs[attr_name] = value
+
+        except OSError:
+            # The database might be opened by a different process
+            # in which case the cross sections are not stored
+            warnings.warn(
+                f"Could not store the extinction cross sections in the "
+                f"database: {database_path}"
+            )
 
     return (
         extinction[1] * c_ext[filters_color[0]] / c_ext[extinction[0]],
@@ -337,6 +482,203 @@ def calc_reddening(
     )
 
 
+@typechecked
+def read_cross_sections(
+    size_distr: str,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Function for reading the grid with MgSiO3 cross sections of a
+    size distribution from the database. The grid is only read once
+    and is kept in memory for subsequent calls.
+
+    Parameters
+    ----------
+    size_distr : str
+        Size distribution ('lognorm' or 'powerlaw').
+
+    Returns
+    -------
+    np.ndarray
+        Extinction cross sections (um2), with shape
+        ``(n_wavel, n_radius, n_shape)``.
+    np.ndarray
+        Wavelengths (um).
+    np.ndarray
+        Grid points of the radius (um), which is the geometric mean
+        radius for 'lognorm' and the maximum radius for 'powerlaw'.
+    np.ndarray
+        Grid points of the shape parameter, which is the geometric
+        standard deviation for 'lognorm' and the exponent for
+        'powerlaw'.
+    """
+
+    if size_distr not in _DUST_PARAM:
+        raise ValueError(
+            f"The size distribution '{size_distr}' is not supported. Please "
+            f"use 'lognorm' or 'powerlaw'."
+        )
+
+    database_path = check_dust_database()
+
+    cache_key = ("dust_grid", size_distr)
+    dust_grid = cache_util.get_cached(database_path, cache_key)
+
+    if dust_grid is None:
+        h5_file = cache_util.open_pooled(database_path)
+        group = f"dust/{size_distr}/mgsio3/crystalline"
+
+        dust_grid = (
+            np.asarray(h5_file[f"{group}/cross_section"]),
+            np.asarray(h5_file[f"{group}/wavelength"]),
+            np.asarray(h5_file[f"{group}/{_DUST_PARAM[size_distr][0]}"]),
+            np.asarray(h5_file[f"{group}/{_DUST_PARAM[size_distr][1]}"]),
+        )
+
+        cache_util.set_cached(database_path, cache_key, dust_grid)
+
+    return dust_grid
+
+
+@typechecked
+def filter_cross_sections(size_distr: str, filter_name: str) -> np.ndarray:
+    """
+    Function for calculating the filter-weighted average of the
+    MgSiO3 cross sections at all grid points of a size distribution.
+    The table is stored in the ``dust`` group of the database, such
+    that it is only calculated once per filter and reused by later
+    fits. A stored table is recalculated if the filter profile has
+    been changed in the meantime.
+
+    Parameters
+    ----------
+    size_distr : str
+        Size distribution ('lognorm' or 'powerlaw').
+    filter_name : str
+        Filter name.
+
+    Returns
+    -------
+    np.ndarray
+        Filter-weighted cross sections (um2), with shape
+        ``(n_radius, n_shape)``.
+    """
+
+    cross_section, wavelength, _, _ = read_cross_sections(size_distr)
+
+    database_path = check_dust_database()
+
+    cache_key = ("dust_filter", size_distr, filter_name)
+    cross_phot = cache_util.get_cached(database_path, cache_key)
+
+    if cross_phot is not None:
+        return cross_phot
+
+    # The filter profile is read before opening the database
+    # since the filter might still need to be added
+    read_filt = read_filter.ReadFilter(filter_name)
+    filt_trans = read_filt.get_filter()
+
+    filter_hash = cache_util.grid_cache_key(filt_trans)
+    table_name = f"dust/{size_distr}/mgsio3/crystalline/filters/{filter_name}"
+
+    h5_file = cache_util.open_pooled(database_path)
+
+    if (
+        table_name in h5_file
+        and h5_file[table_name].attrs.get("filter_hash") == filter_hash
+    ):
+        cross_phot = np.asarray(h5_file[table_name])
+
+    else:
+        # Interpolate all grid points at the wavelengths of the filter
+        cross_interp = interp1d(
+            wavelength, cross_section, kind="linear", axis=0, bounds_error=True
+        )
+
+        cross_tmp = cross_interp(filt_trans[:, 0])
+
+        integral1 = np.trapz(
+            filt_trans[:, 1, np.newaxis, np.newaxis] * cross_tmp,
+            filt_trans[:, 0],
+            axis=0,
+        )
+
+        integral2 = np.trapz(filt_trans[:, 1], filt_trans[:, 0])
+
+        # Filter-weighted average of the extinction cross sections
+        cross_phot = integral1 / integral2
+
+        # Only the table of this filter is replaced, which is cached
+        # below, so the other cached data are kept
+
+        try:
+            with cache_util.open_writable(database_path, clear_cache=False) as h5_file:
+                if table_name in h5_file:
+                    del h5_file[table_name]
+
+                dset = h5_file.create_dataset(table_name, data=cross_phot)
+                dset.attrs["filter_hash"] = filter_hash
+
+        except OSError:
+            # The database might be opened by a different process
+            # in which case the table is not stored
+            warnings.warn(
+                f"Could not store the cross sections of {filter_name} in "
+                f"the database: {database_path}"
+            )
+
+    cache_util.set_cached(database_path, cache_key, cross_phot)
+
+    return cross_phot
+
+
+@typechecked
+def spectrum_cross_sections(size_distr: str, wavel_spec: np.ndarray) -> np.ndarray:
+    """
+    Function for resampling the MgSiO3 cross sections at all grid
+    points of a size distribution to the wavelengths of a spectrum.
+    The resampled table is kept in memory by the hash of the
+    wavelengths, so it is calculated once per wavelength sampling.
+
+    Parameters
+    ----------
+    size_distr : str
+        Size distribution ('lognorm' or 'powerlaw').
+    wavel_spec : np.ndarray
+        Wavelengths (um) of the spectrum.
+
+    Returns
+    -------
+    np.ndarray
+        Cross sections (um2), with shape
+        ``(n_radius, n_shape, n_wavel)``.
+    """
+
+    cross_section, wavelength, _, _ = read_cross_sections(size_distr)
+
+    database_path = check_dust_database()
+
+    cache_key = (
+        "dust_spectrum",
+        size_distr,
+        cache_util.grid_cache_key(wavel_spec),
+    )
+
+    cross_spec = cache_util.get_cached(database_path, cache_key)
+
+    if cross_spec is None:
+        # Interpolate all grid points at the wavelengths of the spectrum
+        cross_interp = interp1d(
+            wavelength, cross_section, kind="linear", axis=0, bounds_error=True
+        )
+
+        cross_spec = np.moveaxis(cross_interp(wavel_spec), 0, -1)
+
+        cache_util.set_cached(database_path, cache_key, cross_spec)
+
+    return cross_spec
+
+
 @typechecked
 def interp_lognorm(
     inc_phot: List[str],
@@ -344,7 +686,7 @@ def interp_lognorm(
     spec_data: Optional[
         Dict[str, Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray], float]]
     ],
-) -> Tuple[Dict[str, Union[interp2d, List[interp2d]]], np.ndarray, np.ndarray]:
+) -> Tuple[Dict[str, RegularGridInterpolator], np.ndarray, np.ndarray]:
     """
     Function for interpolating the log-normal dust cross sections for
     each filter and spectrum.
@@ -365,23 +707,18 @@ def interp_lognorm(
     Returns
     -------
     dict
-        Dictionary with the extinction cross section for each filter
-        and spectrum.
+        Dictionary with the interpolated extinction cross sections
+        (um2) for each filter and spectrum, as function of the
+        geometric mean radius (um) and the geometric standard
+        deviation. The interpolators of the spectra return the
+        cross sections at all wavelengths of the spectrum.
     np.ndarray
         Grid points of the geometric mean radius.
     np.ndarray
         Grid points of the geometric standard deviation.
     """
 
-    database_path = check_dust_database()
-
-    with h5py.File(database_path, "r") as h5_file:
-        cross_section = np.asarray(
-            h5_file["dust/lognorm/mgsio3/crystalline/cross_section"]
-        )
-        wavelength = np.asarray(h5_file["dust/lognorm/mgsio3/crystalline/wavelength"])
-        radius_g = np.asarray(h5_file["dust/lognorm/mgsio3/crystalline/radius_g"])
-        sigma_g = np.asarray(h5_file["dust/lognorm/mgsio3/crystalline/sigma_g"])
+    cross_section, wavelength, radius_g, sigma_g = read_cross_sections("lognorm")
 
     print("Grid boundaries of the dust opacities:")
     print(f"   - Wavelength (um) = {wavelength[0]:.2f} - {wavelength[-1]:.2f}")
@@ -393,27 +730,10 @@ def interp_lognorm(
     cross_sections = {}
 
     for phot_item in inc_phot:
-        read_filt = read_filter.ReadFilter(phot_item)
-        filt_trans = read_filt.get_filter()
-
-        cross_phot = np.zeros((radius_g.shape[0], sigma_g.shape[0]))
-
-        for i in range(radius_g.shape[0]):
-            for j in range(sigma_g.shape[0]):
-                cross_interp = interp1d(
-                    wavelength, cross_section[:, i, j], kind="linear", bounds_error=True
-                )
+        cross_phot = filter_cross_sections("lognorm", phot_item)
 
-                cross_tmp = cross_interp(filt_trans[:, 0])
-
-                integral1 = np.trapz(filt_trans[:, 1] * cross_tmp, filt_trans[:, 0])
-                integral2 = np.trapz(filt_trans[:, 1], filt_trans[:, 0])
-
-                # Filter-weighted average of the extinction cross section
-                cross_phot[i, j] = integral1 / integral2
-
-        cross_sections[phot_item] = interp2d(
-            sigma_g, radius_g, cross_phot, kind="linear", bounds_error=True
+        cross_sections[phot_item] = RegularGridInterpolator(
+            (radius_g, sigma_g), cross_phot, method="linear", bounds_error=True
         )
 
     print("Interpolating dust opacities...", end="")
@@ -421,26 +741,15 @@ def interp_lognorm(
     for spec_item in inc_spec:
         wavel_spec = spec_data[spec_item][0][:, 0]
 
-        cross_spec = np.zeros(
-            (wavel_spec.shape[0], radius_g.shape[0], sigma_g.shape[0])
-        )
-
-        for i in range(radius_g.shape[0]):
-            for j in range(sigma_g.shape[0]):
-                cross_interp = interp1d(
-                    wavelength, cross_section[:, i, j], kind="linear", bounds_error=True
-                )
-
-                cross_spec[:, i, j] = cross_interp(wavel_spec)
-
-        cross_sections[spec_item] = []
-
-        for i in range(wavel_spec.shape[0]):
-            cross_tmp = interp2d(
-                sigma_g, radius_g, cross_spec[i, :, :], kind="linear", bounds_error=True
-            )
+        # Cross sections with shape (n_radius, n_sigma, n_wavel)
+        cross_spec = spectrum_cross_sections("lognorm", wavel_spec)
 
-            cross_sections[spec_item].append(cross_tmp)
+        # A single interpolator that returns the cross sections
+        # at all wavelengths of the spectrum, such that the
+        # extinction is calculated with one array operation
+        cross_sections[spec_item] = RegularGridInterpolator(
+            (radius_g, sigma_g), cross_spec, method="linear", bounds_error=True
+        )
 
     print(" [DONE]")
 
@@ -454,7 +763,7 @@ def interp_powerlaw(
     spec_data: Optional[
         Dict[str, Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray], float]]
     ],
-) -> Tuple[Dict[str, Union[interp2d, List[interp2d]]], np.ndarray, np.ndarray]:
+) -> Tuple[Dict[str, RegularGridInterpolator], np.ndarray, np.ndarray]:
     """
     Function for interpolating the power-law dust cross sections for
     each filter and spectrum.
@@ -475,23 +784,18 @@ def interp_powerlaw(
     Returns
     -------
     dict
-        Dictionary with the extinction cross section for each filter
-        and spectrum.
+        Dictionary with the interpolated extinction cross sections
+        (um2) for each filter and spectrum, as function of the
+        maximum radius (um) and the power-law exponent. The
+        interpolators of the spectra return the cross sections at
+        all wavelengths of the spectrum.
     np.ndarray
         Grid points of the maximum radius.
     np.ndarray
         Grid points of the power-law exponent.
     """
 
-    database_path = check_dust_database()
-
-    with h5py.File(database_path, "r") as h5_file:
-        cross_section = np.asarray(
-            h5_file["dust/powerlaw/mgsio3/crystalline/cross_section"]
-        )
-        wavelength = np.asarray(h5_file["dust/powerlaw/mgsio3/crystalline/wavelength"])
-        radius_max = np.asarray(h5_file["dust/powerlaw/mgsio3/crystalline/radius_max"])
-        exponent = np.asarray(h5_file["dust/powerlaw/mgsio3/crystalline/exponent"])
+    cross_section, wavelength, radius_max, exponent = read_cross_sections("powerlaw")
 
     print("Grid boundaries of the dust opacities:")
     print(f"   - Wavelength (um) = {wavelength[0]:.2f} - {wavelength[-1]:.2f}")
@@ -503,27 +807,10 @@ def interp_powerlaw(
     cross_sections = {}
 
     for phot_item in inc_phot:
-        read_filt = read_filter.ReadFilter(phot_item)
-        filt_trans = read_filt.get_filter()
-
-        cross_phot = np.zeros((radius_max.shape[0], exponent.shape[0]))
-
-        for i in range(radius_max.shape[0]):
-            for j in range(exponent.shape[0]):
-                cross_interp = interp1d(
-                    wavelength, cross_section[:, i, j], kind="linear", bounds_error=True
-                )
-
-                cross_tmp = cross_interp(filt_trans[:, 0])
-
-                integral1 = np.trapz(filt_trans[:, 1] * cross_tmp, filt_trans[:, 0])
-                integral2 = np.trapz(filt_trans[:, 1], filt_trans[:, 0])
+        cross_phot = filter_cross_sections("powerlaw", phot_item)
 
-                # Filter-weighted average of the extinction cross section
-                cross_phot[i, j] = integral1 / integral2
-
-        cross_sections[phot_item] = interp2d(
-            exponent, radius_max, cross_phot, kind="linear", bounds_error=True
+        cross_sections[phot_item] = RegularGridInterpolator(
+            (radius_max, exponent), cross_phot, method="linear", bounds_error=True
         )
 
     print("Interpolating dust opacities...", end="")
@@ -531,40 +818,26 @@ def interp_powerlaw(
     for spec_item in inc_spec:
         wavel_spec = spec_data[spec_item][0][:, 0]
 
-        cross_spec = np.zeros(
-            (wavel_spec.shape[0], radius_max.shape[0], exponent.shape[0])
-        )
-
-        for i in range(radius_max.shape[0]):
-            for j in range(exponent.shape[0]):
-                cross_interp = interp1d(
-                    wavelength, cross_section[:, i, j], kind="linear", bounds_error=True
-                )
-
-                cross_spec[:, i, j] = cross_interp(wavel_spec)
-
-        cross_sections[spec_item] = []
+        # Cross sections with shape (n_radius, n_exponent, n_wavel)
+        cross_spec = spectrum_cross_sections("powerlaw", wavel_spec)
 
-        for i in range(wavel_spec.shape[0]):
-
-            cross_tmp = interp2d(
-                exponent,
-                radius_max,
-                cross_spec[i, :, :],
-                kind="linear",
-                bounds_error=True,
-            )
-
-            cross_sections[spec_item].append(cross_tmp)
+        # A single interpolator that returns the cross sections
+        # at all wavelengths of the spectrum, such that the
+        # extinction is calculated with one array operation
+        cross_sections[spec_item] = RegularGridInterpolator(
+            (radius_max, exponent), cross_spec, method="linear", bounds_error=True
+        )
 
     print(" [DONE]")
 
     return cross_sections, radius_max, exponent
 
 
-@typechecked
+@perf_util.hot_path
 def ism_extinction(
-    av_mag: float, rv_red: float, wavelengths: Union[np.ndarray, List[float], float]
+    av_mag: Union[float, np.ndarray],
+    rv_red: Union[float, np.ndarray],
+    wavelengths: Union[np.ndarray, List[float], float],
 ) -> np.ndarray:
     """
     Function for calculating the optical and IR extinction with the
@@ -573,9 +846,13 @@ def ism_extinction(
 
     Parameters
     ----------
-    av_mag : float
-        Extinction (mag) in the V band.
-    rv_red : float
+    av_mag : float, np.ndarray
+        Extinction (mag) in the V band. Arrays with shape
+        ``(n_samples, 1)`` can be provided for ``av_mag`` and
+        ``rv_red`` to calculate the extinction of multiple samples
+        at once, in which case an array with shape
+        ``(n_samples, n_wavelengths)`` is returned.
+    rv_red : float, np.ndarray
         Reddening in the V band, ``R_V = A_V / E(B-V)``.
     wavelengths : np.ndarray, list(float), float
         Array or list with the wavelengths (um) for which the
@@ -0,0 +1,92 @@
+"""
+Utility functions for the performance mode, in which the runtime
+type checking is skipped for the internal functions that are
+evaluated in the hot loops of the samplers.
+"""
+
+import functools
+import os
+
+from typing import Callable
+
+from typeguard import typechecked
+
+
+# The performance mode can be enabled with the SPECIES_PERFORMANCE
+# environment variable or with the performance_mode parameter in the
+# configuration file, which is read by SpeciesInit
+_PERFORMANCE_MODE = os.environ.get("SPECIES_PERFORMANCE", "").lower() in [
+    "1",
+    "true",
+    "yes",
+    "on",
+]
+
+
+@typechecked
+def set_performance_mode(enable: bool) -> None:
+    """
+    Function for enabling or disabling the performance mode. The
+    runtime type checking of the functions that are decorated with
+    :func:`~species.util.perf_util.hot_path` is skipped when the
+    performance mode is enabled. The type checking of the public
+    functions and methods is not affected.
+
+    Parameters
+    ----------
+    enable : bool
+        Enable the performance mode.
+
+    Returns
+    -------
+    NoneType
+        None
+    """
+
+    global _PERFORMANCE_MODE
+
+    _PERFORMANCE_MODE = enable
+
+
+@typechecked
+def performance_mode() -> bool:
+    """
+    Function for checking if the performance mode is enabled.
+
+    Returns
+    -------
+    bool
+        Performance mode enabled.
+    """
+
+    return _PERFORMANCE_MODE
+
+
+def hot_path(func: Callable) -> Callable:
+    """
+    Decorator for internal functions that are evaluated many times
+    by the samplers (e.g. the log-likelihood function). The function
+    is type checked with ``typeguard``, unless the performance mode
+    is enabled with :func:`~species.util.perf_util.set_performance_mode`.
+
+    Parameters
+    ----------
+    func : callable
+        Function that will be decorated.
+
+    Returns
+    -------
+    callable
+        Decorated function.
+    """
+
+    checked_func = typechecked(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _PERFORMANCE_MODE:
+            return func(*args, **kwargs)
+
+        return checked_func(*args, **kwargs)
+
+    return wrapper
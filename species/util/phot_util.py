@@ -63,69 +63,89 @@ def multi_photometry(
 
     if datatype == "model":
         if spectrum == "petitradtrans":
-            # Calculate the petitRADTRANS spectrum only once
+            # Calculate the petitRADTRANS spectrum only once and
+            # integrate it over all filter profiles at once instead
+            # of using get_flux from ReadRadtrans for each filter
             radtrans_box = radtrans.get_model(parameters)
 
-        for item in filters:
+            multi_phot = photometry.MultiFilterPhotometry(filters)
 
-            if spectrum == "petitradtrans":
-                # Use an instance of SyntheticPhotometry instead
-                # of get_flux from ReadRadtrans in order to not
-                # recalculate the spectrum
-                syn_phot = photometry.SyntheticPhotometry(item)
+            phot_flux = multi_phot.spectrum_to_flux(
+                radtrans_box.wavelength, radtrans_box.flux
+            )
 
-                flux[item], _ = syn_phot.spectrum_to_flux(
-                    radtrans_box.wavelength, radtrans_box.flux
-                )
+            for i, item in enumerate(filters):
+                flux[item] = phot_flux[i]
 
-            elif spectrum == "powerlaw":
-                synphot = photometry.SyntheticPhotometry(item)
+        elif spectrum in ["planck", "powerlaw"]:
+            for item in filters:
+                if spectrum == "powerlaw":
+                    synphot = photometry.SyntheticPhotometry(item)
 
-                # Set the wavel_range attribute
-                synphot.zero_point()
+                    # Set the wavel_range attribute
+                    synphot.zero_point()
 
-                powerl_box = read_util.powerlaw_spectrum(
-                    synphot.wavel_range, parameters
-                )
-                flux[item] = synphot.spectrum_to_flux(
-                    powerl_box.wavelength, powerl_box.flux
-                )[0]
+                    powerl_box = read_util.powerlaw_spectrum(
+                        synphot.wavel_range, parameters
+                    )
+                    flux[item] = synphot.spectrum_to_flux(
+                        powerl_box.wavelength, powerl_box.flux
+                    )[0]
 
-            else:
-                if spectrum == "planck":
+                else:
                     readmodel = read_planck.ReadPlanck(filter_name=item)
+                    flux[item] = readmodel.get_flux(parameters)[0]
 
-                else:
-                    readmodel = read_model.ReadModel(spectrum, filter_name=item)
+        else:
+            # Calculate the model spectrum only once for the
+            # wavelength range of all filters and integrate it
+            # over all filter profiles at once
 
-                try:
-                    if "teff_0" in parameters and "teff_1" in parameters:
-                        # Binary system
+            multi_phot = photometry.MultiFilterPhotometry(filters)
 
-                        param_0 = read_util.binary_to_single(parameters, 0)
-                        model_flux_0 = readmodel.get_flux(param_0)[0]
+            readmodel = read_model.ReadModel(
+                spectrum, wavel_range=multi_phot.wavelength_range()
+            )
 
-                        param_1 = read_util.binary_to_single(parameters, 1)
-                        model_flux_1 = readmodel.get_flux(param_1)[0]
+            try:
+                if "teff_0" in parameters and "teff_1" in parameters:
+                    # Binary system
 
-                        flux[item] = (
-                            parameters["spec_weight"] * model_flux_0
-                            + (1.0 - parameters["spec_weight"]) * model_flux_1
-                        )
+                    param_0 = read_util.binary_to_single(parameters, 0)
+                    model_box_0 = readmodel.get_model(param_0)
 
-                    else:
-                        # Single object
+                    param_1 = read_util.binary_to_single(parameters, 1)
+                    model_box_1 = readmodel.get_model(param_1)
+
+                    model_wavel = model_box_0.wavelength
+
+                    model_flux = (
+                        parameters["spec_weight"] * model_box_0.flux
+                        + (1.0 - parameters["spec_weight"]) * model_box_1.flux
+                    )
+
+                else:
+                    # Single object
+
+                    model_box = readmodel.get_model(parameters)
+
+                    model_wavel = model_box.wavelength
+                    model_flux = model_box.flux
 
-                        flux[item] = readmodel.get_flux(parameters)[0]
+                phot_flux = multi_phot.spectrum_to_flux(model_wavel, model_flux)
 
-                except IndexError:
+                for i, item in enumerate(filters):
+                    flux[item] = phot_flux[i]
+
+            except IndexError:
+                for item in filters:
                     flux[item] = np.nan
 
-                    warnings.warn(
-                        f"The wavelength range of the {item} filter does not "
-                        f"match with the wavelength range of {spectrum}. The "
-                        f"flux is set to NaN."
-                    )
+                warnings.warn(
+                    f"The wavelength range of the filters does not "
+                    f"match with the wavelength range of {spectrum}. The "
+                    f"fluxes are set to NaN."
+                )
 
     elif datatype == "calibration":
         for item in filters:
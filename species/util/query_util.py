@@ -19,6 +19,7 @@ from astroquery.simbad import Simbad
 from astroquery.vizier import Vizier
 
 from species.data import database
+from species.util import cache_util
 
 
 class NoStdStreams:
@@ -55,7 +56,7 @@ def get_parallax():
     species_db = database.Database()
     species_db.add_photometry("vlm-plx")
 
-    with h5py.File(species_db.database, "a") as hdf_file:
+    with cache_util.open_writable(species_db.database) as hdf_file:
         name = np.asarray(hdf_file["photometry/vlm-plx/name"])
         ra_coord = np.asarray(hdf_file["photometry/vlm-plx/ra"])
         dec_coord = np.asarray(hdf_file["photometry/vlm-plx/dec"])
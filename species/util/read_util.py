@@ -5,16 +5,32 @@ Utility functions for reading data.
 import math
 import warnings
 
-from typing import Dict, Optional, Tuple, Union
+from typing import Dict, List, Optional, Tuple, Union
 
 import numpy as np
 
 from scipy.integrate import simps
-from scipy.ndimage import gaussian_filter
+from scipy.interpolate import interp1d
+from scipy.ndimage import gaussian_filter1d
+from scipy.sparse import csr_matrix, hstack
 from typeguard import typechecked
 
 from species.core import box, constants
 from species.read import read_model, read_planck
+from species.util import cache_util
+
+
+# Sparse convolution matrices that have been calculated by
+# lsf_matrix, stored by the wavelength sampling and the
+# spectral resolution
+_LSF_CACHE: Dict[str, csr_matrix] = {}
+
+# Maximum number of matrices in the caches of lsf_matrix and interp_matrix
+_LSF_CACHE_SIZE = 20
+
+# Sparse interpolation matrices that have been calculated by
+# interp_matrix, stored by the wavelengths and interpolation kind
+_INTERP_CACHE: Dict[str, csr_matrix] = {}
 
 
 @typechecked
@@ -433,33 +449,209 @@ def create_wavelengths(
     return wavelength
 
 
+@typechecked
+def lsf_matrix(
+    wavelength: np.ndarray, spec_res: Union[float, np.ndarray]
+) -> csr_matrix:
+    """
+    Function for calculating the sparse matrix with which a spectrum
+    is convolved with a Gaussian line spread function of which the
+    FWHM is equal to the ratio of the wavelength and the spectral
+    resolution. The kernel is truncated at 2.5 times the standard
+    deviation and weighted by the widths of the wavelength bins, so
+    any wavelength sampling is supported. At the edges of the
+    wavelength grid, the kernel is normalized over the available
+    wavelength points. The matrix is calculated once for each
+    wavelength sampling and spectral resolution and then cached.
+
+    Parameters
+    ----------
+    wavelength : np.ndarray
+        Wavelength points (um) in increasing order.
+    spec_res : float, np.ndarray
+        Spectral resolution, either a single value or an array with
+        the spectral resolution at each wavelength point.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        Convolution matrix, with shape ``(n_wavel, n_wavel)``.
+    """
+
+    cache_key = cache_util.grid_cache_key(wavelength, spec_res)
+
+    if cache_key in _LSF_CACHE:
+        return _LSF_CACHE[cache_key]
+
+    # Standard deviation (um) of the Gaussian at each wavelength
+    sigma = wavelength / spec_res / (2.0 * np.sqrt(2.0 * np.log(2.0)))
+
+    # Range of wavelength indices that are covered by each kernel
+    index_low = np.searchsorted(wavelength, wavelength - 2.5 * sigma, side="left")
+    index_high = np.searchsorted(wavelength, wavelength + 2.5 * sigma, side="right")
+
+    n_kernel = index_high - index_low
+
+    row_index = np.repeat(np.arange(wavelength.size), n_kernel)
+
+    col_index = (
+        np.arange(row_index.size)
+        - np.repeat(np.cumsum(n_kernel) - n_kernel, n_kernel)
+        + np.repeat(index_low, n_kernel)
+    )
+
+    # Gaussian weights multiplied by the widths of the wavelength bins
+    lsf_weights = np.exp(
+        -((wavelength[col_index] - wavelength[row_index]) ** 2)
+        / (2.0 * sigma[row_index] ** 2)
+    ) * np.gradient(wavelength)[col_index]
+
+    lsf_weights /= np.bincount(
+        row_index, weights=lsf_weights, minlength=wavelength.size
+    )[row_index]
+
+    conv_matrix = csr_matrix(
+        (lsf_weights, (row_index, col_index)),
+        shape=(wavelength.size, wavelength.size),
+    )
+
+    if len(_LSF_CACHE) >= _LSF_CACHE_SIZE:
+        _LSF_CACHE.pop(next(iter(_LSF_CACHE)))
+
+    _LSF_CACHE[cache_key] = conv_matrix
+
+    return conv_matrix
+
+
+@typechecked
+def interp_matrix(
+    wavelength: np.ndarray, wavel_new: np.ndarray, interp_kind: str = "linear"
+) -> csr_matrix:
+    """
+    Function for calculating the sparse matrix with which a spectrum
+    is interpolated to new wavelengths with ``interp1d``. Since the
+    interpolation is linear in the fluxes, the matrix is obtained by
+    interpolating the unit vector of each wavelength point, after
+    which any number of spectra with the same wavelengths can be
+    interpolated with a single matrix product. The matrix is
+    calculated once for each combination of wavelengths and then
+    cached.
+
+    Parameters
+    ----------
+    wavelength : np.ndarray
+        Wavelength points (um) of the spectrum, in increasing order.
+    wavel_new : np.ndarray
+        Wavelength points (um) to which the spectrum is interpolated,
+        in increasing order. The rows of the matrix are zero for
+        wavelengths outside the range of ``wavelength``.
+    interp_kind : str
+        Kind of interpolation for ``scipy.interpolate.interp1d``.
+
+    Returns
+    -------
+    scipy.sparse.csr_matrix
+        Interpolation matrix, with shape ``(n_wavel_new, n_wavel)``.
+    """
+
+    cache_key = cache_util.grid_cache_key(wavelength, wavel_new, interp_kind)
+
+    if cache_key in _INTERP_CACHE:
+        return _INTERP_CACHE[cache_key]
+
+    local_kind = ["linear", "nearest", "nearest-up", "zero", "slinear"]
+    local_kind += ["previous", "next"]
+
+    if interp_kind in local_kind:
+        # Only the wavelength points next to the new wavelengths are
+        # used by interpolations that are not a quadratic or cubic
+        # spline, so the remaining columns of the matrix are zero
+
+        index_low, index_high = np.searchsorted(
+            wavelength, [wavel_new[0], wavel_new[-1]]
+        )
+
+        index_low = max(index_low - 1, 0)
+        index_high = min(index_high + 1, wavelength.size - 1)
+
+    else:
+        index_low = 0
+        index_high = wavelength.size - 1
+
+    col_index = np.arange(index_low, index_high + 1)
+
+    # The unit vectors are interpolated in blocks to limit the
+    # size of the dense arrays
+
+    n_block = max(1, 2 ** 22 // wavel_new.size)
+
+    matrix_blocks = []
+
+    for i in range(0, col_index.size, n_block):
+        block_index = col_index[i : i + n_block]
+
+        unit_flux = np.zeros((wavelength.size, block_index.size))
+        unit_flux[block_index, np.arange(block_index.size)] = 1.0
+
+        flux_interp = interp1d(
+            wavelength,
+            unit_flux,
+            kind=interp_kind,
+            axis=0,
+            bounds_error=False,
+            fill_value=0.0,
+        )
+
+        matrix_blocks.append(csr_matrix(flux_interp(wavel_new)))
+
+    matrix = hstack(matrix_blocks).tocoo()
+
+    matrix = csr_matrix(
+        (matrix.data, (matrix.row, col_index[matrix.col])),
+        shape=(wavel_new.size, wavelength.size),
+    )
+
+    if len(_INTERP_CACHE) >= _LSF_CACHE_SIZE:
+        _INTERP_CACHE.pop(next(iter(_INTERP_CACHE)))
+
+    _INTERP_CACHE[cache_key] = matrix
+
+    return matrix
+
+
 @typechecked
 def smooth_spectrum(
     wavelength: np.ndarray,
     flux: np.ndarray,
-    spec_res: float,
-    size: int = 11,
+    spec_res: Union[float, np.ndarray],
+    size: Optional[int] = None,
     force_smooth: bool = False,
 ) -> np.ndarray:
     """
     Function for smoothing a spectrum with a Gaussian kernel to a
     fixed spectral resolution. The kernel size is set to 5 times the
     FWHM of the Gaussian. The FWHM of the Gaussian is equal to the
-    ratio of the wavelength and the spectral resolution. If the
-    kernel does not fit within the available wavelength grid (i.e.
-    at the edge of the array) then the flux values are set to NaN.
+    ratio of the wavelength and the spectral resolution. A spectrum
+    with a uniform spectral resolution is smoothed with a single
+    Gaussian filter. Otherwise, the spectrum is convolved with the
+    variable kernel of
+    :func:`~species.util.read_util.lsf_matrix`, which also supports
+    a wavelength-dependent spectral resolution.
 
     Parameters
     ----------
     wavelength : np.ndarray
-        Wavelength points (um). Should be sampled with a uniform
-        spectral resolution or a uniform wavelength spacing (slow).
+        Wavelength points (um).
     flux : np.ndarray
-        Flux (W m-2 um-1).
-    spec_res : float
-        Spectral resolution.
-    size : int
-        Kernel size (odd integer).
+        Flux (W m-2 um-1). A 2D array with shape ``(n_spectra,
+        n_wavel)`` can be provided for smoothing multiple spectra
+        with the same wavelength sampling at once.
+    spec_res : float, np.ndarray
+        Spectral resolution, either a single value or an array with
+        the spectral resolution at each wavelength point.
+    size : int, None
+        Deprecated parameter that is ignored. The kernel size is set
+        by the spectral resolution.
     force_smooth : bool
         Force smoothing for constant spectral resolution
 
@@ -469,58 +661,38 @@ def smooth_spectrum(
         Smoothed spectrum (W m-2 um-1).
     """
 
-    def _gaussian(size, sigma):
-        pos = range(-(size - 1) // 2, (size - 1) // 2 + 1)
-        kernel = [
-            np.exp(-float(x) ** 2 / (2.0 * sigma ** 2)) / (sigma * np.sqrt(2.0 * np.pi))
-            for x in pos
-        ]
-
-        return np.asarray(kernel / sum(kernel))
+    if size is not None:
+        warnings.warn(
+            "The 'size' parameter of smooth_spectrum is deprecated and "
+            "will be removed in a future release. The parameter is "
+            "ignored since the kernel size is set by the spectral "
+            "resolution.",
+            DeprecationWarning,
+        )
 
     spacing = np.mean(2.0 * np.diff(wavelength) / (wavelength[1:] + wavelength[:-1]))
     spacing_std = np.std(2.0 * np.diff(wavelength) / (wavelength[1:] + wavelength[:-1]))
 
-    if spacing_std / spacing < 1e-2 or force_smooth:
+    if np.ndim(spec_res) == 0 and (spacing_std / spacing < 1e-2 or force_smooth):
         # see retrieval_util.convolve
         sigma_lsf = 1.0 / spec_res / (2.0 * np.sqrt(2.0 * np.log(2.0)))
-        flux_smooth = gaussian_filter(flux, sigma=sigma_lsf / spacing, mode="nearest")
+        flux_smooth = gaussian_filter1d(
+            flux, sigma=sigma_lsf / spacing, axis=-1, mode="nearest"
+        )
 
     else:
-        if size % 2 == 0:
-            raise ValueError("The kernel size should be an odd number.")
-
-        flux_smooth = np.zeros(flux.shape)  # (W m-2 um-1)
-
-        spacing = np.mean(np.diff(wavelength))  # (um)
-        spacing_std = np.std(np.diff(wavelength))  # (um)
-
-        if spacing_std / spacing > 1e-2:
-            warnings.warn(
-                f"The wavelength spacing is not uniform ({spacing} +/- {spacing_std}). "
-                f"The smoothing with the Gaussian kernel requires either the spectral "
-                f"resolution or the wavelength spacing to be uniformly sampled."
+        if np.ndim(spec_res) > 0 and spec_res.shape != wavelength.shape:
+            raise ValueError(
+                f"The array with the spectral resolution should have the same "
+                f"shape as the wavelength array, {wavelength.shape}, instead of "
+                f"{spec_res.shape}."
             )
 
-        for i, item in enumerate(wavelength):
-            fwhm = item / spec_res  # (um)
-            sigma = fwhm / (2.0 * np.sqrt(2.0 * np.log(2.0)))  # (um)
-
-            size = int(
-                5.0 * sigma / spacing
-            )  # Kernel size 5 times the width of the LSF
-            if size % 2 == 0:
-                size += 1
-
-            gaussian = _gaussian(size, sigma / spacing)
-
-            try:
-                flux_smooth[i] = np.sum(
-                    gaussian * flux[i - (size - 1) // 2 : i + (size - 1) // 2 + 1]
-                )
+        conv_matrix = lsf_matrix(wavelength, spec_res)
 
-            except ValueError:
-                flux_smooth[i] = np.nan
+        # The sparse matrix product is calculated for all spectra at
+        # once with the wavelengths along the first axis
+        flux_smooth = conv_matrix.dot(flux.T).T
 
     return flux_smooth
 
@@ -663,16 +835,55 @@ def binary_to_single(param_dict: Dict[str, float], star_index: int) -> Dict[str,
         Dictionary with the parameters of the selected star.
     """
 
+    param_values = list(param_dict.values())
+    star_param, param_index = binary_param_index(list(param_dict.keys()), star_index)
+
     new_dict = {}
 
-    for key, value in param_dict.items():
-        if star_index == 0 and key[-1] == "0":
-            new_dict[key[:-2]] = value
+    for key, index in zip(star_param, param_index):
+        new_dict[key] = param_values[index]
 
-        elif star_index == 1 and key[-1] == "1":
-            new_dict[key[:-2]] = value
+    return new_dict
 
-        elif key in ["teff", "logg", "feh", "c_o_ratio", "fsed", "radius", "distance"]:
-            new_dict[key] = value
 
-    return new_dict
+@typechecked
+def binary_param_index(
+    param: List[str], star_index: int
+) -> Tuple[List[str], List[int]]:
+    """
+    Function for selecting the parameters of one of the two stars
+    of a binary system from a list of parameter names, for example
+    for selecting the columns of the posterior samples.
+
+    Parameters
+    ----------
+    param : list(str)
+        Parameter names of both stars. The names end either with
+        ``_0`` or ``_1`` that correspond with ``star_index=0`` or
+        ``star_index=1``. Parameters without a suffix that are
+        shared by both stars (e.g. the distance) are also selected.
+    star_index : int
+        Star index (0 or 1) that is used for the parameters in
+        ``param``.
+
+    Returns
+    -------
+    list(str)
+        Parameter names of the selected star, without the suffix.
+    list(int)
+        Indices of the selected parameters in ``param``.
+    """
+
+    star_param = []
+    param_index = []
+
+    for i, item in enumerate(param):
+        if item[-2:] == f"_{star_index}":
+            star_param.append(item[:-2])
+            param_index.append(i)
+
+        elif item in ["teff", "logg", "feh", "c_o_ratio", "fsed", "radius", "distance"]:
+            star_param.append(item)
+            param_index.append(i)
+
+    return star_param, param_index
@@ -347,6 +347,264 @@ def pt_ret_model(
     return tret, press_tau(1.0) / 1e6, conv_press
 
 
+@typechecked
+def pt_ret_model_batch(
+    temp_3: Optional[np.ndarray],
+    delta: np.ndarray,
+    alpha: np.ndarray,
+    tint: np.ndarray,
+    press: np.ndarray,
+    metallicity: np.ndarray,
+    c_o_ratio: np.ndarray,
+    conv: bool = True,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Function for calculating the pressure-temperature profiles of a
+    batch of samples with the model for a self-luminous atmosphere
+    of :func:`~species.util.retrieval_util.pt_ret_model`. The
+    adiabatic gradients are interpolated for all samples with a
+    single call to ``interpol_abundances`` in each iteration of the
+    convective adjustment, and the spline interpolation of the upper
+    atmosphere is calculated for all samples at once.
+
+    Parameters
+    ----------
+    temp_3 : np.ndarray, None
+        Array with the three temperature points above tau = 0.1,
+        with shape ``(n_samples, 3)``. The three temperature points
+        are not used if set to ``None``.
+    delta : np.ndarray
+        Proportionality factor in tau = delta * press_cgs**alpha.
+    alpha : np.ndarray
+        Power law index in
+        :math:`\\tau = \\delta * P_\\mathrm{cgs}**\\alpha`.
+    tint : np.ndarray
+        Internal temperature for the Eddington model.
+    press : np.ndarray
+        Pressure profile (bar).
+    metallicity : np.ndarray
+        Metallicity [Fe/H]. Required for the ``nabla_ad``
+        interpolation.
+    c_o_ratio : np.ndarray
+        Carbon-to-oxygen ratio. Required for the ``nabla_ad``
+        interpolation.
+    conv : bool
+        Enforce a convective adiabat.
+
+    Returns
+    -------
+    np.ndarray
+        Temperature profiles (K) for ``press``, with shape
+        ``(n_samples, n_pressures)``. The temperatures are NaN for
+        samples of which the spline nodes fall outside the pressure
+        range, for which ``pt_ret_model`` does not return a profile.
+    np.ndarray
+        Pressures (bar) where the optical depth is 1.
+    np.ndarray
+        Pressures (bar) at the radiative-convective boundary. The
+        pressure is NaN for samples without a convective region.
+    """
+
+    # Convert pressures from bar to cgs units
+    press_cgs = press * 1e6
+
+    # Calculate the optical depth
+    tau = delta[:, np.newaxis] * press_cgs ** alpha[:, np.newaxis]
+
+    # Calculate the Eddington temperature
+    tedd = (3.0 / 4.0 * tint[:, np.newaxis] ** 4.0 * (2.0 / 3.0 + tau)) ** 0.25
+
+    conv_press = np.full(tedd.shape[0], np.nan)
+
+    # Enforce convective adiabat
+    if conv:
+        # Import interpol_abundances here because it slows
+        # down importing species otherwise
+
+        from poor_mans_nonequ_chem.poor_mans_nonequ_chem import interpol_abundances
+
+        @typechecked
+        def nabla_ad_batch(sample_index: np.ndarray, temp: np.ndarray) -> np.ndarray:
+            """
+            Function for interpolating the adiabatic temperature
+            gradients of a selection of samples. The layers of all
+            samples are passed as a single profile to
+            ``interpol_abundances``, which interpolates each layer
+            independently.
+
+            Parameters
+            ----------
+            sample_index : np.ndarray
+                Indices of the samples.
+            temp : np.ndarray
+                Temperature profiles (K) of the samples.
+
+            Returns
+            -------
+            np.ndarray
+                Adiabatic temperature gradients.
+            """
+
+            abund = interpol_abundances(
+                np.repeat(c_o_ratio[sample_index], press.size),
+                np.repeat(metallicity[sample_index], press.size),
+                temp.ravel(),
+                np.tile(press, sample_index.size),
+            )
+
+            return np.reshape(abund["nabla_ad"], temp.shape)
+
+        sample_index = np.arange(tedd.shape[0])
+
+        nabla_ad = nabla_ad_batch(sample_index, tedd)
+
+        # Calculate the current, radiative temperature gradient
+        nab_rad = np.diff(np.log(tedd), axis=1) / np.diff(np.log(press_cgs))
+
+        # Extend to array of same length as pressure structure
+        nabla_rad = np.ones_like(tedd)
+        nabla_rad[:, 0] = nab_rad[:, 0]
+        nabla_rad[:, -1] = nab_rad[:, -1]
+        nabla_rad[:, 1:-1] = (nab_rad[:, 1:] + nab_rad[:, :-1]) / 2.0
+
+        # Where is the atmosphere convectively unstable?
+        conv_index = nabla_rad > nabla_ad
+
+        conv_bound = np.any(conv_index, axis=1)
+        conv_press[conv_bound] = press[np.argmax(conv_index[conv_bound], axis=1)]
+
+        # Index of the last radiative layer
+        rad_last = press.size - 1 - np.argmax(~conv_index[:, ::-1], axis=1)
+
+        tfinal = np.copy(tedd)
+
+        for i in range(10):
+            if i > 0:
+                nabla_ad = nabla_ad_batch(sample_index, tfinal[sample_index])
+
+            t_take = tfinal[sample_index]
+            conv_take = conv_index[sample_index]
+
+            # Calculate the average nabla_ad between the layers
+            nabla_ad_mean = np.copy(nabla_ad)
+            nabla_ad_mean[:, 1:] = (nabla_ad[:, 1:] + nabla_ad[:, :-1]) / 2.0
+
+            # What are the increments in temperature due to convection
+            tnew = np.where(
+                conv_take, nabla_ad_mean * np.mean(np.diff(np.log(press_cgs))), 0.0
+            )
+
+            # What is the last radiative temperature?
+            tstart = np.log(t_take[np.arange(t_take.shape[0]), rad_last[sample_index]])
+
+            # Integrate and translate to temperature
+            # from log(temperature)
+            tnew = np.exp(np.cumsum(tnew, axis=1) + tstart[:, np.newaxis])
+
+            # Add upper radiative and lower covective
+            # part into one single array
+            tfinal[sample_index] = np.where(conv_take, tnew, t_take)
+
+            # Only continue with the samples that have not converged
+            t_diff = np.abs(t_take - tfinal[sample_index]) / t_take
+            sample_index = sample_index[np.max(t_diff, axis=1) >= 0.01]
+
+            if sample_index.size == 0:
+                break
+
+    else:
+        tfinal = tedd
+
+    # Pressure (bar) where the optical depth is 1
+    phot_press = (1.0 / delta) ** (1.0 / alpha) / 1e6
+
+    if temp_3 is None:
+        return tfinal, phot_press, conv_press
+
+    # Add the three temperature-point P-T description above tau = 0.1
+
+    # Where is the uppermost pressure of the
+    # Eddington radiative structure?
+    p_bot_spline = (0.1 / delta) ** (1.0 / alpha)
+
+    tret = np.full(tfinal.shape, np.nan)
+
+    log_press = np.log10(press_cgs)
+
+    # Samples for which the temperature at p_bot_spline can be
+    # interpolated, otherwise pt_ret_model raises an error
+    in_range = (p_bot_spline >= press_cgs[0]) & (p_bot_spline <= press_cgs[-1])
+
+    log_bot = np.log10(p_bot_spline)
+
+    # Create the pressure coordinates for the spline support nodes
+    # at low pressure, with the same spacing at high pressure up
+    # to the bottom of the atmosphere, such that the number of
+    # nodes depends on p_bot_spline
+
+    support_low = np.logspace(log_press[0], log_bot, 4, axis=-1)
+    log_step = np.diff(np.log10(support_low), axis=1)[:, 0]
+
+    n_high = np.zeros(tfinal.shape[0], dtype=int)
+    n_high[in_range] = np.ceil((log_press[-1] - log_bot[in_range]) / log_step[in_range])
+
+    for n_item in np.unique(n_high[in_range]):
+        select = in_range & (n_high == n_item)
+
+        # Same support nodes as 10.0**np.arange(...) in pt_ret_model
+        arange_step = (log_bot[select] + log_step[select]) - log_bot[select]
+
+        support_high = 10.0 ** (
+            log_bot[select, np.newaxis]
+            + np.arange(1, n_item) * arange_step[:, np.newaxis]
+        )
+
+        support_points = np.hstack([support_low[select], support_high])
+
+        t_support = np.hstack(
+            [
+                temp_3[select],
+                interp_batch(
+                    press_cgs, tfinal[select], p_bot_spline[select, np.newaxis]
+                ),
+                interp_batch(press_cgs, tfinal[select], support_high),
+            ]
+        )
+
+        tret[select] = pchip_interp_batch(
+            np.log10(support_points), t_support, log_press
+        )
+
+    # Interpolate the spline again with 7 support nodes at low
+    # pressure and 7 nodes from the radiative-convective solution
+
+    support_points = np.hstack(
+        [
+            np.logspace(log_press[0], log_bot, 7, axis=-1),
+            np.logspace(log_bot, log_press[-1], 7, axis=-1)[:, 1:],
+        ]
+    )
+
+    t_support = np.hstack(
+        [
+            interp_batch(press_cgs, tret, support_points[:, :6]),
+            interp_batch(press_cgs, tfinal, p_bot_spline[:, np.newaxis]),
+            interp_batch(press_cgs, tfinal, support_points[:, 7:]),
+        ]
+    )
+
+    # Samples for which pt_ret_model returns None
+    in_range &= np.all(np.isfinite(t_support), axis=1)
+
+    tret = np.full(tfinal.shape, np.nan)
+
+    tret[in_range] = pchip_interp_batch(
+        np.log10(support_points[in_range]), t_support[in_range], log_press
+    )
+
+    return tret, phot_press, conv_press
+
+
 @typechecked
 def pt_spline_interp(
     knot_press: np.ndarray,
@@ -400,6 +658,255 @@ def pt_spline_interp(
     return temp_interp
 
 
+@typechecked
+def pt_spline_interp_batch(
+    knot_press: np.ndarray,
+    knot_temp: np.ndarray,
+    pressure: np.ndarray,
+    pt_smooth: Union[float, np.ndarray] = 0.3,
+) -> np.ndarray:
+    """
+    Function for interpolating the P-T nodes of a batch of samples,
+    as with :func:`~species.util.retrieval_util.pt_spline_interp`.
+    The PCHIP interpolation and the Gaussian smoothing are applied
+    to all samples at once.
+
+    Parameters
+    ----------
+    knot_press : np.ndarray
+        Pressure knots (bar).
+    knot_temp : np.ndarray
+        Temperature knots (K), with shape ``(n_samples, n_knots)``.
+    pressure : np.ndarray
+        Pressure points (bar) at which the temperatures is
+        interpolated.
+    pt_smooth : float, np.ndarray
+        Standard deviation of the Gaussian kernel, given as
+        :math:`\\log10{P/\\mathrm{bar}}`. Either a single value or
+        an array with the value of each sample.
+
+    Returns
+    -------
+    np.ndarray
+        Interpolated, smoothed temperature points (K), with shape
+        ``(n_samples, n_pressures)``.
+    """
+
+    log_press = np.log10(pressure)
+
+    temp_interp = pchip_interp_batch(np.log10(knot_press), knot_temp, log_press)
+
+    log_diff = np.mean(np.diff(log_press))
+
+    if np.std(np.diff(log_press)) / log_diff > 1e-6:
+        raise ValueError("Expecting equally spaced pressures in log space.")
+
+    # Gaussian kernels with the same truncation as gaussian_filter,
+    # padded with zeros to the width of the widest kernel
+
+    sigma = np.zeros(knot_temp.shape[0])
+    sigma[:] = pt_smooth / log_diff
+
+    radius = (4.0 * sigma + 0.5).astype(int)
+    kernel_x = np.arange(radius.max() + 1)
+
+    smooth = sigma > 1e-15
+
+    kernel = np.zeros((sigma.size, kernel_x.size))
+    kernel[~smooth, 0] = 1.0
+
+    kernel[smooth] = np.exp(
+        -0.5 / (sigma[smooth, np.newaxis] ** 2) * kernel_x ** 2
+    )
+
+    kernel[kernel_x > radius[:, np.newaxis]] = 0.0
+    kernel /= kernel[:, :1] + 2.0 * np.sum(kernel[:, 1:], axis=1, keepdims=True)
+
+    # The edge temperatures are repeated beyond the pressure
+    # range, similar to the 'nearest' mode of gaussian_filter
+
+    n_pad = kernel_x.size - 1
+    n_press = pressure.size
+
+    temp_pad = np.pad(temp_interp, ((0, 0), (n_pad, n_pad)), mode="edge")
+
+    temp_smooth = kernel[:, :1] * temp_interp
+
+    for i in kernel_x[1:]:
+        temp_low = temp_pad[:, n_pad - i : n_pad - i + n_press]
+        temp_high = temp_pad[:, n_pad + i : n_pad + i + n_press]
+
+        temp_smooth += kernel[:, i : i + 1] * (temp_low + temp_high)
+
+    return temp_smooth
+
+
+@typechecked
+def pchip_interp_batch(
+    knot_x: np.ndarray,
+    knot_y: np.ndarray,
+    x_new: np.ndarray,
+) -> np.ndarray:
+    """
+    Internal function for evaluating the PCHIP 1-D monotonic cubic
+    interpolation of a batch of curves. The derivatives at the knots
+    and the polynomial coefficients are calculated in the same way
+    as by ``PchipInterpolator`` of ``scipy``, but for all curves at
+    once instead of creating an interpolator for each curve. Points
+    outside the knots are extrapolated.
+
+    Parameters
+    ----------
+    knot_x : np.ndarray
+        Coordinates of the knots, with shape ``(n_knots,)`` if the
+        knots are the same for all curves or ``(n_curves, n_knots)``.
+        The coordinates should be increasing and at least three
+        knots are required.
+    knot_y : np.ndarray
+        Values at the knots, with shape ``(n_curves, n_knots)``.
+    x_new : np.ndarray
+        Coordinates at which the curves are interpolated, with
+        shape ``(n_new,)`` or ``(n_curves, n_new)``.
+
+    Returns
+    -------
+    np.ndarray
+        Interpolated values, with shape ``(n_curves, n_new)``.
+    """
+
+    x_diff = np.diff(knot_x, axis=-1)
+    slope = np.diff(knot_y, axis=-1) / x_diff
+
+    # Weighted harmonic mean of the slopes at the interior knots,
+    # or zero if the slope changes sign
+
+    slope_sign = np.sign(slope)
+
+    extremum = (
+        (slope_sign[:, 1:] != slope_sign[:, :-1])
+        | (slope[:, 1:] == 0.0)
+        | (slope[:, :-1] == 0.0)
+    )
+
+    weight_1 = 2.0 * x_diff[..., 1:] + x_diff[..., :-1]
+    weight_2 = x_diff[..., 1:] + 2.0 * x_diff[..., :-1]
+
+    deriv = np.zeros(knot_y.shape)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        harm_mean = (weight_1 / slope[:, :-1] + weight_2 / slope[:, 1:]) / (
+            weight_1 + weight_2
+        )
+
+        deriv[:, 1:-1] = np.where(extremum, 0.0, 1.0 / harm_mean)
+
+    # One-sided, shape-preserving estimates at the outer knots
+
+    for knot_idx, diff_idx in [(0, (0, 1)), (-1, (-1, -2))]:
+        x_diff_0 = x_diff[..., diff_idx[0]]
+        x_diff_1 = x_diff[..., diff_idx[1]]
+        slope_0 = slope[:, diff_idx[0]]
+        slope_1 = slope[:, diff_idx[1]]
+
+        deriv_edge = ((2.0 * x_diff_0 + x_diff_1) * slope_0 - x_diff_0 * slope_1) / (
+            x_diff_0 + x_diff_1
+        )
+
+        overshoot = (np.sign(slope_0) != np.sign(slope_1)) & (
+            np.abs(deriv_edge) > 3.0 * np.abs(slope_0)
+        )
+
+        deriv[:, knot_idx] = np.where(
+            np.sign(deriv_edge) != np.sign(slope_0),
+            0.0,
+            np.where(overshoot, 3.0 * slope_0, deriv_edge),
+        )
+
+    # Coefficients of the cubic Hermite polynomials
+
+    coeff_t = (deriv[:, :-1] + deriv[:, 1:] - 2.0 * slope) / x_diff
+
+    coeff = np.stack(
+        [
+            coeff_t / x_diff,
+            (slope - deriv[:, :-1]) / x_diff - coeff_t,
+            deriv[:, :-1],
+            knot_y[:, :-1],
+        ]
+    )
+
+    # Index of the interval of each point, such that the
+    # first and last polynomial are used for extrapolation
+
+    if knot_x.ndim == 1:
+        interval = np.searchsorted(knot_x[1:-1], x_new, side="right")
+        x_start = knot_x[interval]
+
+    else:
+        interval = np.sum(
+            np.atleast_2d(x_new)[:, :, np.newaxis]
+            >= knot_x[:, np.newaxis, 1:-1],
+            axis=-1,
+        )
+
+        x_start = np.take_along_axis(knot_x, interval, axis=1)
+
+    interval = np.broadcast_to(interval, (knot_y.shape[0],) + x_new.shape[-1:])
+    coeff = np.take_along_axis(coeff, interval[np.newaxis], axis=2)
+
+    x_shift = x_new - x_start
+
+    return (
+        coeff[3]
+        + coeff[2] * x_shift
+        + coeff[1] * (x_shift * x_shift)
+        + coeff[0] * (x_shift * x_shift * x_shift)
+    )
+
+
+@typechecked
+def interp_batch(
+    x_grid: np.ndarray,
+    y_grid: np.ndarray,
+    x_new: np.ndarray,
+) -> np.ndarray:
+    """
+    Internal function for the linear interpolation of a batch of
+    curves that are sampled on the same grid, at coordinates that
+    can be different for each curve. Coordinates outside the grid
+    are not extrapolated but return a NaN.
+
+    Parameters
+    ----------
+    x_grid : np.ndarray
+        Increasing coordinates of the grid, with shape ``(n_grid,)``.
+    y_grid : np.ndarray
+        Values of the curves, with shape ``(n_curves, n_grid)``.
+    x_new : np.ndarray
+        Coordinates at which the curves are interpolated, with
+        shape ``(n_curves, n_new)``.
+
+    Returns
+    -------
+    np.ndarray
+        Interpolated values, with shape ``(n_curves, n_new)``.
+    """
+
+    upper = np.clip(np.searchsorted(x_grid, x_new), 1, x_grid.size - 1)
+
+    x_low = x_grid[upper - 1]
+    x_high = x_grid[upper]
+
+    y_low = np.take_along_axis(y_grid, upper - 1, axis=1)
+    y_high = np.take_along_axis(y_grid, upper, axis=1)
+
+    y_new = (y_high - y_low) / (x_high - x_low) * (x_new - x_low) + y_low
+
+    out_bounds = (x_new < x_grid[0]) | (x_new > x_grid[-1])
+
+    return np.where(out_bounds, np.nan, y_new)
+
+
 @typechecked
 def create_pt_profile(
     cube,
@@ -504,6 +1011,118 @@ def create_pt_profile(
     return temp, knot_temp, phot_press, conv_press
 
 
+@typechecked
+def pt_profile_batch(
+    samples: np.ndarray,
+    param_index: Dict[str, int],
+    pt_profile: str,
+    pressure: np.ndarray,
+    knot_press: Optional[np.ndarray] = None,
+    metallicity: Optional[np.ndarray] = None,
+    c_o_ratio: Optional[np.ndarray] = None,
+    pt_smooth: float = 0.3,
+) -> Tuple[np.ndarray, Optional[np.ndarray], Optional[np.ndarray]]:
+    """
+    Function for creating the P-T profiles of a batch of posterior
+    samples, as with
+    :func:`~species.util.retrieval_util.create_pt_profile` for a
+    single sample.
+
+    Parameters
+    ----------
+    samples : np.ndarray
+        Samples, with shape ``(n_samples, n_param)``.
+    param_index : dict
+        Dictionary with the column index of each parameter.
+    pt_profile : str
+        The parametrization for the pressure-temperature profile
+        ('molliere', 'mod-molliere', 'free', 'monotonic',
+        'eddington').
+    pressure : np.ndarray
+        Pressure points (bar) at which the temperatures is
+        interpolated.
+    knot_press : np.ndarray, None
+        Pressure knots (bar), which are required when the argument of
+        ``pt_profile`` is either 'free' or 'monotonic'.
+    metallicity : np.ndarray, None
+        Metallicity [Fe/H] of each sample. The values are read from
+        the ``samples`` if set to ``None``. Only required for the
+        'molliere' and 'mod-molliere' profiles.
+    c_o_ratio : np.ndarray, None
+        Carbon-to-oxgen ratio of each sample. The values are read
+        from the ``samples`` if set to ``None``. Only required for
+        the 'molliere' and 'mod-molliere' profiles.
+    pt_smooth : float
+        Standard deviation of the Gaussian kernel that is used for
+        smoothing the 'free' and 'monotonic' profiles. The argument
+        is only used if ``pt_smooth`` is not one of the parameters.
+
+    Returns
+    -------
+    np.ndarray
+        Temperatures (K), with shape ``(n_samples, n_pressures)``.
+    np.ndarray, None
+        Pressures (bar) where the optical depth is 1. A ``None`` is
+        returned if ``pt_profile`` is not a Mollière profile.
+    np.ndarray, None
+        Pressures (bar) at the radiative-convective boundary. A
+        ``None`` is returned if ``pt_profile`` is not a Mollière
+        profile.
+    """
+
+    phot_press = None
+    conv_press = None
+
+    if pt_profile in ["molliere", "mod-molliere"]:
+        if metallicity is None:
+            metallicity = samples[:, param_index["metallicity"]]
+
+        if c_o_ratio is None:
+            c_o_ratio = samples[:, param_index["c_o_ratio"]]
+
+        if pt_profile == "molliere":
+            temp_3 = samples[
+                :, [param_index["t1"], param_index["t2"], param_index["t3"]]
+            ]
+
+        else:
+            temp_3 = None
+
+        temp, phot_press, conv_press = pt_ret_model_batch(
+            temp_3,
+            10.0 ** samples[:, param_index["log_delta"]],
+            samples[:, param_index["alpha"]],
+            samples[:, param_index["tint"]],
+            pressure,
+            metallicity,
+            c_o_ratio,
+        )
+
+    elif pt_profile in ["free", "monotonic"]:
+        knot_index = [param_index[f"t{i}"] for i in range(knot_press.shape[0])]
+
+        if "pt_smooth" in param_index:
+            pt_smooth = samples[:, param_index["pt_smooth"]]
+
+        temp = pt_spline_interp_batch(
+            knot_press, samples[:, knot_index], pressure, pt_smooth
+        )
+
+    elif pt_profile == "eddington":
+        # Eddington approximation
+        # delta = kappa_ir/gravity
+        tau = pressure * 1e6 * 10.0 ** samples[:, param_index["log_delta"], np.newaxis]
+        tint = samples[:, param_index["tint"], np.newaxis]
+        temp = (0.75 * tint ** 4.0 * (2.0 / 3.0 + tau)) ** 0.25
+
+    else:
+        raise ValueError(
+            f"The argument of 'pt_profile', '{pt_profile}', is not supported."
+        )
+
+    return temp, phot_press, conv_press
+
+
 @typechecked
 def make_half_pressure_better(
     p_base: Dict[str, float], pressure: np.ndarray
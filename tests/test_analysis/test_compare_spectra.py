@@ -0,0 +1,157 @@
+import os
+import shutil
+
+import h5py
+import pytest
+import numpy as np
+
+import species
+from species.analysis import compare_spectra
+from species.core import constants
+from species.read import read_planck
+from species.util import test_util
+
+
+class TestCompareSpectra:
+    def setup_class(self):
+        self.limit = 1e-3
+
+        wavel_lib = np.linspace(0.95, 1.15, 20000)
+        flux_lib = 1.0 - 0.5 * np.exp(-0.5 * (wavel_lib - 1.05) ** 2 / 5e-4**2)
+
+        self.spectrum = np.column_stack([wavel_lib, flux_lib])
+
+        # Object spectrum that is redshifted by 30 km s-1
+        # and scaled by a factor 2 relative to the library
+
+        doppler = 1.0 + 3e4 / constants.LIGHT
+
+        wavel_obj = np.linspace(1.0, 1.1, 2000)
+        flux_obj = 2.0 * np.interp(wavel_obj / doppler, wavel_lib, flux_lib)
+
+        self.obj_spec = [
+            np.column_stack([wavel_obj, flux_obj, np.full(wavel_obj.size, 0.01)])
+        ]
+
+    def test_template_fit(self):
+        av_ext = np.array([0.0, 1.0])
+        rad_vel = np.linspace(-60.0, 60.0, 9)
+
+        g_k, c_k = compare_spectra.template_fit(
+            self.spectrum, self.obj_spec, [1e5], av_ext, rad_vel
+        )
+
+        assert g_k.shape == (2, 9)
+        assert c_k.shape == (2, 9, 1)
+
+        av_index, rv_index = np.unravel_index(np.argmin(g_k), g_k.shape)
+
+        assert av_ext[av_index] == 0.0
+        assert rad_vel[rv_index] == 30.0
+
+        assert c_k[av_index, rv_index, 0] == pytest.approx(
+            2.0, rel=self.limit, abs=0.0
+        )
+
+
+class TestCompareModel:
+    def setup_class(self):
+        self.limit = 1e-6
+
+        self.wavelength = np.linspace(1.0, 2.5, 300)
+
+        self.grid = {
+            "teff": np.array([1000.0, 1500.0, 2000.0]),
+            "logg": np.array([3.5, 4.0, 4.5]),
+            "feh": np.array([-0.5, 0.0, 0.5]),
+        }
+
+    def teardown_class(self):
+        os.remove("species_database.hdf5")
+        os.remove("species_config.ini")
+        os.remove("test_spectrum.dat")
+        shutil.rmtree("data/")
+
+    def model_flux(self, teff, logg=4.0, feh=0.0):
+        flux = read_planck.ReadPlanck.planck(self.wavelength, teff, 1.0)
+
+        # Wavelength-dependent changes such that the
+        # parameters are not degenerate with the radius
+
+        flux *= 1.0 + 0.1 * (logg - 4.0) * self.wavelength
+        flux *= 1.0 + 0.1 * feh / self.wavelength
+
+        return flux
+
+    def test_species_init(self):
+        test_util.create_config("./")
+        species.SpeciesInit()
+
+    def test_add_grids(self):
+        # Model grids with one and three parameters, which are
+        # stored in the same format as the grids of add_model
+
+        with h5py.File("species_database.hdf5", "a") as h5_file:
+            grid_param = {"test-1d": ["teff"], "test-3d": ["teff", "logg", "feh"]}
+
+            for model, param in grid_param.items():
+                grid_shape = [self.grid[item].size for item in param]
+                flux = np.zeros(grid_shape + [self.wavelength.size])
+
+                for index in np.ndindex(*grid_shape):
+                    param_dict = {
+                        item: self.grid[item][index[i]] for i, item in enumerate(param)
+                    }
+
+                    flux[index] = self.model_flux(**param_dict)
+
+                group = h5_file.create_group(f"models/{model}")
+                group.attrs["n_param"] = len(param)
+
+                for i, item in enumerate(param):
+                    group.attrs[f"parameter{i}"] = item
+                    group.create_dataset(item, data=self.grid[item])
+
+                group.create_dataset("wavelength", data=self.wavelength)
+                group.create_dataset("flux", data=flux)
+
+        # Object spectrum that is equal to one of the grid points
+        # of both grids, for a radius of 1 Rjup at 10 pc
+
+        flux_obj = self.model_flux(1500.0)
+        flux_obj *= (constants.R_JUP / (10.0 * constants.PARSEC)) ** 2
+
+        np.savetxt(
+            "test_spectrum.dat",
+            np.column_stack([self.wavelength, flux_obj, 0.01 * flux_obj]),
+        )
+
+        database = species.Database()
+
+        database.add_object(
+            "test",
+            distance=(10.0, 0.1),
+            spectrum={"spec": ("test_spectrum.dat", None, 1e5)},
+        )
+
+    @pytest.mark.parametrize(
+        "model,best_param",
+        [("test-1d", [1500.0, 0.0]), ("test-3d", [1500.0, 4.0, 0.0, 0.0])],
+    )
+    def test_compare_model(self, model, best_param):
+        compare = compare_spectra.CompareSpectra("test", ["spec"])
+
+        compare.compare_model(model, model, av_points=[0.0, 0.5], weights=False)
+
+        with h5py.File("species_database.hdf5", "r") as h5_file:
+            dset = h5_file[f"results/comparison/{model}/goodness_of_fit"]
+
+            assert dset.ndim == len(best_param)
+            assert dset.attrs["best_fit"] == pytest.approx(0.0, rel=0.0, abs=1e-6)
+
+            for i, item in enumerate(best_param):
+                assert dset.attrs[f"best_param{i}"] == item
+
+            assert dset.attrs["radius"] == pytest.approx(
+                1.0, rel=self.limit, abs=0.0
+            )
@@ -0,0 +1,201 @@
+import os
+import shutil
+
+import h5py
+import pytest
+import numpy as np
+
+from astropy.io import fits
+
+import species
+from species.core import constants
+from species.read import read_planck
+from species.util import test_util
+
+
+class TestFitModel:
+    def setup_class(self):
+        self.limit = 1e-10
+
+        self.wavelength = np.linspace(0.9, 2.6, 500)
+
+        self.grid = {
+            "teff": np.array([1000.0, 1500.0, 2000.0, 2500.0]),
+            "logg": np.array([3.5, 4.0, 4.5]),
+        }
+
+    def teardown_class(self):
+        os.remove("species_database.hdf5")
+        os.remove("species_config.ini")
+        os.remove("test_spec1.dat")
+        os.remove("test_spec2.dat")
+        os.remove("test_cov2.fits")
+        shutil.rmtree("data/")
+
+        if os.path.isfile("species_grid_cache.hdf5"):
+            os.remove("species_grid_cache.hdf5")
+
+    def model_flux(self, wavelength, teff, logg):
+        flux = read_planck.ReadPlanck.planck(wavelength, teff, 1.0)
+        flux *= 1.0 + 0.1 * (logg - 4.0) * wavelength
+
+        return flux
+
+    def test_species_init(self):
+        test_util.create_config("./")
+        species.SpeciesInit()
+
+    def test_add_grid(self):
+        # Model grid that is stored in the same format as the grids of add_model
+
+        grid_shape = (self.grid["teff"].size, self.grid["logg"].size)
+        flux = np.zeros(grid_shape + (self.wavelength.size,))
+
+        for i, j in np.ndindex(*grid_shape):
+            flux[i, j] = self.model_flux(
+                self.wavelength, self.grid["teff"][i], self.grid["logg"][j]
+            )
+
+        with h5py.File("species_database.hdf5", "a") as h5_file:
+            group = h5_file.create_group("models/test-2d")
+            group.attrs["n_param"] = 2
+
+            for i, item in enumerate(["teff", "logg"]):
+                group.attrs[f"parameter{i}"] = item
+                group.create_dataset(item, data=self.grid[item])
+
+            group.create_dataset("wavelength", data=self.wavelength)
+            group.create_dataset("flux", data=flux)
+
+        # Two spectra of the object, of which the second one
+        # with a covariance matrix with correlated uncertainties
+
+        rng = np.random.default_rng(1)
+
+        scaling = (constants.R_JUP / (10.0 * constants.PARSEC)) ** 2
+
+        wavel_1 = np.linspace(1.0, 1.8, 80)
+        flux_1 = scaling * self.model_flux(wavel_1, 1700.0, 4.2)
+        flux_1 *= 1.0 + 0.05 * rng.normal(size=wavel_1.size)
+
+        np.savetxt(
+            "test_spec1.dat", np.column_stack([wavel_1, flux_1, 0.05 * flux_1])
+        )
+
+        wavel_2 = np.linspace(1.9, 2.5, 40)
+        flux_2 = scaling * self.model_flux(wavel_2, 1700.0, 4.2)
+        error_2 = 0.05 * flux_2
+
+        wavel_dist = np.abs(wavel_2[:, np.newaxis] - wavel_2[np.newaxis, :])
+        cov_2 = np.outer(error_2, error_2) * np.exp(-wavel_dist / 0.05)
+
+        flux_2 += rng.multivariate_normal(np.zeros(wavel_2.size), cov_2)
+
+        np.savetxt("test_spec2.dat", np.column_stack([wavel_2, flux_2, error_2]))
+        fits.writeto("test_cov2.fits", cov_2)
+
+        database = species.Database()
+
+        database.add_object(
+            "test",
+            distance=(10.0, 0.1),
+            spectrum={
+                "spec1": ("test_spec1.dat", None, 1000.0),
+                "spec2": ("test_spec2.dat", "test_cov2.fits", 1000.0),
+            },
+        )
+
+    @pytest.mark.parametrize(
+        "bounds",
+        [
+            {},
+            {"spec1": ((0.8, 1.2), (0.0, 1.0)), "spec2": (None, (0.0, 1.0))},
+            {"ism_ext": (0.0, 2.0), "ism_red": (2.0, 5.0)},
+            {"ism_ext": (0.0, 2.0), "spec2": ((0.8, 1.2), None)},
+        ],
+    )
+    def test_lnprob_mcmc_batch(self, bounds):
+        bounds.update(
+            {"teff": (1100.0, 2400.0), "logg": (3.6, 4.4), "radius": (0.8, 1.2)}
+        )
+
+        fit = species.FitModel(
+            "test", "test-2d", bounds=bounds, inc_phot=False, inc_spec=True
+        )
+
+        # Random samples of which some are outside the bounds
+
+        rng = np.random.default_rng(2)
+
+        params = np.zeros((30, len(fit.cube_index)))
+
+        for key, index in fit.cube_index.items():
+            if key == "distance":
+                params[:, index] = rng.normal(10.0, 0.1, params.shape[0])
+
+            else:
+                low, high = fit.bounds[key]
+                margin = 0.1 * (high - low)
+
+                params[:, index] = rng.uniform(
+                    low - margin, high + margin, params.shape[0]
+                )
+
+        prior = {"distance": fit.distance, "mass": (30.0, 10.0)}
+
+        ln_prob = fit.lnprob_mcmc_batch(params, prior)
+
+        ln_prob_single = np.array([fit.lnprob_mcmc(item, prior) for item in params])
+
+        assert ln_prob.shape == (params.shape[0],)
+        assert np.sum(np.isfinite(ln_prob)) > 0
+
+        assert np.array_equal(np.isfinite(ln_prob), np.isfinite(ln_prob_single))
+
+        select = np.isfinite(ln_prob)
+
+        assert np.allclose(
+            ln_prob[select], ln_prob_single[select], rtol=self.limit, atol=0.0
+        )
+
+    def test_run_mcmc(self):
+        bounds = {
+            "teff": (1100.0, 2400.0),
+            "logg": (3.6, 4.4),
+            "radius": (0.8, 1.2),
+            "spec1": ((0.8, 1.2), None),
+        }
+
+        guess = {
+            "teff": 1700.0,
+            "logg": 4.2,
+            "radius": 1.0,
+            "spec1": (1.0, None),
+        }
+
+        fit = species.FitModel(
+            "test", "test-2d", bounds=bounds, inc_phot=False, inc_spec=True
+        )
+
+        database = species.Database()
+
+        samples = {}
+
+        for tag, kwargs in [
+            ("single", {"processes": 1}),
+            ("pool", {"processes": 2}),
+            ("batch", {"vectorize": True}),
+        ]:
+            np.random.seed(3)
+
+            fit.run_mcmc(tag, guess.copy(), nwalkers=16, nsteps=20, **kwargs)
+
+            samples[tag] = database.get_samples(tag).samples
+
+        assert samples["single"].shape == (20, 16, 5)
+
+        assert np.array_equal(samples["pool"], samples["single"])
+
+        assert np.allclose(
+            samples["batch"], samples["single"], rtol=self.limit, atol=0.0
+        )
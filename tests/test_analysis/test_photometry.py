@@ -2,6 +2,7 @@ import os
 import shutil
 import urllib.request
 
+import h5py
 import pytest
 import numpy as np
 
@@ -29,6 +30,19 @@ class TestPhotometry:
     def test_synthetic_photometry(self):
         species.SyntheticPhotometry("MKO/NSFCam.J")
 
+    def test_zero_point(self):
+        synphot = species.SyntheticPhotometry("MKO/NSFCam.J")
+        zp_flux = synphot.zero_point()
+
+        with h5py.File("species_database.hdf5", "r") as h5_file:
+            dset = h5_file["filters/MKO/NSFCam.J"]
+            assert dset.attrs[f"zero_point_{synphot.det_type}"] == zp_flux
+
+        species.SpeciesInit()
+
+        synphot = species.SyntheticPhotometry("MKO/NSFCam.J")
+        assert synphot.zero_point() == zp_flux
+
     def test_magnitude_to_flux(self):
         synphot = species.SyntheticPhotometry("MKO/NSFCam.J")
         flux, error = synphot.magnitude_to_flux(20.0, error=0.5)
@@ -75,6 +89,27 @@ class TestPhotometry:
         )
         assert phot_error is None
 
+    def test_spectrum_to_flux_error_method(self):
+        jup_wavel, jup_flux, jup_err = np.loadtxt("plnt_Jupiter.txt", unpack=True)
+
+        synphot = species.SyntheticPhotometry("MKO/NSFCam.J")
+
+        _, error_analytic = synphot.spectrum_to_flux(
+            jup_wavel, jup_flux, error=jup_err, threshold=None, error_method="analytic"
+        )
+
+        _, error_sampling = synphot.spectrum_to_flux(
+            jup_wavel, jup_flux, error=jup_err, threshold=None, n_draws=10000, seed=1
+        )
+
+        assert error_analytic == pytest.approx(error_sampling, rel=0.05, abs=0.0)
+
+        _, error_seed = synphot.spectrum_to_flux(
+            jup_wavel, jup_flux, error=jup_err, threshold=None, n_draws=10000, seed=1
+        )
+
+        assert error_seed == error_sampling
+
     def test_spectrum_to_flux_threshold(self):
         jup_wavel, jup_flux, _ = np.loadtxt("plnt_Jupiter.txt", unpack=True)
 
@@ -120,3 +155,26 @@ class TestPhotometry:
         # The error is estimated with Monte Carlo sampling
         assert app_mag[1] == pytest.approx(5.368048545366946e-05, rel=0.0, abs=2e-5)
         assert abs_mag[1] == pytest.approx(0.021714790446227043, rel=0.0, abs=1e-2)
+
+    def test_multi_filter_photometry(self):
+        jup_wavel, jup_flux, _ = np.loadtxt("plnt_Jupiter.txt", unpack=True)
+
+        filter_names = ["MKO/NSFCam.J", "Keck/NIRC2.J"]
+        multi_phot = species.MultiFilterPhotometry(filter_names)
+
+        phot_flux = multi_phot.spectrum_to_flux(jup_wavel, jup_flux, threshold=None)
+
+        assert phot_flux.shape == (2,)
+
+        for i, item in enumerate(filter_names):
+            synphot = species.SyntheticPhotometry(item)
+            syn_flux, _ = synphot.spectrum_to_flux(jup_wavel, jup_flux, threshold=None)
+
+            assert phot_flux[i] == pytest.approx(syn_flux, rel=self.limit, abs=0.0)
+
+        phot_flux = multi_phot.spectrum_to_flux(
+            jup_wavel, np.vstack((jup_flux, 2.0 * jup_flux)), threshold=None
+        )
+
+        assert phot_flux.shape == (2, 2)
+        assert np.allclose(phot_flux[1], 2.0 * phot_flux[0], rtol=self.limit, atol=0.0)
@@ -81,3 +81,21 @@ class TestFilter:
         filter_fwhm = read_filter.filter_fwhm()
 
         assert filter_fwhm == pytest.approx(0.2956945960962718, rel=self.limit, abs=0.0)
+
+    def test_filter_registry(self):
+        read_filter = species.ReadFilter("MKO/NSFCam.H")
+        filter_profile = read_filter.get_filter()
+
+        # The profile is shared by the instances but the
+        # returned array is a copy that can be modified
+        filter_profile[:, 1] = 0.0
+
+        read_filter = species.ReadFilter("MKO/NSFCam.H")
+        filter_profile = read_filter.get_filter()
+
+        assert np.sum(filter_profile) == pytest.approx(2089.2432, rel=1e-6, abs=0.0)
+
+        assert (
+            read_filter.interpolate_filter()
+            is species.ReadFilter("MKO/NSFCam.H").interpolate_filter()
+        )
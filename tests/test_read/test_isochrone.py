@@ -2,11 +2,14 @@ import os
 import shutil
 import urllib.request
 
+import h5py
 import pytest
 import numpy as np
 
+from scipy.interpolate import griddata
+
 import species
-from species.util import test_util
+from species.util import cache_util, test_util
 
 
 class TestIsochrone:
@@ -72,6 +75,64 @@ class TestIsochrone:
             47.47474968578754, rel=self.limit, abs=0.0
         )
 
+    def test_isochrone_cache(self):
+        masses = np.linspace(10.0, 100.0, 10)
+
+        read_isochrone = species.ReadIsochrone("ames-cond_isochrone")
+        isochrone_box = read_isochrone.get_isochrone(100.0, masses, ("J", "H"), "J")
+
+        # Interpolate each column separately with griddata
+
+        with h5py.File("species_database.hdf5", "r") as h5_file:
+            evolution = np.asarray(h5_file["isochrones/ames-cond_isochrone/evolution"])
+            magnitudes = np.asarray(
+                h5_file["isochrones/ames-cond_isochrone/magnitudes"]
+            )
+            filters = list(h5_file["isochrones/ames-cond_isochrone/filters"])
+
+        filters = [
+            item.decode("utf-8") if isinstance(item, bytes) else item
+            for item in filters
+        ]
+
+        def interp_column(values):
+            return griddata(
+                points=evolution[:, 0:2],
+                values=values,
+                xi=np.stack((np.full(masses.size, 100.0), masses), axis=1),
+                method="linear",
+                fill_value=np.nan,
+                rescale=False,
+            )
+
+        mag_j = interp_column(magnitudes[:, filters.index("J")])
+        mag_h = interp_column(magnitudes[:, filters.index("H")])
+
+        for box_values, grid_values in [
+            (isochrone_box.teff, interp_column(evolution[:, 2])),
+            (isochrone_box.logg, interp_column(evolution[:, 4])),
+            (isochrone_box.color, mag_j - mag_h),
+            (isochrone_box.magnitude, mag_j),
+        ]:
+            assert np.allclose(
+                box_values, grid_values, rtol=self.limit, atol=0.0, equal_nan=True
+            )
+
+        # A new instance uses the interpolator of the first instance
+
+        iso_data = read_isochrone._isochrone_data()
+
+        assert (
+            cache_util.get_cached(
+                "species_database.hdf5", "isochrones/ames-cond_isochrone"
+            )
+            is iso_data
+        )
+
+        read_isochrone = species.ReadIsochrone("ames-cond_isochrone")
+
+        assert read_isochrone._isochrone_data() is iso_data
+
     def test_get_color_magnitude(self):
         read_isochrone = species.ReadIsochrone("ames-cond_isochrone")
 
@@ -124,3 +185,130 @@ class TestIsochrone:
         assert np.sum(colorcolor_box.sptype) == pytest.approx(
             400.0, rel=self.limit, abs=0.0
         )
+
+    def magnitude_loop(self, isochrone, filter_name, adapt_logg=False):
+        # Magnitudes that are calculated separately for each isochrone
+        # sample with get_magnitude, with NaNs outside the model grid
+
+        read_model = species.ReadModel("ames-cond", filter_name=filter_name)
+        bounds = read_model.get_bounds()
+
+        magnitude = np.full(isochrone.masses.size, np.nan)
+
+        for i, mass_item in enumerate(isochrone.masses):
+            model_param = {
+                "teff": isochrone.teff[i],
+                "logg": isochrone.logg[i],
+                "mass": mass_item,
+                "distance": 10.0,
+            }
+
+            if np.isnan(model_param["teff"]):
+                continue
+
+            if adapt_logg:
+                model_param["logg"] = np.clip(model_param["logg"], *bounds["logg"])
+
+            elif not bounds["logg"][0] < model_param["logg"] < bounds["logg"][1]:
+                continue
+
+            if bounds["teff"][0] < model_param["teff"] < bounds["teff"][1]:
+                magnitude[i] = read_model.get_magnitude(model_param)[0]
+
+        return magnitude
+
+    def test_add_linear_isochrone(self):
+        # Evolutionary tracks with a Teff and log(g) that are linear in
+        # the mass, such that the isochrone samples are below, within,
+        # and above the Teff and log(g) boundaries of the model grid
+
+        ages, masses = np.meshgrid([10.0, 100.0, 1000.0], np.linspace(10.0, 100.0, 19))
+
+        ages = ages.flatten()
+        masses = masses.flatten()
+
+        evolution = np.column_stack(
+            [
+                ages,
+                masses,
+                1500.0 + 12.0 * masses,
+                np.zeros(masses.size),
+                0.15 * masses - 4.5,
+            ]
+        )
+
+        with cache_util.open_writable("species_database.hdf5") as h5_file:
+            dset = h5_file.create_dataset(
+                "isochrones/linear_isochrone/evolution", data=evolution
+            )
+
+            dset.attrs["model"] = "linear"
+
+    @pytest.mark.parametrize("adapt_logg,n_finite", [(False, 4), (True, 8)])
+    def test_get_color_magnitude_bounds(self, adapt_logg, n_finite):
+        read_isochrone = species.ReadIsochrone("linear_isochrone")
+
+        # Masses above 100 Mjup are outside the evolutionary tracks
+        masses = np.linspace(20.0, 110.0, 19)
+
+        isochrone = read_isochrone.get_isochrone(100.0, masses)
+
+        assert np.sum(np.isnan(isochrone.teff)) == 2
+
+        filters_color = ("MKO/NSFCam.J", "MKO/NSFCam.H")
+
+        with pytest.warns(UserWarning):
+            colormag_box = read_isochrone.get_color_magnitude(
+                100.0,
+                masses,
+                "ames-cond",
+                filters_color,
+                filters_color[0],
+                adapt_logg=adapt_logg,
+            )
+
+        mag1 = self.magnitude_loop(isochrone, filters_color[0], adapt_logg)
+        mag2 = self.magnitude_loop(isochrone, filters_color[1], adapt_logg)
+
+        assert np.sum(np.isfinite(mag1)) == n_finite
+
+        assert np.array_equal(np.isnan(colormag_box.magnitude), np.isnan(mag1))
+        assert np.array_equal(np.isnan(colormag_box.color), np.isnan(mag1 - mag2))
+
+        assert np.allclose(
+            colormag_box.magnitude, mag1, rtol=self.limit, atol=0.0, equal_nan=True
+        )
+
+        assert np.allclose(
+            colormag_box.color, mag1 - mag2, rtol=self.limit, atol=0.0, equal_nan=True
+        )
+
+    def test_get_color_color_bounds(self):
+        read_isochrone = species.ReadIsochrone("linear_isochrone")
+
+        masses = np.linspace(20.0, 110.0, 19)
+
+        isochrone = read_isochrone.get_isochrone(100.0, masses)
+
+        filters_colors = (
+            ("MKO/NSFCam.J", "MKO/NSFCam.H"),
+            ("MKO/NSFCam.H", "MKO/NSFCam.Ks"),
+        )
+
+        with pytest.warns(UserWarning):
+            colorcolor_box = read_isochrone.get_color_color(
+                100.0, masses, "ames-cond", filters_colors
+            )
+
+        for i, filters_color in enumerate(filters_colors):
+            mag1 = self.magnitude_loop(isochrone, filters_color[0])
+            mag2 = self.magnitude_loop(isochrone, filters_color[1])
+
+            color = getattr(colorcolor_box, f"color{i+1}")
+
+            assert np.sum(np.isfinite(color)) == 4
+            assert np.array_equal(np.isnan(color), np.isnan(mag1 - mag2))
+
+            assert np.allclose(
+                color, mag1 - mag2, rtol=self.limit, atol=0.0, equal_nan=True
+            )
@@ -24,6 +24,9 @@ class TestModel:
         os.remove("species_config.ini")
         shutil.rmtree("data/")
 
+        if os.path.isfile("species_grid_cache.hdf5"):
+            os.remove("species_grid_cache.hdf5")
+
     def test_species_init(self):
         test_util.create_config("./")
         species.SpeciesInit()
@@ -66,6 +69,30 @@ class TestModel:
             650.0527540140317, rel=self.limit, abs=0.0
         )
 
+    def test_get_model_batch(self):
+        read_model = species.ReadModel("ames-cond", filter_name="Paranal/NACO.H")
+
+        model_box = read_model.get_model(
+            self.model_param.copy(), spec_res=100.0, magnitude=False, smooth=True
+        )
+
+        samples = np.array([[2200.0, 4.5, 1.0, 10.0], [2300.0, 4.0, 1.0, 10.0]])
+
+        wavelength, flux = read_model.get_model_batch(
+            samples,
+            ["teff", "logg", "radius", "distance"],
+            spec_res=100.0,
+            smooth=True,
+        )
+
+        assert flux.shape == (2, model_box.wavelength.size)
+        assert np.sum(wavelength) == pytest.approx(
+            92.26773310928259, rel=self.limit, abs=0.0
+        )
+        assert np.sum(flux[0, :]) == pytest.approx(
+            1.6347074150483604e-12, rel=self.limit, abs=0.0
+        )
+
     def test_get_data(self):
         read_model = species.ReadModel("ames-cond", filter_name="Paranal/NACO.H")
         model_box = read_model.get_data(self.model_param)
@@ -94,6 +121,102 @@ class TestModel:
             11.357135619661243, rel=self.limit, abs=0.0
         )
 
+    @pytest.mark.parametrize(
+        "param_names,samples",
+        [
+            (
+                ["teff", "logg", "radius", "distance", "ism_ext"],
+                [
+                    [2200.0, 4.5, 1.0, 10.0, 0.0],
+                    [2300.0, 4.0, 1.0, 10.0, 0.0],
+                    [2250.0, 4.2, 1.2, 20.0, 1.5],
+                ],
+            ),
+            (
+                ["teff", "logg", "radius", "distance"],
+                [
+                    [2200.0, 4.5, 1.0, 10.0],
+                    [2300.0, 4.0, 1.0, 10.0],
+                    [2250.0, 4.2, 1.2, 20.0],
+                ],
+            ),
+            (
+                ["teff", "logg", "mass", "distance"],
+                [
+                    [2200.0, 4.5, 20.0, 10.0],
+                    [2300.0, 4.0, 5.0, 10.0],
+                    [2250.0, 4.2, 12.0, 20.0],
+                ],
+            ),
+        ],
+    )
+    def test_get_flux_batch(self, param_names, samples):
+        read_model = species.ReadModel("ames-cond", filter_name="Paranal/NACO.H")
+
+        samples = np.array(samples)
+
+        flux = read_model.get_flux_batch(samples, param_names)
+
+        app_mag, abs_mag = read_model.get_magnitude_batch(samples, param_names)
+
+        for i in range(samples.shape[0]):
+            model_param = dict(zip(param_names, samples[i]))
+
+            assert flux[i] == pytest.approx(
+                read_model.get_flux(model_param.copy())[0], rel=self.limit, abs=0.0
+            )
+
+            magnitude = read_model.get_magnitude(model_param.copy())
+
+            assert app_mag[i] == pytest.approx(magnitude[0], rel=self.limit, abs=0.0)
+            assert abs_mag[i] == pytest.approx(magnitude[1], rel=self.limit, abs=0.0)
+
+    def test_get_mcmc_photometry(self):
+        database = species.Database()
+
+        samples = np.array(
+            [
+                [[2200.0, 4.5, 1.0], [2300.0, 4.0, 1.1], [2250.0, 4.2, 1.2]],
+                [[2100.0, 3.5, 0.9], [2400.0, 5.0, 1.0], [2350.0, 4.8, 0.8]],
+            ]
+        )
+
+        database.add_samples(
+            sampler="emcee",
+            samples=samples,
+            ln_prob=np.zeros(samples.shape[:2]),
+            ln_evidence=None,
+            mean_accept=0.5,
+            spectrum=("model", "ames-cond"),
+            tag="test_phot",
+            modelpar=["teff", "logg", "radius"],
+            distance=20.0,
+            spec_labels=None,
+        )
+
+        for phot_type in ["magnitude", "flux"]:
+            phot = database.get_mcmc_photometry(
+                "test_phot", "Paranal/NACO.H", phot_type=phot_type, vectorize=False
+            )
+
+            phot_batch = database.get_mcmc_photometry(
+                "test_phot", "Paranal/NACO.H", phot_type=phot_type, vectorize=True
+            )
+
+            assert phot_batch.shape == (6,)
+            assert np.allclose(phot_batch, phot, rtol=self.limit, atol=0.0)
+
+        filter_names = ["Paranal/NACO.H", "Paranal/NACO.Ks"]
+
+        phot = database.get_mcmc_photometry("test_phot", filter_names, vectorize=False)
+
+        phot_batch = database.get_mcmc_photometry(
+            "test_phot", filter_names, vectorize=True
+        )
+
+        assert phot_batch.shape == (2, 6)
+        assert np.allclose(phot_batch, phot, rtol=self.limit, atol=0.0)
+
     def test_get_bounds(self):
         read_model = species.ReadModel("ames-cond", filter_name="Paranal/NACO.H")
         bounds = read_model.get_bounds()
@@ -121,3 +244,63 @@ class TestModel:
         parameters = read_model.get_parameters()
 
         assert parameters == ["teff", "logg"]
+
+    def test_grid_cache(self):
+        read_model = species.ReadModel("ames-cond", filter_name="Paranal/NACO.H")
+
+        parameters = read_model.get_parameters()
+        parameters.append("radius")
+
+        assert read_model.get_parameters() == ["teff", "logg"]
+
+        read_model.clear_cache()
+
+        assert read_model.get_parameters() == ["teff", "logg"]
+        assert read_model.get_bounds()["teff"] == (2000.0, 2500.0)
+
+    def test_interpolate_grid(self):
+        model_param = {"teff": 2200.0, "logg": 4.5}
+
+        read_model = species.ReadModel("ames-cond", filter_name="Paranal/NACO.H")
+        flux = read_model.get_flux(model_param)
+
+        read_model = species.ReadModel("ames-cond", filter_name="Paranal/NACO.H")
+        read_model.interpolate_grid()
+
+        assert read_model.spectrum_interp.values.shape == (6, 7, 1)
+        assert read_model.spectrum_interp([2200.0, 4.5])[0, 0] == pytest.approx(
+            flux[0], rel=self.limit, abs=0.0
+        )
+
+        wavel_resample = np.linspace(1.2, 2.4, 100)
+
+        read_model = species.ReadModel("ames-cond", wavel_range=(1.0, 2.6))
+        model_box = read_model.get_model(
+            model_param, spec_res=100.0, wavel_resample=wavel_resample, smooth=True
+        )
+
+        read_model = species.ReadModel("ames-cond", wavel_range=(1.0, 2.6))
+        read_model.interpolate_grid(
+            wavel_resample=wavel_resample, smooth=True, spec_res=100.0
+        )
+
+        assert read_model.spectrum_interp.values.shape == (6, 7, 100)
+        assert np.allclose(
+            read_model.spectrum_interp([2200.0, 4.5])[0],
+            model_box.flux,
+            rtol=self.limit,
+            atol=0.0,
+        )
+
+    def test_grid_cache_file(self):
+        read_model = species.ReadModel("ames-cond", filter_name="Paranal/NACO.H")
+        read_model.interpolate_grid()
+
+        assert os.path.isfile("species_grid_cache.hdf5")
+
+        flux_grid = read_model.spectrum_interp.values
+
+        read_model = species.ReadModel("ames-cond", filter_name="Paranal/NACO.H")
+        read_model.interpolate_grid()
+
+        assert np.array_equal(read_model.spectrum_interp.values, flux_grid)
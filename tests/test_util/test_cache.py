@@ -0,0 +1,36 @@
+import os
+
+import h5py
+import numpy as np
+
+from species.util import cache_util
+
+
+class TestCache:
+    def setup_class(self):
+        self.test_file = "test_cache.hdf5"
+
+        with h5py.File(self.test_file, "w") as h5_file:
+            h5_file.create_dataset("filters/test", data=np.arange(10.0))
+
+    def teardown_class(self):
+        cache_util.invalidate(self.test_file)
+        os.remove(self.test_file)
+
+    def test_open_writable(self):
+        h5_file = cache_util.open_pooled(self.test_file)
+        data = np.asarray(h5_file["filters/test"])
+        cache_util.set_cached(self.test_file, "test", data)
+
+        with cache_util.open_writable(self.test_file, clear_cache=False) as h5_file:
+            h5_file["filters/test"].attrs["zero_point"] = 1.0
+
+        assert cache_util.get_cached(self.test_file, "test") is data
+
+        h5_file = cache_util.open_pooled(self.test_file)
+        assert h5_file["filters/test"].attrs["zero_point"] == 1.0
+
+        with cache_util.open_writable(self.test_file) as h5_file:
+            h5_file["filters/test"].attrs["zero_point"] = 2.0
+
+        assert cache_util.get_cached(self.test_file, "test") is None
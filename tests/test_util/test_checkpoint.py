@@ -0,0 +1,81 @@
+import os
+
+import emcee
+import pytest
+import numpy as np
+
+from species.util import checkpoint_util
+
+
+def log_prob(param):
+    return -0.5 * np.sum(param**2)
+
+
+class TestCheckpoint:
+    def setup_class(self):
+        self.test_file = "test_checkpoint.hdf5"
+
+        self.nwalkers = 8
+        self.ndim = 2
+        self.nsteps = 50
+
+        rng = np.random.default_rng(5)
+        self.initial = rng.normal(size=(self.nwalkers, self.ndim))
+
+        self.random_state = np.random.RandomState(11).get_state()
+
+        ens_sampler = emcee.EnsembleSampler(self.nwalkers, self.ndim, log_prob)
+
+        ens_sampler.run_mcmc(
+            emcee.State(self.initial, random_state=self.random_state), self.nsteps
+        )
+
+        self.chain = ens_sampler.get_chain()
+        self.accepted = ens_sampler.backend.accepted
+
+    def teardown_method(self):
+        if os.path.exists(self.test_file):
+            os.remove(self.test_file)
+
+    @pytest.mark.parametrize("flush_interval,max_steps", [(0.0, 1000), (1e6, 7)])
+    def test_resume(self, flush_interval, max_steps):
+        backend = checkpoint_util.CheckpointBackend(
+            self.test_file, flush_interval=flush_interval, max_steps=max_steps
+        )
+
+        backend.reset(self.nwalkers, self.ndim)
+
+        ens_sampler = emcee.EnsembleSampler(
+            self.nwalkers, self.ndim, log_prob, backend=backend
+        )
+
+        ens_sampler.run_mcmc(
+            emcee.State(self.initial, random_state=self.random_state), 30
+        )
+
+        # Interrupt the sampler without writing the collected steps
+
+        n_buffer = len(backend.step_buffer)
+
+        if flush_interval == 0.0:
+            assert n_buffer == 0
+        else:
+            assert n_buffer == 30 % max_steps
+
+        del ens_sampler, backend
+
+        backend = checkpoint_util.CheckpointBackend(
+            self.test_file, flush_interval=flush_interval, max_steps=max_steps
+        )
+
+        assert backend.iteration == 30 - n_buffer
+
+        ens_sampler = emcee.EnsembleSampler(
+            self.nwalkers, self.ndim, log_prob, backend=backend
+        )
+
+        ens_sampler.run_mcmc(None, self.nsteps - backend.iteration)
+
+        assert backend.iteration == self.nsteps
+        assert np.array_equal(ens_sampler.get_chain(), self.chain)
+        assert np.array_equal(backend.accepted, self.accepted)
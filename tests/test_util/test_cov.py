@@ -0,0 +1,76 @@
+import pytest
+import numpy as np
+
+from species.util import cov_util
+
+
+class TestCov:
+    def setup_class(self):
+        self.limit = 1e-8
+
+        rng = np.random.default_rng(1)
+
+        rand_matrix = rng.normal(size=(50, 50))
+
+        self.cov_matrix = np.dot(rand_matrix, rand_matrix.T) / 50.0 + np.eye(50)
+        self.flux_diff = rng.normal(size=(3, 50))
+        self.sigma_ratio = rng.uniform(1.0, 2.0, size=(3, 50))
+        self.wavelength = np.linspace(1.0, 2.0, 50)
+
+    def test_cov_cholesky(self):
+        chol_factor = cov_util.cov_cholesky(self.cov_matrix)
+
+        assert np.allclose(
+            np.dot(chol_factor, chol_factor.T),
+            self.cov_matrix,
+            rtol=self.limit,
+            atol=0.0,
+        )
+
+        assert cov_util.cov_cholesky(self.cov_matrix) is chol_factor
+
+    def test_chi_squared(self):
+        chi_sq = cov_util.chi_squared(
+            self.flux_diff, self.cov_matrix, self.sigma_ratio
+        )
+
+        assert chi_sq.shape == (3,)
+
+        for i in range(3):
+            cov_inflated = (
+                self.cov_matrix
+                * self.sigma_ratio[i][:, np.newaxis]
+                * self.sigma_ratio[i][np.newaxis, :]
+            )
+
+            chi_sq_inv = np.dot(
+                self.flux_diff[i],
+                np.dot(np.linalg.inv(cov_inflated), self.flux_diff[i]),
+            )
+
+            assert chi_sq[i] == pytest.approx(chi_sq_inv, rel=self.limit, abs=0.0)
+
+    def test_gp_chi_squared(self):
+        error = self.sigma_ratio[0]
+        wavel_dist = cov_util.wavel_distance(self.wavelength)
+
+        chi_sq = cov_util.gp_chi_squared(
+            self.flux_diff[0], error, wavel_dist, 0.1, 0.5
+        )
+
+        wavel_j, wavel_i = np.meshgrid(self.wavelength, self.wavelength)
+        error_j, error_i = np.meshgrid(error, error)
+
+        cov_matrix = (
+            0.5 ** 2
+            * error_i
+            * error_j
+            * np.exp(-((wavel_i - wavel_j) ** 2) / (2.0 * 0.1 ** 2))
+            + (1.0 - 0.5 ** 2) * np.eye(self.wavelength.size) * error_i ** 2
+        )
+
+        chi_sq_inv = np.dot(
+            self.flux_diff[0], np.dot(np.linalg.inv(cov_matrix), self.flux_diff[0])
+        )
+
+        assert chi_sq == pytest.approx(chi_sq_inv, rel=self.limit, abs=0.0)
@@ -0,0 +1,282 @@
+import os
+import shutil
+
+import pytest
+import numpy as np
+import PyMieScatt
+
+import species
+from species.util import cache_util, dust_util, test_util
+
+
+class TestDust:
+    def setup_class(self):
+        self.limit = 1e-8
+
+    def test_mie_efficiency(self):
+        radii = np.logspace(-4.0, 1.0, 20)  # (um)
+        wavel = np.array([0.5, 2.0, 10.0])  # (um)
+        n_index = np.array([1.5, 1.7, 2.0])
+        k_index = np.array([0.01, 0.1, 1.0])
+
+        q_ext = dust_util.mie_efficiency(
+            2.0 * np.pi * radii / wavel[:, np.newaxis],
+            n_index[:, np.newaxis],
+            k_index[:, np.newaxis],
+        )
+
+        assert q_ext.shape == (3, 20)
+
+        for i in range(wavel.size):
+            for j in range(radii.size):
+                mie = PyMieScatt.MieQ(
+                    complex(n_index[i], k_index[i]),
+                    wavel[i] * 1e3,
+                    2.0 * radii[j] * 1e3,
+                    asDict=True,
+                )
+
+                assert q_ext[i, j] == pytest.approx(
+                    mie["Qext"], rel=self.limit, abs=0.0
+                )
+
+    def test_dust_cross_section(self):
+        dn_grains, _, radii = dust_util.log_normal_distribution(1.0, 2.0, 100)
+
+        c_ext = dust_util.dust_cross_section(dn_grains, radii, 2.0, 1.5, 0.01)
+
+        # Integration of the extinction efficiencies of PyMieScatt
+        # over the size distribution
+
+        c_mie = 0.0
+
+        for i, item in enumerate(radii):
+            mie = PyMieScatt.MieQ(
+                complex(1.5, 0.01), 2.0 * 1e3, 2.0 * item * 1e3, asDict=True
+            )
+
+            c_mie += np.pi * item ** 2 * mie["Qext"] * dn_grains[i]
+
+        assert c_ext == pytest.approx(c_mie, rel=self.limit, abs=0.0)
+
+        # Same radii with a different size distribution
+        dn_grains, _, _ = dust_util.log_normal_distribution(1.0, 2.0, 100)
+        c_ext_2 = dust_util.dust_cross_section(2.0 * dn_grains, radii, 2.0, 1.5, 0.01)
+
+        assert c_ext_2 == pytest.approx(2.0 * c_ext, rel=self.limit, abs=0.0)
+
+        # The second call uses the cached extinction efficiencies,
+        # which are replaced here to check that they are used
+
+        cache_key = (1.5, 0.01, 2.0, radii.tobytes())
+
+        assert cache_key in dust_util._QEXT_CACHE
+
+        q_ext = dust_util._QEXT_CACHE[cache_key]
+        dust_util._QEXT_CACHE[cache_key] = 2.0 * q_ext
+
+        c_ext_3 = dust_util.dust_cross_section(dn_grains, radii, 2.0, 1.5, 0.01)
+
+        dust_util._QEXT_CACHE.pop(cache_key)
+
+        assert c_ext_3 == pytest.approx(2.0 * c_ext, rel=self.limit, abs=0.0)
+
+
+class TestDustDatabase:
+    def setup_class(self):
+        self.limit = 1e-8
+        self.database = "species_database.hdf5"
+
+        self.table_name = "dust/lognorm/mgsio3/crystalline/filters/Test/filter.A"
+
+        self.wavelength = np.linspace(0.3, 10.0, 50)
+        self.radius_g = np.logspace(-2.0, 1.0, 6)
+        self.sigma_g = np.array([1.5, 2.0, 3.0])
+
+        # Cross sections that are linear in the wavelength, such
+        # that the filter-weighted averages are known analytically
+
+        self.cross_grid = 1.0 + np.outer(self.radius_g, self.sigma_g)
+
+        self.cross_section = (1.0 + 0.1 * self.wavelength)[
+            :, np.newaxis, np.newaxis
+        ] * self.cross_grid
+
+    def teardown_class(self):
+        cache_util.invalidate(self.database)
+
+        os.remove(self.database)
+        os.remove("species_config.ini")
+        os.remove("test_filter.dat")
+        shutil.rmtree("data/")
+
+    def add_filter(self, filter_name, wavel_range):
+        wavel_filter = np.linspace(wavel_range[0], wavel_range[1], 100)
+        transmission = np.exp(-0.5 * (wavel_filter - np.mean(wavel_range)) ** 2 / 0.01)
+
+        np.savetxt("test_filter.dat", np.column_stack([wavel_filter, transmission]))
+
+        database = species.Database()
+        database.add_filter(filter_name, filename="test_filter.dat")
+
+    def filter_average(self, filter_name):
+        # Filter-weighted average of the linear cross sections
+        read_filt = species.ReadFilter(filter_name)
+        filt_trans = read_filt.get_filter()
+
+        wavel_mean = np.trapz(
+            filt_trans[:, 0] * filt_trans[:, 1], filt_trans[:, 0]
+        ) / np.trapz(filt_trans[:, 1], filt_trans[:, 0])
+
+        return (1.0 + 0.1 * wavel_mean) * self.cross_grid
+
+    def test_species_init(self):
+        test_util.create_config("./")
+        species.SpeciesInit()
+
+    def test_add_dust(self):
+        group = "dust/lognorm/mgsio3/crystalline"
+
+        with cache_util.open_writable(self.database) as h5_file:
+            h5_file.create_dataset(f"{group}/cross_section", data=self.cross_section)
+            h5_file.create_dataset(f"{group}/wavelength", data=self.wavelength)
+            h5_file.create_dataset(f"{group}/radius_g", data=self.radius_g)
+            h5_file.create_dataset(f"{group}/sigma_g", data=self.sigma_g)
+
+        # Optical constants of the three crystal axes
+
+        for i in range(3):
+            optical = np.column_stack(
+                [
+                    self.wavelength,
+                    np.full(self.wavelength.size, 1.5 + 0.1 * i),
+                    0.01 * self.wavelength,
+                ]
+            )
+
+            with cache_util.open_writable(self.database) as h5_file:
+                h5_file.create_dataset(
+                    f"dust/mgsio3/crystalline/axis_{i+1}", data=optical
+                )
+
+        self.add_filter("Test/filter.A", (1.0, 1.4))
+        self.add_filter("Test/filter.B", (2.0, 2.4))
+
+    def test_filter_cross_sections(self):
+        cross_phot = dust_util.filter_cross_sections("lognorm", "Test/filter.A")
+
+        assert cross_phot.shape == (6, 3)
+
+        assert np.allclose(
+            cross_phot, self.filter_average("Test/filter.A"), rtol=1e-6, atol=0.0
+        )
+
+        # The table is stored with the hash of the filter profile
+
+        filt_trans = species.ReadFilter("Test/filter.A").get_filter()
+
+        h5_file = cache_util.open_pooled(self.database)
+
+        assert np.array_equal(h5_file[self.table_name], cross_phot)
+
+        assert h5_file[self.table_name].attrs[
+            "filter_hash"
+        ] == cache_util.grid_cache_key(filt_trans)
+
+        # Replace the stored table, while keeping the filter hash,
+        # such that the table is read back instead of recalculated
+
+        with cache_util.open_writable(self.database) as h5_file:
+            h5_file[self.table_name][...] = 2.0 * cross_phot
+
+        cross_stored = dust_util.filter_cross_sections("lognorm", "Test/filter.A")
+
+        assert np.array_equal(cross_stored, 2.0 * cross_phot)
+
+        # A changed filter profile results in a different hash, so
+        # the table is recalculated and replaced in the database
+
+        self.add_filter("Test/filter.A", (1.2, 1.6))
+
+        cross_new = dust_util.filter_cross_sections("lognorm", "Test/filter.A")
+
+        assert np.allclose(
+            cross_new, self.filter_average("Test/filter.A"), rtol=1e-6, atol=0.0
+        )
+
+        assert not np.allclose(cross_new, cross_phot, rtol=1e-6, atol=0.0)
+
+        filt_trans = species.ReadFilter("Test/filter.A").get_filter()
+
+        h5_file = cache_util.open_pooled(self.database)
+
+        assert np.array_equal(h5_file[self.table_name], cross_new)
+
+        assert h5_file[self.table_name].attrs[
+            "filter_hash"
+        ] == cache_util.grid_cache_key(filt_trans)
+
+    def test_calc_reddening(self):
+        filters = ("Test/filter.A", "Test/filter.B")
+
+        ext_filter = dust_util.calc_reddening(filters, ("Test/filter.A", 1.0))
+
+        assert ext_filter[0] == pytest.approx(1.0, rel=self.limit, abs=0.0)
+
+        # Cross sections that are calculated directly for the optical
+        # constants that are nearest to the filter mean wavelengths
+
+        dn_grains, _, radii = dust_util.log_normal_distribution(1.0, 2.0, 100)
+
+        h5_file = cache_util.open_pooled(self.database)
+
+        c_ext = {}
+        attr_names = {}
+
+        for item in filters:
+            wavel_mean = species.ReadFilter(item).mean_wavelength()
+            c_ext[item] = 0.0
+
+            for i in range(3):
+                dset = h5_file[f"dust/mgsio3/crystalline/axis_{i+1}"]
+                data = np.asarray(dset)
+
+                wavel_index = np.argmin(np.abs(data[:, 0] - wavel_mean))
+
+                cross_tmp = dust_util.dust_cross_section(
+                    dn_grains,
+                    radii,
+                    data[wavel_index, 0],
+                    data[wavel_index, 1],
+                    data[wavel_index, 2],
+                )
+
+                # The cross sections are stored as attributes
+
+                attr_names[(item, i)] = "c_ext_" + cache_util.grid_cache_key(
+                    "lognorm", 1.0, 2.0, 100, int(wavel_index)
+                )
+
+                assert dset.attrs[attr_names[(item, i)]] == pytest.approx(
+                    cross_tmp, rel=self.limit, abs=0.0
+                )
+
+                c_ext[item] += cross_tmp / 3.0
+
+        assert ext_filter[1] == pytest.approx(
+            c_ext["Test/filter.B"] / c_ext["Test/filter.A"], rel=self.limit, abs=0.0
+        )
+
+        # Replace the stored cross sections of the second filter to
+        # check that the attributes are used instead of recalculated
+
+        with cache_util.open_writable(self.database) as h5_file:
+            for i in range(3):
+                dset = h5_file[f"dust/mgsio3/crystalline/axis_{i+1}"]
+                dset.attrs[attr_names[("Test/filter.B", i)]] *= 2.0
+
+        ext_cached = dust_util.calc_reddening(filters, ("Test/filter.A", 1.0))
+
+        assert ext_cached[1] == pytest.approx(
+            2.0 * ext_filter[1], rel=self.limit, abs=0.0
+        )
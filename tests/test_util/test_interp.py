@@ -0,0 +1,39 @@
+import pytest
+import numpy as np
+
+from scipy.interpolate import interp1d
+
+from species.util import read_util
+
+
+class TestInterp:
+    def setup_class(self):
+        self.limit = 1e-10
+
+        rng = np.random.default_rng(6)
+
+        self.wavelength = np.sort(rng.uniform(0.6, 0.7, 400))
+        self.flux = rng.normal(size=(3, 400)) + 5.0
+        self.wavel_new = read_util.create_wavelengths((0.65, 0.66), 1e4)
+
+    @pytest.mark.parametrize("interp_kind", ["linear", "nearest", "cubic"])
+    def test_interp_matrix(self, interp_kind):
+        interp_matrix = read_util.interp_matrix(
+            self.wavelength, self.wavel_new, interp_kind
+        )
+
+        assert interp_matrix.shape == (self.wavel_new.size, self.wavelength.size)
+
+        flux_interp = interp1d(self.wavelength, self.flux, kind=interp_kind)
+
+        assert np.allclose(
+            interp_matrix.dot(self.flux.T).T,
+            flux_interp(self.wavel_new),
+            rtol=self.limit,
+            atol=0.0,
+        )
+
+    def test_cache(self):
+        interp_matrix = read_util.interp_matrix(self.wavelength, self.wavel_new)
+
+        assert read_util.interp_matrix(self.wavelength, self.wavel_new) is interp_matrix
@@ -0,0 +1,90 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+import numpy as np
+
+from species.analysis import fit_model
+from species.util import perf_util
+
+
+@perf_util.hot_path
+def scale_value(value: float) -> float:
+    return value * 2
+
+
+class TestPerf:
+    def setup_class(self):
+        self.mode_init = perf_util.performance_mode()
+
+    def teardown_method(self):
+        perf_util.set_performance_mode(self.mode_init)
+
+    def test_hot_path(self):
+        perf_util.set_performance_mode(False)
+
+        assert scale_value(1.5) == 3.0
+
+        with pytest.raises(TypeError):
+            scale_value("1.5")
+
+        # The type checking is skipped in performance mode
+
+        perf_util.set_performance_mode(True)
+
+        assert perf_util.performance_mode()
+        assert scale_value("1.5") == "1.51.5"
+
+    @pytest.mark.parametrize("env_value,enabled", [("1", True), ("0", False)])
+    def test_environment_variable(self, env_value, enabled):
+        env = os.environ.copy()
+        env["SPECIES_PERFORMANCE"] = env_value
+
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "from species.util import perf_util; "
+                "print(perf_util.performance_mode())",
+            ],
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+
+        assert output.stdout.strip().split("\n")[-1] == str(enabled)
+
+    def test_typecheck_overhead(self):
+        # Time per call of the log-prior function of run_mcmc,
+        # with and without the runtime type checking
+
+        n_calls = 1000
+
+        bounds = {
+            "teff": (1000.0, 2000.0),
+            "logg": (3.5, 5.0),
+            "feh": (-0.5, 0.5),
+            "radius": (0.5, 2.0),
+        }
+
+        param_index = {"teff": 0, "logg": 1, "feh": 2, "radius": 3, "distance": 4}
+
+        param = np.array([1500.0, 4.0, 0.0, 1.0, 10.0])
+        prior = {"teff": (1500.0, 100.0)}
+
+        call_time = {}
+
+        for key, value in [("typechecked", False), ("performance", True)]:
+            perf_util.set_performance_mode(value)
+
+            start_time = time.perf_counter()
+
+            for _ in range(n_calls):
+                fit_model.lnprior(param, bounds, param_index, prior)
+
+            call_time[key] = (time.perf_counter() - start_time) / n_calls
+
+        assert call_time["performance"] < call_time["typechecked"]
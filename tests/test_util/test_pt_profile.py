@@ -0,0 +1,185 @@
+import sys
+import types
+
+import pytest
+import numpy as np
+
+from scipy.interpolate import PchipInterpolator
+
+from species.util import retrieval_util
+
+
+class TestPTProfile:
+    def setup_class(self):
+        self.limit = 1e-10
+
+        rng = np.random.default_rng(4)
+
+        self.pressure = np.logspace(-6.0, 3.0, 180)
+        self.knot_press = np.logspace(-6.0, 3.0, 15)
+        self.knot_temp = rng.uniform(500.0, 3000.0, size=(20, 15))
+        self.knot_temp[:10] = np.sort(self.knot_temp[:10], axis=1)
+
+    def test_pchip_interp(self):
+        rng = np.random.default_rng(5)
+
+        knot_x = np.sort(rng.uniform(0.0, 10.0, size=(20, 8)), axis=1)
+        knot_y = rng.normal(size=(20, 8))
+        x_new = np.linspace(-1.0, 11.0, 50)
+
+        y_new = retrieval_util.pchip_interp_batch(knot_x, knot_y, x_new)
+
+        for i in range(20):
+            assert np.allclose(
+                y_new[i],
+                PchipInterpolator(knot_x[i], knot_y[i])(x_new),
+                rtol=self.limit,
+                atol=0.0,
+            )
+
+    def test_pt_spline_interp(self):
+        temp = retrieval_util.pt_spline_interp_batch(
+            self.knot_press, self.knot_temp, self.pressure, 0.3
+        )
+
+        assert temp.shape == (20, 180)
+
+        for i in range(20):
+            assert np.allclose(
+                temp[i],
+                retrieval_util.pt_spline_interp(
+                    self.knot_press, self.knot_temp[i], self.pressure, 0.3
+                ),
+                rtol=self.limit,
+                atol=0.0,
+            )
+
+    def test_pt_smooth_samples(self):
+        pt_smooth = np.linspace(0.0, 0.8, 20)
+
+        temp = retrieval_util.pt_spline_interp_batch(
+            self.knot_press, self.knot_temp, self.pressure, pt_smooth
+        )
+
+        for i in range(20):
+            assert np.allclose(
+                temp[i],
+                retrieval_util.pt_spline_interp(
+                    self.knot_press, self.knot_temp[i], self.pressure, pt_smooth[i]
+                ),
+                rtol=self.limit,
+                atol=0.0,
+            )
+
+    def test_pt_profile(self):
+        param_index = {f"t{i}": i for i in range(15)}
+
+        temp, phot_press, conv_press = retrieval_util.pt_profile_batch(
+            self.knot_temp,
+            param_index,
+            "free",
+            self.pressure,
+            knot_press=self.knot_press,
+        )
+
+        assert phot_press is None
+        assert conv_press is None
+
+        assert np.allclose(
+            temp,
+            retrieval_util.pt_spline_interp_batch(
+                self.knot_press, self.knot_temp, self.pressure
+            ),
+            rtol=self.limit,
+            atol=0.0,
+        )
+
+        with pytest.raises(ValueError) as error:
+            retrieval_util.pt_profile_batch(
+                self.knot_temp, param_index, "isothermal", self.pressure
+            )
+
+        assert "is not supported" in str(error.value)
+
+    def test_pt_ret_model(self, monkeypatch):
+        def interpol_abundances(c_o_ratio, metallicity, temp, press, **kwargs):
+            # Deterministic stand-in for the interpolation of the
+            # adiabatic gradient by poor_mans_nonequ_chem
+
+            temp = np.asarray(temp, dtype=float).reshape(-1)
+            press = np.asarray(press, dtype=float).reshape(-1)
+
+            nabla_ad = (
+                0.28
+                + 0.04 * np.tanh((temp - 1800.0) / 400.0)
+                + 0.01 * np.asarray(metallicity).reshape(-1)
+                - 0.02 * np.asarray(c_o_ratio).reshape(-1)
+                + 0.003 * np.log10(press)
+            )
+
+            return {"nabla_ad": nabla_ad, "MMW": np.full(temp.size, 2.33)}
+
+        chem_module = types.ModuleType("poor_mans_nonequ_chem.poor_mans_nonequ_chem")
+        chem_module.interpol_abundances = interpol_abundances
+
+        chem_package = types.ModuleType("poor_mans_nonequ_chem")
+        chem_package.poor_mans_nonequ_chem = chem_module
+
+        monkeypatch.setitem(sys.modules, "poor_mans_nonequ_chem", chem_package)
+
+        monkeypatch.setitem(
+            sys.modules, "poor_mans_nonequ_chem.poor_mans_nonequ_chem", chem_module
+        )
+
+        rng = np.random.default_rng(6)
+
+        temp_3 = np.sort(rng.uniform(300.0, 1200.0, size=(20, 3)), axis=1)
+        delta = 10.0 ** rng.uniform(-7.0, -3.0, 20)
+        alpha = rng.uniform(0.5, 2.0, 20)
+        tint = rng.uniform(600.0, 2500.0, 20)
+        metallicity = rng.uniform(-0.5, 0.5, 20)
+        c_o_ratio = rng.uniform(0.3, 0.9, 20)
+
+        for temp_item in [temp_3, None]:
+            temp, phot_press, conv_press = retrieval_util.pt_ret_model_batch(
+                temp_item,
+                delta,
+                alpha,
+                tint,
+                self.pressure,
+                metallicity,
+                c_o_ratio,
+            )
+
+            assert temp.shape == (20, 180)
+
+            for i in range(20):
+                temp_sample, phot_sample, conv_sample = retrieval_util.pt_ret_model(
+                    None if temp_item is None else temp_item[i],
+                    delta[i],
+                    alpha[i],
+                    tint[i],
+                    self.pressure,
+                    metallicity[i],
+                    c_o_ratio[i],
+                )
+
+                assert phot_press[i] == pytest.approx(
+                    phot_sample, rel=self.limit, abs=0.0
+                )
+
+                if temp_sample is None:
+                    assert np.all(np.isnan(temp[i]))
+
+                else:
+                    assert np.allclose(
+                        temp[i], temp_sample, rtol=self.limit, atol=0.0
+                    )
+
+                if conv_sample is None:
+                    assert np.isnan(conv_press[i])
+
+                else:
+                    assert conv_press[i] == pytest.approx(
+                        conv_sample, rel=self.limit, abs=0.0
+                    )
@@ -0,0 +1,100 @@
+import pytest
+import numpy as np
+
+from species.core import box, constants
+from species.util import data_util
+
+
+class BlackbodyModel:
+    """
+    Stand-in forward model that returns the blackbody
+    spectrum of the internal temperature.
+    """
+
+    def __init__(self, line_species, cloud_species, wavel_range):
+        self.line_species = line_species
+        self.cloud_species = cloud_species
+        self.wavelength = np.logspace(
+            np.log10(wavel_range[0]), np.log10(wavel_range[1]), 5000
+        )
+
+    def get_model(self, model_param, spec_res=None):
+        wavel_m = self.wavelength * 1e-6
+
+        planck = (
+            2.0
+            * constants.PLANCK
+            * constants.LIGHT ** 2
+            / wavel_m ** 5
+            / np.expm1(
+                constants.PLANCK
+                * constants.LIGHT
+                / (wavel_m * constants.BOLTZMANN * model_param["tint"])
+            )
+        )
+
+        flux_scale = (
+            model_param["radius"]
+            * constants.R_JUP
+            / (model_param["distance"] * constants.PARSEC)
+        ) ** 2
+
+        return box.create_box(
+            boxtype="model",
+            model="petitradtrans",
+            wavelength=self.wavelength,
+            flux=np.pi * planck * 1e-6 * flux_scale,
+            parameters=dict(model_param),
+            quantity="flux",
+        )
+
+
+class TestRetrieval:
+    def setup_class(self):
+        rng = np.random.default_rng(7)
+
+        param = ["logg", "radius", "t1", "t2", "t3", "log_delta", "alpha", "tint"]
+        param += ["c_o_ratio", "metallicity"]
+
+        self.samples = rng.uniform(0.5, 1.5, size=(25, len(param)))
+        self.samples[:, param.index("tint")] = rng.uniform(800.0, 2000.0, 25)
+
+        self.tint = self.samples[:, param.index("tint")]
+
+        self.spec_kwargs = {
+            "indices": {item: np.int64(i) for i, item in enumerate(param)},
+            "chemistry": "equilibrium",
+            "pt_profile": "molliere",
+            "line_species": ["H2O"],
+            "cloud_species": [],
+            "quenching": None,
+            "spec_res": 100.0,
+            "distance": 10.0,
+            "temp_nodes": None,
+        }
+
+        self.model_kwargs = {
+            "line_species": ["H2O"],
+            "cloud_species": [],
+            "wavel_range": (0.5, 50.0),
+        }
+
+    @pytest.mark.parametrize("processes", [1, 2])
+    def test_retrieval_spectra(self, processes):
+        teff_iter = data_util.retrieval_spectra(
+            self.samples,
+            [None] * self.samples.shape[0],
+            self.spec_kwargs,
+            self.model_kwargs,
+            forward_model=BlackbodyModel,
+            post_process=data_util.retrieval_teff,
+            processes=processes,
+            chunk_size=4,
+        )
+
+        teff = np.zeros(self.samples.shape[0])
+
+        for i, teff_chunk in teff_iter:
+            teff[i : i + len(teff_chunk)] = teff_chunk
+
+        assert np.allclose(teff, self.tint, rtol=1e-2, atol=0.0)
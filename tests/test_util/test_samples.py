@@ -0,0 +1,96 @@
+import os
+
+import h5py
+import pytest
+import numpy as np
+
+from species.util import data_util
+
+
+class TestSamples:
+    def setup_class(self):
+        self.test_file = "test_samples.hdf5"
+
+        rng = np.random.default_rng(3)
+
+        self.samples = rng.normal(size=(500, 4))
+
+    def teardown_class(self):
+        os.remove(self.test_file)
+
+    def test_create_samples(self):
+        with h5py.File(self.test_file, "w") as h5_file:
+            dset = data_util.create_samples(
+                h5_file, "samples", self.samples, compression="gzip"
+            )
+
+            dset.attrs["n_param"] = 4
+
+            assert dset.chunks == (500, 1)
+            assert dset.maxshape == (None, None)
+            assert np.array_equal(dset[()], self.samples)
+
+    def test_append_samples(self):
+        with h5py.File(self.test_file, "a") as h5_file:
+            dset = data_util.append_samples(
+                h5_file, "samples", np.arange(500.0), "derived"
+            )
+
+            assert dset.shape == (500, 5)
+            assert dset.attrs["n_param"] == 5
+            assert dset.attrs["parameter4"] == "derived"
+            assert np.array_equal(dset[:, :4], self.samples)
+
+            with pytest.raises(ValueError) as error:
+                data_util.append_samples(h5_file, "samples", np.zeros(10), "wrong")
+
+            assert "is not compatible with the shape of the dataset" in str(
+                error.value
+            )
+
+    def test_read_samples(self):
+        rows = np.array([7, 3, 3, 499])
+
+        with h5py.File(self.test_file, "r") as h5_file:
+            dset = h5_file["samples"]
+
+            samples = data_util.read_samples(dset, rows=rows, columns=[4, 1])
+
+            assert np.array_equal(samples[:, 0], rows.astype(float))
+            assert np.array_equal(samples[:, 1], self.samples[rows, 1])
+
+            samples = data_util.read_samples(dset, columns=[2], start=100)
+
+            assert np.array_equal(samples, self.samples[100:, [2]])
+
+    def test_read_full_dataset(self):
+        rng = np.random.default_rng(4)
+
+        rows = rng.integers(500, size=200)
+
+        with h5py.File(self.test_file, "r") as h5_file:
+            dset = h5_file["samples"]
+            samples = np.asarray(dset)
+
+            assert np.array_equal(data_util.read_samples(dset), samples)
+
+            assert np.array_equal(
+                data_util.read_samples(dset, rows=rows), samples[rows, :]
+            )
+
+            assert np.array_equal(
+                data_util.read_samples(dset, rows=rows, columns=[3, 0, 3]),
+                samples[rows][:, [3, 0, 3]],
+            )
+
+    def test_convert_compression(self):
+        with h5py.File(self.test_file, "a") as h5_file:
+            h5_file.create_dataset("legacy", data=self.samples)
+
+            dset = data_util.append_samples(
+                h5_file, "legacy", np.zeros(500), "derived", compression="gzip"
+            )
+
+            assert dset.compression == "gzip"
+            assert dset.maxshape == (None, None)
+            assert np.array_equal(dset[:, :4], self.samples)
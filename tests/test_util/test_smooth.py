@@ -0,0 +1,56 @@
+import pytest
+import numpy as np
+
+from species.util import read_util
+
+
+class TestSmooth:
+    def setup_class(self):
+        self.limit = 1e-10
+
+        rng = np.random.default_rng(2)
+
+        self.wavelength = np.linspace(1.0, 2.5, 2000)
+        self.flux = rng.normal(size=(3, 2000)) + 5.0
+
+    def test_constant_flux(self):
+        flux = np.full(self.wavelength.size, 2.0)
+
+        flux_smooth = read_util.smooth_spectrum(self.wavelength, flux, 200.0)
+
+        assert np.allclose(flux_smooth, 2.0, rtol=self.limit, atol=0.0)
+
+    def test_multiple_spectra(self):
+        flux_smooth = read_util.smooth_spectrum(self.wavelength, self.flux, 200.0)
+
+        assert flux_smooth.shape == (3, 2000)
+
+        for i in range(3):
+            assert np.allclose(
+                flux_smooth[i],
+                read_util.smooth_spectrum(self.wavelength, self.flux[i], 200.0),
+                rtol=self.limit,
+                atol=0.0,
+            )
+
+    def test_variable_resolution(self):
+        spec_res = np.full(self.wavelength.size, 200.0)
+
+        flux_smooth = read_util.smooth_spectrum(self.wavelength, self.flux, spec_res)
+
+        assert np.allclose(
+            flux_smooth,
+            read_util.smooth_spectrum(self.wavelength, self.flux, 200.0),
+            rtol=self.limit,
+            atol=0.0,
+        )
+
+        spec_res = np.linspace(100.0, 1000.0, self.wavelength.size)
+
+        flux_smooth = read_util.smooth_spectrum(self.wavelength, self.flux, spec_res)
+
+        assert np.all(np.isfinite(flux_smooth))
+        assert np.std(flux_smooth[:, :500]) < np.std(flux_smooth[:, -500:])
+
+        with pytest.raises(ValueError):
+            read_util.smooth_spectrum(self.wavelength, self.flux, spec_res[:-1])